@@ -0,0 +1,117 @@
+# benchmarks/bench_event_bus.py
+"""
+EventBus.publish throughput with 1, 10 and 100 no-op subscribers.
+
+  legacy   the previous publish: lock + list copy per call, handler names
+           looked up and debug f-strings formatted per handler per call
+  publish  copy-on-write handler tuples read without a lock, names
+           precomputed at subscribe time, debug logging only when enabled
+
+Then hierarchical topics: telemetry.<sysid>.<TYPE> published round-robin
+for 50 vehicles and 6 message types, to the same handlers subscribed
+either with 500 exact topics or with 152 '*'/'#' patterns. Wildcards are
+resolved once per topic, so the two should be close.
+
+    python -m benchmarks.bench_event_bus [--seconds 1.0]
+"""
+
+import argparse
+import logging
+import threading
+import time
+
+from utils.event_bus import EventBus, Events
+
+
+class LegacyEventBus:
+    """The publish path as it was, for comparison."""
+
+    def __init__(self):
+        self._subscribers = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, event_type, handler):
+        self._subscribers.setdefault(event_type, []).append(handler)
+
+    def publish(self, event_type, *args, **kwargs):
+        logging.debug(f"Publishing event '{event_type}' with args={args}, kwargs={kwargs}")
+        with self._lock:
+            handlers = list(self._subscribers.get(event_type, []))
+        if not handlers:
+            logging.debug(f"No subscribers for event '{event_type}'")
+            return
+        for handler in handlers:
+            handler_name = getattr(handler, "__name__", getattr(handler, "name", repr(handler)))
+            try:
+                handler(*args, **kwargs)
+                logging.debug(f"Called handler {handler_name} for '{event_type}'")
+            except Exception as e:
+                logging.error(f"Error executing handler {handler_name} for event '{event_type}': {e}", exc_info=True)
+
+
+def make_handler():
+    def on_telemetry(data):
+        pass
+    return on_telemetry
+
+
+VEHICLES = range(1, 51)
+TYPES = ("ATTITUDE", "GLOBAL_POSITION_INT", "VFR_HUD", "SYS_STATUS", "GPS_RAW_INT", "HEARTBEAT")
+
+
+def rate(bus, seconds, topics=(Events.TELEMETRY_UPDATE,)):
+    """Publishes per second, measured in batches of 1000."""
+    data = {"type": "ATTITUDE", "roll": 1.0, "pitch": 2.0, "yaw": 3.0, "timestamp": 0.0}
+    publish = bus.publish
+    batch = [topics[i % len(topics)] for i in range(1000)]
+    count = 0
+    start = time.perf_counter()
+    while True:
+        for topic in batch:
+            publish(topic, data)
+        count += 1000
+        elapsed = time.perf_counter() - start
+        if elapsed >= seconds:
+            return count / elapsed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--seconds', type=float, default=1.0, help="Time per measurement")
+    args = parser.parse_args(argv)
+    logging.getLogger().setLevel(logging.INFO)  # Debug off, as in the app
+
+    print(f"{'subscribers':>11} {'legacy':>14} {'publish':>14} {'speedup':>8}")
+    for subscribers in (1, 10, 100):
+        legacy, bus = LegacyEventBus(), EventBus()
+        for _ in range(subscribers):
+            handler = make_handler()
+            legacy.subscribe(Events.TELEMETRY_UPDATE, handler)
+            bus.subscribe(Events.TELEMETRY_UPDATE, handler)
+        old, new = rate(legacy, args.seconds), rate(bus, args.seconds)
+        print(f"{subscribers:>11} {old:>10,.0f}/s {new:>12,.0f}/s {new / old:>7.1f}x")
+
+    topics = [f"{Events.TELEMETRY}.{sysid}.{msg_type}" for sysid in VEHICLES for msg_type in TYPES]
+    exact, wildcard = EventBus(), EventBus()
+    for sysid in VEHICLES:
+        # Per vehicle: one handler for all of its telemetry, one for its attitude, one for its position
+        for pattern, matched in ((f"telemetry.{sysid}.#", TYPES), (f"telemetry.{sysid}.ATTITUDE", ("ATTITUDE",)),
+                                 (f"telemetry.{sysid}.GLOBAL_POSITION_INT", ("GLOBAL_POSITION_INT",))):
+            handler = make_handler()
+            wildcard.subscribe(pattern, handler)
+            for msg_type in matched:
+                exact.subscribe(f"telemetry.{sysid}.{msg_type}", handler)
+    for pattern in ("telemetry.*.HEARTBEAT", "telemetry.*.SYS_STATUS"):  # Fleet-wide views
+        handler = make_handler()
+        wildcard.subscribe(pattern, handler)
+        for sysid in VEHICLES:
+            exact.subscribe(f"telemetry.{sysid}.{pattern.rsplit('.', 1)[1]}", handler)
+    subscriptions = "/".join(str(sum(map(len, bus._subscribers.values()))) for bus in (exact, wildcard))
+    exact_rate, wildcard_rate = rate(exact, args.seconds, topics), rate(wildcard, args.seconds, topics)
+    print(f"\n{'topics':>6} {'subscriptions':>13} {'exact':>14} {'wildcard':>14} {'ratio':>6}")
+    print(f"{len(topics):>6} {subscriptions:>13} {exact_rate:>12,.0f}/s {wildcard_rate:>12,.0f}/s "
+          f"{wildcard_rate / exact_rate:>6.2f}")
+
+
+if __name__ == "__main__":
+    main()
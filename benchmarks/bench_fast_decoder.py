@@ -0,0 +1,140 @@
+# benchmarks/bench_fast_decoder.py
+"""
+Decode throughput of the struct fast path against stock pymavlink.
+
+Replays a recorded-style byte stream from the simulated vehicle (streaming
+at the GCS's requested rates) through:
+
+  recv_match    mavutil connection on the raw stream, as TelemetryThread does
+  parse_buffer  pymavlink parser alone, without mavutil's bookkeeping
+  fast_decoder  core.fast_decoder.FastDecoder with pymavlink for the rest
+
+Each path ends with the same published telemetry dicts.
+
+    python -m benchmarks.bench_fast_decoder [--seconds 600] [--chunk 4096]
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+from pymavlink import mavutil
+
+from core.fast_decoder import FastDecoder
+from core.telemetry_manager import TELEMETRY_FIELDS
+from sim.vehicle import SimVehicle
+
+mavlink = mavutil.mavlink
+
+# Same rates TelemetryManager requests (interval in us)
+REQUESTED_INTERVALS = {
+    mavlink.MAVLINK_MSG_ID_ATTITUDE: 100000,
+    mavlink.MAVLINK_MSG_ID_GPS_RAW_INT: 200000,
+    mavlink.MAVLINK_MSG_ID_GLOBAL_POSITION_INT: 200000,
+    mavlink.MAVLINK_MSG_ID_SYS_STATUS: 1000000,
+    mavlink.MAVLINK_MSG_ID_RC_CHANNELS: 500000,
+    mavlink.MAVLINK_MSG_ID_VFR_HUD: 200000,
+    mavlink.MAVLINK_MSG_ID_HEARTBEAT: 1000000,
+    mavlink.MAVLINK_MSG_ID_SYSTEM_TIME: 1000000,  # Not on the fast path
+}
+
+
+def make_stream(seconds, step=0.01):
+    clock = [0.0]
+    vehicle = SimVehicle(clock=lambda: clock[0])
+    for msg_id, interval in REQUESTED_INTERVALS.items():
+        vehicle.set_interval(msg_id, interval)
+    frames = []
+    t = 0.0
+    while t < seconds:
+        clock[0] = t
+        frames.extend(vehicle.due(t))
+        t += step
+    return b"".join(bytes(f) for f in frames), len(frames)
+
+
+def publish(msg_type, values):
+    return TELEMETRY_FIELDS[msg_type][1](*values)
+
+
+def bench_recv_match(path):
+    master = mavutil.mavlink_connection(path, notimestamps=True)
+    count = 0
+    while True:
+        msg = master.recv_match()
+        if msg is None:
+            break
+        fields = TELEMETRY_FIELDS.get(msg.get_type())
+        if fields:
+            publish(msg.get_type(), [getattr(msg, name) for name in fields[0]])
+        count += 1
+    master.close()
+    return count
+
+
+def bench_parse_buffer(stream, chunk):
+    mav = mavlink.MAVLink(None)
+    count = 0
+    for pos in range(0, len(stream), chunk):
+        for msg in mav.parse_buffer(stream[pos:pos + chunk]) or []:
+            fields = TELEMETRY_FIELDS.get(msg.get_type())
+            if fields:
+                publish(msg.get_type(), [getattr(msg, name) for name in fields[0]])
+            count += 1
+    return count
+
+
+def bench_fast_decoder(stream, chunk):
+    decoder = FastDecoder({t: f for t, (f, _) in TELEMETRY_FIELDS.items() if t != 'HEARTBEAT'})
+    mav = mavlink.MAVLink(None)
+    count = 0
+    for pos in range(0, len(stream), chunk):
+        for item in decoder.feed(stream[pos:pos + chunk]):
+            if item.__class__ is bytes:
+                for msg in mav.parse_buffer(item) or []:
+                    fields = TELEMETRY_FIELDS.get(msg.get_type())
+                    if fields:
+                        publish(msg.get_type(), [getattr(msg, name) for name in fields[0]])
+                    count += 1
+            else:
+                publish(item[0], item[3])
+                count += 1
+    return count
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    count = fn(*args)
+    return count, time.perf_counter() - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--seconds', type=float, default=600.0, help="Simulated flight time to replay")
+    parser.add_argument('--chunk', type=int, default=4096, help="Bytes per read")
+    args = parser.parse_args(argv)
+
+    stream, frames = make_stream(args.seconds)
+    print(f"{frames} frames, {len(stream) / 1024:.0f} KiB ({args.seconds:.0f} s of telemetry)")
+
+    with tempfile.NamedTemporaryFile(suffix=".raw", delete=False) as f:
+        f.write(stream)
+    try:
+        results = [
+            ("recv_match", timed(bench_recv_match, f.name)),
+            ("parse_buffer", timed(bench_parse_buffer, stream, args.chunk)),
+            ("fast_decoder", timed(bench_fast_decoder, stream, args.chunk)),
+        ]
+    finally:
+        os.unlink(f.name)
+
+    baseline = results[0][1][1]
+    for name, (count, elapsed) in results:
+        assert count == frames, f"{name} decoded {count}/{frames} frames"
+        print(f"{name:>13}: {count / elapsed:>10,.0f} msg/s  {elapsed * 1000:8.1f} ms  "
+              f"x{baseline / elapsed:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+# benchmarks/bench_headless.py
+"""
+Memory and CPU footprint of `main.py --headless` instances.
+
+Each instance is a separate process connected over UDP loopback to its
+own simulated vehicle (run in this process). After a warm-up the
+instances' CPU time is measured over a window and their resident memory
+read at the end, from /proc (Linux only):
+
+  headless           --headless
+  fast-decode        --headless --fast-decode
+  services           --headless --fast-decode --record DIR --out udpout:... --serve 127.0.0.1:0
+  gui                the window with --map native, offscreen and not connected, for comparison
+
+    python -m benchmarks.bench_headless [--instances 4] [--seconds 10] [--warmup 3]
+"""
+
+import argparse
+import os
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+from sim.autopilot import SimulatedAutopilot
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CLOCK_TICKS = os.sysconf('SC_CLK_TCK')
+
+
+def free_udp_port():
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def cpu_seconds(pid):
+    with open(f'/proc/{pid}/stat') as f:
+        fields = f.read().rpartition(')')[2].split()
+    return (int(fields[11]) + int(fields[12])) / CLOCK_TICKS  # utime + stime
+
+
+def memory_mb(pid):
+    values = {}
+    with open(f'/proc/{pid}/status') as f:
+        for line in f:
+            name, _, value = line.partition(':')
+            if name in ('VmRSS', 'VmHWM'):
+                values[name] = int(value.split()[0]) / 1024
+    return values['VmRSS'], values['VmHWM']
+
+
+def scenario_args(name, workdir, index):
+    if name == 'headless':
+        return ['--headless']
+    if name == 'fast-decode':
+        return ['--headless', '--fast-decode']
+    if name == 'services':
+        return ['--headless', '--fast-decode', '--record', os.path.join(workdir, f'store{index}'),
+                '--out', f'udpout:127.0.0.1:{free_udp_port()}', '--serve', '127.0.0.1:0']
+    if name == 'gui':
+        return ['--map', 'native']
+    raise ValueError(name)
+
+
+def run(name, instances, warmup, seconds):
+    env = dict(os.environ, QT_QPA_PLATFORM='offscreen')
+    with tempfile.TemporaryDirectory() as workdir:
+        sims, procs = [], []
+        try:
+            for i in range(instances):
+                port = free_udp_port()
+                sim = SimulatedAutopilot('udp', f'127.0.0.1:{port}')
+                sim.start()
+                sims.append(sim)
+                procs.append(subprocess.Popen(
+                    [sys.executable, 'main.py', '--connect', f'udpin:127.0.0.1:{port}', '--stats-interval', '0',
+                     *scenario_args(name, workdir, i)],
+                    cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL))
+            time.sleep(warmup)
+            start = [cpu_seconds(p.pid) for p in procs]
+            time.sleep(seconds)
+            cpu = [(cpu_seconds(p.pid) - s) / seconds * 100 for p, s in zip(procs, start)]
+            memory = [memory_mb(p.pid) for p in procs]
+        finally:
+            for proc in procs:
+                proc.send_signal(signal.SIGINT if '--headless' in proc.args else signal.SIGTERM)
+            for proc in procs:
+                try:
+                    proc.wait(timeout=10)
+                except subprocess.TimeoutExpired:
+                    proc.kill()
+            for sim in sims:
+                sim.stop()
+    return cpu, memory
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--instances', type=int, default=4, help="Concurrent instances per scenario")
+    parser.add_argument('--seconds', type=float, default=10.0, help="CPU measurement window")
+    parser.add_argument('--warmup', type=float, default=3.0, help="Seconds before measuring")
+    parser.add_argument('--scenarios', default='headless,fast-decode,services,gui',
+                        help="Comma-separated scenarios")
+    args = parser.parse_args(argv)
+
+    print(f"{'scenario':<18} {'RSS MB':>8} {'peak MB':>8} {'CPU %':>7}   ({args.instances} instances, "
+          f"mean per instance)")
+    for name in args.scenarios.split(','):
+        cpu, memory = run(name, args.instances, args.warmup, args.seconds)
+        rss = sum(m[0] for m in memory) / len(memory)
+        peak = sum(m[1] for m in memory) / len(memory)
+        print(f"{name:<18} {rss:>8.1f} {peak:>8.1f} {sum(cpu) / len(cpu):>7.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+# benchmarks/bench_instruments.py
+"""
+Attitude indicator and compass cost per frame.
+
+paint: times repaints of each instrument face rendered offscreen, with the
+static layers (bezel, scales, tick marks, compass card, horizon card)
+cached in pixmaps and, for comparison, with every layer painted every
+frame.
+
+live: shows the instrument panel with the frame clock at 60 fps, feeds it
+ATTITUDE updates at --rate Hz for --seconds and reports the paints per
+second and the process CPU time per frame (--redraw turns the layer
+caches off). Faster streams than the frame rate still cost one paint per
+tick.
+
+    python -m benchmarks.bench_instruments [--instruments attitude,compass] [--size 200]
+        [--frames 200] [--rate 50] [--seconds 3] [--redraw]
+"""
+
+import argparse
+import os
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PySide6.QtCore import QTimer
+from PySide6.QtGui import QImage
+from PySide6.QtWidgets import QApplication
+
+from ui.frame_clock import FrameClock
+from ui.layouts.instruments_layout import AttitudeCanvas, CompassCanvas, InstrumentsLayout
+
+
+def bench_paint(canvas_class, cache_layers, size, frames):
+    clock = FrameClock()
+    clock.stop()
+    canvas = canvas_class(clock, cache_layers=cache_layers)
+    canvas.resize(size, size)
+    image = QImage(size, size, QImage.Format_ARGB32_Premultiplied)
+    canvas.render(image)  # Warm-up (renders the cached layers)
+    wall, cpu = time.perf_counter(), time.process_time()
+    for i in range(frames):
+        if canvas_class is AttitudeCanvas:
+            canvas.set_attitude(30 * ((i % 60) / 30 - 1), 10 * ((i % 40) / 20 - 1))
+        else:
+            canvas.set_heading(i * 3.7)
+        canvas.render(image)
+    return (time.perf_counter() - wall) / frames, (time.process_time() - cpu) / frames
+
+
+def bench_live(app, rate, seconds, cache_layers=True, fps=FrameClock.DEFAULT_FPS):
+    clock = FrameClock(fps)
+    panel = InstrumentsLayout(frame_clock=clock)
+    panel.resize(460, 250)
+    panel.show()
+    app.processEvents()
+    canvases = (panel.attitude_indicator.get_ui_element(), panel.compass.get_ui_element())
+    for canvas in canvases:
+        canvas.cache_layers = cache_layers
+    start_frames = [c.frames for c in canvases]
+    updates = 0
+
+    def feed():
+        nonlocal updates
+        updates += 1
+        t = updates / rate
+        panel.update_telemetry({"type": "ATTITUDE", "timestamp": t, "roll": 20 * (t % 3 - 1.5),
+                                "pitch": 5 * (t % 2 - 1), "yaw": 36.0 * t})
+
+    feeder = QTimer()
+    feeder.setInterval(max(1, round(1000 / rate)))
+    feeder.timeout.connect(feed)
+    feeder.start()
+    QTimer.singleShot(round(seconds * 1000), app.quit)
+    wall, cpu = time.perf_counter(), time.process_time()
+    app.exec()
+    wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+    feeder.stop()
+    clock.stop()
+    paints = [c.frames - s for c, s in zip(canvases, start_frames)]
+    panel.close()
+    return updates / wall, [p / wall for p in paints], cpu / wall, cpu / max(paints)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--instruments', default="attitude,compass", help="Instruments to paint (empty: none)")
+    parser.add_argument('--size', type=int, default=200, help="Instrument face size in pixels")
+    parser.add_argument('--frames', type=int, default=200, help="Repaints to time per instrument")
+    parser.add_argument('--rate', type=float, default=50, help="ATTITUDE updates per second in the live run")
+    parser.add_argument('--seconds', type=float, default=3, help="Length of the live run (0 skips it)")
+    parser.add_argument('--redraw', action='store_true', help="Paint every layer every frame in the live run")
+    args = parser.parse_args(argv)
+    app = QApplication.instance() or QApplication([])
+
+    canvases = {"attitude": AttitudeCanvas, "compass": CompassCanvas}
+    names = [name for name in args.instruments.split(',') if name]
+    if names:
+        print(f"{'instrument':>10} {'layers':>8} {'frame ms':>9} {'cpu ms':>7}")
+    for name in names:
+        for cache_layers in (True, False):
+            wall, cpu = bench_paint(canvases[name], cache_layers, args.size, args.frames)
+            print(f"{name:>10} {'cached' if cache_layers else 'redrawn':>8} {wall * 1000:>9.3f} {cpu * 1000:>7.3f}")
+
+    if args.seconds > 0:
+        updates, paints, cpu_share, cpu_per_frame = bench_live(app, args.rate, args.seconds, not args.redraw)
+        print(f"live ({'redrawn' if args.redraw else 'cached'} layers): {updates:.0f} updates/s, "
+              f"{paints[0]:.0f} + {paints[1]:.0f} paints/s, {cpu_share * 100:.1f}% CPU, {cpu_per_frame * 1000:.2f} ms CPU per frame")
+
+
+if __name__ == "__main__":
+    main()
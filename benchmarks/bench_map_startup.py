@@ -0,0 +1,125 @@
+# benchmarks/bench_map_startup.py
+"""
+Time from startup to the first map frame with the web map.
+
+Each run is a fresh process that runs main.main() with the web map and
+stops when the page logs Leaflet's 'Map is ready and initialized':
+
+  file     no gcs:// scheme and no preload: the map page is written to a
+           temporary file next to the Leaflet assets and loaded from a
+           file:// URL when the map is built, as before the gcs:// scheme
+  scheme   main.py as shipped: the scheme is registered before the
+           QApplication and the page is preloaded from memory while the
+           window shell and the telemetry backend are built
+
+Tiles need the network; the ready message comes from Leaflet once the map
+is set up, not once the tiles have arrived, so the numbers do not depend
+on the tile servers.
+
+    python -m benchmarks.bench_map_startup [--runs 5] [--timeout 60]
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODES = ("file", "scheme")
+READY_MESSAGE = "Map is ready and initialized"
+_temp_files = []
+
+
+def file_map_page(parent=None):
+    """The map page as loaded before the gcs:// scheme: from a temporary file via file://."""
+    from PySide6.QtCore import QUrl
+    from PySide6.QtWebEngineCore import QWebEngineProfile, QWebEngineSettings
+    from ui.layouts import map_resources
+
+    page = map_resources.MapWebPage(QWebEngineProfile.defaultProfile(), parent)
+    settings = page.settings()
+    settings.setAttribute(QWebEngineSettings.LocalContentCanAccessRemoteUrls, True)
+    settings.setAttribute(QWebEngineSettings.LocalContentCanAccessFileUrls, True)
+    settings.setAttribute(QWebEngineSettings.JavascriptEnabled, True)
+    with tempfile.NamedTemporaryFile("w", suffix=".html", dir=map_resources._RESOURCE_DIR, delete=False) as f:
+        f.write(map_resources.MAP_HTML)
+    _temp_files.append(f.name)
+    page.load(QUrl.fromLocalFile(f.name))
+    return page
+
+
+def run_once(mode):
+    """Runs main.main() with the web map in `mode`; returns seconds from start to the ready map."""
+    start = time.perf_counter()
+    import main as gcs_main
+    from PySide6.QtWidgets import QApplication
+    from ui.layouts import map_resources
+
+    if mode == "file":
+        # No scheme and no preload; MapLayout builds the file:// page when the map is built
+        map_resources.register_map_scheme = lambda: None
+        map_resources.preload_map_page = lambda: None
+        map_resources.take_map_page = file_map_page
+    ready = []
+
+    def console_message(page, level, message, line, source):
+        if message == READY_MESSAGE and not ready:
+            ready.append(time.perf_counter() - start)
+            QApplication.instance().quit()
+    map_resources.MapWebPage.javaScriptConsoleMessage = console_message
+
+    try:
+        gcs_main.main([sys.argv[0], "--map", "web"])
+    finally:
+        for path in _temp_files:
+            os.unlink(path)
+    return ready[0] if ready else None
+
+
+def measure(mode, timeout):
+    """Runs one startup in a fresh process; returns seconds to the ready map or None."""
+    try:
+        result = subprocess.run([sys.executable, "-m", "benchmarks.bench_map_startup", "--child", mode],
+                                cwd=ROOT, capture_output=True, text=True, timeout=timeout)
+    except subprocess.TimeoutExpired:
+        return None
+    for line in result.stdout.splitlines():
+        if line.startswith("READY "):
+            return float(line.split()[1])
+    sys.stderr.write(result.stderr[-2000:])
+    return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=5, help="Startups per mode (alternating)")
+    parser.add_argument('--timeout', type=float, default=60, help="Seconds to wait for the map")
+    parser.add_argument('--child', choices=MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        ready = run_once(args.child)
+        print(f"READY {ready:.4f}" if ready is not None else "NOT READY", flush=True)
+        os._exit(0)  # Skip QtWebEngine teardown, it does not affect the measurement
+
+    results = {mode: [] for mode in MODES}
+    for _ in range(args.runs):
+        for mode in MODES:
+            ready = measure(mode, args.timeout)
+            if ready is None:
+                print(f"{mode}: map did not get ready", file=sys.stderr)
+                continue
+            results[mode].append(ready)
+
+    print(f"{'mode':>7} {'runs':>5} {'map ready ms':>13} {'min ms':>7}")
+    for mode in MODES:
+        ready = results[mode]
+        if ready:
+            print(f"{mode:>7} {len(ready):>5} {statistics.median(ready) * 1000:>13.0f} {min(ready) * 1000:>7.0f}")
+
+
+if __name__ == "__main__":
+    main()
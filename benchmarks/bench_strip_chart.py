@@ -0,0 +1,74 @@
+# benchmarks/bench_strip_chart.py
+"""
+Strip chart frame time against the amount of history shown.
+
+Fills roll, pitch and yaw with 50 Hz data, zooms the view out to cover
+all of it and times full repaints of a 1200 x 300 chart rendered
+offscreen. With per-column min/max decimation from block summaries the
+frame time should stay flat from minutes to hours. Also times append()
+per telemetry update, the cost paid on the GUI thread per message.
+
+    python -m benchmarks.bench_strip_chart [--hours 1,3,6] [--frames 50]
+"""
+
+import argparse
+import os
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import numpy as np
+from PySide6.QtGui import QImage
+from PySide6.QtWidgets import QApplication
+
+from ui.layouts.plot_layout import StripChart
+
+RATE_HZ = 50
+FIELDS = ("roll", "pitch", "yaw")
+
+
+def bench_paint(hours, frames, width=1200, height=300):
+    samples = int(hours * 3600 * RATE_HZ)
+    chart = StripChart(capacity=samples)
+    chart.resize(width, height)
+    times = 1_700_000_000.0 + np.arange(samples) / RATE_HZ
+    for i, field in enumerate(FIELDS):
+        chart.add_series(field).buffer.extend(times, np.sin(times / (30 + i)) * 30 + np.random.normal(size=samples))
+    chart.set_span(max(60.0, hours * 3600))
+    image = QImage(width, height, QImage.Format_ARGB32_Premultiplied)
+    chart.render(image)  # Warm-up
+    start = time.perf_counter()
+    for _ in range(frames):
+        chart.render(image)
+    return samples, (time.perf_counter() - start) / frames
+
+
+def bench_append(count=100_000):
+    chart = StripChart()
+    for field in FIELDS:
+        chart.add_series(field)
+    updates = [{"type": "ATTITUDE", "timestamp": i * 0.02, "roll": 1.0, "pitch": 2.0, "yaw": 3.0}
+               for i in range(count)]
+    start = time.perf_counter()
+    for data in updates:
+        chart.append(data)
+    return (time.perf_counter() - start) / count
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--hours', default="0.0167,1,3,6", help="Comma-separated history lengths")
+    parser.add_argument('--frames', type=int, default=50, help="Repaints to time per length")
+    args = parser.parse_args(argv)
+    app = QApplication.instance() or QApplication([])  # noqa: F841 (widgets need an application)
+
+    print(f"{'history':>9} {'samples/series':>15} {'frame ms':>9}")
+    for hours in (float(h) for h in args.hours.split(',')):
+        samples, seconds = bench_paint(hours, args.frames)
+        label = f"{hours * 60:.0f} min" if hours < 1 else f"{hours:g} h"
+        print(f"{label:>9} {samples:>15,} {seconds * 1000:>9.2f}")
+    print(f"append: {bench_append() * 1e6:.2f} us per update ({len(FIELDS)} series)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,373 @@
+# core/command_scheduler.py
+
+import heapq
+import itertools
+import threading
+import time
+import logging
+from collections import deque
+from pymavlink import mavutil
+
+from utils.event_bus import event_bus, Events
+
+
+class Priority:
+    """Outbound priorities; lower values are sent first."""
+    CRITICAL = 0  # Arm/disarm, mode changes, flight termination
+    COMMAND = 1   # Other vehicle commands
+    STREAM = 2    # Stream rate requests
+    BULK = 3      # Parameter, mission and file transfer traffic
+
+
+# Result reported when a command was never acknowledged
+RESULT_TIMEOUT = -1
+
+
+class PendingCommand:
+    """A COMMAND_LONG waiting to be sent or acknowledged."""
+    __slots__ = ("command", "params", "priority", "callback", "attempts",
+                 "created_at", "sent_at", "deadline", "target_system")
+
+    def __init__(self, command, params, priority, callback):
+        self.command = command
+        self.params = params
+        self.priority = priority
+        self.callback = callback
+        self.attempts = 0
+        self.created_at = time.monotonic()
+        self.sent_at = None
+        self.deadline = None
+        self.target_system = 0  # Set when first sent
+
+
+class CommandScheduler(threading.Thread):
+    """
+    Single owner of all outbound MAVLink traffic.
+
+    Messages are queued by priority and written by this thread, so a
+    flight-critical command always goes out ahead of queued stream requests
+    or bulk transfers. COMMAND_LONGs are tracked until their COMMAND_ACK
+    (matched by command ID) arrives and are resent with an incremented
+    confirmation field on timeout. Because an ACK only names the command ID,
+    commands with the same ID are kept in flight one at a time.
+
+    An optional bandwidth budget (bytes/s, token bucket) throttles everything
+    except CRITICAL traffic, which is sent immediately and only charged.
+    """
+    ACK_TIMEOUT = 1.0  # seconds per attempt
+    IN_PROGRESS_TIMEOUT = 5.0  # seconds granted after MAV_RESULT_IN_PROGRESS
+    MAX_ATTEMPTS = 4  # first send + 3 retries
+    BUCKET_SECONDS = 0.5  # burst allowance as a fraction of one second's budget
+
+    def __init__(self, signal_manager=None, bandwidth_limit=None):
+        super().__init__(name="CommandScheduler", daemon=True)
+        self.signal_manager = signal_manager
+        self.master = None
+        self._send_lock = threading.Lock()  # Serializes writes to the transport
+        self._cond = threading.Condition()
+        self._queue = []  # Heap of (priority, seq, kind, item)
+        self._seq = itertools.count()
+        self._in_flight = {}  # Key: command ID, Value: PendingCommand
+        self._held = {}  # Key: command ID, Value: deque of PendingCommand
+        self._running = True
+
+        self.bandwidth_limit = bandwidth_limit
+        self._tokens = 0.0
+        self._tokens_updated = time.monotonic()
+
+        # Statistics
+        self.bytes_sent = 0
+        self.messages_sent = 0
+        self.retries = 0
+        self.timeouts = 0
+        self._rtts = deque(maxlen=100)  # Recent command round-trip times (s)
+
+    # --- Transport ---
+
+    def attach(self, master):
+        """Sets the connection used for sending (called when a transport opens)."""
+        with self._send_lock:
+            self.master = master
+
+    def detach(self):
+        """Forgets the connection; queued traffic waits for the next attach()."""
+        with self._send_lock:
+            self.master = None
+
+    def set_bandwidth_limit(self, bytes_per_second):
+        """Caps non-critical outbound traffic; None disables the cap."""
+        with self._cond:
+            self.bandwidth_limit = bytes_per_second
+            self._cond.notify()
+
+    def _write(self, msg):
+        """Packs and writes one message. Returns its size in bytes, or None if not connected."""
+        with self._send_lock:
+            if self.master is None:
+                return None
+            self.master.mav.send(msg)
+            size = len(msg.get_msgbuf())
+        self.bytes_sent += size
+        self.messages_sent += 1
+        return size
+
+    def send_immediate(self, msg):
+        """
+        Writes a message right away from the calling thread, bypassing the
+        queue (used by the periodic sender for low-jitter keep-alives).
+        The message is still charged against the bandwidth budget.
+        """
+        size = self._write(msg)
+        if size:
+            with self._cond:
+                self._charge(size)
+        return size is not None
+
+    def send_raw(self, data):
+        """
+        Writes already-encoded frame bytes (e.g. routed uplink traffic).
+        Like send_immediate(), they are charged against the bandwidth budget.
+        """
+        with self._send_lock:
+            if self.master is None:
+                return False
+            self.master.write(data)
+        self.bytes_sent += len(data)
+        with self._cond:
+            self._charge(len(data))
+        return True
+
+    # --- Queueing ---
+
+    def _push(self, priority, kind, item):
+        with self._cond:
+            heapq.heappush(self._queue, (priority, next(self._seq), kind, item))
+            self._cond.notify()
+
+    def send_message(self, msg, priority=Priority.BULK):
+        """
+        Queues a fire-and-forget message.
+
+        Args:
+            msg: A MAVLink message object, or a callable taking the link's
+                 `mav` object and returning one (so it can be encoded with the
+                 target ids current at send time).
+            priority: One of the Priority constants.
+        """
+        self._push(priority, "message", msg)
+
+    def send_command(self, command, params=(), priority=Priority.COMMAND, callback=None):
+        """
+        Queues a COMMAND_LONG that is retried until acknowledged.
+
+        Args:
+            command: MAV_CMD_* id.
+            params: Up to seven float parameters.
+            priority: One of the Priority constants.
+            callback: Optional callable(result, rtt_seconds) run on the
+                      scheduler thread when the ACK arrives or retries run out;
+                      result is a MAV_RESULT_* value or RESULT_TIMEOUT.
+        """
+        params = tuple(params) + (0,) * (7 - len(params))
+        self._push(priority, "command", PendingCommand(command, params, priority, callback))
+
+    # --- ACK matching (called from the receive thread) ---
+
+    def handle_message(self, msg):
+        """Receive-thread hook: matches COMMAND_ACKs to in-flight commands."""
+        if msg.get_type() != 'COMMAND_ACK':
+            return
+        with self._cond:
+            pending = self._in_flight.get(msg.command)
+            if pending is None:
+                return
+            now = time.monotonic()
+            if msg.result == mavutil.mavlink.MAV_RESULT_IN_PROGRESS:
+                pending.deadline = now + self.IN_PROGRESS_TIMEOUT
+                return
+            del self._in_flight[msg.command]
+            self._release_held(msg.command)
+            self._cond.notify()
+        rtt = now - pending.sent_at
+        self._rtts.append(rtt)
+        self._complete(pending, msg.result, rtt)
+
+    def _release_held(self, command):
+        """Queues the next command with the same ID once the previous one finished."""
+        held = self._held.get(command)
+        if held:
+            nxt = held.popleft()
+            heapq.heappush(self._queue, (nxt.priority, next(self._seq), "command", nxt))
+            if not held:
+                del self._held[command]
+
+    def _complete(self, pending, result, rtt):
+        logging.debug(f"Command {pending.command} result {result} after {pending.attempts} attempt(s), RTT {rtt * 1000:.0f} ms")
+        if pending.callback:
+            try:
+                pending.callback(result, rtt)
+            except Exception as e:
+                logging.error(f"Error in command callback for {pending.command}: {e}", exc_info=True)
+        if self.signal_manager:
+            self.signal_manager.command_result.emit(pending.command, result, rtt * 1000.0)
+        event_bus.publish(f"{Events.COMMAND_ACK}.{pending.target_system}.{pending.command}",
+                          {"sysid": pending.target_system, "command": pending.command,
+                           "result": result, "rtt_ms": rtt * 1000.0})
+
+    # --- Bandwidth budget ---
+
+    def _refill(self):
+        now = time.monotonic()
+        if self.bandwidth_limit:
+            capacity = self.bandwidth_limit * self.BUCKET_SECONDS
+            self._tokens = min(capacity, self._tokens + (now - self._tokens_updated) * self.bandwidth_limit)
+        self._tokens_updated = now
+
+    def _charge(self, size):
+        if self.bandwidth_limit:
+            self._refill()
+            self._tokens -= size
+
+    def _budget_wait(self, priority):
+        """Seconds to wait before a message of this priority may be sent."""
+        if not self.bandwidth_limit or priority == Priority.CRITICAL:
+            return 0.0
+        self._refill()
+        if self._tokens >= 0:
+            return 0.0
+        return -self._tokens / self.bandwidth_limit
+
+    # --- Scheduler thread ---
+
+    def _expire(self, now):
+        """Returns commands whose ACK timed out; requeues those with attempts left."""
+        failed = []
+        for command, pending in list(self._in_flight.items()):
+            if pending.deadline is not None and now >= pending.deadline:
+                del self._in_flight[command]
+                if pending.attempts < self.MAX_ATTEMPTS:
+                    self.retries += 1
+                    heapq.heappush(self._queue, (pending.priority, next(self._seq), "command", pending))
+                else:
+                    self.timeouts += 1
+                    self._release_held(command)
+                    failed.append(pending)
+        return failed
+
+    def _next_deadline(self):
+        deadlines = [p.deadline for p in self._in_flight.values() if p.deadline is not None]
+        return min(deadlines) if deadlines else None
+
+    def _next_item(self):
+        """Blocks until an item may be sent. Returns (kind, item) or None when stopping."""
+        with self._cond:
+            while self._running:
+                now = time.monotonic()
+                failed = self._expire(now)
+                if failed:
+                    self._cond.release()
+                    try:
+                        for pending in failed:
+                            logging.warning(f"Command {pending.command} not acknowledged after {pending.attempts} attempts")
+                            self._complete(pending, RESULT_TIMEOUT, now - pending.created_at)
+                    finally:
+                        self._cond.acquire()
+                    continue
+
+                timeout = None
+                deadline = self._next_deadline()
+                if deadline is not None:
+                    timeout = max(0.0, deadline - now)
+
+                if self._queue and self.master is not None:
+                    priority, _, kind, item = self._queue[0]
+                    if kind == "command" and item.command in self._in_flight and self._in_flight[item.command] is not item:
+                        # Same command ID already awaiting an ACK: hold it back
+                        heapq.heappop(self._queue)
+                        self._held.setdefault(item.command, deque()).append(item)
+                        continue
+                    wait = self._budget_wait(priority)
+                    if wait <= 0:
+                        heapq.heappop(self._queue)
+                        return kind, item
+                    timeout = wait if timeout is None else min(timeout, wait)
+                elif self._queue:
+                    timeout = 0.1 if timeout is None else min(timeout, 0.1)  # Waiting for attach()
+
+                self._cond.wait(timeout)
+        return None
+
+    def _send_item(self, kind, item):
+        if kind == "command":
+            master = self.master
+            if master is None:
+                return None
+            item.target_system = master.target_system
+            msg = master.mav.command_long_encode(
+                master.target_system, master.target_component,
+                item.command, item.attempts - 1,  # confirmation = retransmission count
+                *item.params
+            )
+        else:
+            msg = item(self.master.mav) if callable(item) else item
+        return self._write(msg)
+
+    def run(self):
+        logging.info("Command scheduler started.")
+        while True:
+            entry = self._next_item()
+            if entry is None:
+                break
+            kind, item = entry
+            if kind == "command":
+                with self._cond:
+                    item.attempts += 1
+                    item.sent_at = time.monotonic()
+                    item.deadline = item.sent_at + self.ACK_TIMEOUT
+                    self._in_flight[item.command] = item
+            try:
+                size = self._send_item(kind, item)
+            except Exception as e:
+                logging.error(f"Error sending outbound {kind}: {type(e).__name__}: {e}")
+                size = None
+            if size:
+                with self._cond:
+                    self._charge(size)
+        logging.info("Command scheduler stopped.")
+
+    def clear(self):
+        """Discards queued, held and in-flight traffic (e.g. on disconnect)."""
+        with self._cond:
+            self._queue.clear()
+            self._held.clear()
+            self._in_flight.clear()
+            self._cond.notify()
+
+    def stop(self):
+        """Stops the scheduler thread; queued traffic is discarded."""
+        with self._cond:
+            self._running = False
+            self._queue.clear()
+            self._cond.notify()
+
+    # --- Reporting ---
+
+    def stats(self):
+        """Returns counters and command round-trip latency statistics."""
+        with self._cond:
+            queued = {}
+            for priority, _, _, _ in self._queue:
+                queued[priority] = queued.get(priority, 0) + 1
+            in_flight = len(self._in_flight)
+        rtts = sorted(self._rtts)
+        return {
+            "queued": queued,
+            "in_flight": in_flight,
+            "messages_sent": self.messages_sent,
+            "bytes_sent": self.bytes_sent,
+            "retries": self.retries,
+            "timeouts": self.timeouts,
+            "rtt_ms_last": self._rtts[-1] * 1000.0 if rtts else None,
+            "rtt_ms_median": rtts[len(rtts) // 2] * 1000.0 if rtts else None,
+            "rtt_ms_max": rtts[-1] * 1000.0 if rtts else None,
+        }
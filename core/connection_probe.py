@@ -0,0 +1,189 @@
+# core/connection_probe.py
+
+import threading
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from pymavlink import mavutil
+from PySide6.QtCore import QThread, Signal
+
+# Endpoints probed in addition to whatever the UI lists (SITL / MAVProxy defaults)
+STANDARD_ENDPOINTS = [
+    'udpin:0.0.0.0:14550',
+    'udpin:0.0.0.0:14551',
+    'tcp:127.0.0.1:5760',
+    'tcp:127.0.0.1:5762',
+]
+
+
+def is_network_endpoint(conn_string):
+    """True for udp/tcp connection strings, which take no baud rate."""
+    return conn_string.startswith(('udp', 'tcp'))
+
+
+def build_candidates(conn_strings, bauds, endpoints=STANDARD_ENDPOINTS):
+    """
+    Builds the probe list from the UI's connection strings and baud rates.
+
+    Returns a list of (conn_string, bauds) tuples. Network endpoints get
+    [None] as their baud list. Listening UDP endpoints are de-duplicated by
+    port, since only one socket can usefully listen on a given port.
+    """
+    candidates = []
+    seen = set()
+    udpin_ports = set()
+    for conn_string in list(conn_strings) + list(endpoints):
+        if not conn_string or conn_string in seen:
+            continue
+        seen.add(conn_string)
+        if conn_string.startswith('udpin:'):
+            port = conn_string.rsplit(':', 1)[-1]
+            if port in udpin_ports:
+                continue
+            udpin_ports.add(port)
+        if is_network_endpoint(conn_string):
+            candidates.append((conn_string, [None]))
+        else:
+            candidates.append((conn_string, list(bauds)))
+    return candidates
+
+
+# HEARTBEAT types that never identify the vehicle itself
+NON_VEHICLE_TYPES = frozenset([
+    mavutil.mavlink.MAV_TYPE_GCS,
+    mavutil.mavlink.MAV_TYPE_GIMBAL,
+    mavutil.mavlink.MAV_TYPE_ADSB,
+    mavutil.mavlink.MAV_TYPE_ONBOARD_CONTROLLER,
+])
+
+
+def is_vehicle_heartbeat(msg):
+    """True if a HEARTBEAT comes from an autopilot rather than a GCS or peripheral."""
+    return (msg is not None
+            and msg.get_type() == 'HEARTBEAT'
+            and msg.type not in NON_VEHICLE_TYPES
+            and msg.autopilot != mavutil.mavlink.MAV_AUTOPILOT_INVALID)
+
+
+class ConnectionProber:
+    """
+    Probes many connection candidates concurrently and keeps the first one
+    that delivers a vehicle heartbeat.
+
+    Each candidate runs in a worker of a thread pool. A serial port cannot be
+    opened several times at once, so the baud rates of one port are tried in
+    turn by its worker while different ports and network endpoints are probed
+    in parallel. As soon as one worker sees a heartbeat it claims the win and
+    all other workers close their links at their next poll.
+    """
+    POLL_INTERVAL = 0.2  # seconds per recv_match call
+    GCS_HEARTBEAT_INTERVAL = 0.5  # seconds; prompts udpout/tcp peers to talk
+
+    def __init__(self, heartbeat_timeout=1.5, max_workers=16, connect_fn=None):
+        self.heartbeat_timeout = heartbeat_timeout
+        self.max_workers = max_workers
+        self._connect_fn = connect_fn or mavutil.mavlink_connection
+        self._cancel_event = threading.Event()
+        self._winner_lock = threading.Lock()
+        self._winner = None
+
+    def cancel(self):
+        """Stops all probes; probe() returns None if nothing was found yet."""
+        self._cancel_event.set()
+
+    def _open(self, conn_string, baud):
+        if baud is None:
+            # retries=0: a refused TCP port fails at once instead of sleeping
+            return self._connect_fn(conn_string, source_system=255, autoreconnect=False, retries=0)
+        return self._connect_fn(conn_string, baud=baud, source_system=255, autoreconnect=False)
+
+    def _claim(self, result):
+        """Records the first successful probe. Returns False if another won."""
+        with self._winner_lock:
+            if self._winner is not None:
+                return False
+            self._winner = result
+            self._cancel_event.set()
+            return True
+
+    def _probe_one(self, conn_string, bauds):
+        """Worker: tries each baud rate of one candidate until a heartbeat arrives."""
+        for baud in bauds:
+            if self._cancel_event.is_set():
+                return None
+            try:
+                master = self._open(conn_string, baud)
+            except Exception as e:
+                logging.debug(f"Probe {conn_string} @ {baud}: open failed: {e}")
+                return None  # Port unusable, other bauds won't help
+
+            found = False
+            try:
+                deadline = time.monotonic() + self.heartbeat_timeout
+                next_gcs_heartbeat = 0.0
+                while not self._cancel_event.is_set() and time.monotonic() < deadline:
+                    now = time.monotonic()
+                    if now >= next_gcs_heartbeat:
+                        master.mav.heartbeat_send(mavutil.mavlink.MAV_TYPE_GCS,
+                                                  mavutil.mavlink.MAV_AUTOPILOT_INVALID, 0, 0, 0)
+                        next_gcs_heartbeat = now + self.GCS_HEARTBEAT_INTERVAL
+                    msg = master.recv_match(type='HEARTBEAT', blocking=True, timeout=self.POLL_INTERVAL)
+                    if is_vehicle_heartbeat(msg):
+                        found = self._claim((master, conn_string, baud))
+                        break
+            except Exception as e:
+                logging.debug(f"Probe {conn_string} @ {baud}: {type(e).__name__}: {e}")
+            finally:
+                if not found:
+                    try:
+                        master.close()
+                    except Exception:
+                        pass
+            if found:
+                logging.info(f"Auto-connect: heartbeat on {conn_string}" + (f" @ {baud}" if baud else ""))
+                return (master, conn_string, baud)
+        return None
+
+    def probe(self, candidates):
+        """
+        Probes all candidates concurrently.
+
+        Args:
+            candidates: List of (conn_string, bauds) as from build_candidates().
+
+        Returns:
+            (master, conn_string, baud) for the first vehicle found, or None.
+        """
+        self._cancel_event.clear()
+        self._winner = None
+        if not candidates:
+            return None
+
+        executor = ThreadPoolExecutor(max_workers=min(self.max_workers, len(candidates)),
+                                      thread_name_prefix="probe")
+        try:
+            pending = {executor.submit(self._probe_one, conn, bauds) for conn, bauds in candidates}
+            while pending and self._winner is None and not self._cancel_event.is_set():
+                _, pending = wait(pending, timeout=self.POLL_INTERVAL, return_when=FIRST_COMPLETED)
+        finally:
+            # Losers notice the cancel flag within one poll and close themselves
+            self._cancel_event.set()
+            executor.shutdown(wait=False, cancel_futures=True)
+        return self._winner
+
+
+class AutoConnectThread(QThread):
+    """Runs a ConnectionProber off the UI thread."""
+    probe_finished = Signal(object)  # Data: (master, conn_string, baud) or None
+
+    def __init__(self, candidates, prober=None, parent=None):
+        super().__init__(parent)
+        self.candidates = candidates
+        self.prober = prober or ConnectionProber()
+
+    def run(self):
+        logging.info(f"Auto-connect: probing {len(self.candidates)} endpoints...")
+        self.probe_finished.emit(self.prober.probe(self.candidates))
+
+    def cancel(self):
+        self.prober.cancel()
@@ -0,0 +1,144 @@
+# core/connection_supervisor.py
+
+import random
+import time
+import logging
+
+
+class LinkState:
+    """States of the vehicle link as tracked by ConnectionSupervisor."""
+    DISCONNECTED = "DISCONNECTED"  # Not running
+    CONNECTING = "CONNECTING"      # Transport open, waiting for the first heartbeat
+    CONNECTED = "CONNECTED"        # Heartbeats arriving
+    LINK_LOST = "LINK_LOST"        # Heartbeats stopped, transport kept open
+    BACKOFF = "BACKOFF"            # Transport failed, waiting before reopening it
+    FAILED = "FAILED"              # Gave up
+
+
+# Status strings shown by the UI for each link state
+STATUS_FOR_STATE = {
+    LinkState.DISCONNECTED: "DISCONNECTED",
+    LinkState.CONNECTING: "CONNECTING",
+    LinkState.CONNECTED: "CONNECTED",
+    LinkState.LINK_LOST: "RECONNECTING",
+    LinkState.BACKOFF: "RECONNECTING",
+    LinkState.FAILED: "ERROR",
+}
+
+
+class ConnectionSupervisor:
+    """
+    State machine for the vehicle link.
+
+    The supervisor only decides; the telemetry thread owns the transport and
+    feeds it events (transport opened, heartbeat seen, transport failed,
+    periodic tick). A heartbeat gap does not close the transport: the link
+    goes to LINK_LOST and returns to CONNECTED on the very next heartbeat.
+    The transport is only reopened after it fails, or after the link has been
+    silent for REOPEN_AFTER seconds, with jittered exponential backoff.
+    """
+    HEARTBEAT_TIMEOUT = 5.0  # seconds without heartbeat before LINK_LOST
+    CONNECT_TIMEOUT = 10.0  # seconds to wait for the first heartbeat
+    REOPEN_AFTER = 15.0  # seconds in LINK_LOST before the transport is reopened
+    MAX_RECONNECT_ATTEMPTS = 10
+    RECONNECT_BACKOFF_BASE = 0.5  # seconds
+    RECONNECT_BACKOFF_MAX = 10.0  # seconds
+
+    def __init__(self, on_state_change=None, rng=random.random, clock=time.monotonic):
+        self._on_state_change = on_state_change
+        self._rng = rng
+        self._clock = clock
+        self.state = LinkState.DISCONNECTED
+        self.state_since = clock()
+        self.last_heartbeat = None
+        self.reconnect_attempts = 0
+        self.ever_connected = False
+
+    def status(self):
+        """UI status string for the current state."""
+        if self.state == LinkState.CONNECTING and self.ever_connected:
+            return "RECONNECTING"
+        return STATUS_FOR_STATE[self.state]
+
+    def _set_state(self, new_state, message=""):
+        if new_state == self.state:
+            return False
+        logging.debug(f"Link state {self.state} -> {new_state} {message}")
+        self.state = new_state
+        self.state_since = self._clock()
+        if self._on_state_change:
+            self._on_state_change(new_state, message)
+        return True
+
+    def transport_opening(self, message=""):
+        """The thread is about to open (or reopen) the transport."""
+        if not self._set_state(LinkState.CONNECTING, message) and message and self._on_state_change:
+            # Progress update within CONNECTING (e.g. "Waiting for heartbeat...")
+            self._on_state_change(self.state, message)
+
+    def transport_adopted(self):
+        """An already-verified transport (e.g. from auto-detect) was handed over."""
+        self.last_heartbeat = self._clock()
+        self.ever_connected = True
+        self.reconnect_attempts = 0
+        self._set_state(LinkState.CONNECTED, "Connected")
+
+    def heartbeat(self, message="Heartbeat received"):
+        """
+        Records a vehicle heartbeat.
+        Returns True if this (re)established the link, so the caller can
+        re-request data streams.
+        """
+        self.last_heartbeat = self._clock()
+        if self.state in (LinkState.CONNECTING, LinkState.LINK_LOST):
+            if self.state == LinkState.LINK_LOST:
+                message = "Link recovered"
+            self.ever_connected = True
+            self.reconnect_attempts = 0
+            return self._set_state(LinkState.CONNECTED, message)
+        return False
+
+    def tick(self):
+        """
+        Periodic check. Returns a reason string if the transport should be
+        closed and reopened, otherwise None.
+        """
+        now = self._clock()
+        if self.state == LinkState.CONNECTED:
+            if self.last_heartbeat is not None and now - self.last_heartbeat > self.HEARTBEAT_TIMEOUT:
+                self._set_state(LinkState.LINK_LOST,
+                                f"No heartbeat for {self.HEARTBEAT_TIMEOUT:.0f} seconds, waiting for link")
+        elif self.state == LinkState.LINK_LOST:
+            if now - self.state_since > self.REOPEN_AFTER:
+                return f"Link silent for {self.REOPEN_AFTER + self.HEARTBEAT_TIMEOUT:.0f} seconds"
+        elif self.state == LinkState.CONNECTING:
+            if now - self.state_since > self.CONNECT_TIMEOUT:
+                return "Heartbeat timed out"
+        return None
+
+    def backoff_delay(self, attempt):
+        """Exponential backoff with 'equal jitter': half fixed, half random."""
+        delay = min(self.RECONNECT_BACKOFF_MAX, self.RECONNECT_BACKOFF_BASE * (2 ** (attempt - 1)))
+        return delay / 2.0 + self._rng() * delay / 2.0
+
+    def transport_failed(self, reason):
+        """
+        The transport failed or is being recycled.
+        Returns the delay in seconds before reopening, or None to give up.
+        A link that never delivered a heartbeat is not retried.
+        """
+        if not self.ever_connected:
+            self._set_state(LinkState.FAILED, reason)
+            return None
+        self.reconnect_attempts += 1
+        if self.reconnect_attempts > self.MAX_RECONNECT_ATTEMPTS:
+            self._set_state(LinkState.FAILED, f"{reason}; maximum reconnection attempts reached")
+            return None
+        delay = self.backoff_delay(self.reconnect_attempts)
+        self._set_state(LinkState.BACKOFF,
+                        f"{reason}; reconnecting in {delay:.1f}s (attempt {self.reconnect_attempts})")
+        return delay
+
+    def stopped(self, message=""):
+        """The link was shut down deliberately."""
+        self._set_state(LinkState.DISCONNECTED, message)
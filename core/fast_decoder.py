@@ -0,0 +1,191 @@
+# core/fast_decoder.py
+
+import binascii
+import logging
+import re
+import struct
+from pymavlink import mavutil
+
+mavlink = mavutil.mavlink
+
+# C type -> struct code, for building layouts from pymavlink's message definitions
+_TYPE_CODES = {
+    'char': 'c', 'int8_t': 'b', 'uint8_t': 'B', 'uint8_t_mavlink_version': 'B',
+    'int16_t': 'h', 'uint16_t': 'H', 'int32_t': 'i', 'uint32_t': 'I',
+    'int64_t': 'q', 'uint64_t': 'Q', 'float': 'f', 'double': 'd',
+}
+
+# MAVLink uses CRC-16/MCRF4XX, the bit-reflected form of the CCITT CRC that
+# binascii.crc_hqx implements in C: reflect the input bytes, run crc_hqx and
+# reflect the result
+_REFLECT = bytes(int(f"{i:08b}"[::-1], 2) for i in range(256))
+
+
+def x25crc(data, crc_extra=None):
+    """MAVLink checksum of `data` (bytes or bytearray) and an optional CRC_EXTRA byte."""
+    crc = binascii.crc_hqx(data.translate(_REFLECT), 0xFFFF)
+    if crc_extra is not None:
+        crc = binascii.crc_hqx(_REFLECT[crc_extra:crc_extra + 1], crc)
+    return _REFLECT[crc & 0xFF] << 8 | _REFLECT[crc >> 8]
+
+
+_MAGIC = re.compile(b'[\xfd\xfe]')
+_V1_HEADER = struct.Struct('<BBBBBB')  # magic, len, seq, sysid, compid, msgid
+_V2_HEADER = struct.Struct('<BBBBBBBHB')  # magic, len, incompat, compat, seq, sysid, compid, msgid (24 bit)
+_CRC = struct.Struct('<H')
+_SIGNATURE_LEN = 13
+
+
+class Layout:
+    """Precompiled decoder for the fields of one message that we actually use."""
+    __slots__ = ("msg_id", "name", "crc_extra", "length", "struct", "order", "fields")
+
+    def __init__(self, msg_type, fields):
+        cls = mavlink.mavlink_map[getattr(mavlink, f"MAVLINK_MSG_ID_{msg_type}")]
+        types = dict(zip(cls.fieldnames, cls.fieldtypes))
+        missing = set(fields) - set(types)
+        if missing:
+            raise ValueError(f"{msg_type} has no field(s) {sorted(missing)}")
+
+        # One struct over the whole wire payload that unpacks only the wanted
+        # fields and skips the rest with pad bytes
+        codes, wanted = ['<'], []
+        for name, array_len in zip(cls.ordered_fieldnames, cls.array_lengths):
+            code = _TYPE_CODES[types[name]]
+            if name in fields:
+                if array_len:
+                    raise ValueError(f"{msg_type}.{name} is an array; not supported on the fast path")
+                codes.append(code)
+                wanted.append(name)
+            else:
+                codes.append(f"{struct.calcsize('<' + code) * max(array_len, 1)}x")
+        self.msg_id = cls.id
+        self.name = msg_type
+        self.crc_extra = cls.crc_extra
+        self.length = cls.unpacker.size
+        self.struct = struct.Struct(''.join(codes))
+        self.fields = tuple(fields)
+        # Wire order -> requested order (None when they already agree)
+        order = tuple(wanted.index(name) for name in fields)
+        self.order = None if order == tuple(range(len(order))) else order
+
+    def decode(self, payload):
+        """Unpacks a payload, zero-filling a MAVLink2-truncated one."""
+        if len(payload) < self.length:
+            payload = bytes(payload).ljust(self.length, b'\0')
+        values = self.struct.unpack_from(payload)
+        if self.order is not None:
+            values = tuple(values[i] for i in self.order)
+        return values
+
+
+class FastDecoder:
+    """
+    Frames a raw MAVLink byte stream (v1 and v2, signed or not) and decodes
+    selected messages with precompiled struct layouts instead of building
+    pymavlink message objects.
+
+    feed() returns, in stream order, a (msg_type, src_system, src_component,
+    values) tuple for every frame with a layout, where `values` follow the
+    field order given to the constructor, and the raw frame bytes for
+    everything else, to be handed to pymavlink. Frames with a bad checksum
+    or an id unknown to the dialect are dropped.
+
+    If `on_frame` is set, it is called as on_frame(sysid, msg_id, frame)
+    for every valid frame, with a memoryview of the frame's bytes in the
+    receive buffer that is only valid during the call (see
+    core.mavlink_router).
+    """
+
+    def __init__(self, fields_by_type):
+        self.layouts = {}  # Key: message id, Value: Layout
+        for msg_type, fields in fields_by_type.items():
+            layout = Layout(msg_type, fields)
+            self.layouts[layout.msg_id] = layout
+        self._crc_extra = {msg_id: cls.crc_extra for msg_id, cls in mavlink.mavlink_map.items()}
+        self._buf = bytearray()
+        self.on_frame = None
+        self.frames = 0
+        self.fast = 0
+        self.crc_errors = 0
+        self.skipped_bytes = 0
+        self.on_frame_errors = 0
+
+    def stats(self):
+        return {"frames": self.frames, "fast": self.fast, "fallback": self.frames - self.fast,
+                "crc_errors": self.crc_errors, "skipped_bytes": self.skipped_bytes,
+                "on_frame_errors": self.on_frame_errors}
+
+    def feed(self, data):
+        """Appends received bytes and returns everything that is now complete."""
+        buf = self._buf
+        buf += data
+        out = []
+        pos, end = 0, len(buf)
+        layouts = self.layouts
+        on_frame = self.on_frame
+        view = memoryview(buf) if on_frame is not None else None
+        try:
+            while True:
+                match = _MAGIC.search(buf, pos)
+                if match is None:
+                    self.skipped_bytes += end - pos
+                    pos = end
+                    break
+                start = match.start()
+                self.skipped_bytes += start - pos
+                if end - start < 2:
+                    pos = start
+                    break
+                if buf[start] == 0xFE:
+                    header_len, signature_len = 6, 0
+                    if end - start < header_len:
+                        pos = start
+                        break
+                    _, length, _, sysid, compid, msg_id = _V1_HEADER.unpack_from(buf, start)
+                else:
+                    header_len = 10
+                    if end - start < header_len:
+                        pos = start
+                        break
+                    _, length, incompat, _, _, sysid, compid, msg_lo, msg_hi = _V2_HEADER.unpack_from(buf, start)
+                    msg_id = msg_lo | msg_hi << 16
+                    signature_len = _SIGNATURE_LEN if incompat & mavlink.MAVLINK_IFLAG_SIGNED else 0
+                frame_end = start + header_len + length + 2 + signature_len
+                if frame_end > end:
+                    pos = start
+                    break
+
+                # Unknown ids cannot be checked (or decoded by pymavlink either), so
+                # like a bad checksum they mean noise: resync after this magic byte
+                crc_extra = self._crc_extra.get(msg_id)
+                payload_end = start + header_len + length
+                if (crc_extra is None or
+                        x25crc(buf[start + 1:payload_end], crc_extra) != _CRC.unpack_from(buf, payload_end)[0]):
+                    self.crc_errors += 1
+                    pos = start + 1
+                    continue
+
+                self.frames += 1
+                if on_frame is not None:
+                    with view[start:frame_end] as frame:
+                        try:
+                            on_frame(sysid, msg_id, frame)
+                        except Exception as e:
+                            # A failing consumer (e.g. the router) must not stop decoding
+                            if self.on_frame_errors == 0:
+                                logging.error(f"Error in frame callback: {e}", exc_info=True)
+                            self.on_frame_errors += 1
+                layout = layouts.get(msg_id)
+                if layout is not None:
+                    self.fast += 1
+                    out.append((layout.name, sysid, compid,
+                                layout.decode(buf[start + header_len:payload_end])))
+                else:
+                    out.append(bytes(buf[start:frame_end]))
+                pos = frame_end
+        finally:
+            if view is not None:
+                view.release()  # The buffer cannot shrink while it is exported
+        del buf[:pos]
+        return out
@@ -0,0 +1,387 @@
+# core/flight_summary.py
+"""
+Post-flight summaries of telemetry logs, computed in parallel.
+
+A log is cut into chunks that start on record boundaries. Each chunk is
+decoded with core.tlog_arrays and reduced to a FlightSummary in a worker
+process, and the per-chunk summaries are merged in log order. Everything
+that spans a chunk boundary (distance, battery charge, mode changes) is
+carried in the first/last samples of each partial, so merging gives the
+same result as summarising the whole log at once.
+
+    python -m core.flight_summary logs/*.tlog [--workers 8] [--json]
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from types import SimpleNamespace
+
+import numpy as np
+from pymavlink import mavutil
+
+from core.tlog_arrays import decode_buffer, scan_tlog
+
+mavlink = mavutil.mavlink
+
+DEFAULT_CHUNK_BYTES = 64 * 1024 * 1024
+_ALIGN_WINDOW = 64 * 1024  # bytes scanned after a nominal cut to find the next record
+_TIMESTAMP_LEN = 8
+_EARTH_RADIUS = 6371008.8  # m
+_MESSAGE_TYPES = ('HEARTBEAT', 'GLOBAL_POSITION_INT', 'SYS_STATUS', 'GPS_RAW_INT', 'STATUSTEXT')
+
+
+def _haversine(lat1, lon1, lat2, lon2):
+    """Great-circle distance in m between points given in degrees (scalars or arrays)."""
+    lat1, lon1, lat2, lon2 = (np.radians(v) for v in (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * _EARTH_RADIUS * np.arcsin(np.sqrt(a))
+
+
+def _mode_name(vehicle_type, base_mode, custom_mode):
+    msg = SimpleNamespace(type=vehicle_type, autopilot=mavlink.MAV_AUTOPILOT_ARDUPILOTMEGA, base_mode=base_mode,
+                          custom_mode=custom_mode, get_type=lambda: 'HEARTBEAT')  # Enough for mode_string_v10
+    return mavutil.mode_string_v10(msg)
+
+
+def _min(a, b):
+    return b if a is None else a if b is None else min(a, b)
+
+
+def _max(a, b):
+    return b if a is None else a if b is None else max(a, b)
+
+
+def _join_timeline(earlier, later):
+    """Concatenates two (time, value) change lists, dropping a repeat of the last value."""
+    if earlier and later and earlier[-1][1] == later[0][1]:
+        later = later[1:]
+    return earlier + later
+
+
+class FlightSummary:
+    """
+    Aggregates of one log, or of a contiguous part of it.
+
+    Partials of consecutive chunks combine with merge(); to_dict() gives the
+    report. Altitudes are in m, distance in m, battery charge in mAh, times
+    in seconds since the epoch.
+    """
+
+    def __init__(self):
+        self.messages = 0
+        self.crc_errors = 0
+        self.start_time = None
+        self.end_time = None
+        self.max_alt_rel = None
+        self.max_alt_msl = None
+        self.distance = 0.0
+        self.first_position = None  # (lat, lon) in degrees
+        self.last_position = None
+        self.first_battery = None  # (time, remaining %, current A)
+        self.last_battery = None
+        self.min_voltage = None
+        self.max_current = None
+        self.consumed_mah = 0.0
+        self.modes = []  # [(time, mode name)] at each change
+        self.armed = []  # [(time, armed)] at each change
+        self.fix_samples = {}  # Key: GPS fix type, Value: sample count
+        self.min_satellites = None  # While the fix is 3D or better
+        self.max_hdop = None
+        self.errors = []  # [(time, severity, text)] of STATUSTEXT at ERROR or worse
+
+    def merge(self, later):
+        """Combines this summary with the one of the chunk right after it."""
+        merged = FlightSummary()
+        merged.messages = self.messages + later.messages
+        merged.crc_errors = self.crc_errors + later.crc_errors
+        merged.start_time = self.start_time if self.start_time is not None else later.start_time
+        merged.end_time = later.end_time if later.end_time is not None else self.end_time
+        merged.max_alt_rel = _max(self.max_alt_rel, later.max_alt_rel)
+        merged.max_alt_msl = _max(self.max_alt_msl, later.max_alt_msl)
+
+        merged.distance = self.distance + later.distance
+        if self.last_position is not None and later.first_position is not None:
+            merged.distance += float(_haversine(*self.last_position, *later.first_position))
+        merged.first_position = self.first_position or later.first_position
+        merged.last_position = later.last_position or self.last_position
+
+        merged.consumed_mah = self.consumed_mah + later.consumed_mah
+        if self.last_battery is not None and later.first_battery is not None:
+            (t0, _, i0), (t1, _, i1) = self.last_battery, later.first_battery
+            merged.consumed_mah += (i0 + i1) / 2 * (t1 - t0) / 3.6
+        merged.first_battery = self.first_battery or later.first_battery
+        merged.last_battery = later.last_battery or self.last_battery
+        merged.min_voltage = _min(self.min_voltage, later.min_voltage)
+        merged.max_current = _max(self.max_current, later.max_current)
+
+        merged.modes = _join_timeline(self.modes, later.modes)
+        merged.armed = _join_timeline(self.armed, later.armed)
+        merged.fix_samples = dict(self.fix_samples)
+        for fix_type, count in later.fix_samples.items():
+            merged.fix_samples[fix_type] = merged.fix_samples.get(fix_type, 0) + count
+        merged.min_satellites = _min(self.min_satellites, later.min_satellites)
+        merged.max_hdop = _max(self.max_hdop, later.max_hdop)
+        merged.errors = self.errors + later.errors
+        return merged
+
+    def to_dict(self):
+        end = self.end_time
+        modes = [{'time': t, 'mode': mode, 'duration': (nxt[0] if nxt else end) - t}
+                 for (t, mode), nxt in zip(self.modes, self.modes[1:] + [None])]
+        armed_time = sum((nxt[0] if nxt else end) - t
+                         for (t, armed), nxt in zip(self.armed, self.armed[1:] + [None]) if armed)
+        return {
+            'start_time': self.start_time,
+            'duration': end - self.start_time if end is not None else 0.0,
+            'armed_time': armed_time,
+            'messages': self.messages,
+            'crc_errors': self.crc_errors,
+            'max_alt_rel': self.max_alt_rel,
+            'max_alt_msl': self.max_alt_msl,
+            'distance': self.distance,
+            'battery': {
+                'start_remaining': self.first_battery[1] if self.first_battery else None,
+                'end_remaining': self.last_battery[1] if self.last_battery else None,
+                'consumed_mah': self.consumed_mah,
+                'min_voltage': self.min_voltage,
+                'max_current': self.max_current,
+            },
+            'modes': modes,
+            'gps': {
+                'fix_samples': {int(k): v for k, v in sorted(self.fix_samples.items())},
+                'min_satellites': self.min_satellites,
+                'max_hdop': self.max_hdop,
+            },
+            'errors': [{'time': t, 'severity': severity, 'text': text} for t, severity, text in self.errors],
+        }
+
+
+def _rows(arrays, msg_type, sysid):
+    """(MessageArrays, row mask) of one message type, limited to `sysid` when given."""
+    columns = arrays.get(msg_type)
+    if columns is None:
+        return None, None
+    mask = np.ones(len(columns), dtype=bool) if sysid is None else columns.src_system == sysid
+    return columns, mask
+
+
+def _changes(key):
+    """Indices where `key` differs from the previous row, including the first row."""
+    if len(key) == 0:
+        return key.astype(np.intp)
+    return np.concatenate(([0], np.flatnonzero(key[1:] != key[:-1]) + 1))
+
+
+def summarize_buffer(buf, sysid=None):
+    """Summarises tlog records held in a uint8 array that starts on a record boundary."""
+    arrays, frames = decode_buffer(buf, _MESSAGE_TYPES)
+    summary = FlightSummary()
+    summary.messages = len(frames)
+    summary.crc_errors = frames.crc_errors
+    if len(frames):
+        summary.start_time = float(frames.timestamp[0])
+        summary.end_time = float(frames.timestamp[-1])
+
+    columns, mask = _rows(arrays, 'HEARTBEAT', sysid)
+    if columns is not None:
+        mask &= columns['autopilot'] != mavlink.MAV_AUTOPILOT_INVALID  # GCS and companion heartbeats
+        t = columns.timestamp[mask]
+        vehicle_type, base_mode, custom_mode = (columns[f][mask] for f in ('type', 'base_mode', 'custom_mode'))
+        mode_key = custom_mode.astype(np.int64) << 16 | vehicle_type.astype(np.int64) << 8 | (
+            base_mode & mavlink.MAV_MODE_FLAG_CUSTOM_MODE_ENABLED)
+        summary.modes = [(float(t[i]), _mode_name(int(vehicle_type[i]), int(base_mode[i]), int(custom_mode[i])))
+                         for i in _changes(mode_key)]
+        armed = (base_mode & mavlink.MAV_MODE_FLAG_SAFETY_ARMED) != 0
+        summary.armed = [(float(t[i]), bool(armed[i])) for i in _changes(armed)]
+
+    columns, mask = _rows(arrays, 'GLOBAL_POSITION_INT', sysid)
+    if columns is not None:
+        mask &= (columns['lat'] != 0) | (columns['lon'] != 0)  # No position yet
+        lat, lon = columns['lat'][mask] * 1e-7, columns['lon'][mask] * 1e-7
+        if len(lat):
+            summary.max_alt_rel = float(columns['relative_alt'][mask].max()) / 1000.0
+            summary.max_alt_msl = float(columns['alt'][mask].max()) / 1000.0
+            summary.distance = float(_haversine(lat[:-1], lon[:-1], lat[1:], lon[1:]).sum())
+            summary.first_position = (float(lat[0]), float(lon[0]))
+            summary.last_position = (float(lat[-1]), float(lon[-1]))
+
+    columns, mask = _rows(arrays, 'SYS_STATUS', sysid)
+    if columns is not None:
+        t = columns.timestamp[mask]
+        voltage = columns['voltage_battery'][mask]
+        current = columns['current_battery'][mask].astype(np.float64)
+        remaining = columns['battery_remaining'][mask]
+        measured = current >= 0  # -1: not measured
+        if measured.any():
+            t_i, amps = t[measured], current[measured] / 100.0
+            summary.consumed_mah = float(np.sum((amps[1:] + amps[:-1]) / 2 * np.diff(t_i)) / 3.6)
+            summary.max_current = float(amps.max())
+        known = voltage != 0xFFFF
+        if known.any():
+            summary.min_voltage = float(voltage[known].min()) / 1000.0
+        if len(t):
+            first_amps = current[measured][0] / 100.0 if measured.any() else 0.0
+            last_amps = current[measured][-1] / 100.0 if measured.any() else 0.0
+            summary.first_battery = (float(t[0]), int(remaining[0]) if remaining[0] >= 0 else None, first_amps)
+            summary.last_battery = (float(t[-1]), int(remaining[-1]) if remaining[-1] >= 0 else None, last_amps)
+
+    columns, mask = _rows(arrays, 'GPS_RAW_INT', sysid)
+    if columns is not None:
+        fix_type = columns['fix_type'][mask]
+        values, counts = np.unique(fix_type, return_counts=True)
+        summary.fix_samples = {int(v): int(c) for v, c in zip(values, counts)}
+        fixed = fix_type >= mavlink.GPS_FIX_TYPE_3D_FIX
+        if fixed.any():
+            summary.min_satellites = int(columns['satellites_visible'][mask][fixed].min())
+            eph = columns['eph'][mask][fixed]
+            eph = eph[eph != 0xFFFF]  # Unknown
+            if len(eph):
+                summary.max_hdop = float(eph.max()) / 100.0
+
+    columns, mask = _rows(arrays, 'STATUSTEXT', sysid)
+    if columns is not None:
+        mask &= columns['severity'] <= mavlink.MAV_SEVERITY_ERROR
+        summary.errors = [(float(t), int(severity), text.decode('utf-8', 'replace'))
+                          for t, severity, text in zip(columns.timestamp[mask], columns['severity'][mask],
+                                                       columns['text'][mask])]
+    return summary
+
+
+def split_tlog(path, chunk_bytes=DEFAULT_CHUNK_BYTES):
+    """
+    Cuts a tlog into [(start, end)] byte ranges of about `chunk_bytes`,
+    each starting on a record. A nominal cut is moved forward to the first
+    record found after it; cuts with no record nearby are dropped.
+    """
+    size = os.path.getsize(path)
+    if size == 0:
+        return []
+    buf = np.asarray(np.memmap(path, dtype=np.uint8, mode='r'))
+    cuts = [0]
+    for nominal in range(chunk_bytes, size, chunk_bytes):
+        if nominal <= cuts[-1]:
+            continue
+        frames = scan_tlog(buf[nominal:nominal + _ALIGN_WINDOW], verify_crc=True)
+        if len(frames):
+            cuts.append(nominal + int(frames.start[0]) - _TIMESTAMP_LEN)
+    return list(zip(cuts, cuts[1:] + [size]))
+
+
+def summarize_chunk(path, start, end, sysid=None):
+    """Worker entry point: the summary of bytes [start, end) of a log."""
+    buf = np.asarray(np.memmap(path, dtype=np.uint8, mode='r', offset=start, shape=(end - start,)))
+    return summarize_buffer(buf, sysid)
+
+
+def _reduce(partials):
+    summary = FlightSummary()
+    for partial in partials:
+        summary = summary.merge(partial)
+    return summary
+
+
+def summarize_logs(paths, workers=None, chunk_bytes=DEFAULT_CHUNK_BYTES, sysid=None, failures=None):
+    """
+    Summarises many logs at once: {path: FlightSummary}.
+
+    The chunks of all logs go to one ProcessPoolExecutor so the pool stays
+    busy across small and large logs alike. `workers=0` runs everything in
+    this process. A log that cannot be read or summarised is logged and
+    left out without stopping the others; pass a dict as `failures` to get
+    {path: exception} for them.
+    """
+    started = time.perf_counter()
+    paths = list(dict.fromkeys(paths))
+    failed = {}
+    jobs = []
+    for path in paths:
+        try:
+            jobs.extend((path, start, end) for start, end in split_tlog(path, chunk_bytes))
+        except Exception as e:
+            failed[path] = e
+
+    by_path = {path: [] for path in paths if path not in failed}
+    if workers == 0:
+        for path, start, end in jobs:
+            if path not in failed:
+                try:
+                    by_path[path].append(summarize_chunk(path, start, end, sysid))
+                except Exception as e:
+                    failed[path] = e
+    elif jobs:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [(path, pool.submit(summarize_chunk, path, start, end, sysid)) for path, start, end in jobs]
+            for path, future in futures:  # In log order
+                try:
+                    partial = future.result()
+                except Exception as e:
+                    failed.setdefault(path, e)
+                    continue
+                if path not in failed:
+                    by_path[path].append(partial)
+
+    for path, error in failed.items():
+        logging.error(f"Cannot summarise {path}: {type(error).__name__}: {error}", exc_info=error)
+        by_path.pop(path, None)
+    if failures is not None:
+        failures.update(failed)
+    logging.info(f"Summarised {len(by_path)} of {len(paths)} log(s) in {len(jobs)} chunk(s) in "
+                 f"{time.perf_counter() - started:.2f}s")
+    return {path: _reduce(parts) for path, parts in by_path.items()}
+
+
+def summarize_tlog(path, workers=None, chunk_bytes=DEFAULT_CHUNK_BYTES, sysid=None):
+    """Summarises one log, see summarize_logs(). Raises the log's error if it cannot be summarised."""
+    failures = {}
+    summaries = summarize_logs([path], workers, chunk_bytes, sysid, failures)
+    if path in failures:
+        raise failures[path]
+    return summaries[path]
+
+
+def _format(path, report):
+    battery, gps = report['battery'], report['gps']
+    lines = [
+        f"{path}",
+        f"  duration {report['duration']:.0f} s (armed {report['armed_time']:.0f} s), "
+        f"{report['messages']} messages, {report['crc_errors']} bad checksums",
+        f"  max altitude {report['max_alt_rel']} m rel / {report['max_alt_msl']} m MSL, "
+        f"distance {report['distance']:.0f} m",
+        f"  battery {battery['start_remaining']}% -> {battery['end_remaining']}%, "
+        f"{battery['consumed_mah']:.0f} mAh, min {battery['min_voltage']} V, max {battery['max_current']} A",
+        f"  GPS fix samples {gps['fix_samples']}, min satellites {gps['min_satellites']}, "
+        f"max HDOP {gps['max_hdop']}",
+        "  modes: " + ", ".join(f"{m['mode']} {m['duration']:.0f}s" for m in report['modes']),
+    ]
+    lines += [f"  error: [{e['severity']}] {e['text']}" for e in report['errors']]
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Summarise telemetry logs (.tlog) in parallel")
+    parser.add_argument('logs', nargs='+', help="Log files")
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: CPU count, 0: none)")
+    parser.add_argument('--chunk-mb', type=float, default=DEFAULT_CHUNK_BYTES / 2 ** 20, help="Chunk size in MiB")
+    parser.add_argument('--sysid', type=int, default=None, help="Only summarise this vehicle")
+    parser.add_argument('--json', action='store_true', help="Print one JSON object per log")
+    args = parser.parse_args(argv)
+
+    failures = {}
+    summaries = summarize_logs(args.logs, args.workers, int(args.chunk_mb * 2 ** 20), args.sysid, failures)
+    for path, summary in summaries.items():
+        report = summary.to_dict()
+        print(json.dumps(dict(report, path=path)) if args.json else _format(path, report))
+    for path, error in failures.items():
+        message = f"{type(error).__name__}: {error}"
+        print(json.dumps({"path": path, "error": message}) if args.json else f"{path}\n  failed: {message}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING)
+    sys.exit(main())
@@ -0,0 +1,268 @@
+# core/log_download.py
+
+import queue
+import threading
+import time
+import logging
+from collections import deque
+
+from core.command_scheduler import Priority
+from utils.interval_set import IntervalSet
+from utils.offset_file import OffsetFile
+
+LOG_DATA_SIZE = 90  # Bytes per LOG_DATA message
+
+
+class LogEntry:
+    """One onboard log as reported by LOG_ENTRY."""
+    __slots__ = ("id", "size", "time_utc")
+
+    def __init__(self, log_id, size, time_utc):
+        self.id = log_id
+        self.size = size
+        self.time_utc = time_utc
+
+    def __repr__(self):
+        return f"LogEntry(id={self.id}, size={self.size}, time_utc={self.time_utc})"
+
+
+class _LogTransfer(threading.Thread):
+    """Shared plumbing: inbox fed from the receive thread, BULK sends via the scheduler."""
+    MESSAGE_TYPES = ()
+
+    def __init__(self, name, command_scheduler, target_system, target_component, on_complete=None):
+        super().__init__(name=name, daemon=True)
+        self.command_scheduler = command_scheduler
+        self.target_system = target_system
+        self.target_component = target_component
+        self.on_complete = on_complete
+        self._inbox = queue.Queue()
+        self._cancelled = False
+
+    def handle_message(self, msg):
+        """Receive-thread hook."""
+        if msg.get_type() not in self.MESSAGE_TYPES:
+            return
+        if self.target_system and msg.get_srcSystem() != self.target_system:
+            return
+        self._inbox.put(msg)
+
+    def cancel(self):
+        self._cancelled = True
+        self._inbox.put(None)
+
+    def _send(self, build):
+        ts, tc = self.target_system, self.target_component
+        self.command_scheduler.send_message(lambda mav: build(mav, ts, tc), Priority.BULK)
+
+    def _next(self, timeout):
+        try:
+            return self._inbox.get(timeout=max(0.0, timeout))
+        except queue.Empty:
+            return None
+
+
+class LogListRequest(_LogTransfer):
+    """Fetches the onboard log list, re-requesting only entries that went missing."""
+    MESSAGE_TYPES = ('LOG_ENTRY',)
+    TIMEOUT = 1.0  # seconds without a LOG_ENTRY before re-requesting
+    MAX_RETRIES = 5
+
+    def __init__(self, command_scheduler, target_system, target_component, on_complete=None):
+        super().__init__("LogList", command_scheduler, target_system, target_component, on_complete)
+        self.entries = {}  # Key: log id, Value: LogEntry
+        self.num_logs = None
+        self.last_log_num = None
+
+    def _request(self, first=0, last=0xFFFF):
+        self._send(lambda mav, ts, tc: mav.log_request_list_encode(ts, tc, first, last))
+
+    def _missing_ids(self):
+        first = self.last_log_num - self.num_logs + 1
+        return [i for i in range(first, self.last_log_num + 1) if i not in self.entries]
+
+    def run(self):
+        self._request()
+        retries = 0
+        result = None
+        while result is None:
+            msg = self._next(self.TIMEOUT)
+            if self._cancelled:
+                result = (False, "Log list cancelled")
+            elif msg is not None:
+                retries = 0
+                self.num_logs, self.last_log_num = msg.num_logs, msg.last_log_num
+                if msg.num_logs == 0:
+                    result = (True, "No logs on vehicle")
+                    continue
+                self.entries[msg.id] = LogEntry(msg.id, msg.size, msg.time_utc)
+                if not self._missing_ids():
+                    result = (True, f"{len(self.entries)} logs on vehicle")
+            else:
+                retries += 1
+                if retries > self.MAX_RETRIES:
+                    result = (False, "Log list timed out")
+                elif self.num_logs is None:
+                    self._request()
+                else:
+                    missing = self._missing_ids()
+                    self._request(missing[0], missing[-1])
+
+        success, message = result
+        logging.info(f"Log list: {message}")
+        if self.on_complete:
+            self.on_complete(success, message, sorted(self.entries.values(), key=lambda e: e.id))
+
+
+class LogDownload(_LogTransfer):
+    """
+    Downloads one dataflash log with LOG_REQUEST_DATA / LOG_DATA.
+
+    The whole log is requested at once and every LOG_DATA chunk is written
+    at its offset in a file preallocated to the log size. Received ranges
+    are kept in an IntervalSet, and only the holes are requested again:
+    as soon as the chunk ending the current request arrives, or when the
+    stream stalls. Nearby holes are merged into one request, since the
+    vehicle serves one request at a time. A link drop just looks like a long
+    stall: the download keeps re-requesting the first hole until STALL_LIMIT
+    seconds pass without progress, and never starts over.
+    """
+    MESSAGE_TYPES = ('LOG_DATA',)
+    STALL_TIMEOUT = 0.5  # seconds without data before re-requesting holes
+    STALL_LIMIT = 30.0  # seconds without any progress before giving up
+    MERGE_SLACK = 10 * LOG_DATA_SIZE  # Received bytes worth re-fetching to merge two holes
+    PROGRESS_INTERVAL = 0.1  # seconds between progress reports
+    RATE_WINDOW = 2.0  # seconds of history for the throughput estimate
+
+    def __init__(self, command_scheduler, target_system, target_component, log_id, size, path,
+                 on_progress=None, on_complete=None):
+        super().__init__(f"LogDownload{log_id}", command_scheduler, target_system, target_component, on_complete)
+        self.log_id = log_id
+        self.size = size
+        self.path = path
+        self.on_progress = on_progress  # Callable(received, size, bytes_per_second, eta_seconds)
+        self.received = IntervalSet()
+        self.retries = 0
+        self._file = None
+        self._requested_end = 0  # End of the range currently being streamed
+        self._history = deque()  # (monotonic time, bytes received)
+        self._last_report = 0.0
+        self._started_at = None
+        self._finished_at = None
+
+    def _request(self, offset, count):
+        self._requested_end = offset + count
+        self._send(lambda mav, ts, tc: mav.log_request_data_encode(ts, tc, self.log_id, offset, count))
+
+    def _request_end(self):
+        self._send(lambda mav, ts, tc: mav.log_request_end_encode(ts, tc))
+
+    def holes(self):
+        """Missing byte ranges, with holes separated by less than MERGE_SLACK merged."""
+        merged = []
+        for start, end in self.received.gaps(0, self.size):
+            if merged and start - merged[-1][1] < self.MERGE_SLACK:
+                merged[-1] = (merged[-1][0], end)
+            else:
+                merged.append((start, end))
+        return merged
+
+    def _store(self, msg):
+        if msg.id != self.log_id or msg.count == 0:
+            return False
+        end = min(msg.ofs + msg.count, self.size)
+        if end <= msg.ofs or self.received.contains(msg.ofs, end):
+            return False
+        self._file.write_at(msg.ofs, bytes(msg.data[:end - msg.ofs]))
+        self.received.add(msg.ofs, end)
+        return True
+
+    def _request_next_hole(self):
+        start, end = self.holes()[0]
+        self.retries += 1
+        logging.debug(f"Log {self.log_id}: re-requesting {start}-{end}")
+        self._request(start, end - start)
+
+    def rate(self):
+        """Returns (bytes_per_second, eta_seconds) over the last RATE_WINDOW seconds."""
+        if len(self._history) < 2:
+            return 0.0, None
+        (t0, b0), (t1, b1) = self._history[0], self._history[-1]
+        if t1 <= t0:
+            return 0.0, None
+        rate = (b1 - b0) / (t1 - t0)
+        remaining = self.size - b1
+        return rate, (remaining / rate if rate > 0 else None)
+
+    def _report(self, now, force=False):
+        received = self.received.covered()
+        self._history.append((now, received))
+        while len(self._history) > 2 and now - self._history[0][0] > self.RATE_WINDOW:
+            self._history.popleft()
+        if self.on_progress and (force or now - self._last_report >= self.PROGRESS_INTERVAL):
+            self._last_report = now
+            rate, eta = self.rate()
+            self.on_progress(received, self.size, rate, eta if eta is not None else -1.0)
+
+    def run(self):
+        self._started_at = last_data = last_progress = time.monotonic()
+        result = None
+        try:
+            self._file = OffsetFile(self.path, self.size)
+            if self.size == 0:
+                result = (True, f"Log {self.log_id} is empty")
+            else:
+                self._request(0, self.size)
+            while result is None:
+                msg = self._next(last_data + self.STALL_TIMEOUT - time.monotonic())
+                now = time.monotonic()
+                if self._cancelled:
+                    result = (False, f"Log {self.log_id} download cancelled")
+                elif msg is not None:
+                    last_data = now
+                    if self._store(msg):
+                        last_progress = now
+                        self._report(now)
+                        if self.received.covered() >= self.size:
+                            result = (True, f"Log {self.log_id} downloaded")
+                        elif msg.ofs + msg.count >= self._requested_end:
+                            self._request_next_hole()  # Current request fully streamed
+                elif now - last_progress > self.STALL_LIMIT:
+                    result = (False, f"Log {self.log_id} download stalled at "
+                                     f"{self.received.covered()}/{self.size} bytes")
+                else:
+                    # Stream ended or the link dropped: ask again for the first hole
+                    self._request_next_hole()
+                    last_data = now
+        except OSError as e:
+            result = (False, f"Cannot write {self.path}: {e}")
+        except Exception as e:
+            logging.error(f"Log {self.log_id} download failed", exc_info=True)
+            result = (False, f"{type(e).__name__}: {e}")
+        finally:
+            self._finished_at = time.monotonic()
+            if self._file:
+                self._file.close()
+            self._request_end()
+
+        self._report(self._finished_at, force=True)
+        success, message = result
+        stats = self.stats()
+        logging.info(f"{message}: {stats['bytes']} bytes in {stats['elapsed']:.1f}s "
+                     f"({stats['bytes_per_second'] / 1024:.1f} KiB/s, {self.retries} re-requests)")
+        if self.on_complete:
+            self.on_complete(success, message)
+
+    def stats(self):
+        """Returns bytes received, elapsed time, average throughput and re-request count."""
+        end = self._finished_at or time.monotonic()
+        elapsed = end - self._started_at if self._started_at else 0.0
+        received = self.received.covered()
+        return {
+            "log_id": self.log_id,
+            "bytes": received,
+            "size": self.size,
+            "elapsed": elapsed,
+            "bytes_per_second": received / elapsed if elapsed > 0 else 0.0,
+            "retries": self.retries,
+        }
@@ -0,0 +1,392 @@
+# core/mavftp.py
+
+import queue
+import struct
+import threading
+import time
+import logging
+
+from core.command_scheduler import Priority
+from utils.interval_set import IntervalSet
+from utils.offset_file import OffsetFile
+
+# FILE_TRANSFER_PROTOCOL payload: 12-byte header followed by data
+HEADER = struct.Struct('<HBBBBBxI')  # seq, session, opcode, size, req_opcode, burst_complete, (padding), offset
+PAYLOAD_SIZE = 251
+MAX_DATA = PAYLOAD_SIZE - HEADER.size  # 239
+
+
+class OpCode:
+    NONE = 0
+    TERMINATE_SESSION = 1
+    RESET_SESSIONS = 2
+    LIST_DIRECTORY = 3
+    OPEN_FILE_RO = 4
+    READ_FILE = 5
+    CREATE_FILE = 6
+    WRITE_FILE = 7
+    REMOVE_FILE = 8
+    CREATE_DIRECTORY = 9
+    REMOVE_DIRECTORY = 10
+    OPEN_FILE_WO = 11
+    TRUNCATE_FILE = 12
+    RENAME = 13
+    CALC_FILE_CRC32 = 14
+    BURST_READ_FILE = 15
+    ACK = 128
+    NAK = 129
+
+
+class FtpError:
+    NONE = 0
+    FAIL = 1
+    FAIL_ERRNO = 2
+    INVALID_DATA_SIZE = 3
+    INVALID_SESSION = 4
+    NO_SESSIONS_AVAILABLE = 5
+    EOF = 6
+    UNKNOWN_COMMAND = 7
+    FILE_EXISTS = 8
+    FILE_PROTECTED = 9
+    FILE_NOT_FOUND = 10
+
+    NAMES = {
+        0: "None", 1: "Fail", 2: "FailErrno", 3: "InvalidDataSize", 4: "InvalidSession",
+        5: "NoSessionsAvailable", 6: "EOF", 7: "UnknownCommand", 8: "FileExists",
+        9: "FileProtected", 10: "FileNotFound",
+    }
+
+
+class FtpFailure(Exception):
+    """A transfer failed for a reason reported by the vehicle or a timeout."""
+
+
+class FtpPayload:
+    """One MAVLink FTP request or reply."""
+    __slots__ = ("seq", "session", "opcode", "size", "req_opcode", "burst_complete", "offset", "data")
+
+    def __init__(self, opcode, session=0, offset=0, data=b"", size=None, seq=0,
+                 req_opcode=OpCode.NONE, burst_complete=0):
+        self.seq = seq
+        self.session = session
+        self.opcode = opcode
+        self.size = len(data) if size is None else size
+        self.req_opcode = req_opcode
+        self.burst_complete = burst_complete
+        self.offset = offset
+        self.data = data
+
+    def pack(self):
+        """Returns the 251-byte payload field."""
+        header = HEADER.pack(self.seq, self.session, self.opcode, self.size,
+                             self.req_opcode, self.burst_complete, self.offset)
+        return (header + self.data).ljust(PAYLOAD_SIZE, b"\0")
+
+    @classmethod
+    def unpack(cls, payload):
+        raw = bytes(payload)
+        seq, session, opcode, size, req_opcode, burst_complete, offset = HEADER.unpack_from(raw)
+        size = min(size, MAX_DATA)
+        return cls(opcode, session, offset, raw[HEADER.size:HEADER.size + size], size, seq,
+                   req_opcode, burst_complete)
+
+    def error(self):
+        """NAK error code (FtpError)."""
+        return self.data[0] if self.data else FtpError.FAIL
+
+
+class FtpClient:
+    """
+    MAVLink FTP client sharing the vehicle link.
+
+    Replies arrive through handle_message() (a TelemetryManager message
+    listener) and are routed to the transfer they belong to: open replies by
+    sequence number, everything else by session id, so several downloads
+    can run at once. Requests go out as BULK traffic on the command scheduler.
+    """
+
+    def __init__(self, command_scheduler, target_system, target_component):
+        self.command_scheduler = command_scheduler
+        self.target_system = target_system
+        self.target_component = target_component
+        self._lock = threading.Lock()
+        self._seq = 0
+        self._by_reply_seq = {}  # Key: expected reply seq, Value: transfer (while opening)
+        self._by_session = {}  # Key: session id, Value: transfer
+
+    def next_seq(self):
+        with self._lock:
+            self._seq = (self._seq + 1) & 0xFFFF
+            return self._seq
+
+    def send(self, payload):
+        """Queues a request; returns the sequence number its reply will carry."""
+        data = list(payload.pack())
+        ts, tc = self.target_system, self.target_component
+        self.command_scheduler.send_message(
+            lambda mav: mav.file_transfer_protocol_encode(0, ts, tc, data), Priority.BULK)
+        return (payload.seq + 1) & 0xFFFF
+
+    def expect_reply(self, reply_seq, transfer):
+        with self._lock:
+            self._by_reply_seq[reply_seq] = transfer
+
+    def bind_session(self, session, transfer):
+        with self._lock:
+            self._by_session[session] = transfer
+            for seq in [s for s, t in self._by_reply_seq.items() if t is transfer]:
+                del self._by_reply_seq[seq]
+
+    def release(self, transfer):
+        with self._lock:
+            for table in (self._by_reply_seq, self._by_session):
+                for key in [k for k, t in table.items() if t is transfer]:
+                    del table[key]
+
+    def handle_message(self, msg):
+        """Receive-thread hook: routes FILE_TRANSFER_PROTOCOL replies."""
+        if msg.get_type() != 'FILE_TRANSFER_PROTOCOL':
+            return
+        if self.target_system and msg.get_srcSystem() != self.target_system:
+            return
+        reply = FtpPayload.unpack(msg.payload)
+        if reply.opcode not in (OpCode.ACK, OpCode.NAK):
+            return
+        with self._lock:
+            if reply.req_opcode == OpCode.OPEN_FILE_RO:
+                transfer = self._by_reply_seq.get(reply.seq)
+            else:
+                transfer = self._by_session.get(reply.session)
+        if transfer is not None:
+            transfer.post(reply)
+
+    def download(self, remote_path, local_path, on_progress=None, on_complete=None):
+        """Starts downloading a file in the background. Returns the FtpDownload."""
+        transfer = FtpDownload(self, remote_path, local_path, on_progress, on_complete)
+        transfer.start()
+        return transfer
+
+
+class FtpDownload(threading.Thread):
+    """
+    Reads one file over MAVLink FTP.
+
+    The bulk of the file is fetched with burst reads from the end of the
+    received data. Chunks lost from a burst leave holes below that point,
+    which are re-requested with individual ReadFile requests (up to
+    READ_WINDOW in flight) while the burst carries on. Every chunk is
+    written straight to its offset in a preallocated file.
+    """
+    REQUEST_TIMEOUT = 0.5  # seconds
+    MAX_RETRIES = 5  # consecutive timeouts without progress before giving up
+    READ_WINDOW = 8  # ReadFile requests in flight for hole filling
+    BURST_MIN = 4 * MAX_DATA  # Remaining tail worth a new burst rather than ReadFiles
+
+    def __init__(self, client, remote_path, local_path, on_progress=None, on_complete=None):
+        super().__init__(name="FtpDownload", daemon=True)
+        self.client = client
+        self.remote_path = remote_path
+        self.local_path = local_path
+        self.on_progress = on_progress  # Callable(bytes_received, size)
+        self.on_complete = on_complete  # Callable(success, message)
+        self._inbox = queue.Queue()
+        self._cancelled = False
+
+        self.session = None
+        self.size = None
+        self.received = IntervalSet()
+        self.retries = 0
+        self._file = None
+        self._open_request = None
+        self._burst_active = False
+        self._last_burst_packet = 0.0
+        self._reads = {}  # Key: reply seq, Value: (offset, length, sent_at)
+        self._started_at = None
+        self._finished_at = None
+
+    def post(self, reply):
+        self._inbox.put(reply)
+
+    def cancel(self):
+        self._cancelled = True
+        self._inbox.put(None)
+
+    # --- Requests ---
+
+    def _request(self, opcode, offset=0, data=b"", size=None):
+        payload = FtpPayload(opcode, self.session or 0, offset, data, size, seq=self.client.next_seq())
+        return self.client.send(payload)
+
+    def _open(self, retry=False):
+        # A retry reuses the sequence number: the vehicle then repeats its
+        # last reply instead of opening a second session
+        if not retry:
+            self._open_request = FtpPayload(OpCode.OPEN_FILE_RO, data=self.remote_path.encode() + b"\0",
+                                            seq=self.client.next_seq())
+        # Registered before sending: a fast reply could otherwise arrive first and be dropped
+        self.client.expect_reply((self._open_request.seq + 1) & 0xFFFF, self)
+        self.client.send(self._open_request)
+
+    def _start_burst(self, offset):
+        self._burst_active = True
+        self._last_burst_packet = time.monotonic()
+        self._request(OpCode.BURST_READ_FILE, offset, size=MAX_DATA)
+
+    def _read(self, offset, length):
+        reply_seq = self._request(OpCode.READ_FILE, offset, size=length)
+        self._reads[reply_seq] = (offset, length, time.monotonic())
+
+    def _schedule(self):
+        """Issues burst and hole-filling reads for whatever is still missing."""
+        tail = self.received.end()
+        if not self._burst_active and self.size - tail >= self.BURST_MIN:
+            self._start_burst(tail)
+        limit = tail if self._burst_active else self.size
+        in_flight = {offset for offset, _, _ in self._reads.values()}
+        for start, end in self.received.gaps(0, limit):
+            for offset in range(start, end, MAX_DATA):
+                if len(self._reads) >= self.READ_WINDOW:
+                    return
+                if offset not in in_flight:
+                    self._read(offset, min(MAX_DATA, end - offset))
+
+    # --- Replies ---
+
+    def _store(self, offset, data):
+        if not data or self.received.contains(offset, offset + len(data)):
+            return False
+        self._file.write_at(offset, data)
+        self.received.add(offset, offset + len(data))
+        if self.on_progress:
+            self.on_progress(self.received.covered(), self.size)
+        return True
+
+    def _handle_open(self, reply):
+        if reply.opcode == OpCode.NAK:
+            raise FtpFailure(f"Open {self.remote_path} failed: {FtpError.NAMES.get(reply.error(), reply.error())}")
+        self.session = reply.session
+        self.size = struct.unpack_from('<I', reply.data.ljust(4, b"\0"))[0]
+        self.client.bind_session(self.session, self)
+        self._file = OffsetFile(self.local_path, self.size)
+        logging.info(f"FTP: reading {self.remote_path} ({self.size} bytes, session {self.session})")
+
+    def _handle_data(self, reply):
+        """Returns True if the reply made progress."""
+        progress = False
+        if reply.req_opcode == OpCode.BURST_READ_FILE:
+            self._last_burst_packet = time.monotonic()
+            if reply.opcode == OpCode.ACK:
+                progress = self._store(reply.offset, reply.data)
+                if reply.burst_complete:
+                    self._burst_active = False
+            elif reply.error() == FtpError.EOF:
+                self._burst_active = False
+            else:
+                raise FtpFailure(f"Burst read failed: {FtpError.NAMES.get(reply.error(), reply.error())}")
+        elif reply.req_opcode == OpCode.READ_FILE:
+            self._reads.pop(reply.seq, None)
+            if reply.opcode == OpCode.ACK:
+                progress = self._store(reply.offset, reply.data)
+            elif reply.error() != FtpError.EOF:
+                raise FtpFailure(f"Read failed: {FtpError.NAMES.get(reply.error(), reply.error())}")
+        return progress
+
+    def _expire(self, now):
+        """Re-requests timed-out reads and notices a stalled burst. Returns True if anything expired."""
+        expired = False
+        if self._burst_active and now - self._last_burst_packet >= self.REQUEST_TIMEOUT:
+            self._burst_active = False  # Burst end (or the rest of it) was lost
+            expired = True
+        for reply_seq, (offset, length, sent_at) in list(self._reads.items()):
+            if now - sent_at >= self.REQUEST_TIMEOUT:
+                del self._reads[reply_seq]
+                expired = True
+        return expired
+
+    # --- Thread ---
+
+    def _complete(self):
+        return self.size is not None and self.received.covered() >= self.size
+
+    def run(self):
+        self._started_at = time.monotonic()
+        stalls = 0
+        result = None
+        try:
+            self._open()
+            last_progress = time.monotonic()
+            while not self._complete():
+                try:
+                    reply = self._inbox.get(timeout=self.REQUEST_TIMEOUT / 2)
+                except queue.Empty:
+                    reply = None
+                if self._cancelled:
+                    raise FtpFailure("Transfer cancelled")
+                now = time.monotonic()
+
+                if reply is not None:
+                    if self.session is None:
+                        if reply.req_opcode != OpCode.OPEN_FILE_RO:
+                            continue
+                        self._handle_open(reply)
+                        last_progress = now
+                        if self.size == 0:
+                            break
+                        self._schedule()
+                        continue
+                    if reply.session != self.session:
+                        continue
+                    if self._handle_data(reply):
+                        last_progress = now
+                        stalls = 0
+
+                if self.session is not None:
+                    if self._expire(now):
+                        self.retries += 1
+                    self._schedule()
+
+                if now - last_progress >= self.REQUEST_TIMEOUT:
+                    stalls += 1
+                    if stalls > self.MAX_RETRIES:
+                        raise FtpFailure(f"FTP read of {self.remote_path} timed out")
+                    if self.session is None:
+                        self.retries += 1
+                        self._open(retry=True)
+                    last_progress = now
+            result = (True, f"Downloaded {self.remote_path}")
+        except FtpFailure as e:
+            result = (False, str(e))
+        except OSError as e:
+            result = (False, f"Cannot write {self.local_path}: {e}")
+        except Exception as e:
+            logging.error(f"FTP: download of {self.remote_path} failed", exc_info=True)
+            result = (False, f"{type(e).__name__}: {e}")
+        finally:
+            self._finished_at = time.monotonic()
+            if self.session is not None:
+                self._request(OpCode.TERMINATE_SESSION)  # Best effort
+            self.client.release(self)
+            if self._file:
+                self._file.close()
+
+        success, message = result
+        stats = self.stats()
+        logging.info(f"FTP: {message}: {stats['bytes']} bytes in {stats['elapsed']:.2f}s "
+                     f"({stats['bytes_per_second'] / 1024:.1f} KiB/s, {self.retries} retries)")
+        if self.on_complete:
+            self.on_complete(success, message)
+
+    def stats(self):
+        """Returns bytes received, elapsed time, throughput and retry count."""
+        end = self._finished_at or time.monotonic()
+        elapsed = end - self._started_at if self._started_at else 0.0
+        received = self.received.covered()
+        return {
+            "path": self.remote_path,
+            "bytes": received,
+            "size": self.size,
+            "elapsed": elapsed,
+            "bytes_per_second": received / elapsed if elapsed > 0 else 0.0,
+            "retries": self.retries,
+        }
+
@@ -0,0 +1,398 @@
+# core/mavlink_router.py
+"""
+Built-in MAVLink router: forwards every frame received from the vehicle,
+byte for byte, to additional UDP/TCP endpoints and merges whatever those
+endpoints send back into the vehicle link, so other tools can share the
+GCS connection without a separate MAVProxy.
+
+Outputs are given as
+
+    udpout:HOST:PORT   send to HOST:PORT (e.g. another GCS listening there)
+    udpin:HOST:PORT    listen on HOST:PORT, send to whoever sent to it last
+    tcpin:HOST:PORT    accept TCP clients on HOST:PORT, each gets the stream
+    tcp:HOST:PORT      connect to a TCP server, reconnecting when it drops
+
+optionally followed by routing rules, e.g.
+
+    udpout:127.0.0.1:14560?sysid=1,2&msgs=HEARTBEAT,ATTITUDE,33&exclude=RC_CHANNELS
+
+Frames are forwarded from the receive thread as they are framed, without
+re-encoding. Each TCP client has its own bounded send buffer that the
+router thread flushes, so a client that stops reading only loses frames
+(counted in stats()) instead of holding up the receive loop; UDP sends
+never wait. Uplink traffic is reframed per endpoint and only complete,
+valid frames are written to the vehicle link.
+"""
+
+import logging
+import selectors
+import socket
+import threading
+import time
+import urllib.parse
+
+from pymavlink import mavutil
+
+from core.fast_decoder import FastDecoder
+
+mavlink = mavutil.mavlink
+
+KINDS = ("udpout", "udpin", "tcpin", "tcp")
+_COUNTERS = ("frames", "bytes", "dropped", "uplink")
+
+
+def _msg_ids(names):
+    """'HEARTBEAT,33' -> frozenset({0, 33})"""
+    ids = set()
+    for name in names.split(','):
+        name = name.strip()
+        if name.isdigit():
+            ids.add(int(name))
+            continue
+        msg_id = getattr(mavlink, f"MAVLINK_MSG_ID_{name.upper()}", None)
+        if msg_id is None:
+            raise ValueError(f"Unknown MAVLink message {name!r}")
+        ids.add(msg_id)
+    return frozenset(ids)
+
+
+class Route:
+    """Which frames an output gets: source systems and message ids (None for all) minus excluded ids."""
+    __slots__ = ("sysids", "msg_ids", "exclude")
+
+    def __init__(self, sysids=None, msg_ids=None, exclude=()):
+        self.sysids = None if sysids is None else frozenset(sysids)
+        self.msg_ids = None if msg_ids is None else frozenset(msg_ids)
+        self.exclude = frozenset(exclude)
+
+    def allows(self, sysid, msg_id):
+        return ((self.sysids is None or sysid in self.sysids) and
+                (self.msg_ids is None or msg_id in self.msg_ids) and msg_id not in self.exclude)
+
+    def __repr__(self):
+        return f"Route(sysids={self.sysids}, msg_ids={self.msg_ids}, exclude={set(self.exclude) or None})"
+
+
+def parse_output(spec):
+    """'udpout:127.0.0.1:14560?sysid=1' -> ('udpout', ('127.0.0.1', 14560), Route)"""
+    address, _, query = spec.partition('?')
+    try:
+        kind, host, port = address.split(':')
+        port = int(port)
+    except ValueError:
+        raise ValueError(f"Output must be KIND:HOST:PORT, got {spec!r}") from None
+    if kind not in KINDS:
+        raise ValueError(f"Unknown output kind {kind!r} (expected one of {', '.join(KINDS)})")
+    rules = {name: ','.join(values) for name, values in urllib.parse.parse_qs(query).items()}
+    unknown = rules.keys() - {"sysid", "msgs", "exclude"}
+    if unknown:
+        raise ValueError(f"Unknown routing rule(s) {sorted(unknown)} in {spec!r}")
+    route = Route(sysids=[int(s) for s in rules["sysid"].split(',')] if "sysid" in rules else None,
+                  msg_ids=_msg_ids(rules["msgs"]) if "msgs" in rules else None,
+                  exclude=_msg_ids(rules["exclude"]) if "exclude" in rules else ())
+    return kind, (host, port), route
+
+
+class _Peer:
+    """A TCP connection with its own bounded send buffer and uplink framer."""
+
+    def __init__(self, endpoint, sock):
+        self.endpoint = endpoint
+        self.sock = sock
+        self.buffer = bytearray()
+        self.lock = threading.Lock()  # Receive thread appends, router thread flushes
+        self.framer = FastDecoder({})
+        self.closed = False
+
+    def send(self, frame):
+        """Sends or buffers a frame; returns True if the router thread has to flush."""
+        with self.lock:
+            if self.closed:
+                return False
+            if self.buffer:
+                if len(self.buffer) + len(frame) > self.endpoint.buffer_size:
+                    self.endpoint.counts["dropped"] += 1
+                    return False
+                self.buffer += frame
+                return False  # Already waiting for the router thread
+            try:
+                sent = self.sock.send(frame)
+            except BlockingIOError:
+                sent = 0
+            except OSError:
+                self.closed = True
+                return True  # Router thread closes it
+            if sent < len(frame):
+                self.buffer += frame[sent:]
+                return True
+            return False
+
+    def flush(self):
+        """Router thread: sends what is buffered; returns True while data is left."""
+        with self.lock:
+            if self.closed or not self.buffer:
+                return False
+            try:
+                sent = self.sock.send(self.buffer)
+            except BlockingIOError:
+                return True
+            except OSError:
+                self.closed = True
+                return False
+            del self.buffer[:sent]
+            return bool(self.buffer)
+
+
+class Endpoint:
+    """One configured output with its routing rule and counters."""
+
+    def __init__(self, spec, kind, address, route, buffer_size):
+        self.spec = spec
+        self.kind = kind
+        self.address = address
+        self.route = route
+        self.buffer_size = buffer_size
+        self.sock = None  # UDP socket or TCP listening socket
+        self.peers = ()  # TCP connections (copy-on-write tuple)
+        self.udp_peer = address if kind == "udpout" else None  # udpin learns it from the first datagram
+        self.framer = FastDecoder({})  # UDP uplink
+        self.next_connect = 0.0  # tcp: monotonic time of the next connection attempt
+        self.counts = dict.fromkeys(_COUNTERS, 0)
+
+    def send(self, frame):
+        """Receive thread: forwards one frame; returns True if the router thread has to flush."""
+        counts = self.counts
+        if self.kind in ("udpout", "udpin"):
+            if self.udp_peer is None:
+                return False  # udpin: nobody to send to yet
+            counts["frames"] += 1
+            counts["bytes"] += len(frame)
+            try:
+                self.sock.sendto(frame, self.udp_peer)
+            except OSError:  # Includes a full socket buffer: UDP drops rather than waits
+                counts["dropped"] += 1
+            return False
+        if not self.peers:
+            return False
+        counts["frames"] += 1
+        counts["bytes"] += len(frame)
+        flush = False
+        for peer in self.peers:
+            flush |= peer.send(frame)
+        return flush
+
+
+class MavlinkRouter(threading.Thread):
+    """
+    Forwards received frames to the configured outputs and passes complete
+    frames received from them to `uplink` (e.g. CommandScheduler.send_raw).
+    forward() is called from the receive thread; socket setup, TCP
+    backlogs and uplink reads run on this thread.
+    """
+    BUFFER_SIZE = 256 * 1024  # Bytes buffered per TCP client before frames are dropped
+    RECONNECT_INTERVAL = 2.0  # seconds between attempts of a 'tcp' output
+    CONNECT_TIMEOUT = 1.0
+
+    def __init__(self, uplink=None, buffer_size=BUFFER_SIZE):
+        super().__init__(name="MavlinkRouter", daemon=True)
+        self.uplink = uplink
+        self.buffer_size = buffer_size
+        self.endpoints = ()  # Copy-on-write tuple read by forward() without locking
+        self._selector = selectors.DefaultSelector()
+        self._pending = set()  # Peers with buffered data
+        self._lock = threading.Lock()  # Guards _pending and endpoints changes
+        self._stop_event = threading.Event()
+        self._wake_r, self._wake_w = socket.socketpair()
+        self._wake_r.setblocking(False)
+        self._wake_w.setblocking(False)
+        self._selector.register(self._wake_r, selectors.EVENT_READ, self._on_wake)
+
+    def add_output(self, spec, sysids=None, msg_ids=None, exclude=()):
+        """
+        Adds an output from its spec; explicit rules replace those in the
+        spec. Binds UDP and listening sockets right away so errors surface
+        here. Returns the Endpoint.
+        """
+        kind, address, route = parse_output(spec)
+        if sysids is not None or msg_ids is not None or exclude:
+            route = Route(sysids, msg_ids, exclude)
+        endpoint = Endpoint(spec, kind, address, route, self.buffer_size)
+        if kind in ("udpout", "udpin"):
+            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, self.buffer_size)
+            if kind == "udpin":
+                sock.bind(address)
+            sock.setblocking(False)
+            endpoint.sock = sock
+            self._selector.register(sock, selectors.EVENT_READ, lambda events: self._read_udp(endpoint))
+        elif kind == "tcpin":
+            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            sock.bind(address)
+            sock.listen()
+            sock.setblocking(False)
+            endpoint.sock = sock
+            self._selector.register(sock, selectors.EVENT_READ, lambda events: self._accept(endpoint))
+        with self._lock:
+            self.endpoints += (endpoint,)
+        self._wake()
+        logging.info(f"Routing MAVLink to {spec} ({route})")
+        return endpoint
+
+    # --- Receive thread ---
+
+    def forward(self, sysid, msg_id, frame):
+        """Sends one received frame (bytes, bytearray or memoryview) to every output whose route allows it."""
+        flush = False
+        for endpoint in self.endpoints:
+            if endpoint.route.allows(sysid, msg_id):
+                flush |= endpoint.send(frame)
+        if flush:
+            with self._lock:
+                self._pending.update(peer for endpoint in self.endpoints for peer in endpoint.peers
+                                     if peer.buffer or peer.closed)
+            self._wake()
+
+    def forward_message(self, msg):
+        """forward() for a message parsed by pymavlink, using its received frame bytes."""
+        if msg.get_type() == 'BAD_DATA':
+            return
+        self.forward(msg.get_srcSystem(), msg.get_msgId(), msg.get_msgbuf())
+
+    # --- Router thread ---
+
+    def _wake(self):
+        try:
+            self._wake_w.send(b'\0')
+        except (BlockingIOError, OSError):
+            pass  # Already awake, or stopped
+
+    def _on_wake(self, events):
+        try:
+            while self._wake_r.recv(4096):
+                pass
+        except BlockingIOError:
+            pass
+
+    def _uplink(self, endpoint, framer, data):
+        for frame in framer.feed(data):
+            endpoint.counts["uplink"] += 1
+            if self.uplink is not None:
+                self.uplink(frame)
+
+    def _read_udp(self, endpoint):
+        try:
+            data, address = endpoint.sock.recvfrom(65536)
+        except (BlockingIOError, OSError):
+            return
+        if endpoint.kind == "udpin":
+            endpoint.udp_peer = address
+        self._uplink(endpoint, endpoint.framer, data)
+
+    def _accept(self, endpoint):
+        try:
+            sock, address = endpoint.sock.accept()
+        except (BlockingIOError, OSError):
+            return
+        self._add_peer(endpoint, sock)
+        logging.info(f"Router output {endpoint.spec}: client {address[0]}:{address[1]} connected")
+
+    def _add_peer(self, endpoint, sock):
+        sock.setblocking(False)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, self.buffer_size)  # Bounded backlog, fresh data
+        peer = _Peer(endpoint, sock)
+        self._selector.register(sock, selectors.EVENT_READ, lambda events: self._on_peer(peer, events))
+        with self._lock:
+            endpoint.peers += (peer,)
+
+    def _on_peer(self, peer, events):
+        if events & selectors.EVENT_WRITE and not peer.flush():
+            if peer.closed:
+                self._close_peer(peer)
+                return
+            self._selector.modify(peer.sock, selectors.EVENT_READ, self._selector.get_key(peer.sock).data)
+        if events & selectors.EVENT_READ:
+            try:
+                data = peer.sock.recv(65536)
+            except BlockingIOError:
+                return
+            except OSError:
+                data = b''
+            if not data:
+                self._close_peer(peer)
+                return
+            self._uplink(peer.endpoint, peer.framer, data)
+
+    def _close_peer(self, peer):
+        with peer.lock:
+            peer.closed = True
+        with self._lock:
+            peer.endpoint.peers = tuple(p for p in peer.endpoint.peers if p is not peer)
+            self._pending.discard(peer)
+        try:
+            self._selector.unregister(peer.sock)
+        except (KeyError, ValueError):
+            pass
+        peer.sock.close()
+        logging.info(f"Router output {peer.endpoint.spec}: connection closed")
+
+    def _connect(self, now):
+        """Opens the connection of 'tcp' outputs that have none."""
+        for endpoint in self.endpoints:
+            if endpoint.kind != "tcp" or endpoint.peers or now < endpoint.next_connect:
+                continue
+            endpoint.next_connect = now + self.RECONNECT_INTERVAL
+            try:
+                sock = socket.create_connection(endpoint.address, timeout=self.CONNECT_TIMEOUT)
+            except OSError as e:
+                logging.debug(f"Router output {endpoint.spec}: {e}")
+                continue
+            self._add_peer(endpoint, sock)
+            logging.info(f"Router output {endpoint.spec}: connected")
+
+    def run(self):
+        selector = self._selector
+        while not self._stop_event.is_set():
+            self._connect(time.monotonic())
+            with self._lock:
+                pending, self._pending = self._pending, set()
+            for peer in pending:
+                if peer.closed:
+                    self._close_peer(peer)
+                elif peer.flush():
+                    key = selector.get_key(peer.sock)
+                    selector.modify(peer.sock, selectors.EVENT_READ | selectors.EVENT_WRITE, key.data)
+            for key, events in selector.select(timeout=0.5):
+                key.data(events)
+        self._close()
+
+    def _close(self):
+        for endpoint in self.endpoints:
+            for peer in endpoint.peers:
+                with peer.lock:
+                    peer.closed = True
+                peer.sock.close()
+            if endpoint.sock is not None:
+                endpoint.sock.close()
+        self._selector.close()
+        self._wake_r.close()
+        self._wake_w.close()
+
+    def stop(self):
+        """Stops the router thread and closes all outputs."""
+        self._stop_event.set()
+        if self.ident is None:  # Never started
+            self._close()
+            return
+        self._wake()
+        self.join(timeout=2)
+
+    def stats(self):
+        """Per output: frames and bytes forwarded, frames dropped, uplink frames merged into the link."""
+        stats = {}
+        for endpoint in self.endpoints:
+            stats[endpoint.spec] = dict(endpoint.counts)
+            if endpoint.kind in ("tcpin", "tcp"):
+                stats[endpoint.spec]["clients"] = len(endpoint.peers)
+        return stats
@@ -0,0 +1,369 @@
+# core/mission.py
+
+import queue
+import threading
+import time
+import logging
+from array import array
+from pymavlink import mavutil
+
+from core.command_scheduler import Priority
+
+# MAVLink 1 dialects drop extension fields, so mission_type can only be sent
+# (and non-flight-plan missions transferred) with a MAVLink 2 dialect loaded
+HAS_MISSION_TYPE = 'mission_type' in mavutil.mavlink.MAVLink_mission_count_message.fieldnames
+
+
+def mission_type_args(mission_type):
+    """Trailing mission_type argument for *_encode() calls, if the dialect has it."""
+    if HAS_MISSION_TYPE:
+        return (mission_type,)
+    if mission_type != mavutil.mavlink.MAV_MISSION_TYPE_MISSION:
+        raise ValueError("Fence and rally transfers need a MAVLink 2 dialect (set MAVLINK20=1)")
+    return ()
+
+
+class MissionTable:
+    """
+    Mission items stored column-wise in typed arrays (about 40 bytes per
+    item), indexed by sequence number. Coordinates are kept as MAVLink
+    INT-protocol integers (degrees * 1e7).
+    """
+    COLUMNS = (
+        ("frame", "B"), ("command", "H"), ("current", "B"), ("autocontinue", "B"),
+        ("param1", "f"), ("param2", "f"), ("param3", "f"), ("param4", "f"),
+        ("x", "i"), ("y", "i"), ("z", "f"),
+    )
+
+    def __init__(self, count=0, mission_type=mavutil.mavlink.MAV_MISSION_TYPE_MISSION):
+        self.mission_type = mission_type
+        self._columns = {name: array(code, [0]) * count for name, code in self.COLUMNS}
+
+    def __len__(self):
+        return len(self._columns["command"])
+
+    def __getitem__(self, seq):
+        if not 0 <= seq < len(self):
+            raise IndexError(f"Mission item {seq} out of range")
+        return {name: column[seq] for name, column in self._columns.items()}
+
+    def __eq__(self, other):
+        return (isinstance(other, MissionTable) and self.mission_type == other.mission_type
+                and self._columns == other._columns)
+
+    def append(self, command, x=0, y=0, z=0.0, frame=mavutil.mavlink.MAV_FRAME_GLOBAL_RELATIVE_ALT_INT,
+               params=(0, 0, 0, 0), current=0, autocontinue=1):
+        """Appends an item with raw INT-protocol coordinates. Returns its sequence number."""
+        values = (frame, command, current, autocontinue) + tuple(params) + (x, y, z)
+        for (name, _), value in zip(self.COLUMNS, values):
+            self._columns[name].append(value)
+        return len(self) - 1
+
+    def add_waypoint(self, lat, lon, alt, command=mavutil.mavlink.MAV_CMD_NAV_WAYPOINT, params=(0, 0, 0, 0)):
+        """Appends a navigation item at lat/lon (degrees) and altitude (m, relative)."""
+        return self.append(command, int(round(lat * 1e7)), int(round(lon * 1e7)), alt, params=params)
+
+    def item_message(self, mav, target_system, target_component, seq):
+        """Encodes item `seq` as a MISSION_ITEM_INT."""
+        c = self._columns
+        return mav.mission_item_int_encode(
+            target_system, target_component, seq,
+            c["frame"][seq], c["command"][seq], c["current"][seq], c["autocontinue"][seq],
+            c["param1"][seq], c["param2"][seq], c["param3"][seq], c["param4"][seq],
+            c["x"][seq], c["y"][seq], c["z"][seq], *mission_type_args(self.mission_type)
+        )
+
+    def store_message(self, msg):
+        """Stores a received MISSION_ITEM_INT at its sequence number."""
+        seq = msg.seq
+        for name, column in self._columns.items():
+            column[seq] = getattr(msg, name)
+
+
+class MissionTransfer(threading.Thread):
+    """
+    Uploads or downloads one mission over the MISSION_ITEM_INT protocol.
+
+    Messages are fed in from the receive thread with handle_message() and
+    processed on this thread; outbound messages are queued on the command
+    scheduler as BULK traffic, so commands still overtake a transfer.
+
+    Upload is driven by the vehicle's MISSION_REQUEST_INTs, each answered as
+    soon as it arrives. Download keeps a window of MISSION_REQUEST_INTs in
+    flight and, on timeout, re-requests only the sequence numbers still
+    missing.
+
+    Timeouts adapt to the link: a smoothed round-trip estimate (from
+    first-attempt exchanges only) sets the timeout to a few RTTs, bounded
+    by MIN_TIMEOUT and ITEM_TIMEOUT, so a lost frame on a fast link costs
+    little while a slow radio is not flooded with duplicates.
+    """
+    UPLOAD = "upload"
+    DOWNLOAD = "download"
+
+    ITEM_TIMEOUT = 0.6  # seconds before an outstanding request is repeated (upper bound)
+    MIN_TIMEOUT = 0.15  # seconds; lower bound for the adaptive timeout
+    RTT_MULTIPLIER = 4
+    MAX_RETRIES = 5  # consecutive timeouts without progress before giving up
+    DOWNLOAD_WINDOW = 6  # MISSION_REQUEST_INTs kept in flight
+
+    def __init__(self, direction, command_scheduler, target_system, target_component,
+                 table=None, mission_type=mavutil.mavlink.MAV_MISSION_TYPE_MISSION,
+                 on_progress=None, on_complete=None):
+        super().__init__(name=f"Mission{direction.capitalize()}", daemon=True)
+        self.direction = direction
+        self.command_scheduler = command_scheduler
+        self.target_system = target_system
+        self.target_component = target_component
+        self.table = table if table is not None else MissionTable(mission_type=mission_type)
+        self.mission_type = self.table.mission_type
+        self._type_args = mission_type_args(self.mission_type)
+        self.on_progress = on_progress  # Callable(done, total)
+        self.on_complete = on_complete  # Callable(success, message)
+        self._inbox = queue.Queue()
+        self._cancelled = False
+
+        self.total = len(self.table) if direction == self.UPLOAD else None
+        self.done = 0
+        self.retries = 0
+        self._stall_retries = 0
+        self._started_at = None
+        self._finished_at = None
+        self._last_activity = None
+        self._srtt = None  # Smoothed round-trip time (s)
+
+        # Upload state
+        self._sent = None  # bytearray: item sent at least once
+        self._last_requested = None
+        self._item_sent = None  # (seq, monotonic time) of the last first-time item sent
+        # Download state
+        self._received = None  # bytearray: item stored
+        self._outstanding = {}  # Key: seq, Value: monotonic request time
+        self._rerequested = set()  # Seqs requested more than once (no RTT samples)
+        self._next_seq = 0  # Lowest sequence never requested
+
+    # --- Called from other threads ---
+
+    def handle_message(self, msg):
+        """Receive-thread hook: forwards this transfer's MISSION_* messages."""
+        msg_type = msg.get_type()
+        if msg_type not in ('MISSION_REQUEST_INT', 'MISSION_REQUEST', 'MISSION_ITEM_INT',
+                            'MISSION_COUNT', 'MISSION_ACK'):
+            return
+        if self.target_system and msg.get_srcSystem() != self.target_system:
+            return
+        if getattr(msg, 'mission_type', self.mission_type) != self.mission_type:
+            return
+        self._inbox.put(msg)
+
+    def cancel(self):
+        self._cancelled = True
+        self._inbox.put(None)
+
+    # --- Sending ---
+
+    def _send(self, build):
+        ts, tc = self.target_system, self.target_component
+        self.command_scheduler.send_message(lambda mav: build(mav, ts, tc), Priority.BULK)
+
+    def _send_count(self):
+        self._send(lambda mav, ts, tc: mav.mission_count_encode(ts, tc, self.total, *self._type_args))
+
+    def _send_item(self, seq):
+        self._send(lambda mav, ts, tc: self.table.item_message(mav, ts, tc, seq))
+
+    def _send_request_list(self):
+        self._send(lambda mav, ts, tc: mav.mission_request_list_encode(ts, tc, *self._type_args))
+
+    def _send_request(self, seq):
+        if seq in self._outstanding:
+            self._rerequested.add(seq)
+        self._outstanding[seq] = time.monotonic()
+        self._send(lambda mav, ts, tc: mav.mission_request_int_encode(ts, tc, seq, *self._type_args))
+
+    def _send_ack(self, result):
+        self._send(lambda mav, ts, tc: mav.mission_ack_encode(ts, tc, result, *self._type_args))
+
+    # --- Upload ---
+
+    def _handle_upload(self, msg):
+        msg_type = msg.get_type()
+        if msg_type in ('MISSION_REQUEST_INT', 'MISSION_REQUEST'):
+            seq = msg.seq
+            if not 0 <= seq < self.total:
+                return None
+            if self._item_sent and self._item_sent[0] == seq - 1:
+                self._rtt_sample(time.monotonic() - self._item_sent[1])
+            first = not self._sent[seq]
+            if first:
+                self._sent[seq] = 1
+                self.done += 1
+                self._progress()
+            self._item_sent = (seq, time.monotonic()) if first else None
+            self._last_requested = seq
+            self._send_item(seq)
+            return None
+        if msg_type == 'MISSION_ACK':
+            if msg.type == mavutil.mavlink.MAV_MISSION_ACCEPTED:
+                self.done = self.total
+                return True, "Mission uploaded"
+            return False, f"Vehicle rejected mission: {self._ack_name(msg.type)}"
+        return None
+
+    def _upload_timeout(self):
+        self._item_sent = None  # Whatever answers next is not an RTT sample
+        if self._last_requested is None:
+            self._send_count()
+        else:
+            self._send_item(self._last_requested)
+
+    # --- Download ---
+
+    def _fill_window(self):
+        while len(self._outstanding) < self.DOWNLOAD_WINDOW and self._next_seq < self.total:
+            seq = self._next_seq
+            self._next_seq += 1
+            if not self._received[seq]:
+                self._send_request(seq)
+
+    def _handle_download(self, msg):
+        msg_type = msg.get_type()
+        if msg_type == 'MISSION_COUNT' and self.total is None:
+            self.total = msg.count
+            self.table = MissionTable(msg.count, self.mission_type)
+            self._received = bytearray(msg.count)
+            if msg.count == 0:
+                self._send_ack(mavutil.mavlink.MAV_MISSION_ACCEPTED)
+                return True, "Vehicle has no mission"
+            self._fill_window()
+            return None
+        if msg_type == 'MISSION_ITEM_INT' and self.total is not None:
+            seq = msg.seq
+            if not 0 <= seq < self.total:
+                return None
+            requested_at = self._outstanding.pop(seq, None)
+            if requested_at is not None and seq not in self._rerequested:
+                self._rtt_sample(time.monotonic() - requested_at)
+            if not self._received[seq]:
+                self.table.store_message(msg)
+                self._received[seq] = 1
+                self.done += 1
+                self._progress()
+            if self.done == self.total:
+                self._send_ack(mavutil.mavlink.MAV_MISSION_ACCEPTED)
+                return True, "Mission downloaded"
+            self._fill_window()
+            return None
+        if msg_type == 'MISSION_ACK':
+            return False, f"Vehicle aborted download: {self._ack_name(msg.type)}"
+        return None
+
+    def _download_timeout(self):
+        """Repeats the list request, or re-requests outstanding items that timed out."""
+        if self.total is None:
+            self._send_request_list()
+            return
+        self._expire_requests(time.monotonic())
+
+    def _expire_requests(self, now):
+        for seq, requested_at in list(self._outstanding.items()):
+            if now - requested_at >= self._timeout():
+                self.retries += 1
+                self._send_request(seq)  # Only items still missing are outstanding
+
+    def _next_deadline(self):
+        timeout = self._timeout()
+        deadline = self._last_activity + timeout
+        if self._outstanding:
+            deadline = min(deadline, min(self._outstanding.values()) + timeout)
+        return deadline
+
+    # --- Timing ---
+
+    def _rtt_sample(self, rtt):
+        self._srtt = rtt if self._srtt is None else 0.875 * self._srtt + 0.125 * rtt
+
+    def _timeout(self):
+        if self._srtt is None:
+            return self.ITEM_TIMEOUT
+        return min(self.ITEM_TIMEOUT, max(self.MIN_TIMEOUT, self.RTT_MULTIPLIER * self._srtt))
+
+    # --- Thread ---
+
+    @staticmethod
+    def _ack_name(result):
+        entry = mavutil.mavlink.enums['MAV_MISSION_RESULT'].get(result)
+        return entry.name if entry else str(result)
+
+    def _progress(self):
+        self._stall_retries = 0
+        if self.on_progress:
+            self.on_progress(self.done, self.total)
+
+    def run(self):
+        self._started_at = self._last_activity = time.monotonic()
+        if self.direction == self.UPLOAD:
+            self._sent = bytearray(self.total)
+            self._send_count()
+        else:
+            self._send_request_list()
+
+        result = None
+        while result is None:
+            try:
+                msg = self._inbox.get(timeout=max(0.0, self._next_deadline() - time.monotonic()))
+            except queue.Empty:
+                msg = None
+            if self._cancelled:
+                result = (False, "Transfer cancelled")
+                break
+            now = time.monotonic()
+            if msg is not None:
+                self._last_activity = now
+                if self.direction == self.UPLOAD:
+                    result = self._handle_upload(msg)
+                else:
+                    result = self._handle_download(msg)
+                    if result is None:
+                        self._expire_requests(now)  # Lost items must not clog the window
+                continue
+            if now - self._last_activity < self._timeout():
+                self._expire_requests(now)
+                continue
+
+            # Nothing arrived for a whole timeout period
+            self._stall_retries += 1
+            if self._stall_retries > self.MAX_RETRIES:
+                result = (False, f"Mission {self.direction} timed out at item {self.done}/{self.total}")
+                break
+            logging.debug(f"Mission {self.direction}: no response, retry {self._stall_retries}")
+            if self.direction == self.UPLOAD:
+                self.retries += 1
+                self._upload_timeout()
+            else:
+                if self.total is None:
+                    self.retries += 1
+                self._download_timeout()
+            self._last_activity = now
+
+        self._finished_at = time.monotonic()
+        success, message = result
+        stats = self.stats()
+        logging.info(f"{message}: {self.done}/{self.total} items in {stats['elapsed']:.2f}s "
+                     f"({stats['items_per_second']:.1f} items/s, {self.retries} retries)")
+        if self.on_complete:
+            self.on_complete(success, message)
+
+    def stats(self):
+        """Returns progress, elapsed time, transfer rate and retry count."""
+        end = self._finished_at or time.monotonic()
+        elapsed = end - self._started_at if self._started_at else 0.0
+        return {
+            "direction": self.direction,
+            "done": self.done,
+            "total": self.total,
+            "elapsed": elapsed,
+            "items_per_second": self.done / elapsed if elapsed > 0 else 0.0,
+            "retries": self.retries,
+            "rtt_ms": self._srtt * 1000.0 if self._srtt is not None else None,
+        }
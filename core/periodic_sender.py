@@ -0,0 +1,180 @@
+# core/periodic_sender.py
+
+import heapq
+import itertools
+import threading
+import time
+import logging
+from collections import deque
+from pymavlink import mavutil
+
+
+def gcs_heartbeat(master):
+    """HEARTBEAT identifying this station as a GCS."""
+    return master.mav.heartbeat_encode(
+        mavutil.mavlink.MAV_TYPE_GCS, mavutil.mavlink.MAV_AUTOPILOT_INVALID,
+        0, 0, mavutil.mavlink.MAV_STATE_ACTIVE
+    )
+
+
+_BOOT_TIME = time.monotonic()
+
+
+def system_time(master):
+    """SYSTEM_TIME with the wall clock (us) and time since start (ms)."""
+    return master.mav.system_time_encode(
+        int(time.time() * 1e6), int((time.monotonic() - _BOOT_TIME) * 1000) & 0xFFFFFFFF
+    )
+
+
+class ManualControl:
+    """
+    MANUAL_CONTROL keep-alive builder holding the current stick values
+    (x, y, r in -1000..1000, z in 0..1000). Defaults to centred sticks and
+    mid throttle. Only register it when the GCS is meant to be flying the
+    vehicle: the autopilot treats these as pilot inputs.
+    """
+
+    def __init__(self):
+        self._axes = (0, 0, 500, 0, 0)  # x, y, z, r, buttons
+
+    def set_axes(self, x=0, y=0, z=500, r=0, buttons=0):
+        self._axes = (int(x), int(y), int(z), int(r), int(buttons))  # Single assignment: no lock needed
+
+    def __call__(self, master):
+        x, y, z, r, buttons = self._axes
+        return master.mav.manual_control_encode(master.target_system, x, y, z, r, buttons)
+
+
+class PeriodicTask:
+    """One periodic message and its timing statistics."""
+    JITTER_WINDOW = 200  # samples kept for statistics
+
+    def __init__(self, name, interval, builder):
+        self.name = name
+        self.interval = interval
+        self.builder = builder
+        self.deadline = None
+        self.sent = 0
+        self.missed = 0  # Deadlines skipped because the sender fell behind
+        self.jitter = deque(maxlen=self.JITTER_WINDOW)  # Seconds late per send
+
+    def stats(self):
+        samples = sorted(self.jitter)
+        return {
+            "interval_ms": self.interval * 1000.0,
+            "sent": self.sent,
+            "missed": self.missed,
+            "jitter_ms_mean": sum(samples) / len(samples) * 1000.0 if samples else None,
+            "jitter_ms_p99": samples[min(len(samples) - 1, int(len(samples) * 0.99))] * 1000.0 if samples else None,
+            "jitter_ms_max": samples[-1] * 1000.0 if samples else None,
+        }
+
+
+class PeriodicSender(threading.Thread):
+    """
+    Sends periodic outbound messages (GCS heartbeat, SYSTEM_TIME, optional
+    MANUAL_CONTROL) from its own thread on monotonic deadlines.
+
+    Deadlines advance by exactly one interval per send, so there is no
+    cumulative drift; if the sender falls more than an interval behind, the
+    missed deadlines are skipped (and counted) rather than sent in a burst.
+    Messages go out through CommandScheduler.send_immediate(), which shares
+    the transport lock with the scheduler thread.
+    """
+
+    def __init__(self, command_scheduler, clock=time.monotonic):
+        super().__init__(name="PeriodicSender", daemon=True)
+        self.command_scheduler = command_scheduler
+        self._clock = clock
+        self._cond = threading.Condition()
+        self._tasks = {}  # Key: name, Value: PeriodicTask
+        self._heap = []  # (deadline, seq, task)
+        self._seq = itertools.count()
+        self._running = True
+
+    def add(self, name, rate_hz, builder):
+        """
+        Registers (or replaces) a periodic message.
+
+        Args:
+            name: Task name used for remove() and statistics.
+            rate_hz: Send rate.
+            builder: Callable taking the mavutil connection and returning a message.
+        """
+        task = PeriodicTask(name, 1.0 / rate_hz, builder)
+        with self._cond:
+            self._tasks[name] = task
+            task.deadline = self._clock()
+            heapq.heappush(self._heap, (task.deadline, next(self._seq), task))
+            self._cond.notify()
+        return task
+
+    def remove(self, name):
+        """Stops sending a periodic message."""
+        with self._cond:
+            self._tasks.pop(name, None)  # Stale heap entries are dropped when popped
+            self._cond.notify()
+
+    def _send(self, task):
+        master = self.command_scheduler.master
+        if master is None:
+            return False
+        try:
+            return self.command_scheduler.send_immediate(task.builder(master))
+        except Exception as e:
+            logging.error(f"Error sending periodic {task.name}: {type(e).__name__}: {e}")
+            return False
+
+    def run(self):
+        logging.info("Periodic sender started.")
+        with self._cond:
+            while self._running:
+                if not self._heap:
+                    self._cond.wait()
+                    continue
+                deadline, _, task = self._heap[0]
+                if self._tasks.get(task.name) is not task:
+                    heapq.heappop(self._heap)  # Removed or replaced
+                    continue
+                now = self._clock()
+                if now < deadline:
+                    self._cond.wait(deadline - now)
+                    continue
+                heapq.heappop(self._heap)
+
+                self._cond.release()
+                try:
+                    sent = self._send(task)
+                    sent_at = self._clock()
+                finally:
+                    self._cond.acquire()
+
+                if sent:
+                    task.sent += 1
+                    task.jitter.append(sent_at - deadline)
+                next_deadline = deadline + task.interval
+                if next_deadline <= sent_at:
+                    skipped = int((sent_at - next_deadline) // task.interval) + 1
+                    task.missed += skipped
+                    next_deadline += skipped * task.interval
+                task.deadline = next_deadline
+                heapq.heappush(self._heap, (next_deadline, next(self._seq), task))
+        logging.info("Periodic sender stopped.")
+
+    def stop(self):
+        with self._cond:
+            self._running = False
+            self._cond.notify()
+
+    def stats(self):
+        """Returns per-task send counts and jitter statistics."""
+        with self._cond:
+            return {name: task.stats() for name, task in self._tasks.items()}
+
+    def log_stats(self):
+        for name, s in self.stats().items():
+            if s["sent"]:
+                logging.info(f"Periodic {name}: {s['sent']} sent, {s['missed']} missed, "
+                             f"jitter mean {s['jitter_ms_mean']:.2f} ms, p99 {s['jitter_ms_p99']:.2f} ms, "
+                             f"max {s['jitter_ms_max']:.2f} ms")
@@ -0,0 +1,279 @@
+# core/shm_ring.py
+"""
+Shared-memory telemetry ring for consumers in other processes.
+
+The telemetry thread writes every telemetry message it decodes into a
+`multiprocessing.shared_memory` block (see TelemetryManager.start_ring).
+Any number of local processes attach to it by name and read the records
+in place, without pipes or serialization, at their own pace.
+
+Layout of the block:
+
+    header (HEADER_SIZE bytes)
+        magic, version, record size, capacity
+        head: number of records written so far
+        schema length, writer process ID
+        schema: JSON list of [message type, [field names]]
+    capacity records of RECORD_SIZE bytes (RECORD_DTYPE)
+        seq, timestamp, message type code, sysid, compid, value count,
+        values: the MAVLink fields listed in the schema, in wire units,
+        as float64 (NaN past `count`)
+
+Each record slot is a seqlock. Writing record n sets its seq to 2n+1, then
+fills the slot and sets seq to 2n+2; a reader copies a batch of slots and
+keeps only those whose seq is 2n+2 both before and after the copy. Slots
+that were being overwritten while a slow reader copied them are dropped
+and counted in RingReader.lost, as are records the writer lapped before
+the reader got to them. There is a single writer; readers never write.
+A writer only replaces an existing ring of the same name if the process
+that created it is gone, so each GCS instance needs its own ring name.
+
+    python -m core.shm_ring [NAME] [--types ATTITUDE,VFR_HUD]
+
+prints the records of a running GCS as they arrive.
+"""
+
+import argparse
+import json
+import logging
+import os
+import struct
+import sys
+import threading
+import time
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+
+DEFAULT_NAME = "gcs_telemetry"
+MAGIC = b"GCSRING1"
+VERSION = 2
+HEADER_SIZE = 4096
+MAX_VALUES = 8
+RECORD_DTYPE = np.dtype({
+    'names': ['seq', 'timestamp', 'code', 'sysid', 'compid', 'count', 'values'],
+    'formats': ['<u8', '<f8', '<u2', 'u1', 'u1', 'u1', ('<f8', MAX_VALUES)],
+    'offsets': [0, 8, 16, 18, 19, 20, 32],
+    'itemsize': 96,
+})
+RECORD_SIZE = RECORD_DTYPE.itemsize
+_HEADER = struct.Struct('<8s2I2Q2I')  # magic, version, record size, capacity, head, schema length, writer pid
+_HEAD_OFFSET = 24
+_U64 = struct.Struct('<Q')
+_BODY = struct.Struct(f'<dHBBB11x{MAX_VALUES}d')  # Record after seq
+_NAN = (float('nan'),) * MAX_VALUES
+
+
+def _attach(name):
+    """Opens an existing block without letting this process's resource tracker unlink it at exit."""
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    register = resource_tracker.register
+    resource_tracker.register = lambda name, rtype: None  # Before 3.13 attaching also registers the block
+    try:
+        return shared_memory.SharedMemory(name=name)
+    finally:
+        resource_tracker.register = register
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True  # Exists, but belongs to another user
+    return True
+
+
+def ring_owner(name):
+    """PID of the live process writing ring `name`, or None if the block is not a ring or its writer is gone."""
+    try:
+        shm = _attach(name)
+    except FileNotFoundError:
+        return None
+    try:
+        if shm.size < _HEADER.size:
+            return None
+        magic, version, _, _, _, _, pid = _HEADER.unpack_from(shm.buf, 0)
+    finally:
+        shm.close()
+    if magic != MAGIC or version != VERSION or not pid:
+        return None
+    return pid if _pid_alive(pid) else None
+
+
+class RingWriter:
+    """
+    Creates the ring and appends records to it. `schema` maps message
+    types to the names of the fields written for them (at most MAX_VALUES).
+    Writes after close() are ignored. Raises FileExistsError if a live
+    process already writes a ring of that name.
+    """
+
+    def __init__(self, schema, name=DEFAULT_NAME, capacity=65536):
+        self.types = list(schema)
+        self.codes = {msg_type: code for code, msg_type in enumerate(self.types)}
+        for msg_type, fields in schema.items():
+            if len(fields) > MAX_VALUES:
+                raise ValueError(f"{msg_type} has {len(fields)} fields; records hold {MAX_VALUES}")
+        schema_json = json.dumps([[msg_type, list(fields)] for msg_type, fields in schema.items()]).encode()
+        if _HEADER.size + len(schema_json) > HEADER_SIZE:
+            raise ValueError("Schema does not fit in the ring header")
+
+        self.capacity = capacity
+        size = HEADER_SIZE + capacity * RECORD_SIZE
+        try:
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        except FileExistsError:
+            owner = ring_owner(name)
+            if owner is not None:
+                raise FileExistsError(f"Shared memory ring '{name}' is in use by process {owner}") from None
+            # Left behind by a GCS that did not shut down cleanly
+            logging.warning(f"Replacing stale shared memory ring '{name}'")
+            stale = shared_memory.SharedMemory(name=name)
+            stale.close()
+            stale.unlink()
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        self.name = self.shm.name
+        self._buf = self.shm.buf
+        self._buf[_HEADER.size:_HEADER.size + len(schema_json)] = schema_json
+        # Magic last: readers reject a half-initialized header
+        _HEADER.pack_into(self._buf, 0, b"\0" * 8, VERSION, RECORD_SIZE, capacity, 0, len(schema_json), os.getpid())
+        self._buf[:8] = MAGIC
+        self.head = 0
+        self._lock = threading.Lock()  # Keeps close() from unmapping the block mid-write
+
+    def write(self, msg_type, sysid, compid, timestamp, values):
+        with self._lock:
+            buf = self._buf
+            if buf is None:
+                return
+            n = self.head
+            offset = HEADER_SIZE + (n % self.capacity) * RECORD_SIZE
+            _U64.pack_into(buf, offset, 2 * n + 1)
+            _BODY.pack_into(buf, offset + 8, timestamp, self.codes[msg_type], sysid, compid, len(values),
+                            *values, *_NAN[len(values):])
+            _U64.pack_into(buf, offset, 2 * n + 2)
+            self.head = n + 1
+            _U64.pack_into(buf, _HEAD_OFFSET, n + 1)
+
+    def close(self):
+        """Releases and removes the ring; attached readers keep their mapping."""
+        with self._lock:
+            if self.shm is None:
+                return
+            self._buf = None
+            self.shm.close()
+            self.shm.unlink()
+            self.shm = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class RingReader:
+    """
+    Attaches to a ring by name. read() returns the records written since
+    the previous call as a RECORD_DTYPE array; records the reader missed
+    are counted in `lost`. `records` is the live, zero-copy view of all
+    slots for consumers that only sample the latest values.
+    """
+
+    def __init__(self, name=DEFAULT_NAME, start="latest"):
+        self.shm = _attach(name)
+        buf = self.shm.buf
+        magic, version, record_size, capacity, head, schema_len, _ = _HEADER.unpack_from(buf, 0)
+        if magic != MAGIC or version != VERSION or record_size != RECORD_SIZE:
+            self.shm.close()
+            raise ValueError(f"'{name}' is not a version {VERSION} telemetry ring")
+        self.capacity = capacity
+        self.schema = [(msg_type, tuple(fields)) for msg_type, fields in
+                       json.loads(bytes(buf[_HEADER.size:_HEADER.size + schema_len]))]
+        self.codes = {msg_type: code for code, (msg_type, _) in enumerate(self.schema)}
+        self._head = np.ndarray((1,), '<u8', buf, _HEAD_OFFSET)
+        self.records = np.ndarray((capacity,), RECORD_DTYPE, buf, HEADER_SIZE)
+        self.next = int(self._head[0]) if start == "latest" else max(0, int(self._head[0]) - capacity)
+        self.lost = 0
+
+    @property
+    def head(self):
+        """Records written so far."""
+        return int(self._head[0])
+
+    def read(self, max_records=None):
+        head = self.head
+        oldest = head - self.capacity
+        if self.next < oldest:  # Lapped by the writer
+            self.lost += oldest - self.next
+            self.next = oldest
+        count = head - self.next
+        if max_records is not None:
+            count = min(count, max_records)
+        if count <= 0:
+            return np.empty(0, RECORD_DTYPE)
+        numbers = np.arange(self.next, self.next + count, dtype=np.uint64)
+        slots = numbers % np.uint64(self.capacity)
+        batch = self.records[slots]  # Copy
+        expected = 2 * numbers + 2
+        valid = (batch['seq'] == expected) & (self.records['seq'][slots] == expected)
+        self.next += count
+        if not valid.all():
+            self.lost += count - int(valid.sum())
+            batch = batch[valid]
+        return batch
+
+    def messages(self, batch):
+        """
+        Record dicts of a batch: the named fields plus type, timestamp,
+        sysid and compid (which win over fields of the same name, such as
+        HEARTBEAT's `type`; those are still in batch['values']).
+        """
+        for _, timestamp, code, sysid, compid, count, values in batch.tolist():
+            msg_type, names = self.schema[code]
+            message = dict(zip(names, values.tolist()[:count]))
+            message.update(type=msg_type, timestamp=timestamp, sysid=sysid, compid=compid)
+            yield message
+
+    def close(self):
+        if self.shm is None:
+            return
+        del self._head, self.records  # Views must go before the mapping
+        self.shm.close()
+        self.shm = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Print the records of a shared-memory telemetry ring")
+    parser.add_argument('name', nargs='?', default=DEFAULT_NAME, help="Ring name")
+    parser.add_argument('--types', help="Comma-separated message types to print")
+    parser.add_argument('--interval', type=float, default=0.05, help="Seconds between polls")
+    args = parser.parse_args(argv)
+    types = set(args.types.split(',')) if args.types else None
+    with RingReader(args.name) as reader:
+        lost = 0
+        try:
+            while True:
+                for message in reader.messages(reader.read()):
+                    if types is None or message["type"] in types:
+                        print(message)
+                if reader.lost != lost:
+                    print(f"-- {reader.lost - lost} records lost", file=sys.stderr)
+                    lost = reader.lost
+                time.sleep(args.interval)
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
@@ -10,6 +10,7 @@ class SignalManager(QObject):
     
     # Connection signals
     connection_request = Signal(str, int)  # Data: conn_string, baud
+    auto_connect_request = Signal(list, list)  # Data: conn_strings, bauds to probe
     disconnect_request = Signal()  # No data
     reconnect_request = Signal()  # No data
     
@@ -17,9 +18,22 @@ class SignalManager(QObject):
     connection_status_changed = Signal(str, str)  # Data: status, message
     status_text_received = Signal(str, int)  # Data: text, severity
     
-    # Command signals (for future use)
+    # Mission signals
+    mission_progress = Signal(str, int, int)  # Data: 'upload'/'download', items done, total
+    mission_transfer_complete = Signal(str, bool, str)  # Data: 'upload'/'download', success, message
+    
+    # File transfer signals
+    file_transfer_progress = Signal(str, int, int)  # Data: remote path, bytes received, file size
+    file_transfer_complete = Signal(str, bool, str)  # Data: remote path, success, message
+    log_list_received = Signal(list)  # Data: list of LogEntry
+    log_download_progress = Signal(int, int, int, float, float)  # Data: log id, bytes, size, bytes/s, ETA s (-1 = unknown)
+    log_download_complete = Signal(int, bool, str)  # Data: log id, success, message
+    
+    # Command signals
     arm_request = Signal()  # No data
     disarm_request = Signal()  # No data
+    mode_change_request = Signal(str)  # Data: flight mode name
+    command_result = Signal(int, int, float)  # Data: MAV_CMD id, MAV_RESULT (-1 = timeout), round-trip ms
     
     def __init__(self):
         super().__init__()
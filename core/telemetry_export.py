@@ -0,0 +1,358 @@
+# core/telemetry_export.py
+"""
+Columnar telemetry store: one column per telemetry field over a shared
+time index, written in chunks.
+
+A store is a directory holding chunk_NNNNNN.npz files and a manifest.json
+that lists the chunks (rows, time range) and the columns with their kind.
+Each chunk is an .npz with a `time` array and one array per column present
+in it; rows where a field was not updated are NaN (or '' for text).
+
+Chunks are written with zlib compression by default. Reading a column
+only inflates that column's member of each chunk; uncompressed stores
+are memory-mapped straight out of the .npz files instead.
+
+Live recording appends the telemetry_update dicts as they arrive (see
+TelemetryManager.start_recording); recorded tlogs are exported with
+
+    python -m core.telemetry_export flight.tlog flight.columns [--no-compress]
+"""
+
+import argparse
+import json
+import logging
+import os
+import struct
+import threading
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+MANIFEST = "manifest.json"
+FORMAT = "gcs-telemetry-columns"
+VERSION = 1
+_ZIP_LOCAL_HEADER = struct.Struct('<4s5H3I2H')  # ... name length, extra length
+_NPY_HEADER_READERS = {(1, 0): np.lib.format.read_array_header_1_0, (2, 0): np.lib.format.read_array_header_2_0}
+
+
+def _chunk_name(index):
+    return f"chunk_{index:06d}.npz"
+
+
+def _columnize(rows):
+    """Row dicts -> ({column: ndarray}, {column: kind}); lists become name[i] columns."""
+    names = {}
+    for row in rows:
+        for name, value in row.items():
+            if value is not None and name not in names:
+                names[name] = value
+    for row in rows:
+        for name in row.keys() - names.keys():
+            names[name] = None  # Only ever None
+
+    columns, kinds = {}, {}
+    for name, sample in names.items():
+        values = [row.get(name) for row in rows]
+        if isinstance(sample, str):
+            columns[name] = np.array(['' if v is None else v for v in values], dtype=str)
+            kinds[name] = 'str'
+        elif isinstance(sample, (list, tuple)):
+            width = max(len(v) for v in values if v is not None)
+            for i in range(width):
+                columns[f"{name}[{i}]"] = np.array(
+                    [v[i] if v is not None and i < len(v) else None for v in values], dtype=np.float64)
+                kinds[f"{name}[{i}]"] = 'float'
+        else:
+            columns[name] = np.array(values, dtype=np.float64)  # None -> NaN, bool -> 0/1
+            kinds[name] = 'float'
+    return columns, kinds
+
+
+class ColumnWriter:
+    """
+    Writes a columnar store, either row by row as telemetry arrives
+    (append) or a chunk of columns at a time (write_chunk).
+
+    append() only queues the row: chunks are built, compressed and written
+    on a background thread once `chunk_rows` rows are pending or the
+    oldest pending row is `max_chunk_seconds` old, so a live recording
+    never holds up the telemetry thread and loses at most one chunk on a
+    crash. The manifest is replaced atomically after every chunk, so the
+    store can be read while it is being written.
+    """
+
+    def __init__(self, path, chunk_rows=65536, max_chunk_seconds=60.0, compress=True):
+        self.path = path
+        self.chunk_rows = chunk_rows
+        self.max_chunk_seconds = max_chunk_seconds
+        self.compress = compress
+        os.makedirs(path, exist_ok=True)
+        if os.path.exists(os.path.join(path, MANIFEST)):
+            raise FileExistsError(f"{path} already holds a telemetry store")
+        self.manifest = {"format": FORMAT, "version": VERSION, "compressed": compress,
+                         "rows": 0, "columns": {}, "chunks": []}
+        self._pending = []  # [(time, row dict)]
+        self._lock = threading.Lock()  # Guards _pending, _closed and submitting; chunks are written by the executor
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ColumnWriter")
+        self._closed = False
+        self._write_manifest()
+
+    def append(self, data):
+        """Queues one telemetry_update dict; its "timestamp" becomes the time index. Ignored once closed."""
+        row = dict(data)
+        t = row.pop("timestamp", None)
+        if t is None:
+            t = time.time()
+        with self._lock:
+            # May race with close() on another thread: a row is either dropped or in the final flush
+            if self._closed:
+                return
+            self._pending.append((t, row))
+            due = (len(self._pending) >= self.chunk_rows or
+                   t - self._pending[0][0] >= self.max_chunk_seconds)
+            if not due:
+                return
+            rows, self._pending = self._pending, []
+            self._executor.submit(self._write_rows, rows)  # Not after close() shut the executor down
+
+    def flush(self):
+        """Writes the pending rows as a chunk and waits until every queued chunk is on disk."""
+        with self._lock:
+            rows, self._pending = self._pending, []
+        if rows:
+            self._executor.submit(self._write_rows, rows)
+        self._executor.submit(lambda: None).result()
+
+    def write_chunk(self, times, columns, kinds=None):
+        """
+        Writes arrays as one chunk right away (after any pending rows).
+        `columns` maps names to arrays as long as `times`; float columns use
+        NaN and text columns '' for rows without a value.
+        """
+        self.flush()
+        if kinds is None:
+            kinds = {name: 'str' if np.asarray(col).dtype.kind in 'US' else 'float' for name, col in columns.items()}
+        self._executor.submit(self._write, np.asarray(times, dtype=np.float64), columns, kinds).result()
+
+    def close(self):
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        self.flush()
+        self._executor.shutdown()
+        logging.info(f"Telemetry store {self.path}: {self.manifest['rows']} rows, "
+                     f"{len(self.manifest['columns'])} columns, {len(self.manifest['chunks'])} chunks")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # --- Executor thread ---
+
+    def _write_rows(self, rows):
+        try:
+            columns, kinds = _columnize([row for _, row in rows])
+            self._write(np.fromiter((t for t, _ in rows), dtype=np.float64, count=len(rows)), columns, kinds)
+        except Exception as e:
+            logging.error(f"Failed to write telemetry chunk to {self.path}: {e}")
+
+    def _write(self, times, columns, kinds):
+        if len(times) == 0:
+            return
+        index = len(self.manifest["chunks"])
+        name = _chunk_name(index)
+        arrays = {"time": times}
+        arrays.update(columns)
+        save = np.savez_compressed if self.compress else np.savez
+        tmp = os.path.join(self.path, name + ".tmp")
+        with open(tmp, "wb") as f:
+            save(f, **arrays)
+        os.replace(tmp, os.path.join(self.path, name))
+
+        for column, kind in kinds.items():
+            self.manifest["columns"].setdefault(column, kind)
+        self.manifest["chunks"].append({"file": name, "rows": len(times),
+                                        "t0": float(times.min()), "t1": float(times.max()),
+                                        "columns": list(columns)})
+        self.manifest["rows"] += len(times)
+        self._write_manifest()
+
+    def _write_manifest(self):
+        tmp = os.path.join(self.path, MANIFEST + ".tmp")
+        with open(tmp, "w") as f:
+            json.dump(self.manifest, f, indent=1)
+        os.replace(tmp, os.path.join(self.path, MANIFEST))
+
+
+def _npz_member(path, member, mmap):
+    """
+    One array out of an .npz. Stored (uncompressed) members are
+    memory-mapped at their offset in the zip; deflated ones are inflated.
+    """
+    with zipfile.ZipFile(path) as archive:
+        info = archive.getinfo(member + ".npy")
+        if not mmap or info.compress_type != zipfile.ZIP_STORED:
+            with archive.open(info) as f:
+                return np.lib.format.read_array(f)
+    with open(path, "rb") as f:
+        f.seek(info.header_offset)
+        header = _ZIP_LOCAL_HEADER.unpack(f.read(_ZIP_LOCAL_HEADER.size))
+        f.seek(header[-2] + header[-1], os.SEEK_CUR)  # File name and extra field
+        read_header = _NPY_HEADER_READERS.get(np.lib.format.read_magic(f))
+        if read_header is None:
+            return _npz_member(path, member, mmap=False)
+        shape, fortran_order, dtype = read_header(f)
+        offset = f.tell()
+    if shape == () or 0 in shape:
+        return np.zeros(shape, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode="r", offset=offset, shape=shape,
+                     order="F" if fortran_order else "C")
+
+
+class ColumnReader:
+    """
+    Reads a store written by ColumnWriter. Only the chunks overlapping the
+    requested time range and only the requested column are touched.
+    """
+
+    def __init__(self, path, mmap=True):
+        self.path = path
+        self.mmap = mmap
+        with open(os.path.join(path, MANIFEST)) as f:
+            self.manifest = json.load(f)
+        if self.manifest.get("format") != FORMAT:
+            raise ValueError(f"{path} is not a telemetry store")
+
+    @property
+    def columns(self):
+        return list(self.manifest["columns"])
+
+    def __len__(self):
+        return self.manifest["rows"]
+
+    def _chunks(self, start, end):
+        for chunk in self.manifest["chunks"]:
+            if (start is None or chunk["t1"] >= start) and (end is None or chunk["t0"] <= end):
+                yield chunk
+
+    def _read(self, chunk, name):
+        path = os.path.join(self.path, chunk["file"])
+        if name == "time" or name in chunk["columns"]:
+            return _npz_member(path, name, self.mmap)
+        if self.manifest["columns"].get(name) == 'str':
+            return np.full(chunk["rows"], '', dtype='U1')
+        return np.full(chunk["rows"], np.nan)
+
+    def iter_chunks(self, name, start=None, end=None):
+        """Yields (time, values) per chunk in the range; memory-mapped where possible."""
+        if name != "time" and name not in self.manifest["columns"]:
+            raise KeyError(name)
+        for chunk in self._chunks(start, end):
+            yield self._read(chunk, "time"), self._read(chunk, name)
+
+    def column(self, name, start=None, end=None):
+        """(time, values) of one column, limited to rows with start <= time <= end."""
+        times, values = [], []
+        for t, v in self.iter_chunks(name, start, end):
+            keep = np.ones(len(t), dtype=bool)
+            if start is not None:
+                keep &= t >= start
+            if end is not None:
+                keep &= t <= end
+            times.append(t[keep])
+            values.append(v[keep])
+        if not times:
+            kind = self.manifest["columns"].get(name)
+            return np.empty(0), np.empty(0, dtype=str if kind == 'str' else np.float64)
+        return np.concatenate(times), np.concatenate(values)
+
+    def read(self, names=None, start=None, end=None):
+        """{"time": ..., name: ...} for the given columns (all by default)."""
+        names = self.columns if names is None else names
+        result = {"time": self.column("time", start, end)[0]}
+        for name in names:
+            result[name] = self.column(name, start, end)[1]
+        return result
+
+
+def export_tlog(tlog_path, path, chunk_rows=65536, compress=True):
+    """
+    Exports the telemetry of a recorded tlog into a store at `path`.
+
+    Messages are decoded in bulk by core.tlog_arrays and converted with the
+    same TELEMETRY_FIELDS converters the live link publishes, so an export
+    has the columns of a live recording. Returns the number of rows.
+    """
+    from pymavlink import mavutil
+    from core.telemetry_manager import TELEMETRY_FIELDS
+    from core.tlog_arrays import decode_tlog
+
+    started = time.perf_counter()
+    arrays = decode_tlog(tlog_path, message_types=list(TELEMETRY_FIELDS))
+
+    # Per message type: its timestamps and converted columns
+    parts = []
+    for msg_type, (fields, convert) in TELEMETRY_FIELDS.items():
+        source = arrays.get(msg_type)
+        if source is None:
+            continue
+        if msg_type == 'HEARTBEAT':
+            vehicle = source['autopilot'] != mavutil.mavlink.MAV_AUTOPILOT_INVALID  # Not GCS heartbeats
+        else:
+            vehicle = np.ones(len(source), dtype=bool)
+        rows = [dict(convert(*values), type=msg_type, sysid=sysid)
+                for sysid, *values in zip(source.src_system[vehicle].tolist(),
+                                          *(source[name][vehicle].tolist() for name in fields))]
+        columns, kinds = _columnize(rows)
+        parts.append((source.timestamp[vehicle], columns, kinds))
+
+    times = np.concatenate([t for t, _, _ in parts]) if parts else np.empty(0)
+    order = np.argsort(times, kind="stable")
+    offsets = np.cumsum([0] + [len(t) for t, _, _ in parts])
+    kinds = {}
+    for _, _, part_kinds in parts:
+        kinds.update(part_kinds)
+    with ColumnWriter(path, chunk_rows, compress=compress) as writer:
+        for begin in range(0, len(order), chunk_rows):
+            rows = order[begin:begin + chunk_rows]
+            chunk = {}
+            for (t, columns, _), offset in zip(parts, offsets):
+                # Positions in this chunk of the rows that came from this message type
+                position = np.flatnonzero((rows >= offset) & (rows < offset + len(t)))
+                if len(position) == 0:
+                    continue
+                source_rows = rows[position] - offset
+                for name, values in columns.items():
+                    target = chunk.get(name)
+                    if target is None:
+                        target = chunk[name] = (np.full(len(rows), '', dtype=values.dtype) if kinds[name] == 'str'
+                                                else np.full(len(rows), np.nan))
+                    elif target.dtype.kind == 'U' and values.dtype.itemsize > target.dtype.itemsize:
+                        target = chunk[name] = target.astype(values.dtype)
+                    target[position] = values[source_rows]
+            writer.write_chunk(times[rows], chunk, {name: kinds[name] for name in chunk})
+    logging.info(f"Exported {len(order)} telemetry rows from {tlog_path} to {path} in "
+                 f"{time.perf_counter() - started:.2f}s")
+    return len(order)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export the telemetry of a .tlog into a columnar store")
+    parser.add_argument('tlog', help="Telemetry log")
+    parser.add_argument('output', help="Store directory to create")
+    parser.add_argument('--chunk-rows', type=int, default=65536, help="Rows per chunk")
+    parser.add_argument('--no-compress', dest='compress', action='store_false',
+                        help="Store chunks uncompressed so columns can be memory-mapped")
+    args = parser.parse_args(argv)
+    rows = export_tlog(args.tlog, args.output, args.chunk_rows, args.compress)
+    print(f"{rows} rows written to {args.output}")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
@@ -3,186 +3,369 @@
 import threading
 import time
 import math
+from types import SimpleNamespace
 from pymavlink import mavutil
 import sys
-import logging 
-from PySide6.QtCore import QObject, QThread, Signal, QTimer
+import logging
+from PySide6.QtCore import QObject, QThread, Signal, Qt
 
 # Import the global event bus instance and Events class
 from utils.event_bus import event_bus, Events
+from core.connection_probe import AutoConnectThread, build_candidates, is_vehicle_heartbeat
+from core.connection_supervisor import ConnectionSupervisor, LinkState
+from core.fast_decoder import FastDecoder
+from core.command_scheduler import CommandScheduler, Priority
+from core.log_download import LogDownload, LogListRequest
+from core.mavftp import FtpClient
+from core.mission import MissionTable, MissionTransfer
+from core.periodic_sender import PeriodicSender, ManualControl, gcs_heartbeat, system_time
+from core.telemetry_export import ColumnWriter
+from core.shm_ring import DEFAULT_NAME as DEFAULT_RING_NAME, RingWriter
+from core.mavlink_router import MavlinkRouter
+from core.telemetry_server import TelemetryServer
+from core.telemetry_server import DEFAULT_HOST as DEFAULT_SERVER_HOST, DEFAULT_PORT as DEFAULT_SERVER_PORT
+
+def _heartbeat(type, autopilot, base_mode, custom_mode, system_status):
+    msg = SimpleNamespace(type=type, autopilot=autopilot, base_mode=base_mode, custom_mode=custom_mode,
+                          get_type=lambda: 'HEARTBEAT')  # Enough of a message for mode_string_v10
+    return {
+        'armed': bool(base_mode & mavutil.mavlink.MAV_MODE_FLAG_SAFETY_ARMED),
+        'mode': mavutil.mode_string_v10(msg),
+        'system_status': system_status,
+    }
+
+
+def _sys_status(voltage_battery, current_battery, battery_remaining):
+    return {
+        'battery_voltage': voltage_battery / 1000.0,
+        'battery_current': current_battery / 100.0 if current_battery != -1 else None,
+        'battery_remaining': battery_remaining if battery_remaining != -1 else None,
+    }
+
+
+# Message type -> (fields used, callable(*field values) -> published telemetry).
+# Shared by the pymavlink path and the struct fast path so both publish the same data.
+TELEMETRY_FIELDS = {
+    'HEARTBEAT': (('type', 'autopilot', 'base_mode', 'custom_mode', 'system_status'), _heartbeat),
+    'SYS_STATUS': (('voltage_battery', 'current_battery', 'battery_remaining'), _sys_status),
+    'GPS_RAW_INT': (('fix_type', 'satellites_visible'),
+                    lambda fix_type, satellites: {'gps_fix_type': fix_type, 'gps_satellites': satellites}),
+    'GLOBAL_POSITION_INT': (('lat', 'lon', 'alt', 'relative_alt'),
+                            lambda lat, lon, alt, relative_alt: {'lat': lat / 1e7, 'lon': lon / 1e7,
+                                                                 'alt_msl': alt / 1000.0,
+                                                                 'alt_agl': relative_alt / 1000.0}),
+    'VFR_HUD': (('airspeed', 'groundspeed', 'heading', 'throttle', 'climb'),
+                lambda airspeed, groundspeed, heading, throttle, climb: {
+                    'airspeed': airspeed, 'groundspeed': groundspeed, 'heading': heading,
+                    'throttle': throttle, 'climb_rate': climb}),
+    'RC_CHANNELS': (tuple(f'chan{i}_raw' for i in range(1, 9)), lambda *channels: {'rc_channels': list(channels)}),
+    'ATTITUDE': (('roll', 'pitch', 'yaw'),
+                 lambda roll, pitch, yaw: {'roll': math.degrees(roll), 'pitch': math.degrees(pitch),
+                                           'yaw': math.degrees(yaw)}),
+}
+
+
+# Share of a serial link's line rate that outbound traffic may use by default
+SERIAL_UPLINK_SHARE = 0.8
+
+
+def default_uplink_budget(conn_string, baud):
+    """
+    Outbound bandwidth budget (bytes/s) for a connection: a share of the line
+    rate for serial links (8N1, ten bits per byte), so queued bulk traffic
+    never fills the OS serial buffer ahead of a critical command; None
+    (unlimited) for network links.
+    """
+    if not baud or conn_string.startswith(('tcp', 'udp')):
+        return None
+    return baud / 10.0 * SERIAL_UPLINK_SHARE
+
 
 class TelemetryThread(QThread):
-    """Thread for receiving telemetry data."""
-    # Constants for connection monitoring
-    HEARTBEAT_TIMEOUT = 5.0  # seconds
-    MAX_RECONNECT_ATTEMPTS = 5
-    RECONNECT_BACKOFF_BASE = 1.0  # seconds
-    
-    def __init__(self, master, signal_manager, stop_event):
+    """
+    Thread that owns the MAVLink transport and receives telemetry.
+
+    The connection lifecycle (open, wait for heartbeat, heartbeat gaps,
+    transport failures and reopening) is driven from this thread by a
+    ConnectionSupervisor, so nothing here ever blocks the UI thread.
+    """
+    status_changed = Signal(str, str)  # Data: status, message
+
+    RECV_TIMEOUT = 0.2  # seconds; bounds how quickly stop and timeouts are noticed
+    READ_SIZE = 4096  # bytes per raw read on the fast path
+
+    def __init__(self, conn_string, baud, signal_manager, stop_event, message_frequencies=None, master=None,
+                 command_scheduler=None, on_message=None, fast_decode=False, ring=None, router=None):
         super().__init__()
-        self.master = master
+        self.conn_string = conn_string
+        self.baud = baud
+        self.master = master  # May be a pre-opened, verified link (auto-connect)
         self.signal_manager = signal_manager
         self.stop_event = stop_event
-        self.last_heartbeat_time = time.time()
-        self.reconnect_attempts = 0
+        self.message_frequencies = message_frequencies or {}
+        self.command_scheduler = command_scheduler  # Owns all outbound traffic
+        self.on_message = on_message  # Called with every received message, on this thread
+        self.ring = ring  # RingWriter that also gets every telemetry message (see core.shm_ring)
+        self.router = router  # MavlinkRouter that gets every received frame (see core.mavlink_router)
+        self._reopen_requested = threading.Event()
+        self.supervisor = ConnectionSupervisor(on_state_change=self._on_state_change)
         self.desired_message_types = [
             'ATTITUDE', 'GPS_RAW_INT', 'GLOBAL_POSITION_INT', 'SYS_STATUS',
             'RC_CHANNELS', 'VFR_HUD', 'HEARTBEAT', 'STATUSTEXT'
         ]
-        
+        # Opt-in struct decoding of the high-rate telemetry (see _receive_fast)
+        self.fast_decoder = FastDecoder({
+            msg_type: fields for msg_type, (fields, _) in TELEMETRY_FIELDS.items() if msg_type != 'HEARTBEAT'
+        }) if fast_decode else None
+
+    def _on_state_change(self, state, message):
+        self.status_changed.emit(self.supervisor.status(), message)
+
+    def request_reopen(self):
+        """Asks the thread to close and reopen the transport (thread-safe)."""
+        self._reopen_requested.set()
+
+    def _open_transport(self):
+        """Opens the MAVLink connection. Returns True on success."""
+        self.supervisor.transport_opening(f"Attempting connection to {self.conn_string}...")
+        try:
+            if self.conn_string.startswith('tcp:'):
+                # retries=0 so a refused port fails at once instead of sleeping here
+                self.master = mavutil.mavlink_connection(self.conn_string, source_system=255, retries=0)
+            elif self.conn_string.startswith('udp'):
+                self.master = mavutil.mavlink_connection(self.conn_string, source_system=255)
+            else:
+                self.master = mavutil.mavlink_connection(self.conn_string, baud=self.baud, source_system=255)
+        except Exception as e:
+            self.master = None
+            self._recycle_transport(f"Connection failed: {type(e).__name__}: {e}")
+            return False
+
+        if self.command_scheduler:
+            self.command_scheduler.attach(self.master)
+        self.supervisor.transport_opening("Waiting for heartbeat...")
+        return True
+
+    def _close_transport(self):
+        if self.command_scheduler:
+            self.command_scheduler.detach()
+        if self.master:
+            try:
+                self.master.close()
+            except Exception as e:
+                logging.error(f"Error closing connection: {e}")
+            self.master = None
+
+    def _recycle_transport(self, reason):
+        """Closes the transport and waits out the backoff. Returns False to give up."""
+        self._close_transport()
+        delay = self.supervisor.transport_failed(reason)
+        if delay is None:
+            return False
+        self.stop_event.wait(delay)
+        return True
+
+    def request_data_streams(self):
+        """Queues commands to set message intervals."""
+        if not self.master:
+            logging.warning("Not connected. Cannot request streams.")
+            return
+        if not self.command_scheduler:
+            logging.warning("No command scheduler. Cannot request streams.")
+            return
+
+        logging.info("Requesting data streams...")
+        for msg_id, frequency in self.message_frequencies.items():
+            if frequency > 0:
+                self.command_scheduler.send_command(
+                    mavutil.mavlink.MAV_CMD_SET_MESSAGE_INTERVAL,
+                    (msg_id, frequency),
+                    priority=Priority.STREAM
+                )
+                logging.debug(f"Requested ID {msg_id} at interval {frequency} us")
+
+        logging.info("Data stream requests queued.")
+
     def run(self):
-        """Main thread loop for receiving telemetry."""
+        """Main thread loop: supervises the link and receives telemetry."""
         logging.info("Telemetry thread starting.")
-        active_connection = True
-        
-        while not self.stop_event.is_set() and active_connection:
-            # Check connection status
-            if not self.master or self.master.target_system == 0:
-                errmsg = ""
-                if not self.master: 
-                    errmsg = "Connection object is None."
-                else: 
-                    errmsg = "Connection lost (target system 0)."
-                self.signal_manager.connection_status_changed.emit("DISCONNECTED", errmsg)
-                active_connection = False
+
+        if self.master:
+            if self.command_scheduler:
+                self.command_scheduler.attach(self.master)
+            self.supervisor.transport_adopted()
+            self.request_data_streams()
+
+        while not self.stop_event.is_set():
+            if self.master is None:
+                if not self._open_transport():
+                    if self.supervisor.state == LinkState.FAILED:
+                        break
+                    continue
+
+            if self._reopen_requested.is_set():
+                self._reopen_requested.clear()
+                if not self._recycle_transport("Reconnect requested"):
+                    break
                 continue
-                
+
+            reason = self.supervisor.tick()
+            if reason:
+                if not self._recycle_transport(reason):
+                    break
+                continue
+
             try:
-                # Check for heartbeat timeout
-                current_time = time.time()
-                if current_time - self.last_heartbeat_time > self.HEARTBEAT_TIMEOUT:
-                    errmsg = f"No heartbeat received for {self.HEARTBEAT_TIMEOUT} seconds"
-                    self.signal_manager.connection_status_changed.emit("RECONNECTING", errmsg)
-                    active_connection = False
-                    # Signal the TelemetryManager to attempt reconnection
-                    if hasattr(self.signal_manager, 'reconnect_request'):
-                        self.signal_manager.reconnect_request.emit()
+                if self.fast_decoder:
+                    self._receive_fast()
                     continue
-                
+
                 # Receive ANY message
-                msg = self.master.recv_match(blocking=True, timeout=2.0)
-                
-                if msg is None: 
+                msg = self.master.recv_match(blocking=True, timeout=self.RECV_TIMEOUT)
+
+                if msg is None:
                     continue  # Timeout, just loop
-                    
-                msg_type = msg.get_type()
-                
-                # Filter AFTER receiving
-                if msg_type not in self.desired_message_types:
-                    continue  # Skip messages we don't want
-                    
-                # --- Parse the messages we DO want ---
-                data = {"type": msg_type, "timestamp": time.time()}
-                publish_event = True
-                
-                if msg_type == 'HEARTBEAT':
-                    self.last_heartbeat_time = time.time()  # Update heartbeat timestamp
-                    data['armed'] = bool(msg.base_mode & mavutil.mavlink.MAV_MODE_FLAG_SAFETY_ARMED)
-                    data['mode'] = mavutil.mode_string_v10(msg)
-                    data['system_status'] = msg.system_status
-                    # If connection was lost, receiving heartbeat means it's back
-                    if self.reconnect_attempts > 0:
-                        self.reconnect_attempts = 0  # Reset reconnect attempts
-                        self.signal_manager.connection_status_changed.emit("CONNECTED", "Reconnected via Heartbeat")
-                    
-                elif msg_type == 'SYS_STATUS':
-                    data['battery_voltage'] = msg.voltage_battery / 1000.0
-                    data['battery_current'] = msg.current_battery / 100.0 if msg.current_battery != -1 else None
-                    data['battery_remaining'] = msg.battery_remaining if msg.battery_remaining != -1 else None
-                    
-                elif msg_type == 'GPS_RAW_INT':
-                    data['gps_fix_type'] = msg.fix_type
-                    data['gps_satellites'] = msg.satellites_visible
-                    
-                elif msg_type == 'GLOBAL_POSITION_INT':
-                    data['lat'] = msg.lat / 1e7
-                    data['lon'] = msg.lon / 1e7
-                    data['alt_msl'] = msg.alt / 1000.0
-                    data['alt_agl'] = msg.relative_alt / 1000.0
-                    
-                elif msg_type == 'VFR_HUD':
-                    data['airspeed'] = msg.airspeed
-                    data['groundspeed'] = msg.groundspeed
-                    data['heading'] = msg.heading
-                    data['throttle'] = msg.throttle
-                    data['climb_rate'] = msg.climb
-                    
-                elif msg_type == 'RC_CHANNELS':
-                    data['rc_channels'] = [
-                        msg.chan1_raw, msg.chan2_raw, msg.chan3_raw, msg.chan4_raw,
-                        msg.chan5_raw, msg.chan6_raw, msg.chan7_raw, msg.chan8_raw
-                    ]
-                    
-                elif msg_type == 'ATTITUDE':
-                    data['roll'] = math.degrees(msg.roll)
-                    data['pitch'] = math.degrees(msg.pitch)
-                    data['yaw'] = math.degrees(msg.yaw)
-                    
-                elif msg_type == 'STATUSTEXT':
-                    data['text'] = msg.text.strip()
-                    data['severity'] = msg.severity
-                    # Publish STATUSTEXT as a separate event
-                    self.signal_manager.status_text_received.emit(data['text'], data['severity'])
-                    # Don't publish this as a generic TELEMETRY_UPDATE event
-                    publish_event = False
-                    # Still log important status messages directly
-                    if data['severity'] <= mavutil.mavlink.MAV_SEVERITY_ERROR:
-                        logging.error(f"MAV STATUS [{data['severity']}]: {data['text']}")
-                    else:
-                        logging.info(f"MAV STATUS [{data['severity']}]: {data['text']}")
-                        
-                # --- Publish TELEMETRY_UPDATE event ---
-                # Check len > 2 ensures type and timestamp are present plus actual data
-                if publish_event and len(data) > 2:
-                    self.signal_manager.telemetry_update.emit(data)
-                    
-            except (ConnectionResetError, BrokenPipeError) as conn_e:
-                errmsg = f"{type(conn_e).__name__} in receive loop."
-                self.signal_manager.connection_status_changed.emit("ERROR", errmsg)
-                active_connection = False  # Stop loop
-                
+
+                router = self.router
+                if router is not None:
+                    router.forward_message(msg)
+                self._handle_message(msg)
+
+            except (OSError, EOFError) as conn_e:
+                # Covers ConnectionResetError, BrokenPipeError and serial port errors
+                if not self._recycle_transport(f"{type(conn_e).__name__} in receive loop"):
+                    break
+
             except Exception as e:
                 if isinstance(e, mavutil.mavlink.MAVLinkError):
                     logging.warning(f"MAVLink Error in receive loop: {e}. Continuing.")
                 else:
                     logging.error(f"Unhandled Exception in receive loop: {type(e).__name__}: {e}", exc_info=True)
                     time.sleep(0.1)  # Prevent fast spinning
-                
+
         logging.info("Telemetry thread finished.")
         if self.master:
             logging.info("Closing connection from receive loop exit.")
-            try: 
-                self.master.close()
-            except Exception as e:
-                logging.error(f"Error closing connection: {e}")
-                
-    def reset_heartbeat(self):
-        """Reset the heartbeat timer."""
-        self.last_heartbeat_time = time.time()
-        
-    def increment_reconnect_attempt(self):
-        """Increment the reconnect attempt counter and return the backoff time."""
-        self.reconnect_attempts += 1
-        if self.reconnect_attempts > self.MAX_RECONNECT_ATTEMPTS:
-            return -1  # Signal to stop reconnecting
-        return self.RECONNECT_BACKOFF_BASE * (2 ** (self.reconnect_attempts - 1))  # Exponential backoff
+        self._close_transport()
+
+    def _handle_message(self, msg):
+        """Feeds the supervisor and publishes the telemetry we care about."""
+        msg_type = msg.get_type()
+
+        if self.on_message:
+            self.on_message(msg)
+
+        if msg_type == 'HEARTBEAT':
+            if not is_vehicle_heartbeat(msg):
+                return  # Ignore other GCSs, gimbals, etc.
+            if self.supervisor.heartbeat(f"Heartbeat received (Sys:{msg.get_srcSystem()}/Comp:{msg.get_srcComponent()})"):
+                # Link (re)established: the vehicle may have rebooted and lost our stream rates
+                self.request_data_streams()
+
+        # Filter AFTER receiving
+        if msg_type not in self.desired_message_types:
+            return  # Skip messages we don't want
+
+        if msg_type == 'STATUSTEXT':
+            text = msg.text.strip()
+            # Published as its own signal rather than as a TELEMETRY_UPDATE
+            self.signal_manager.status_text_received.emit(text, msg.severity)
+            # Still log important status messages directly
+            if msg.severity <= mavutil.mavlink.MAV_SEVERITY_ERROR:
+                logging.error(f"MAV STATUS [{msg.severity}]: {text}")
+            else:
+                logging.info(f"MAV STATUS [{msg.severity}]: {text}")
+            return
+
+        fields = TELEMETRY_FIELDS[msg_type][0]
+        self._publish(msg_type, msg.get_srcSystem(), msg.get_srcComponent(), [getattr(msg, name) for name in fields])
+
+    def _publish(self, msg_type, sysid, compid, raw):
+        """
+        Emits one TELEMETRY_UPDATE with the parsed fields of a message,
+        publishes it on the event bus as telemetry.<sysid>.<msg_type> and
+        writes the raw fields to the shared-memory ring, if there is one.
+        """
+        timestamp = time.time()
+        data = {"type": msg_type, "timestamp": timestamp, "sysid": sysid}
+        data.update(TELEMETRY_FIELDS[msg_type][1](*raw))
+        ring = self.ring
+        if ring is not None:
+            ring.write(msg_type, sysid, compid, timestamp, raw)
+        self.signal_manager.telemetry_update.emit(data)
+        event_bus.publish(f"{Events.TELEMETRY}.{sysid}.{msg_type}", data)
+
+    def _receive_fast(self):
+        """
+        Fast-path receive: frames the raw byte stream ourselves and decodes the
+        high-rate telemetry with precompiled struct layouts. Everything else,
+        including HEARTBEAT (which mavutil needs for target and mode tracking),
+        goes through pymavlink as usual. Fast-decoded messages are published
+        directly and are not passed to the message listeners. The router
+        gets every frame straight out of the receive buffer.
+        """
+        master = self.master
+        if not master.select(self.RECV_TIMEOUT):
+            return
+        data = master.recv(self.READ_SIZE)
+        if not data:
+            return
+        if master.first_byte:
+            master.auto_mavlink_version(data)
+        router = self.router
+        self.fast_decoder.on_frame = None if router is None else router.forward
+        for item in self.fast_decoder.feed(data):
+            if item.__class__ is bytes:
+                for msg in master.mav.parse_buffer(item) or []:
+                    master.post_message(msg)
+                    self._handle_message(msg)
+            else:
+                msg_type, sysid, compid, values = item
+                self._publish(msg_type, sysid, compid, values)
 
 
 class TelemetryManager(QObject):
     """Manages the connection to the vehicle and telemetry data."""
-    
-    def __init__(self, initial_conn_string, initial_baud=115200, signal_manager=None):
+    GCS_HEARTBEAT_RATE = 1.0  # Hz
+    SYSTEM_TIME_RATE = 1.0  # Hz
+
+    def __init__(self, initial_conn_string, initial_baud=115200, signal_manager=None, fast_decode=False,
+                 uplink_budget=None):
         super().__init__()
         self._connection_string = initial_conn_string
         self._baud = initial_baud
-        self.master = None
+        self.fast_decode = fast_decode  # Struct fast path for high-rate telemetry (TelemetryThread._receive_fast)
+        # Outbound bytes/s for non-critical traffic; None derives it from the link (default_uplink_budget), 0 disables it
+        self.uplink_budget = uplink_budget
         self.thread = None
         self.stop_event = threading.Event()
         self.signal_manager = signal_manager
         self.current_status = "DISCONNECTED"
-        self.reconnect_timer = None
-        self._is_connecting = False  # Add flag to prevent multiple connection attempts
-        
+        self._is_connecting = False  # Set while auto-detect is probing
+        self.auto_connect_thread = None
+        self._message_listeners = ()  # Copy-on-write; read by the telemetry thread without locking
+        self._listeners_lock = threading.Lock()  # Serializes writers only
+        self.mission = None  # Last uploaded or downloaded MissionTable
+        self.mission_transfer = None
+        self.ftp_client = None  # Created on first use for the connected vehicle
+        self.log_transfers = []  # Running log list requests and downloads
+        self.recorder = None  # ColumnWriter while telemetry is being recorded
+        self.ring = None  # RingWriter while telemetry is shared with other processes
+        self.router = None  # MavlinkRouter while frames are forwarded to other endpoints
+        self.server = None  # TelemetryServer while state is streamed to local dashboards
+
+        # Single owner of outbound traffic; lives across connections
+        self.command_scheduler = CommandScheduler(signal_manager)
+        self.command_scheduler.start()
+        self.add_message_listener(self.command_scheduler.handle_message)
+
+        # GCS heartbeat and other keep-alives, sent whenever a transport is open
+        self.periodic_sender = PeriodicSender(self.command_scheduler)
+        self.periodic_sender.add("HEARTBEAT", self.GCS_HEARTBEAT_RATE, gcs_heartbeat)
+        self.periodic_sender.add("SYSTEM_TIME", self.SYSTEM_TIME_RATE, system_time)
+        self.periodic_sender.start()
+        self.manual_control = ManualControl()
+
         # Store desired frequencies using numeric IDs
         self.message_frequencies = {
             mavutil.mavlink.MAVLINK_MSG_ID_ATTITUDE: 100000,
@@ -193,14 +376,43 @@ class TelemetryManager(QObject):
             mavutil.mavlink.MAVLINK_MSG_ID_VFR_HUD: 200000,
             mavutil.mavlink.MAVLINK_MSG_ID_HEARTBEAT: 1000000,
         }
-        
+
         # Connect to signal manager signals
         if signal_manager:
             signal_manager.connection_request.connect(self.handle_connect_request)
+            signal_manager.auto_connect_request.connect(self.handle_auto_connect_request)
             signal_manager.disconnect_request.connect(self.handle_disconnect_request)
-            signal_manager.reconnect_request.connect(self.attempt_reconnect)
+            signal_manager.reconnect_request.connect(self.handle_reconnect_request)
+            signal_manager.arm_request.connect(self.handle_arm_request)
+            signal_manager.disarm_request.connect(self.handle_disarm_request)
+            signal_manager.mode_change_request.connect(self.handle_mode_change_request)
             logging.info("TelemetryManager connected to signal manager.")
-            
+
+    @property
+    def master(self):
+        """The current MAVLink connection (owned by the telemetry thread), or None."""
+        return self.thread.master if self.thread else None
+
+    def add_message_listener(self, listener):
+        """
+        Registers a callable that receives every MAVLink message.
+        Listeners run on the telemetry thread and must not block.
+        """
+        with self._listeners_lock:
+            self._message_listeners = self._message_listeners + (listener,)
+
+    def remove_message_listener(self, listener):
+        """Unregisters a listener added with add_message_listener()."""
+        with self._listeners_lock:
+            self._message_listeners = tuple(l for l in self._message_listeners if l != listener)
+
+    def _dispatch_message(self, msg):
+        for listener in self._message_listeners:
+            try:
+                listener(msg)
+            except Exception as e:
+                logging.error(f"Error in message listener {listener}: {e}", exc_info=True)
+
     def _update_status(self, new_status: str, message: str = ""):
         """Updates internal status and emits a status change signal."""
         if new_status != self.current_status:
@@ -212,187 +424,367 @@ class TelemetryManager(QObject):
             logging.info(f"Connection Status Info: {message}")
             if self.signal_manager:
                 self.signal_manager.connection_status_changed.emit(self.current_status, message)
-                
-    def connect(self):
-        """Establishes the MAVLink connection using internal connection string/_baud."""
-        if self._is_connecting:
-            logging.info("Connection attempt already in progress.")
-            return False
-            
-        if self.master:
-            logging.info("Already connected.")
-            return True
-            
-        self._is_connecting = True
-        self._update_status("CONNECTING", f"Attempting connection to {self._connection_string}...")
-        
-        try:
-            # Ensure any existing connection is properly closed
-            if self.master:
-                try:
-                    self.master.close()
-                except Exception as e:
-                    logging.error(f"Error closing existing connection: {e}")
-                self.master = None
-            
-            if self._connection_string.startswith(('udp:', 'tcp:')):
-                self.master = mavutil.mavlink_connection(self._connection_string, source_system=255)
-            else:
-                self.master = mavutil.mavlink_connection(self._connection_string, baud=self._baud, source_system=255)
-                
-            if not self.master:
-                self._update_status("ERROR", "mavutil.mavlink_connection failed")
-                self._is_connecting = False
-                return False
-                
-            self._update_status("CONNECTING", "Waiting for heartbeat...")
-            heartbeat = self.master.wait_heartbeat(timeout=10)
-            
-            if heartbeat:
-                msg = f"Heartbeat received (Sys:{self.master.target_system}/Comp:{self.master.target_component})"
-                self._update_status("CONNECTED", msg)
-                self._is_connecting = False
-                return True
-            else:
-                self._update_status("ERROR", "Heartbeat timed out")
-                if self.master: 
-                    self.master.close()
-                self.master = None
-                self._is_connecting = False
-                return False
-                
-        except Exception as e:
-            errmsg = f"Connection failed: {type(e).__name__}: {e}"
-            self._update_status("ERROR", errmsg)
-            if self.master: 
-                try:
-                    self.master.close()
-                except Exception as close_e:
-                    logging.error(f"Error closing connection after failure: {close_e}")
-            self.master = None
-            self._is_connecting = False
-            return False
-            
-    def _request_data_streams(self):
-        """Sends commands to set message intervals."""
-        if not self.master:
-            logging.warning("Not connected. Cannot request streams.")
-            return
-            
-        logging.info("Requesting data streams...")
-        for msg_id, frequency in self.message_frequencies.items():
-            if frequency > 0:
-                try:
-                    if not hasattr(self.master, 'mav'):
-                        logging.error(f"master.mav missing, cannot send command for MSG ID {msg_id}")
-                        continue
-                        
-                    self.master.mav.command_long_send(
-                        self.master.target_system,
-                        self.master.target_component,
-                        mavutil.mavlink.MAV_CMD_SET_MESSAGE_INTERVAL,
-                        0, msg_id, frequency, 0, 0, 0, 0, 0
-                    )
-                    logging.debug(f"Requested ID {msg_id} at interval {frequency} us")
-                    time.sleep(0.05)
-                    
-                except AttributeError as ae:
-                    logging.error(f"AttributeError sending interval command for MSG ID {msg_id}: {ae}. Check mav object.", exc_info=True)
-                    break
-                except Exception as e:
-                    logging.error(f"Error requesting interval for MSG ID {msg_id}: {type(e).__name__}: {e}", exc_info=True)
-                    
-        logging.info("Data stream requests sent.")
-        
-    def start(self):
-        """Starts the telemetry thread."""
+
+    def connect(self, master=None):
+        """
+        Starts connecting using the internal connection string/_baud.
+        Returns immediately; progress is reported through status changes.
+
+        Args:
+            master: Optional already-open connection that has delivered a
+                    heartbeat (e.g. from auto-detect) to adopt instead.
+        """
+        return self.start(master)
+
+    def start(self, master=None):
+        """Starts the telemetry thread, which opens and supervises the connection."""
         if self.thread and self.thread.isRunning():
             logging.warning("Telemetry thread already running.")
             return True
-            
-        if not self.master:
-            logging.error("Cannot start telemetry thread: Not connected.")
-            return False
-            
+
+        budget = self.uplink_budget
+        if budget is None:
+            budget = default_uplink_budget(self._connection_string, self._baud)
+        self.command_scheduler.set_bandwidth_limit(budget or None)
+        if budget:
+            logging.info(f"Uplink budget: {budget:.0f} bytes/s")
+
         self.stop_event.clear()
-        self.thread = TelemetryThread(self.master, self.signal_manager, self.stop_event)
+        self.thread = TelemetryThread(
+            self._connection_string, self._baud, self.signal_manager, self.stop_event,
+            message_frequencies=self.message_frequencies, master=master,
+            command_scheduler=self.command_scheduler, on_message=self._dispatch_message,
+            fast_decode=self.fast_decode, ring=self.ring, router=self.router
+        )
+        self.thread.status_changed.connect(self._update_status)
         self.thread.start()
         logging.info("Telemetry thread started.")
         return True
-        
+
     def stop(self):
-        """Stops the telemetry thread and closes the connection."""
+        """Stops the telemetry thread, which closes the connection."""
         if self.thread and self.thread.isRunning():
             logging.info("Stopping telemetry thread...")
             self.stop_event.set()
-            self.thread.wait()  # Wait for thread to finish
+            self.thread.wait()  # Wait for thread to finish (bounded by RECV_TIMEOUT)
             logging.info("Telemetry thread stopped.")
-            
-        if self.master:
-            logging.info("Closing connection...")
-            try:
-                self.master.close()
-            except Exception as e:
-                logging.error(f"Error closing connection: {e}")
-            self.master = None
-            
+
+        if self.thread:
+            self.thread.status_changed.disconnect(self._update_status)
+            self.thread = None
+        if self.mission_transfer and self.mission_transfer.is_alive():
+            self.mission_transfer.cancel()
+        for transfer in list(self.log_transfers):
+            transfer.cancel()
+        self.command_scheduler.clear()
+        self.periodic_sender.log_stats()
+
         self._update_status("DISCONNECTED", "Connection closed.")
         self._is_connecting = False  # Reset connection flag
-        
+
+    def enable_manual_control(self, rate_hz=10.0):
+        """Starts the MANUAL_CONTROL keep-alive; sticks are set via self.manual_control."""
+        self.periodic_sender.add("MANUAL_CONTROL", rate_hz, self.manual_control)
+
+    def disable_manual_control(self):
+        """Stops the MANUAL_CONTROL keep-alive."""
+        self.periodic_sender.remove("MANUAL_CONTROL")
+
     def handle_connect_request(self, conn_string, baud):
         """Handles a connection request signal."""
         logging.info(f"Connection request received: {conn_string} at {baud} baud")
         self._connection_string = conn_string
         self._baud = baud
-        
+
         # Stop any existing connection first
         self.stop()
-        
-        if self.connect():
-            self._request_data_streams()
-            self.start()
-            
+        self.connect()
+
+    def handle_auto_connect_request(self, conn_strings, bauds):
+        """Probes all candidate endpoints in the background and connects to the first vehicle found."""
+        if self._is_connecting:
+            logging.info("Connection attempt already in progress.")
+            return
+
+        self.stop()
+        candidates = build_candidates(conn_strings, bauds)
+        self._is_connecting = True
+        self._update_status("CONNECTING", f"Auto-detecting vehicle on {len(candidates)} endpoints...")
+
+        self.auto_connect_thread = AutoConnectThread(candidates)
+        self.auto_connect_thread.probe_finished.connect(self._on_auto_connect_finished)
+        self.auto_connect_thread.start()
+
+    def _on_auto_connect_finished(self, result):
+        """Adopts the link found by auto-detect (runs on the UI thread)."""
+        if not self._is_connecting:
+            # Disconnect was requested while probing
+            if result is not None:
+                result[0].close()
+            return
+        self._is_connecting = False
+        if result is None:
+            self._update_status("ERROR", "Auto-connect: no vehicle heartbeat on any endpoint")
+            return
+
+        master, conn_string, baud = result
+        self._connection_string = conn_string
+        if baud:
+            self._baud = baud
+        logging.info(f"Auto-connect: using {conn_string} (Sys:{master.target_system}/Comp:{master.target_component})")
+        self.connect(master)
+
     def handle_disconnect_request(self):
         """Handles a disconnect request signal."""
         logging.info("Disconnect request received")
+        if self.auto_connect_thread and self.auto_connect_thread.isRunning():
+            self.auto_connect_thread.cancel()
         self.stop()
-        
-    def attempt_reconnect(self):
-        """Attempts to reconnect to the vehicle."""
-        if self._is_connecting:
-            logging.info("Reconnection attempt already in progress.")
-            return
-            
+
+    def handle_reconnect_request(self):
+        """Handles a reconnect request signal by recycling the transport in the background."""
         if self.thread and self.thread.isRunning():
-            backoff_time = self.thread.increment_reconnect_attempt()
-            if backoff_time < 0:
-                self._update_status("ERROR", "Maximum reconnection attempts reached")
-                self.stop()
-                return
-                
-            self._update_status("RECONNECTING", f"Attempting reconnection (attempt {self.thread.reconnect_attempts})")
-            
-            # Schedule the reconnection attempt
-            if self.reconnect_timer:
-                self.reconnect_timer.stop()
-            self.reconnect_timer = QTimer()
-            self.reconnect_timer.setSingleShot(True)
-            self.reconnect_timer.timeout.connect(self._perform_reconnect)
-            self.reconnect_timer.start(int(backoff_time * 1000))  # Convert to milliseconds
-            
-    def _perform_reconnect(self):
-        """Performs the actual reconnection attempt."""
-        # Stop any existing connection first
-        if self.master:
-            try:
-                self.master.close()
-            except Exception as e:
-                logging.error(f"Error closing old connection: {e}")
-            self.master = None
-            
-        if self.connect():
-            self._request_data_streams()
-            if self.thread:
-                self.thread.reset_heartbeat()
+            self.thread.request_reopen()
         else:
-            self.attempt_reconnect()  # Try again if connection failed
\ No newline at end of file
+            self.connect()
+
+    def handle_arm_request(self):
+        """Arms the vehicle; sent ahead of any queued stream or bulk traffic."""
+        self.send_command(mavutil.mavlink.MAV_CMD_COMPONENT_ARM_DISARM, (1,), Priority.CRITICAL)
+
+    def handle_disarm_request(self):
+        """Disarms the vehicle; sent ahead of any queued stream or bulk traffic."""
+        self.send_command(mavutil.mavlink.MAV_CMD_COMPONENT_ARM_DISARM, (0,), Priority.CRITICAL)
+
+    def handle_mode_change_request(self, mode):
+        """Switches the flight mode by name (e.g. 'GUIDED')."""
+        master = self.master
+        if master is None:
+            logging.warning(f"Not connected. Cannot change mode to {mode}.")
+            return
+        mode_id = (master.mode_mapping() or {}).get(mode.upper())
+        if mode_id is None:
+            logging.warning(f"Unknown flight mode: {mode}")
+            return
+        self.send_command(
+            mavutil.mavlink.MAV_CMD_DO_SET_MODE,
+            (mavutil.mavlink.MAV_MODE_FLAG_CUSTOM_MODE_ENABLED, mode_id),
+            Priority.CRITICAL
+        )
+
+    def upload_mission(self, table):
+        """Uploads a MissionTable in the background. Returns False if not possible."""
+        return self._start_mission_transfer(MissionTransfer.UPLOAD, table)
+
+    def download_mission(self, mission_type=mavutil.mavlink.MAV_MISSION_TYPE_MISSION):
+        """Downloads the vehicle's mission in the background into self.mission."""
+        return self._start_mission_transfer(MissionTransfer.DOWNLOAD, MissionTable(mission_type=mission_type))
+
+    def _start_mission_transfer(self, direction, table):
+        master = self.master
+        if master is None:
+            logging.warning(f"Not connected. Cannot start mission {direction}.")
+            return False
+        if self.mission_transfer and self.mission_transfer.is_alive():
+            logging.warning("A mission transfer is already in progress.")
+            return False
+
+        def on_progress(done, total):
+            if self.signal_manager:
+                self.signal_manager.mission_progress.emit(direction, done, total)
+
+        def on_complete(success, message):
+            self.remove_message_listener(transfer.handle_message)
+            if success:
+                self.mission = transfer.table
+            if self.signal_manager:
+                self.signal_manager.mission_transfer_complete.emit(direction, success, message)
+
+        transfer = MissionTransfer(
+            direction, self.command_scheduler, master.target_system, master.target_component,
+            table=table if direction == MissionTransfer.UPLOAD else None,
+            mission_type=table.mission_type, on_progress=on_progress, on_complete=on_complete
+        )
+        self.mission_transfer = transfer
+        self.add_message_listener(transfer.handle_message)
+        transfer.start()
+        return True
+
+    def download_file(self, remote_path, local_path):
+        """Downloads a file (e.g. '@PARAM/param.pck') over MAVLink FTP in the background."""
+        master = self.master
+        if master is None:
+            logging.warning(f"Not connected. Cannot download {remote_path}.")
+            return None
+        client = self.ftp_client
+        if client is None or (client.target_system, client.target_component) != (master.target_system, master.target_component):
+            if client is not None:
+                self.remove_message_listener(client.handle_message)
+            client = self.ftp_client = FtpClient(self.command_scheduler, master.target_system, master.target_component)
+            self.add_message_listener(client.handle_message)
+
+        def on_progress(received, size):
+            if self.signal_manager:
+                self.signal_manager.file_transfer_progress.emit(remote_path, received, size)
+
+        def on_complete(success, message):
+            if self.signal_manager:
+                self.signal_manager.file_transfer_complete.emit(remote_path, success, message)
+
+        return client.download(remote_path, local_path, on_progress, on_complete)
+
+    def request_log_list(self):
+        """Fetches the onboard log list in the background (see log_list_received)."""
+        master = self.master
+        if master is None:
+            logging.warning("Not connected. Cannot request log list.")
+            return None
+
+        def on_complete(success, message, entries):
+            self._finish_log_transfer(transfer)
+            if self.signal_manager:
+                if success:
+                    self.signal_manager.log_list_received.emit(entries)
+                else:
+                    self.signal_manager.status_text_received.emit(message, mavutil.mavlink.MAV_SEVERITY_WARNING)
+
+        transfer = LogListRequest(self.command_scheduler, master.target_system, master.target_component,
+                                  on_complete=on_complete)
+        return self._start_log_transfer(transfer)
+
+    def download_log(self, log_id, size, path):
+        """Downloads onboard log `log_id` (of `size` bytes, from the log list) to `path`."""
+        master = self.master
+        if master is None:
+            logging.warning(f"Not connected. Cannot download log {log_id}.")
+            return None
+
+        def on_progress(received, total, rate, eta):
+            if self.signal_manager:
+                self.signal_manager.log_download_progress.emit(log_id, received, total, rate, eta)
+
+        def on_complete(success, message):
+            self._finish_log_transfer(transfer)
+            if self.signal_manager:
+                self.signal_manager.log_download_complete.emit(log_id, success, message)
+
+        transfer = LogDownload(self.command_scheduler, master.target_system, master.target_component,
+                               log_id, size, path, on_progress=on_progress, on_complete=on_complete)
+        return self._start_log_transfer(transfer)
+
+    def _start_log_transfer(self, transfer):
+        self.log_transfers.append(transfer)
+        self.add_message_listener(transfer.handle_message)
+        transfer.start()
+        return transfer
+
+    def _finish_log_transfer(self, transfer):
+        self.remove_message_listener(transfer.handle_message)
+        if transfer in self.log_transfers:
+            self.log_transfers.remove(transfer)
+
+    def send_command(self, command, params=(), priority=Priority.COMMAND, callback=None):
+        """Queues a COMMAND_LONG on the scheduler. Returns False if not connected."""
+        if self.master is None:
+            logging.warning(f"Not connected. Cannot send command {command}.")
+            return False
+        self.command_scheduler.send_command(command, params, priority, callback)
+        return True
+
+    def start_recording(self, path, **options):
+        """
+        Records every telemetry update into a columnar store at `path` (see
+        core.telemetry_export) until stop_recording(). Rows are queued on the
+        telemetry thread and written in the background.
+        """
+        if self.signal_manager is None:
+            raise RuntimeError("Recording needs a signal manager")
+        self.stop_recording()
+        self.recorder = ColumnWriter(path, **options)
+        self.signal_manager.telemetry_update.connect(self.recorder.append, Qt.DirectConnection)
+        logging.info(f"Recording telemetry to {path}")
+        return self.recorder
+
+    def stop_recording(self):
+        if self.recorder is None:
+            return
+        self.signal_manager.telemetry_update.disconnect(self.recorder.append)
+        self.recorder.close()
+        self.recorder = None
+
+    def start_ring(self, name=None, capacity=65536):
+        """
+        Shares every telemetry message with other local processes through a
+        shared-memory ring (see core.shm_ring) until stop_ring(). Records
+        hold the raw MAVLink fields of TELEMETRY_FIELDS.
+        """
+        self.stop_ring()
+        schema = {msg_type: fields for msg_type, (fields, _) in TELEMETRY_FIELDS.items()}
+        self.ring = RingWriter(schema, name or DEFAULT_RING_NAME, capacity)
+        if self.thread:
+            self.thread.ring = self.ring
+        logging.info(f"Sharing telemetry in shared memory ring '{self.ring.name}' ({capacity} records)")
+        return self.ring
+
+    def stop_ring(self):
+        if self.ring is None:
+            return
+        if self.thread:
+            self.thread.ring = None
+        self.ring.close()
+        self.ring = None
+
+    def start_router(self, outputs, **options):
+        """
+        Forwards every received frame unchanged to the `outputs` (specs such
+        as 'udpout:127.0.0.1:14560', see core.mavlink_router) and merges
+        their uplink traffic into the vehicle link until stop_router().
+        """
+        self.stop_router()
+        router = MavlinkRouter(uplink=self.command_scheduler.send_raw, **options)
+        try:
+            for spec in outputs:
+                router.add_output(spec)
+        except (OSError, ValueError):
+            router.stop()
+            raise
+        router.start()
+        self.router = router
+        if self.thread:
+            self.thread.router = router
+        return router
+
+    def stop_router(self):
+        if self.router is None:
+            return
+        if self.thread:
+            self.thread.router = None
+        logging.info(f"Router statistics: {self.router.stats()}")
+        self.router.stop()
+        self.router = None
+
+    def start_server(self, host=None, port=None, **options):
+        """
+        Streams vehicle state to local dashboards over HTTP/WebSocket (see
+        core.telemetry_server) until stop_server(). The server keeps its
+        state from telemetry updates taken on the telemetry thread.
+        """
+        if self.signal_manager is None:
+            raise RuntimeError("The telemetry server needs a signal manager")
+        self.stop_server()
+        server = TelemetryServer(host or DEFAULT_SERVER_HOST, DEFAULT_SERVER_PORT if port is None else port, **options)
+        server.update_status(self.current_status)
+        server.start()
+        self.signal_manager.telemetry_update.connect(server.update, Qt.DirectConnection)
+        self.signal_manager.connection_status_changed.connect(server.update_status, Qt.DirectConnection)
+        self.server = server
+        return server
+
+    def stop_server(self):
+        if self.server is None:
+            return
+        self.signal_manager.telemetry_update.disconnect(self.server.update)
+        self.signal_manager.connection_status_changed.disconnect(self.server.update_status)
+        logging.info(f"Telemetry server statistics: {self.server.stats()}")
+        self.server.stop()
+        self.server = None
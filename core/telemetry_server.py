@@ -0,0 +1,411 @@
+# core/telemetry_server.py
+"""
+Local streaming telemetry API for dashboards: HTTP and WebSocket on one
+port, served by an asyncio loop on its own thread (never the Qt thread).
+
+    GET /state      the current state as JSON
+    GET /stats      server counters as JSON
+    GET /ws         WebSocket stream, optionally /ws?fields=roll,lat&rate=5&sysid=1
+
+State is grouped per vehicle ("1", "2", ...: the latest value of every
+telemetry field) plus "link" (connection status). A WebSocket client gets
+a snapshot of the fields it asked for, then at its rate only what changed:
+
+    {"t":"snapshot","seq":0,"time":...,"state":{"link":{...},"1":{"roll":1.5,...}}}
+    {"t":"delta","seq":1,"time":...,"changed":{"1":{"roll":1.6}}}
+
+Ticks without changes are skipped; `seq` numbers the ticks of the
+client's channel, so a gap means deltas were skipped (a snapshot always
+follows). A client joining a channel that is already running gets the
+channel's state as of its last tick right away, with the seq of the delta
+that follows. Clients change their subscription by sending
+{"fields": [...] or null, "rate": Hz, "sysid": [...] or null}, which
+starts a new snapshot. A malformed subscription in the /ws query is
+answered with 400.
+
+Clients with the same subscription share a channel: each tick the delta
+(and, for clients that need one, the snapshot) is computed, serialized
+and framed once, and the same frame bytes are written to every client of
+the channel. A client whose socket backs up skips deltas and gets a
+fresh snapshot once it has drained.
+"""
+
+import asyncio
+import base64
+import hashlib
+import json
+import logging
+import math
+import struct
+import threading
+import time
+import urllib.parse
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+MIN_RATE, MAX_RATE = 0.1, 50.0
+DEFAULT_RATE = 5.0
+_WS_GUID = b"258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+_OP_TEXT, _OP_CLOSE, _OP_PING, _OP_PONG = 0x1, 0x8, 0x9, 0xA
+_MAX_CLIENT_MESSAGE = 64 * 1024
+_META_KEYS = ("type", "timestamp", "sysid")  # Telemetry keys that are not state fields
+
+
+def _json(obj):
+    return json.dumps(obj, separators=(',', ':')).encode()
+
+
+def ws_frame(payload, opcode=_OP_TEXT):
+    """An unmasked, unfragmented server-to-client WebSocket frame."""
+    length = len(payload)
+    if length < 126:
+        header = struct.pack('!BB', 0x80 | opcode, length)
+    elif length < 1 << 16:
+        header = struct.pack('!BBH', 0x80 | opcode, 126, length)
+    else:
+        header = struct.pack('!BBQ', 0x80 | opcode, 127, length)
+    return header + payload
+
+
+async def _read_ws_frame(reader):
+    """Reads one client frame; returns (opcode, payload)."""
+    first, second = await reader.readexactly(2)
+    if not first & 0x80:
+        raise ValueError("Fragmented WebSocket messages are not supported")
+    length = second & 0x7F
+    if length == 126:
+        length, = struct.unpack('!H', await reader.readexactly(2))
+    elif length == 127:
+        length, = struct.unpack('!Q', await reader.readexactly(8))
+    if length > _MAX_CLIENT_MESSAGE:
+        raise ValueError(f"WebSocket message of {length} bytes is too large")
+    mask = await reader.readexactly(4) if second & 0x80 else None
+    payload = await reader.readexactly(length)
+    if mask:
+        payload = bytes(b ^ mask[i & 3] for i, b in enumerate(payload))
+    return first & 0x0F, payload
+
+
+class Subscription:
+    """What a client streams: fields (None for all), vehicles (None for all) and ticks per second."""
+    __slots__ = ("fields", "sysids", "rate")
+
+    def __init__(self, fields=None, sysids=None, rate=DEFAULT_RATE):
+        rate = float(rate)
+        if not math.isfinite(rate):
+            raise ValueError(f"rate must be a number, not {rate}")
+        self.fields = None if fields is None else frozenset(fields)
+        self.sysids = None if sysids is None else frozenset(str(int(s)) for s in sysids)
+        self.rate = min(MAX_RATE, max(MIN_RATE, rate))
+
+    @classmethod
+    def from_query(cls, query):
+        params = urllib.parse.parse_qs(query)
+        fields = params.get("fields", [None])[0]
+        sysids = params.get("sysid", [None])[0]
+        return cls(fields=fields.split(',') if fields else None,
+                   sysids=sysids.split(',') if sysids else None,
+                   rate=params.get("rate", [DEFAULT_RATE])[0])
+
+    @classmethod
+    def from_message(cls, message):
+        return cls(message.get("fields"), message.get("sysid"), message.get("rate", DEFAULT_RATE))
+
+    @property
+    def key(self):
+        return self.fields, self.sysids, self.rate
+
+    def select(self, state):
+        """The part of a state ({group: {field: value}}) this subscription covers."""
+        view = {}
+        for group, values in state.items():
+            if group == "link":
+                view[group] = dict(values)
+            elif self.sysids is None or group in self.sysids:
+                view[group] = (dict(values) if self.fields is None else
+                               {name: value for name, value in values.items() if name in self.fields})
+        return view
+
+
+class _Client:
+    def __init__(self, writer):
+        self.writer = writer
+        self.channel = None
+        self.needs_snapshot = True
+
+
+class _Channel:
+    """Clients sharing one subscription; ticks at its rate and frames each message once per tick."""
+
+    def __init__(self, server, subscription):
+        self.server = server
+        self.subscription = subscription
+        self.clients = set()
+        self.last = {}  # State as of the last tick
+        self.last_time = None  # Time of the last tick
+        self.seq = 0  # Ticks that sent something
+        self.task = None
+
+    def _frame(self, kind, now, body):
+        self.server.counts["serializations"] += 1
+        return ws_frame(b'{"t":"%s","seq":%d,"time":%.3f,%s}' % (kind.encode(), self.seq, now, body))
+
+    def tick(self, now):
+        state = self.subscription.select(self.server.snapshot_state())
+        changed = {}
+        for group, values in state.items():
+            previous = self.last.get(group, {})
+            delta = {name: value for name, value in values.items()
+                     if name not in previous or previous[name] != value}
+            if delta:
+                changed[group] = delta
+        self.last = state
+        self.last_time = now
+
+        frames = {}  # Key: message kind, Value: WebSocket frame shared by the clients
+        for client in list(self.clients):
+            transport = client.writer.transport
+            if transport.is_closing():
+                continue
+            if transport.get_write_buffer_size() > self.server.max_client_backlog:
+                client.needs_snapshot = True  # Behind: skip deltas, resync once drained
+                self.server.counts["skipped"] += 1
+                continue
+            if client.needs_snapshot:
+                kind = "snapshot"
+                client.needs_snapshot = False
+            elif changed:
+                kind = "delta"
+            else:
+                continue
+            frame = frames.get(kind)
+            if frame is None:
+                body = b'"state":' + _json(state) if kind == "snapshot" else b'"changed":' + _json(changed)
+                frame = frames[kind] = self._frame(kind, now, body)
+            self.server.send_frame(client, frame)
+        if frames:
+            self.seq += 1
+
+    def send_snapshot(self, client):
+        """
+        Sends a client joining a running channel the state as of the last
+        tick, numbered like the next tick's delta, which follows on from it.
+        The other clients and the tick schedule are not affected.
+        """
+        self.server.send_frame(client, self._frame("snapshot", self.last_time, b'"state":' + _json(self.last)))
+        client.needs_snapshot = False
+
+    async def run(self):
+        period = 1.0 / self.subscription.rate
+        loop = asyncio.get_running_loop()
+        deadline = loop.time()
+        while self.clients:
+            self.tick(time.time())
+            deadline += period
+            delay = deadline - loop.time()
+            if delay < 0:  # Fell behind: skip the missed ticks instead of bursting
+                deadline = loop.time()
+                delay = 0
+            await asyncio.sleep(delay)
+
+
+class TelemetryServer:
+    """
+    Serves the telemetry state over HTTP/WebSocket on its own asyncio
+    thread. update() and update_status() may be called from any thread.
+    """
+    MAX_CLIENT_BACKLOG = 256 * 1024  # Bytes queued for a client before it is resynced
+
+    def __init__(self, host=DEFAULT_HOST, port=DEFAULT_PORT, max_client_backlog=MAX_CLIENT_BACKLOG):
+        self.host = host
+        self.port = port
+        self.max_client_backlog = max_client_backlog
+        self._state = {"link": {"status": "DISCONNECTED", "message": ""}}
+        self._state_lock = threading.Lock()
+        self._channels = {}  # Key: Subscription.key (loop thread only)
+        self.counts = {"clients": 0, "messages": 0, "bytes": 0, "serializations": 0, "skipped": 0}
+        self._loop = None
+        self._server = None
+        self._thread = None
+
+    # --- State (any thread) ---
+
+    def update(self, data):
+        """Merges one telemetry update (a telemetry_update dict) into the state of its vehicle."""
+        values = {name: value for name, value in data.items() if name not in _META_KEYS}
+        group = str(data.get("sysid", 0))
+        with self._state_lock:
+            vehicle = self._state.get(group)
+            if vehicle is None:
+                self._state[group] = values
+            else:
+                vehicle.update(values)
+
+    def update_status(self, status, message=""):
+        with self._state_lock:
+            self._state["link"] = {"status": status, "message": message}
+
+    def snapshot_state(self):
+        with self._state_lock:
+            return {group: dict(values) for group, values in self._state.items()}
+
+    # --- Lifecycle ---
+
+    def start(self):
+        """Starts the server thread; returns once it listens (self.port holds the bound port)."""
+        started = threading.Event()
+        errors = []
+
+        def run():
+            loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(loop)
+            self._loop = loop
+            try:
+                self._server = loop.run_until_complete(asyncio.start_server(self._handle, self.host, self.port))
+            except OSError as e:
+                errors.append(e)
+                started.set()
+                loop.close()
+                return
+            self.port = self._server.sockets[0].getsockname()[1]
+            started.set()
+            try:
+                loop.run_forever()
+            finally:
+                loop.run_until_complete(self._shutdown())
+                loop.close()
+
+        self._thread = threading.Thread(target=run, name="TelemetryServer", daemon=True)
+        self._thread.start()
+        started.wait()
+        if errors:
+            raise errors[0]
+        logging.info(f"Telemetry server listening on http://{self.host}:{self.port}/ (WebSocket /ws)")
+        return self
+
+    def stop(self):
+        if self._thread is None:
+            return
+        if self._loop.is_running():
+            self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=5)
+        self._thread = None
+
+    async def _shutdown(self):
+        self._server.close()
+        for channel in list(self._channels.values()):
+            for client in list(channel.clients):
+                client.writer.close()
+        tasks = asyncio.all_tasks() - {asyncio.current_task()}  # Channel tickers and client handlers
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await self._server.wait_closed()
+
+    # --- Loop thread ---
+
+    def stats(self):
+        return dict(self.counts, channels=len(self._channels))
+
+    def send(self, client, payload):
+        self.send_frame(client, ws_frame(payload))
+
+    def send_frame(self, client, frame):
+        self.counts["messages"] += 1
+        self.counts["bytes"] += len(frame)
+        client.writer.write(frame)
+
+    def _join(self, client, subscription):
+        self._leave(client)
+        channel = self._channels.get(subscription.key)
+        if channel is None:
+            channel = self._channels[subscription.key] = _Channel(self, subscription)
+        channel.clients.add(client)
+        client.channel = channel
+        client.needs_snapshot = True
+        if channel.task is None or channel.task.done():
+            channel.task = asyncio.get_running_loop().create_task(channel.run())
+        elif (channel.last_time is not None and
+              client.writer.transport.get_write_buffer_size() <= self.max_client_backlog):
+            channel.send_snapshot(client)  # Now rather than at the next tick
+
+    def _leave(self, client):
+        channel = client.channel
+        if channel is None:
+            return
+        channel.clients.discard(client)
+        client.channel = None
+        if not channel.clients:
+            self._channels.pop(channel.subscription.key, None)
+
+    async def _handle(self, reader, writer):
+        try:
+            request_line = (await reader.readline()).decode('latin-1').split()
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b'\r\n', b'\n', b''):
+                    break
+                name, _, value = line.decode('latin-1').partition(':')
+                headers[name.strip().lower()] = value.strip()
+            if len(request_line) != 3 or request_line[0] != 'GET':
+                await self._respond(writer, 405, b'{"error":"only GET is supported"}')
+                return
+            path, _, query = request_line[1].partition('?')
+            if path == '/state':
+                await self._respond(writer, 200, _json(self.snapshot_state()))
+            elif path == '/stats':
+                await self._respond(writer, 200, _json(self.stats()))
+            elif path == '/ws' and headers.get('upgrade', '').lower() == 'websocket':
+                try:
+                    subscription = Subscription.from_query(query)
+                except (ValueError, TypeError) as e:
+                    await self._respond(writer, 400, _json({"error": f"Bad subscription: {e}"}))
+                    return
+                await self._websocket(reader, writer, headers, subscription)
+            else:
+                await self._respond(writer, 404, b'{"error":"not found"}')
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except Exception as e:
+            logging.error(f"Telemetry server error: {type(e).__name__}: {e}", exc_info=True)
+        finally:
+            writer.close()
+
+    async def _respond(self, writer, status, body):
+        reason = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed"}[status]
+        header = (b"HTTP/1.1 %d %s\r\nContent-Type: application/json\r\nContent-Length: %d\r\n"
+                  b"Access-Control-Allow-Origin: *\r\nConnection: close\r\n\r\n" % (status, reason.encode(), len(body)))
+        writer.write(header + body)
+        await writer.drain()
+
+    async def _websocket(self, reader, writer, headers, subscription):
+        key = headers.get('sec-websocket-key')
+        if not key:
+            await self._respond(writer, 400, b'{"error":"missing Sec-WebSocket-Key"}')
+            return
+        accept = base64.b64encode(hashlib.sha1(key.encode() + _WS_GUID).digest())
+        writer.write(b"HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+                     b"Sec-WebSocket-Accept: " + accept + b"\r\n\r\n")
+        client = _Client(writer)
+        self.counts["clients"] += 1
+        self._join(client, subscription)
+        try:
+            while True:
+                opcode, payload = await _read_ws_frame(reader)
+                if opcode == _OP_CLOSE:
+                    writer.write(ws_frame(payload[:2], _OP_CLOSE))
+                    break
+                if opcode == _OP_PING:
+                    writer.write(ws_frame(payload, _OP_PONG))
+                elif opcode == _OP_TEXT:
+                    try:
+                        self._join(client, Subscription.from_message(json.loads(payload)))
+                    except (ValueError, TypeError, AttributeError) as e:
+                        self.send(client, _json({"t": "error", "error": f"Bad subscription: {e}"}))
+        except ValueError as e:
+            logging.warning(f"Closing telemetry client: {e}")
+            writer.write(ws_frame(struct.pack('!H', 1009), _OP_CLOSE))
+        finally:
+            self._leave(client)
+            self.counts["clients"] -= 1
@@ -1,43 +1,196 @@
 # main.py
 
 import sys
+import argparse
 import logging
-from PySide6.QtWidgets import QApplication
 
-from core.telemetry_manager import TelemetryManager
-from core.signal_manager import SignalManager
-from ui.main_window import MainWindow
+from utils.startup_profiler import StartupProfiler
 
 # --- Configuration ---
 # Set the DEFAULT connection string here
 DEFAULT_CONNECTION_STRING = 'udp:localhost:14550' # SITL UDP
 #DEFAULT_CONNECTION_STRING = '/dev/tty.usbmodem101' # Mac serial
 DEFAULT_BAUD_RATE = 115200 # Serial baud rate
+DEFAULT_MAP_BACKEND = 'web' # 'web' (Leaflet in QtWebEngine) or 'native' (QPainter, no WebEngine)
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(threadName)s - %(levelname)s - %(message)s')
 
+def parse_args(argv):
+    """Parses GCS options, leaving unknown (Qt) arguments in place."""
+    parser = argparse.ArgumentParser(description="ArduPilot GCS - Basic Telemetry")
+    parser.add_argument('--connect', metavar='CONN', default=DEFAULT_CONNECTION_STRING,
+                        help="Connection string, e.g. udp:localhost:14550 or /dev/ttyACM0 (default %(default)s)")
+    parser.add_argument('--baud', type=int, default=DEFAULT_BAUD_RATE, help="Serial baud rate (default %(default)s)")
+    parser.add_argument('--headless', action='store_true',
+                        help="Run without a window: connect at once and keep only the telemetry services "
+                             "(no widgets, map or QtWebEngine)")
+    parser.add_argument('--stats-interval', type=float, default=60.0, metavar='SECONDS',
+                        help="Headless: seconds between memory/CPU footprint log lines, 0 to disable")
+    parser.add_argument('--map', dest='map_backend', choices=['web', 'native'], default=DEFAULT_MAP_BACKEND,
+                        help="Map renderer: 'web' uses QtWebEngine/Leaflet, 'native' draws cached tiles with QPainter")
+    parser.add_argument('--profile-startup', action='store_true',
+                        help="Log per-phase import and initialization timings once startup has finished")
+    parser.add_argument('--uplink-budget', type=float, metavar='BYTES_PER_S',
+                        help="Outbound bandwidth for non-critical traffic (default: 80%% of the serial line rate, "
+                             "unlimited on UDP/TCP; 0 disables)")
+    parser.add_argument('--fast-decode', action='store_true',
+                        help="Decode high-rate telemetry with precompiled struct layouts instead of pymavlink objects")
+    parser.add_argument('--record', metavar='DIR',
+                        help="Record all telemetry into a columnar store (chunked .npz, see core.telemetry_export)")
+    parser.add_argument('--shm-ring', metavar='NAME', nargs='?', const='',
+                        help="Share telemetry with other processes through a shared-memory ring (see core.shm_ring)")
+    parser.add_argument('--out', metavar='SPEC', action='append', default=[],
+                        help="Forward the MAVLink stream to another endpoint, e.g. udpout:127.0.0.1:14560 or "
+                             "tcpin:0.0.0.0:5760 (repeatable; see core.mavlink_router for routing rules)")
+    parser.add_argument('--serve', metavar='[HOST:]PORT', nargs='?', const='',
+                        help="Stream vehicle state to local dashboards over HTTP/WebSocket "
+                             "(default 127.0.0.1:8765; see core.telemetry_server)")
+    return parser.parse_known_args(argv[1:])
+
+def start_services(manager, args):
+    """Starts the optional recording, sharing and forwarding services; they stop when the application quits."""
+    from PySide6.QtCore import QCoreApplication
+    about_to_quit = QCoreApplication.instance().aboutToQuit
+    if args.record:
+        manager.start_recording(args.record)
+        about_to_quit.connect(manager.stop_recording)
+    if args.shm_ring is not None:
+        try:
+            manager.start_ring(args.shm_ring)
+        except FileExistsError as e:
+            logging.error(f"Not sharing telemetry: {e}; pass another name to --shm-ring")
+        else:
+            about_to_quit.connect(manager.stop_ring)
+    if args.out:
+        manager.start_router(args.out)
+        about_to_quit.connect(manager.stop_router)
+    if args.serve is not None:
+        host, _, port = args.serve.rpartition(':')
+        manager.start_server(host or None, int(port) if port else None)
+        about_to_quit.connect(manager.stop_server)
+
+def start_backend(window, profiler, args):
+    """
+    Second startup stage, run from the event loop once the window shell is
+    visible: imports pymavlink via TelemetryManager and builds the map.
+    """
+    with profiler.phase("import core.telemetry_manager (pymavlink)"):
+        from core.telemetry_manager import TelemetryManager
+
+    # Create telemetry manager
+    with profiler.phase("create TelemetryManager"):
+        window.telemetry_manager = TelemetryManager(
+            initial_conn_string=args.connect,
+            initial_baud=args.baud,
+            signal_manager=window.signal_manager,
+            fast_decode=args.fast_decode,
+            uplink_budget=args.uplink_budget
+        )
+    start_services(window.telemetry_manager, args)
+
+    with profiler.phase(f"build map ({args.map_backend})"):
+        window.init_map()
+
+    profiler.mark("startup complete")
+    profiler.log_report()
+
+def run_headless(args, qt_args, argv, profiler):
+    """
+    Runs TelemetryManager on a QCoreApplication, for companion computers and
+    servers: connects at once and keeps recording, forwarding and the
+    telemetry server running until SIGINT/SIGTERM. Imports no widgets.
+    """
+    import signal
+
+    with profiler.phase("create QCoreApplication"):
+        from PySide6.QtCore import QCoreApplication, QTimer
+        app = QCoreApplication(argv[:1] + qt_args)
+
+    with profiler.phase("import core.telemetry_manager (pymavlink)"):
+        from core.signal_manager import SignalManager
+        from core.telemetry_manager import TelemetryManager
+        from utils.footprint import Footprint
+
+    signal_manager = SignalManager()
+    signal_manager.status_text_received.connect(lambda text, severity: logging.info(f"STATUSTEXT ({severity}): {text}"))
+    with profiler.phase("create TelemetryManager"):
+        manager = TelemetryManager(args.connect, args.baud, signal_manager, fast_decode=args.fast_decode,
+                                   uplink_budget=args.uplink_budget)
+    start_services(manager, args)
+    app.aboutToQuit.connect(manager.stop)
+    manager.connect()
+
+    # Python signal handlers only run once the interpreter gets control back from Qt
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, lambda *_: app.quit())
+    wake = QTimer()
+    wake.timeout.connect(lambda: None)
+    wake.start(200)
+
+    footprint = Footprint()
+    if args.stats_interval > 0:
+        stats_timer = QTimer()
+        stats_timer.timeout.connect(footprint.log)
+        stats_timer.start(int(args.stats_interval * 1000))
+
+    profiler.mark("startup complete")
+    profiler.log_report()
+    code = app.exec()
+    footprint.log()
+    return code
+
 # --- Main Class ---
-def main():
+def main(argv=None):
+    argv = sys.argv if argv is None else argv
+    args, qt_args = parse_args(argv)
+    profiler = StartupProfiler(enabled=args.profile_startup)
+    if args.headless:
+        return run_headless(args, qt_args, argv, profiler)
+
+    with profiler.phase("import PySide6.QtWidgets"):
+        from PySide6.QtWidgets import QApplication
+        from PySide6.QtCore import Qt, QCoreApplication, QTimer
+
+    if args.map_backend == 'web':
+        with profiler.phase("register gcs:// map scheme"):
+            # Custom URL schemes have to be registered before the application
+            # exists, and QtWebEngine needs shared GL contexts when it is
+            # imported after the application has been created
+            from ui.layouts.map_resources import register_map_scheme
+            register_map_scheme()
+            QCoreApplication.setAttribute(Qt.AA_ShareOpenGLContexts)
+
     # Create Qt application
-    app = QApplication(sys.argv)
-    app.setStyle("Fusion")
+    with profiler.phase("create QApplication"):
+        app = QApplication(argv[:1] + qt_args)
+        app.setStyle("Fusion")
+
+    if args.map_backend == 'web':
+        with profiler.phase("preload map page"):
+            # The web engine loads the map page while the window shell and
+            # the telemetry backend are built; MapLayout adopts it later
+            from ui.layouts.map_resources import preload_map_page
+            preload_map_page()
+
+    with profiler.phase("import ui.main_window"):
+        from core.signal_manager import SignalManager
+        from ui.main_window import MainWindow
+
     # Create signal manager
     signal_manager = SignalManager()
-    
-    # Create telemetry manager
-    telemetry_manager = TelemetryManager(
-        initial_conn_string=DEFAULT_CONNECTION_STRING,
-        initial_baud=DEFAULT_BAUD_RATE,
-        signal_manager=signal_manager
-    )
-    
-    # Create main window
-    window = MainWindow(signal_manager)
-    window.show()
-    
+
+    # Create the window shell; the map is built once the window is showing
+    with profiler.phase("build window shell"):
+        window = MainWindow(signal_manager, map_backend=args.map_backend, defer_map=True)
+        window.show()
+    profiler.mark("window shown")
+
+    # Heavy imports and the map are deferred until the event loop is running
+    QTimer.singleShot(0, lambda: start_backend(window, profiler, args))
+
     # Start Qt event loop
     return app.exec()
 
 if __name__ == "__main__":
-    sys.exit(main())
\ No newline at end of file
+    sys.exit(main())
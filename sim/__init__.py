@@ -0,0 +1,7 @@
+# sim/__init__.py
+"""Pure-Python simulated autopilot for load and regression testing without SITL."""
+
+from sim.autopilot import SimulatedAutopilot
+from sim.vehicle import SimVehicle
+
+__all__ = ["SimulatedAutopilot", "SimVehicle"]
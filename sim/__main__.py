@@ -0,0 +1,43 @@
+# sim/__main__.py
+
+import argparse
+import logging
+import time
+
+from sim.autopilot import SimulatedAutopilot
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m sim", description="Simulated MAVLink autopilot")
+    parser.add_argument('--transport', choices=['udp', 'tcp'], default='udp',
+                        help="udp: send to a GCS listening with udpin:, tcp: accept GCS connections")
+    parser.add_argument('--address', default='127.0.0.1:14550', help="host:port (default %(default)s)")
+    parser.add_argument('--vehicles', type=int, default=1, help="Number of vehicles (sysids 1..N)")
+    parser.add_argument('--rate-scale', type=float, default=1.0, help="Multiplier on every stream rate")
+    parser.add_argument('--loss', type=float, default=0.0, help="Frame loss probability per direction")
+    parser.add_argument('--latency', type=float, default=0.0, help="One-way latency in ms")
+    parser.add_argument('--jitter', type=float, default=0.0, help="Extra random one-way delay in ms")
+    parser.add_argument('--seed', type=int, default=None, help="Seed for loss and jitter")
+    parser.add_argument('--stats-interval', type=float, default=5.0, help="Seconds between stats lines")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(threadName)s - %(levelname)s - %(message)s')
+    sim = SimulatedAutopilot(args.transport, args.address, vehicles=args.vehicles, rate_scale=args.rate_scale,
+                             loss=args.loss, latency=args.latency / 1000.0, jitter=args.jitter / 1000.0,
+                             seed=args.seed)
+    sim.start()
+    try:
+        while sim.is_alive():
+            time.sleep(args.stats_interval)
+            logging.info(f"Sim stats: {sim.stats()}")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        sim.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+# sim/autopilot.py
+
+import heapq
+import itertools
+import logging
+import random
+import select
+import socket
+import threading
+import time
+from pymavlink import mavutil
+
+from sim.vehicle import SimVehicle
+
+mavlink = mavutil.mavlink
+
+
+def parse_address(address):
+    """'host:port' -> (host, port)."""
+    host, _, port = address.rpartition(':')
+    return host or '127.0.0.1', int(port)
+
+
+class SimulatedAutopilot(threading.Thread):
+    """
+    Serves one or more SimVehicles over a loopback link.
+
+    'udp' sends from an ephemeral port to `address`, where the GCS listens
+    with udpin:, and replies to whoever last sent to it. 'tcp' listens on
+    `address` for GCS connections (tcp:). Each frame is dropped with
+    probability `loss` and delayed by `latency` plus up to `jitter` seconds
+    in each direction; TCP frames keep their order.
+    """
+    MAX_WAIT = 0.05  # seconds; bounds how quickly stop() is noticed
+
+    def __init__(self, transport='udp', address='127.0.0.1:14550', vehicles=1, rate_scale=1.0,
+                 loss=0.0, latency=0.0, jitter=0.0, seed=None):
+        super().__init__(name="SimAutopilot", daemon=True)
+        if transport not in ('udp', 'tcp'):
+            raise ValueError(f"Unknown transport {transport!r}")
+        self.transport = transport
+        self.address = parse_address(address)
+        self.vehicles = [SimVehicle(sysid=i + 1, lat=-35.363261 + i * 0.001, rate_scale=rate_scale)
+                         for i in range(vehicles)]
+        self.loss = loss
+        self.latency = latency
+        self.jitter = jitter
+        self._rng = random.Random(seed)
+        self._stop_requested = threading.Event()
+        self._ready = threading.Event()
+        self._delayed = []  # Heap of (due time, tie-breaker, direction, payload)
+        self._counter = itertools.count()
+        self._last_out = 0.0  # Due time of the last queued outbound frame (TCP ordering)
+        self._parsers = {}  # Key: peer, Value: MAVLink parser
+        self._sock = None
+        self._clients = []  # TCP client sockets
+        self._peer = None  # UDP destination
+        self._stats = {"frames_sent": 0, "bytes_sent": 0, "frames_received": 0,
+                       "dropped_out": 0, "dropped_in": 0}
+
+    # --- Public API ---
+
+    def wait_ready(self, timeout=None):
+        """Blocks until the socket is bound. Returns False on timeout."""
+        return self._ready.wait(timeout)
+
+    @property
+    def local_address(self):
+        """The bound (host, port); for 'tcp' with port 0 this is the port to connect to."""
+        return self._sock.getsockname() if self._sock else None
+
+    def stop(self):
+        self._stop_requested.set()
+        if self.is_alive():
+            self.join()
+
+    def stats(self):
+        """Frame and byte counters for both directions."""
+        return dict(self._stats)
+
+    # --- Link emulation ---
+
+    def _delay(self):
+        return self.latency + (self._rng.uniform(0.0, self.jitter) if self.jitter else 0.0)
+
+    def _queue_out(self, frames, now):
+        for frame in frames:
+            if self.loss and self._rng.random() < self.loss:
+                self._stats["dropped_out"] += 1
+                continue
+            due = now + self._delay()
+            if self.transport == 'tcp':
+                due = self._last_out = max(due, self._last_out)
+            heapq.heappush(self._delayed, (due, next(self._counter), 'out', frame))
+
+    def _queue_in(self, msg, now):
+        if self.loss and self._rng.random() < self.loss:
+            self._stats["dropped_in"] += 1
+            return
+        heapq.heappush(self._delayed, (now + self._delay(), next(self._counter), 'in', msg))
+
+    def _deliver(self, direction, payload, now):
+        if direction == 'in':
+            for vehicle in self.vehicles:
+                self._queue_out(vehicle.handle(payload, now), now)
+        else:
+            self._write(payload)
+
+    # --- Sockets ---
+
+    def _open(self):
+        if self.transport == 'udp':
+            self._sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            self._sock.bind(('127.0.0.1', 0))
+            self._peer = self.address
+        else:
+            self._sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            self._sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            self._sock.bind(self.address)
+            self._sock.listen()
+        self._sock.setblocking(False)
+
+    def _write(self, frame):
+        if self.transport == 'udp':
+            try:
+                self._sock.sendto(frame, self._peer)
+            except OSError:
+                return  # Nobody listening yet (ICMP port unreachable)
+            self._stats["frames_sent"] += 1
+            self._stats["bytes_sent"] += len(frame)
+            return
+        for client in list(self._clients):
+            try:
+                client.sendall(frame)
+            except OSError:
+                self._drop_client(client)
+                continue
+            self._stats["frames_sent"] += 1
+            self._stats["bytes_sent"] += len(frame)
+
+    def _drop_client(self, client):
+        logging.info(f"Sim: GCS disconnected ({self._parsers.get(client, (None, None))[1]})")
+        self._clients.remove(client)
+        self._parsers.pop(client, None)
+        client.close()
+
+    def _readable(self, sock, now):
+        if self.transport == 'tcp' and sock is self._sock:
+            client, peer = sock.accept()
+            client.setblocking(False)
+            client.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            self._clients.append(client)
+            self._parsers[client] = (mavlink.MAVLink(None), peer)
+            logging.info(f"Sim: GCS connected from {peer}")
+            return
+        try:
+            if self.transport == 'udp':
+                data, peer = sock.recvfrom(65535)
+                self._peer = peer  # Reply to whoever talks to us
+                key = peer
+                if key not in self._parsers:
+                    self._parsers[key] = (mavlink.MAVLink(None), peer)
+            else:
+                data, key = sock.recv(65535), sock
+                if not data:
+                    return self._drop_client(sock)
+        except (BlockingIOError, ConnectionRefusedError):
+            return
+        except OSError:
+            if self.transport == 'tcp':
+                self._drop_client(sock)
+            return
+        parser = self._parsers[key][0]
+        for msg in parser.parse_buffer(data) or []:
+            self._stats["frames_received"] += 1
+            self._queue_in(msg, now)
+
+    def _close(self):
+        for client in list(self._clients):
+            client.close()
+        self._clients = []
+        if self._sock:
+            self._sock.close()
+
+    # --- Main loop ---
+
+    def run(self):
+        self._open()
+        logging.info(f"Sim: {len(self.vehicles)} vehicle(s) over {self.transport} "
+                     f"{self.address[0]}:{self.address[1]}")
+        self._ready.set()
+        try:
+            while not self._stop_requested.is_set():
+                now = time.monotonic()
+                for vehicle in self.vehicles:
+                    self._queue_out(vehicle.due(now), now)
+                while self._delayed and self._delayed[0][0] <= now:
+                    _, _, direction, payload = heapq.heappop(self._delayed)
+                    self._deliver(direction, payload, now)
+
+                wake = min(vehicle.next_due() for vehicle in self.vehicles)
+                if self._delayed:
+                    wake = min(wake, self._delayed[0][0])
+                timeout = min(max(0.0, wake - time.monotonic()), self.MAX_WAIT)
+                readable, _, _ = select.select([self._sock] + self._clients, [], [], timeout)
+                now = time.monotonic()
+                for sock in readable:
+                    self._readable(sock, now)
+        finally:
+            self._close()
+            logging.info(f"Sim stopped: {self.stats()}")
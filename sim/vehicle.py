@@ -0,0 +1,291 @@
+# sim/vehicle.py
+
+import math
+import time
+import logging
+from pymavlink import mavutil
+
+mavlink = mavutil.mavlink
+
+# Message id -> default interval (s) before the GCS asks for anything else
+DEFAULT_INTERVALS = {
+    mavlink.MAVLINK_MSG_ID_HEARTBEAT: 1.0,
+    mavlink.MAVLINK_MSG_ID_SYS_STATUS: 1.0,
+    mavlink.MAVLINK_MSG_ID_GPS_RAW_INT: 0.5,
+    mavlink.MAVLINK_MSG_ID_GLOBAL_POSITION_INT: 0.25,
+    mavlink.MAVLINK_MSG_ID_ATTITUDE: 0.25,
+    mavlink.MAVLINK_MSG_ID_VFR_HUD: 0.5,
+    mavlink.MAVLINK_MSG_ID_RC_CHANNELS: 1.0,
+}
+
+# A representative slice of an ArduCopter parameter table
+DEFAULT_PARAMS = {
+    "SYSID_THISMAV": 1.0, "SYSID_MYGCS": 255.0, "FRAME_CLASS": 1.0, "FRAME_TYPE": 1.0,
+    "ARMING_CHECK": 1.0, "BATT_MONITOR": 4.0, "BATT_CAPACITY": 5200.0, "BATT_LOW_VOLT": 10.5,
+    "FS_THR_ENABLE": 1.0, "FS_GCS_ENABLE": 0.0, "RTL_ALT": 1500.0, "WPNAV_SPEED": 1000.0,
+    "WPNAV_ACCEL": 250.0, "ANGLE_MAX": 4500.0, "PILOT_SPEED_UP": 250.0, "LAND_SPEED": 50.0,
+    "ATC_RAT_RLL_P": 0.135, "ATC_RAT_RLL_I": 0.135, "ATC_RAT_RLL_D": 0.0036,
+    "ATC_RAT_PIT_P": 0.135, "ATC_RAT_PIT_I": 0.135, "ATC_RAT_PIT_D": 0.0036,
+    "ATC_RAT_YAW_P": 0.18, "ATC_RAT_YAW_I": 0.018, "INS_GYRO_FILTER": 20.0,
+    "SERIAL1_BAUD": 57.0, "SERIAL1_PROTOCOL": 2.0, "SR1_POSITION": 2.0, "SR1_EXTRA1": 4.0,
+    "LOG_BITMASK": 176126.0, "GPS_TYPE": 1.0, "COMPASS_USE": 1.0, "EK3_ENABLE": 1.0,
+}
+
+
+class SimVehicle:
+    """
+    One simulated ArduCopter: flies a circle, streams telemetry at the
+    requested intervals and answers parameter, mission and command traffic.
+
+    The vehicle never touches a socket. due() returns the telemetry that is
+    due at a given time and handle() returns the replies to one received
+    message; SimulatedAutopilot moves the resulting frames.
+    """
+    MISSION_TIMEOUT = 0.5  # seconds before an upload request is repeated
+
+    def __init__(self, sysid=1, lat=-35.363261, lon=149.165230, radius=80.0, speed=8.0,
+                 rate_scale=1.0, clock=time.monotonic):
+        self.sysid = sysid
+        self.compid = mavlink.MAV_COMP_ID_AUTOPILOT1
+        self.mav = mavlink.MAVLink(None, srcSystem=sysid, srcComponent=self.compid)
+        self._clock = clock
+        self._boot = clock()
+        self.home = (lat, lon)
+        self.radius = radius
+        self.speed = speed
+        self.rate_scale = rate_scale
+
+        self.armed = False
+        self.custom_mode = 0  # STABILIZE
+        self.params = dict(DEFAULT_PARAMS, SYSID_THISMAV=float(sysid))
+        self._param_names = list(self.params)
+        self.mission = []  # Stored MISSION_ITEM_INT messages
+        self._upload = None  # (count, items, next seq, last request time) while receiving a mission
+
+        self.intervals = dict(DEFAULT_INTERVALS)  # msg id -> seconds (None = disabled)
+        self._next_due = {msg_id: self._boot for msg_id in self.intervals}
+
+    # --- Encoding ---
+
+    def pack(self, msg):
+        """Packs a message with this vehicle's ids and sequence number."""
+        buf = msg.pack(self.mav)
+        self.mav.seq = (self.mav.seq + 1) % 256
+        return buf
+
+    def boot_ms(self, now):
+        return int((now - self._boot) * 1000) & 0xFFFFFFFF
+
+    # --- Flight model ---
+
+    def state(self, now):
+        """Position on the circle: (lat, lon, alt_rel, heading_deg, roll_rad, yaw_rad, vn, ve)."""
+        t = now - self._boot
+        omega = self.speed / self.radius
+        angle = omega * t
+        north = self.radius * math.sin(angle)
+        east = self.radius * math.cos(angle)
+        lat = self.home[0] + north / 111320.0
+        lon = self.home[1] + east / (111320.0 * math.cos(math.radians(self.home[0])))
+        vn = self.speed * math.cos(angle)
+        ve = -self.speed * math.sin(angle)
+        yaw = math.atan2(ve, vn)
+        roll = -math.atan(self.speed * omega / 9.81)  # Coordinated left turn
+        alt = 30.0 + 2.0 * math.sin(t / 10.0)
+        return lat, lon, alt, math.degrees(yaw) % 360.0, roll, yaw, vn, ve
+
+    # --- Telemetry ---
+
+    def _telemetry(self, msg_id, now):
+        mav = self.mav
+        lat, lon, alt, heading, roll, yaw, vn, ve = self.state(now)
+        if msg_id == mavlink.MAVLINK_MSG_ID_HEARTBEAT:
+            base_mode = mavlink.MAV_MODE_FLAG_CUSTOM_MODE_ENABLED
+            if self.armed:
+                base_mode |= mavlink.MAV_MODE_FLAG_SAFETY_ARMED
+            return mav.heartbeat_encode(mavlink.MAV_TYPE_QUADROTOR, mavlink.MAV_AUTOPILOT_ARDUPILOTMEGA,
+                                        base_mode, self.custom_mode,
+                                        mavlink.MAV_STATE_ACTIVE if self.armed else mavlink.MAV_STATE_STANDBY)
+        if msg_id == mavlink.MAVLINK_MSG_ID_SYS_STATUS:
+            remaining = max(0, 100 - int((now - self._boot) / 30))
+            return mav.sys_status_encode(0, 0, 0, 250, 11100 + remaining * 13, 1250, remaining, 0, 0, 0, 0, 0, 0)
+        if msg_id == mavlink.MAVLINK_MSG_ID_GPS_RAW_INT:
+            return mav.gps_raw_int_encode(int((now - self._boot) * 1e6), 3, int(lat * 1e7), int(lon * 1e7),
+                                          int((584 + alt) * 1000), 121, 150, int(self.speed * 100),
+                                          int(heading * 100), 12)
+        if msg_id == mavlink.MAVLINK_MSG_ID_GLOBAL_POSITION_INT:
+            return mav.global_position_int_encode(self.boot_ms(now), int(lat * 1e7), int(lon * 1e7),
+                                                  int((584 + alt) * 1000), int(alt * 1000),
+                                                  int(vn * 100), int(ve * 100), 0, int(heading * 100))
+        if msg_id == mavlink.MAVLINK_MSG_ID_ATTITUDE:
+            return mav.attitude_encode(self.boot_ms(now), roll, 0.02, yaw, 0.0, 0.0, self.speed / self.radius)
+        if msg_id == mavlink.MAVLINK_MSG_ID_VFR_HUD:
+            return mav.vfr_hud_encode(self.speed, self.speed, int(heading), 45 if self.armed else 0, alt, 0.0)
+        if msg_id == mavlink.MAVLINK_MSG_ID_RC_CHANNELS:
+            return mav.rc_channels_encode(self.boot_ms(now), 8, 1500, 1500, 1100, 1500, 1800, 1000, 1000, 1000,
+                                          *([0] * 10), 255)
+        if msg_id == mavlink.MAVLINK_MSG_ID_SYSTEM_TIME:
+            return mav.system_time_encode(int(time.time() * 1e6), self.boot_ms(now))
+        return None
+
+    def due(self, now):
+        """Returns the frames of all telemetry due at `now`."""
+        frames = []
+        for msg_id, due_at in self._next_due.items():
+            interval = self.intervals.get(msg_id)
+            if interval is None or now < due_at:
+                continue
+            msg = self._telemetry(msg_id, now)
+            if msg is not None:
+                frames.append(self.pack(msg))
+            interval /= self.rate_scale
+            # Keep the schedule drift-free, but never try to catch up a backlog
+            self._next_due[msg_id] = max(due_at + interval, now - interval)
+        frames.extend(self._mission_tick(now))
+        return frames
+
+    def next_due(self):
+        """Monotonic time of the next scheduled telemetry message."""
+        times = [t for msg_id, t in self._next_due.items() if self.intervals.get(msg_id) is not None]
+        if self._upload is not None:
+            times.append(self._upload[3] + self.MISSION_TIMEOUT)
+        return min(times) if times else self._clock() + 1.0
+
+    def set_interval(self, msg_id, interval_us):
+        """SET_MESSAGE_INTERVAL semantics: -1 disables, 0 restores the default."""
+        if interval_us < 0:
+            self.intervals[msg_id] = None
+        elif interval_us == 0:
+            self.intervals[msg_id] = DEFAULT_INTERVALS.get(msg_id)
+        else:
+            self.intervals[msg_id] = interval_us / 1e6
+        self._next_due[msg_id] = self._clock()
+
+    # --- Requests ---
+
+    def _for_me(self, msg):
+        target = getattr(msg, 'target_system', None)
+        return target is not None and target in (0, self.sysid)
+
+    def handle(self, msg, now):
+        """Returns the reply frames for one message from the GCS."""
+        if not self._for_me(msg):
+            return []
+        msg_type = msg.get_type()
+        handler = getattr(self, f"_on_{msg_type.lower()}", None)
+        if handler is None:
+            return []
+        replies = handler(msg, now) or []
+        return [self.pack(reply) for reply in replies]
+
+    def _ack(self, command, result):
+        return self.mav.command_ack_encode(command, result)
+
+    def _on_command_long(self, msg, now):
+        cmd = msg.command
+        if cmd == mavlink.MAV_CMD_SET_MESSAGE_INTERVAL:
+            self.set_interval(int(msg.param1), int(msg.param2))
+            return [self._ack(cmd, mavlink.MAV_RESULT_ACCEPTED)]
+        if cmd == mavlink.MAV_CMD_REQUEST_MESSAGE:
+            reply = self._telemetry(int(msg.param1), now)
+            if reply is None:
+                return [self._ack(cmd, mavlink.MAV_RESULT_UNSUPPORTED)]
+            return [self._ack(cmd, mavlink.MAV_RESULT_ACCEPTED), reply]
+        if cmd == mavlink.MAV_CMD_COMPONENT_ARM_DISARM:
+            arm = msg.param1 >= 0.5
+            if arm == self.armed:
+                return [self._ack(cmd, mavlink.MAV_RESULT_ACCEPTED)]
+            self.armed = arm
+            text = "Arming motors" if arm else "Disarming motors"
+            logging.debug(f"Sim vehicle {self.sysid}: {text}")
+            return [self._ack(cmd, mavlink.MAV_RESULT_ACCEPTED),
+                    self.mav.statustext_encode(mavlink.MAV_SEVERITY_INFO, text.encode()),
+                    self._telemetry(mavlink.MAVLINK_MSG_ID_HEARTBEAT, now)]
+        if cmd == mavlink.MAV_CMD_DO_SET_MODE:
+            mode = int(msg.param2)
+            if mode not in mavutil.mode_mapping_acm:
+                return [self._ack(cmd, mavlink.MAV_RESULT_DENIED)]
+            self.custom_mode = mode
+            return [self._ack(cmd, mavlink.MAV_RESULT_ACCEPTED),
+                    self._telemetry(mavlink.MAVLINK_MSG_ID_HEARTBEAT, now)]
+        return [self._ack(cmd, mavlink.MAV_RESULT_UNSUPPORTED)]
+
+    def _on_set_mode(self, msg, now):
+        self.custom_mode = msg.custom_mode
+        return [self._telemetry(mavlink.MAVLINK_MSG_ID_HEARTBEAT, now)]
+
+    def _param_value(self, index):
+        name = self._param_names[index]
+        return self.mav.param_value_encode(name.encode(), self.params[name], mavlink.MAV_PARAM_TYPE_REAL32,
+                                           len(self._param_names), index)
+
+    def _on_param_request_list(self, msg, now):
+        return [self._param_value(i) for i in range(len(self._param_names))]
+
+    def _on_param_request_read(self, msg, now):
+        if msg.param_index >= 0:
+            index = msg.param_index
+        else:
+            name = msg.param_id.rstrip('\0') if isinstance(msg.param_id, str) else msg.param_id.decode().rstrip('\0')
+            if name not in self.params:
+                return []
+            index = self._param_names.index(name)
+        if not 0 <= index < len(self._param_names):
+            return []
+        return [self._param_value(index)]
+
+    def _on_param_set(self, msg, now):
+        name = msg.param_id.rstrip('\0') if isinstance(msg.param_id, str) else msg.param_id.decode().rstrip('\0')
+        if name not in self.params:
+            return []
+        self.params[name] = msg.param_value
+        return [self._param_value(self._param_names.index(name))]
+
+    # --- Mission protocol (vehicle side) ---
+
+    def _mission_request(self, seq, now):
+        count, items, _, _ = self._upload
+        self._upload = (count, items, seq, now)
+        return self.mav.mission_request_int_encode(255, 0, seq)
+
+    def _mission_tick(self, now):
+        """Repeats the outstanding item request during an upload."""
+        if self._upload is None or now - self._upload[3] < self.MISSION_TIMEOUT:
+            return []
+        return [self.pack(self._mission_request(self._upload[2], now))]
+
+    def _on_mission_count(self, msg, now):
+        if msg.count == 0:
+            self.mission = []
+            self._upload = None
+            return [self.mav.mission_ack_encode(255, 0, mavlink.MAV_MISSION_ACCEPTED)]
+        self._upload = (msg.count, [None] * msg.count, 0, now)
+        return [self._mission_request(0, now)]
+
+    def _on_mission_item_int(self, msg, now):
+        if self._upload is None:
+            return []
+        count, items, expected, _ = self._upload
+        if msg.seq == expected:
+            items[msg.seq] = msg
+            expected += 1
+        if expected == count:
+            self.mission = items
+            self._upload = None
+            return [self.mav.mission_ack_encode(255, 0, mavlink.MAV_MISSION_ACCEPTED)]
+        return [self._mission_request(expected, now)]
+
+    def _on_mission_request_list(self, msg, now):
+        return [self.mav.mission_count_encode(255, 0, len(self.mission))]
+
+    def _on_mission_request_int(self, msg, now):
+        if not 0 <= msg.seq < len(self.mission):
+            return [self.mav.mission_ack_encode(255, 0, mavlink.MAV_MISSION_INVALID_SEQUENCE)]
+        item = self.mission[msg.seq]
+        return [self.mav.mission_item_int_encode(
+            255, 0, item.seq, item.frame, item.command, item.current, item.autocontinue,
+            item.param1, item.param2, item.param3, item.param4, item.x, item.y, item.z)]
+
+    def _on_mission_clear_all(self, msg, now):
+        self.mission = []
+        return [self.mav.mission_ack_encode(255, 0, mavlink.MAV_MISSION_ACCEPTED)]
@@ -0,0 +1,201 @@
+import threading
+import time
+
+import pytest
+from pymavlink import mavutil
+
+from core.command_scheduler import CommandScheduler, Priority, RESULT_TIMEOUT
+from utils.event_bus import Context, event_bus
+
+ARM = mavutil.mavlink.MAV_CMD_COMPONENT_ARM_DISARM
+SET_INTERVAL = mavutil.mavlink.MAV_CMD_SET_MESSAGE_INTERVAL
+
+
+class FakeMaster:
+    """Stands in for a mavutil connection: encodes for real, records decoded frames."""
+
+    def __init__(self):
+        self.target_system = 1
+        self.target_component = 1
+        self.mav = mavutil.mavlink.MAVLink(self, srcSystem=255)
+        self._parser = mavutil.mavlink.MAVLink(None)
+        self.sent = []
+        self.lock = threading.Lock()
+
+    def write(self, data):
+        with self.lock:
+            self.sent.extend(self._parser.parse_buffer(bytes(data)) or [])
+
+    def commands(self):
+        with self.lock:
+            return [m for m in self.sent if m.get_type() == 'COMMAND_LONG']
+
+
+def ack(command, result=mavutil.mavlink.MAV_RESULT_ACCEPTED):
+    return mavutil.mavlink.MAVLink_command_ack_message(command, result)
+
+
+def wait_for(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.005)
+    return False
+
+
+@pytest.fixture
+def master():
+    return FakeMaster()
+
+
+@pytest.fixture
+def scheduler():
+    scheduler = CommandScheduler()
+    yield scheduler
+    scheduler.stop()
+    scheduler.join(timeout=1)
+
+
+class TestCommandScheduler:
+    def test_critical_command_overtakes_queued_bulk(self, scheduler, master):
+        for _ in range(5):
+            scheduler.send_message(lambda mav: mav.param_request_list_encode(1, 1), Priority.BULK)
+        scheduler.send_command(ARM, (1,), Priority.CRITICAL)
+        scheduler.attach(master)
+        scheduler.start()
+
+        assert wait_for(lambda: len(master.sent) == 6)
+        assert master.sent[0].get_type() == 'COMMAND_LONG'
+        assert master.sent[0].command == ARM
+        assert master.sent[0].param1 == 1
+
+    def test_ack_completes_command_with_rtt(self, scheduler, master):
+        results = []
+        scheduler.attach(master)
+        scheduler.start()
+        scheduler.send_command(ARM, (1,), Priority.CRITICAL, callback=lambda r, rtt: results.append((r, rtt)))
+
+        assert wait_for(lambda: master.commands())
+        scheduler.handle_message(ack(ARM))
+
+        assert results[0][0] == mavutil.mavlink.MAV_RESULT_ACCEPTED
+        assert results[0][1] >= 0
+        stats = scheduler.stats()
+        assert stats["in_flight"] == 0
+        assert stats["rtt_ms_last"] is not None
+
+    def test_ack_is_published_per_vehicle_and_command(self, scheduler, master):
+        acks = []
+        event_bus.subscribe("command_ack.1.#", acks.append)
+        try:
+            scheduler.attach(master)
+            scheduler.start()
+            scheduler.send_command(ARM, (1,), Priority.CRITICAL)
+            assert wait_for(lambda: master.commands())
+            scheduler.handle_message(ack(ARM))
+        finally:
+            event_bus.unsubscribe("command_ack.1.#", acks.append)
+        assert len(acks) == 1
+        assert (acks[0]["sysid"], acks[0]["command"], acks[0]["result"]) == (1, ARM, mavutil.mavlink.MAV_RESULT_ACCEPTED)
+
+    def test_stalled_ack_subscriber_does_not_delay_handle_message(self, scheduler, master):
+        release = threading.Event()
+        handled = []
+
+        def stalled(data):
+            release.wait(5)
+            handled.append(data)
+
+        event_bus.subscribe("command_ack.#", stalled, context=Context.WORKER)
+        try:
+            scheduler.attach(master)
+            scheduler.start()
+            slowest = 0.0
+            for i in range(100):  # More than any subscriber queue holds
+                scheduler.send_command(ARM, (1,), Priority.CRITICAL)
+                assert wait_for(lambda: len(master.commands()) == i + 1)
+                started = time.perf_counter()
+                scheduler.handle_message(ack(ARM))
+                slowest = max(slowest, time.perf_counter() - started)
+        finally:
+            release.set()
+            event_bus.unsubscribe("command_ack.#", stalled)
+        assert slowest < 0.1
+        assert wait_for(lambda: len(handled) == 2)  # The first ACK, then the newest one
+
+    def test_unacknowledged_command_is_retried_then_times_out(self, scheduler, master):
+        scheduler.ACK_TIMEOUT = 0.02
+        results = []
+        scheduler.attach(master)
+        scheduler.start()
+        scheduler.send_command(ARM, (1,), callback=lambda r, rtt: results.append(r))
+
+        assert wait_for(lambda: results)
+        assert results == [RESULT_TIMEOUT]
+        confirmations = [m.confirmation for m in master.commands()]
+        assert confirmations == list(range(CommandScheduler.MAX_ATTEMPTS))
+        assert scheduler.stats()["timeouts"] == 1
+
+    def test_in_progress_ack_keeps_command_pending(self, scheduler, master):
+        scheduler.ACK_TIMEOUT = 0.05
+        results = []
+        scheduler.attach(master)
+        scheduler.start()
+        scheduler.send_command(ARM, (1,), callback=lambda r, rtt: results.append(r))
+        assert wait_for(lambda: master.commands())
+
+        scheduler.handle_message(ack(ARM, mavutil.mavlink.MAV_RESULT_IN_PROGRESS))
+        time.sleep(0.15)
+        assert results == []
+        assert len(master.commands()) == 1
+
+        scheduler.handle_message(ack(ARM))
+        assert results == [mavutil.mavlink.MAV_RESULT_ACCEPTED]
+
+    def test_same_command_id_is_serialized(self, scheduler, master):
+        scheduler.attach(master)
+        scheduler.start()
+        scheduler.send_command(SET_INTERVAL, (30, 100000), Priority.STREAM)
+        scheduler.send_command(SET_INTERVAL, (33, 200000), Priority.STREAM)
+
+        assert wait_for(lambda: master.commands())
+        time.sleep(0.05)
+        assert [m.param1 for m in master.commands()] == [30]
+
+        scheduler.handle_message(ack(SET_INTERVAL))
+        assert wait_for(lambda: len(master.commands()) == 2)
+        assert master.commands()[1].param1 == 33
+
+    def test_bandwidth_limit_throttles_bulk_but_not_critical(self, scheduler, master):
+        scheduler.set_bandwidth_limit(200)  # bytes/s; ~10 frames per second
+        scheduler.attach(master)
+        for _ in range(50):
+            scheduler.send_message(lambda mav: mav.param_request_list_encode(1, 1), Priority.BULK)
+        scheduler.start()
+
+        time.sleep(0.2)
+        sent_bulk = len(master.sent)
+        assert sent_bulk < 10
+
+        scheduler.send_command(ARM, (1,), Priority.CRITICAL)
+        assert wait_for(lambda: master.commands(), timeout=0.1)
+
+    def test_raw_uplink_is_charged_against_bandwidth_limit(self, scheduler, master):
+        scheduler.set_bandwidth_limit(200)
+        scheduler.attach(master)
+        frame = master.mav.param_request_list_encode(1, 1).pack(master.mav)
+        for _ in range(20):  # 400 bytes: two seconds of budget
+            assert scheduler.send_raw(frame)
+        scheduler.send_message(lambda mav: mav.param_request_list_encode(1, 1), Priority.BULK)
+        scheduler.start()
+
+        time.sleep(0.3)
+        assert len(master.sent) == 20  # The queued message waits for the budget
+
+    def test_nothing_is_sent_while_detached(self, scheduler, master):
+        scheduler.start()
+        scheduler.send_command(ARM, (1,))
+        time.sleep(0.05)
+        scheduler.attach(master)
+        assert wait_for(lambda: master.commands())
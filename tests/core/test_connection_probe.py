@@ -0,0 +1,137 @@
+import socket
+import threading
+import time
+
+import pytest
+from pymavlink import mavutil
+
+from core.connection_probe import ConnectionProber, build_candidates, is_vehicle_heartbeat
+
+
+def free_udp_port():
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class FakeHeartbeat:
+    def __init__(self, mav_type=mavutil.mavlink.MAV_TYPE_QUADROTOR,
+                 autopilot=mavutil.mavlink.MAV_AUTOPILOT_ARDUPILOTMEGA):
+        self.type = mav_type
+        self.autopilot = autopilot
+
+    def get_type(self):
+        return 'HEARTBEAT'
+
+
+class FakeLink:
+    """Stand-in for a mavutil connection that answers only on one baud."""
+    def __init__(self, conn_string, baud, good):
+        self.conn_string = conn_string
+        self.baud = baud
+        self.good = good
+        self.closed = False
+        self.mav = self
+        self.target_system = 1
+        self.target_component = 1
+
+    def heartbeat_send(self, *args):
+        pass
+
+    def recv_match(self, type=None, blocking=True, timeout=None):
+        time.sleep(0.01)
+        return FakeHeartbeat() if self.good else None
+
+    def close(self):
+        self.closed = True
+
+
+class FakeConnector:
+    def __init__(self, good):
+        self.good = good  # (conn_string, baud) that yields a heartbeat
+        self.links = []
+        self.lock = threading.Lock()
+
+    def __call__(self, conn_string, baud=None, **kwargs):
+        link = FakeLink(conn_string, baud, (conn_string, baud) == self.good)
+        with self.lock:
+            self.links.append(link)
+        return link
+
+
+class TestBuildCandidates:
+    def test_serial_ports_get_all_bauds_and_network_none(self):
+        candidates = build_candidates(['/dev/ttyUSB0', 'udpout:localhost:14550'], [57600, 115200], endpoints=[])
+        assert candidates == [('/dev/ttyUSB0', [57600, 115200]), ('udpout:localhost:14550', [None])]
+
+    def test_udpin_deduplicated_by_port(self):
+        candidates = build_candidates(['udpin:localhost:14550', 'udpin:0.0.0.0:14550'], [57600],
+                                      endpoints=['udpin:0.0.0.0:14550', 'tcp:127.0.0.1:5760'])
+        assert [c for c, _ in candidates] == ['udpin:localhost:14550', 'tcp:127.0.0.1:5760']
+
+
+def test_is_vehicle_heartbeat_rejects_gcs_and_invalid_autopilot():
+    assert is_vehicle_heartbeat(FakeHeartbeat())
+    assert not is_vehicle_heartbeat(FakeHeartbeat(mav_type=mavutil.mavlink.MAV_TYPE_GCS))
+    assert not is_vehicle_heartbeat(FakeHeartbeat(autopilot=mavutil.mavlink.MAV_AUTOPILOT_INVALID))
+    assert not is_vehicle_heartbeat(None)
+
+
+class TestConnectionProber:
+    def test_first_heartbeat_wins_and_losers_are_closed(self):
+        connector = FakeConnector(good=('/dev/ttyUSB1', 115200))
+        prober = ConnectionProber(heartbeat_timeout=0.3, connect_fn=connector)
+        candidates = build_candidates(['/dev/ttyUSB0', '/dev/ttyUSB1', 'udpin:0.0.0.0:14550'],
+                                      [57600, 115200], endpoints=[])
+
+        start = time.monotonic()
+        result = prober.probe(candidates)
+        elapsed = time.monotonic() - start
+
+        assert result is not None
+        master, conn_string, baud = result
+        assert (conn_string, baud) == ('/dev/ttyUSB1', 115200)
+        assert not master.closed
+        # Both bauds of a port are tried sequentially, ports in parallel
+        assert elapsed < 1.0
+
+        time.sleep(0.5)  # Let cancelled workers notice and close
+        losers = [link for link in connector.links if link is not master]
+        assert losers and all(link.closed for link in losers)
+
+    def test_no_vehicle_returns_none(self):
+        connector = FakeConnector(good=None)
+        prober = ConnectionProber(heartbeat_timeout=0.1, connect_fn=connector)
+        assert prober.probe(build_candidates(['/dev/ttyUSB0'], [57600], endpoints=[])) is None
+        assert all(link.closed for link in connector.links)
+
+    def test_open_failure_is_skipped(self):
+        def failing_connect(conn_string, **kwargs):
+            raise OSError("no such port")
+        prober = ConnectionProber(heartbeat_timeout=0.1, connect_fn=failing_connect)
+        assert prober.probe([('/dev/ttyUSB9', [57600])]) is None
+
+    def test_finds_vehicle_over_udp_loopback(self):
+        port = free_udp_port()
+        stop = threading.Event()
+
+        def vehicle():
+            link = mavutil.mavlink_connection(f'udpout:127.0.0.1:{port}', source_system=1)
+            while not stop.is_set():
+                link.mav.heartbeat_send(mavutil.mavlink.MAV_TYPE_QUADROTOR,
+                                        mavutil.mavlink.MAV_AUTOPILOT_ARDUPILOTMEGA, 0, 0, 0)
+                time.sleep(0.1)
+            link.close()
+
+        thread = threading.Thread(target=vehicle, daemon=True)
+        thread.start()
+        try:
+            prober = ConnectionProber(heartbeat_timeout=1.0)
+            result = prober.probe([(f'udpin:127.0.0.1:{port}', [None]), ('tcp:127.0.0.1:1', [None])])
+            assert result is not None
+            master, conn_string, _ = result
+            assert conn_string == f'udpin:127.0.0.1:{port}'
+            master.close()
+        finally:
+            stop.set()
+            thread.join()
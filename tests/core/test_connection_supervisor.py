@@ -0,0 +1,105 @@
+import pytest
+
+from core.connection_supervisor import ConnectionSupervisor, LinkState
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def transitions():
+    return []
+
+
+@pytest.fixture
+def supervisor(clock, transitions):
+    return ConnectionSupervisor(
+        on_state_change=lambda state, message: transitions.append(state),
+        rng=lambda: 0.5,
+        clock=clock
+    )
+
+
+class TestConnectionSupervisor:
+    def test_first_heartbeat_connects(self, supervisor, transitions):
+        supervisor.transport_opening()
+        assert supervisor.heartbeat() is True
+        assert supervisor.state == LinkState.CONNECTED
+        assert supervisor.heartbeat() is False
+        assert transitions == [LinkState.CONNECTING, LinkState.CONNECTED]
+
+    def test_heartbeat_gap_keeps_transport_and_recovers_on_next_heartbeat(self, supervisor, clock):
+        supervisor.transport_opening()
+        supervisor.heartbeat()
+        clock.advance(ConnectionSupervisor.HEARTBEAT_TIMEOUT + 0.1)
+
+        assert supervisor.tick() is None  # No transport recycle, just LINK_LOST
+        assert supervisor.state == LinkState.LINK_LOST
+        assert supervisor.status() == "RECONNECTING"
+
+        clock.advance(1.0)
+        assert supervisor.heartbeat() is True
+        assert supervisor.state == LinkState.CONNECTED
+
+    def test_long_silence_recycles_transport(self, supervisor, clock):
+        supervisor.transport_opening()
+        supervisor.heartbeat()
+        clock.advance(ConnectionSupervisor.HEARTBEAT_TIMEOUT + 0.1)
+        supervisor.tick()
+        clock.advance(ConnectionSupervisor.REOPEN_AFTER + 0.1)
+        assert supervisor.tick() is not None
+
+    def test_initial_heartbeat_timeout_gives_up(self, supervisor, clock):
+        supervisor.transport_opening()
+        clock.advance(ConnectionSupervisor.CONNECT_TIMEOUT + 0.1)
+        reason = supervisor.tick()
+        assert reason == "Heartbeat timed out"
+        assert supervisor.transport_failed(reason) is None
+        assert supervisor.state == LinkState.FAILED
+        assert supervisor.status() == "ERROR"
+
+    def test_transport_failure_after_connect_backs_off_with_jitter(self, supervisor):
+        supervisor.transport_opening()
+        supervisor.heartbeat()
+
+        delays = [supervisor.transport_failed("boom") for _ in range(4)]
+        base = ConnectionSupervisor.RECONNECT_BACKOFF_BASE
+        # rng fixed at 0.5 -> 75% of the exponential delay
+        assert delays == pytest.approx([0.75 * base * 2 ** i for i in range(4)])
+        assert supervisor.state == LinkState.BACKOFF
+
+        supervisor.transport_opening()
+        assert supervisor.status() == "RECONNECTING"
+
+    def test_backoff_is_capped_and_jittered(self):
+        low = ConnectionSupervisor(rng=lambda: 0.0).backoff_delay(20)
+        high = ConnectionSupervisor(rng=lambda: 0.999999).backoff_delay(20)
+        assert low == pytest.approx(ConnectionSupervisor.RECONNECT_BACKOFF_MAX / 2)
+        assert high == pytest.approx(ConnectionSupervisor.RECONNECT_BACKOFF_MAX, rel=1e-5)
+
+    def test_gives_up_after_max_attempts(self, supervisor):
+        supervisor.transport_adopted()
+        for _ in range(ConnectionSupervisor.MAX_RECONNECT_ATTEMPTS):
+            assert supervisor.transport_failed("boom") is not None
+        assert supervisor.transport_failed("boom") is None
+        assert supervisor.state == LinkState.FAILED
+
+    def test_heartbeat_resets_attempts(self, supervisor):
+        supervisor.transport_adopted()
+        supervisor.transport_failed("boom")
+        supervisor.transport_opening()
+        supervisor.heartbeat()
+        assert supervisor.reconnect_attempts == 0
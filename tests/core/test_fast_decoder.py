@@ -0,0 +1,159 @@
+import math
+import random
+import struct
+
+import pytest
+from pymavlink import mavutil
+from pymavlink.generator.mavcrc import x25crc as reference_crc
+
+from core.fast_decoder import FastDecoder, x25crc
+from core.telemetry_manager import TELEMETRY_FIELDS
+
+mavlink = mavutil.mavlink
+FIELDS = {msg_type: fields for msg_type, (fields, _) in TELEMETRY_FIELDS.items()}
+
+
+def encoder(sysid=1):
+    return mavlink.MAVLink(None, srcSystem=sysid, srcComponent=1)
+
+
+def sample_messages(mav):
+    return [
+        mav.heartbeat_encode(mavlink.MAV_TYPE_QUADROTOR, mavlink.MAV_AUTOPILOT_ARDUPILOTMEGA,
+                             mavlink.MAV_MODE_FLAG_SAFETY_ARMED | 1, 4, mavlink.MAV_STATE_ACTIVE),
+        mav.attitude_encode(1234, 0.1, -0.2, 3.0, 0.01, 0.02, 0.03),
+        mav.global_position_int_encode(5678, -353632610, 1491652300, 584000, 30000, 120, -340, 5, 27000),
+        mav.vfr_hud_encode(12.5, 11.0, 271, 45, 30.2, -0.5),
+        mav.sys_status_encode(0, 0, 0, 250, 11800, -1, 87, 0, 0, 0, 0, 0, 0),
+        mav.gps_raw_int_encode(99, 3, -353632610, 1491652300, 584000, 121, 150, 800, 27000, 12),
+        mav.rc_channels_encode(42, 8, *range(1100, 1900, 100), *([0] * 10), 255),
+        mav.statustext_encode(mavlink.MAV_SEVERITY_INFO, b"hello"),
+    ]
+
+
+def v1_frame(mav, msg):
+    buf = msg.pack(mav)
+    mav.seq = (mav.seq + 1) % 256
+    return bytes(buf)
+
+
+def v2_frame(msg, sysid=1, compid=1, seq=0, signed=False):
+    """MAVLink2 framing (with payload zero-truncation) of a message, done by hand."""
+    payload = v1_frame(encoder(sysid), msg)[6:-2].rstrip(b"\0") or b"\0"
+    msg_id = msg.get_msgId()
+    header = struct.pack('<BBBBBBBHB', 0xFD, len(payload), 1 if signed else 0, 0, seq, sysid, compid,
+                         msg_id & 0xFFFF, msg_id >> 16)
+    crc = reference_crc(header[1:] + payload + bytes((msg.crc_extra,))).crc
+    frame = header + payload + struct.pack('<H', crc)
+    return frame + (bytes(13) if signed else b"")
+
+
+def expected(msg):
+    return tuple(getattr(msg, name) for name in FIELDS[msg.get_type()])
+
+
+def assert_same_values(actual, wanted):
+    for a, w in zip(actual, wanted):
+        if isinstance(w, float):
+            assert a == pytest.approx(w, rel=1e-6)
+        else:
+            assert a == w
+
+
+class TestFastDecoder:
+    def test_checksum_matches_pymavlink(self):
+        rng = random.Random(0)
+        for _ in range(200):
+            data = rng.randbytes(rng.randrange(0, 300))
+            extra = rng.randrange(256)
+            assert x25crc(data, extra) == reference_crc(data + bytes((extra,))).crc
+
+    def test_decodes_v1_frames_like_pymavlink(self):
+        mav = encoder()
+        messages = sample_messages(mav)
+        decoder = FastDecoder(FIELDS)
+        out = decoder.feed(b"".join(v1_frame(mav, m) for m in messages))
+        assert len(out) == len(messages)
+        for item, msg in zip(out, messages):
+            if msg.get_type() == 'STATUSTEXT':
+                assert isinstance(item, bytes)
+                assert mavlink.MAVLink(None).parse_buffer(item)[0].text == "hello"
+                continue
+            msg_type, sysid, compid, values = item
+            assert (msg_type, sysid, compid) == (msg.get_type(), 1, 1)
+            assert_same_values(values, expected(msg))
+
+    @pytest.mark.parametrize("signed", [False, True])
+    def test_decodes_truncated_v2_frames(self, signed):
+        messages = [m for m in sample_messages(encoder()) if m.get_type() != 'STATUSTEXT']
+        decoder = FastDecoder(FIELDS)
+        out = decoder.feed(b"".join(v2_frame(m, sysid=7, signed=signed) for m in messages))
+        assert [item[0] for item in out] == [m.get_type() for m in messages]
+        for (_, sysid, _, values), msg in zip(out, messages):
+            assert sysid == 7
+            assert_same_values(values, expected(msg))
+
+    def test_split_reads_noise_and_corruption(self):
+        mav = encoder()
+        good = [mav.attitude_encode(i, 0.1 * i, 0.0, 0.0, 0, 0, 0) for i in range(50)]
+        frames = [v1_frame(mav, m) for m in good]
+        corrupted = bytearray(frames[10])
+        corrupted[8] ^= 0xFF
+        stream = b"\x00\xfe\x13garbage" + b"".join(frames[:10]) + bytes(corrupted) + b"".join(frames[11:])
+
+        decoder = FastDecoder(FIELDS)
+        rng = random.Random(3)
+        out, pos = [], 0
+        while pos < len(stream):
+            step = rng.randrange(1, 40)
+            out.extend(decoder.feed(stream[pos:pos + step]))
+            pos += step
+        rolls = [values[0] for _, _, _, values in out]
+        assert rolls == pytest.approx([0.1 * i for i in range(50) if i != 10], rel=1e-6)
+        assert decoder.stats()["crc_errors"] >= 1
+
+    def test_on_frame_gets_every_valid_frame_unchanged(self):
+        mav = encoder(sysid=4)
+        frames = [v1_frame(mav, m) for m in sample_messages(mav)]
+        corrupted = bytearray(frames[2])
+        corrupted[8] ^= 0xFF
+        stream = b"noise" + b"".join(frames[:2]) + bytes(corrupted) + b"".join(frames[2:])
+        seen = []
+        decoder = FastDecoder(FIELDS)
+        decoder.on_frame = lambda sysid, msg_id, frame: seen.append((sysid, msg_id, bytes(frame)))
+        for pos in range(0, len(stream), 17):
+            decoder.feed(stream[pos:pos + 17])
+        assert seen == [(4, frame[5], frame) for frame in frames]
+
+    def test_failing_on_frame_does_not_wedge_decoder(self):
+        mav = encoder()
+        frames = [v1_frame(mav, m) for m in sample_messages(mav)]
+        decoder = FastDecoder(FIELDS)
+
+        def on_frame(sysid, msg_id, frame):
+            raise RuntimeError("router failed")
+
+        decoder.on_frame = on_frame
+        out = decoder.feed(b"".join(frames[:2]))
+        out += decoder.feed(b"".join(frames[2:]))  # Would raise BufferError with the buffer still exported
+        assert len(out) == len(frames)
+        assert decoder.stats()["on_frame_errors"] == len(frames)
+
+    def test_requested_field_order_is_kept(self):
+        # GLOBAL_POSITION_INT puts time_boot_ms first on the wire; ask for it last
+        decoder = FastDecoder({'GLOBAL_POSITION_INT': ('hdg', 'lat', 'time_boot_ms')})
+        mav = encoder()
+        msg = mav.global_position_int_encode(5678, -353632610, 1, 2, 3, 4, 5, 6, 27000)
+        (_, _, _, values), = decoder.feed(v1_frame(mav, msg))
+        assert values == (27000, -353632610, 5678)
+
+    def test_unknown_field_is_rejected(self):
+        with pytest.raises(ValueError):
+            FastDecoder({'ATTITUDE': ('nope',)})
+
+    def test_converted_telemetry_matches_pymavlink_path(self):
+        mav = encoder()
+        msg = mav.attitude_encode(0, math.radians(10), math.radians(-5), math.radians(90), 0, 0, 0)
+        (_, _, _, values), = FastDecoder(FIELDS).feed(v1_frame(mav, msg))
+        convert = TELEMETRY_FIELDS['ATTITUDE'][1]
+        assert convert(*values) == pytest.approx(convert(*expected(msg)))
@@ -0,0 +1,120 @@
+import json
+import struct
+
+import numpy as np
+import pytest
+from pymavlink import mavutil
+
+from core import flight_summary
+from core.flight_summary import FlightSummary, main, split_tlog, summarize_logs, summarize_tlog
+from core.tlog_arrays import scan_tlog
+from sim.vehicle import SimVehicle
+
+mavlink = mavutil.mavlink
+T0 = 1_700_000_000.0
+SECONDS = 120
+
+
+def record(t, frame):
+    return struct.pack('>Q', int(t * 1e6)) + bytes(frame)
+
+
+@pytest.fixture(scope="module")
+def flight_log(tmp_path_factory):
+    """Two minutes of a simulated flight: armed at 20 s, LOITER at 60 s, an error at 90 s, GCS heartbeats."""
+    clock = [0.0]
+    vehicle = SimVehicle(clock=lambda: clock[0], rate_scale=5.0)
+    gcs = mavlink.MAVLink(None, srcSystem=255, srcComponent=190)
+    records = []
+    t = 0.0
+    while t < SECONDS:
+        clock[0] = t
+        vehicle.armed = t >= 20
+        vehicle.custom_mode = 5 if t >= 60 else 0
+        records.extend(record(T0 + t, frame) for frame in vehicle.due(t))
+        if round(t * 100) % 100 == 0:
+            records.append(record(T0 + t, gcs.heartbeat_encode(mavlink.MAV_TYPE_GCS, mavlink.MAV_AUTOPILOT_INVALID,
+                                                                 0, 0, 0).pack(gcs)))
+        if round(t * 100) == 9000:
+            records.append(record(T0 + t, vehicle.pack(
+                vehicle.mav.statustext_encode(mavlink.MAV_SEVERITY_CRITICAL, b"PreArm: Compass not healthy"))))
+            records.append(record(T0 + t, vehicle.pack(
+                vehicle.mav.statustext_encode(mavlink.MAV_SEVERITY_INFO, b"Just information"))))
+        t += 0.01
+    path = tmp_path_factory.mktemp("logs") / "flight.tlog"
+    path.write_bytes(b"".join(records))
+    return str(path)
+
+
+class TestFlightSummary:
+    def test_report(self, flight_log):
+        report = summarize_tlog(flight_log, workers=0).to_dict()
+        assert report['duration'] == pytest.approx(SECONDS, abs=0.1)
+        assert report['armed_time'] == pytest.approx(SECONDS - 20, abs=1.0)
+        assert report['max_alt_rel'] == pytest.approx(32.0, abs=0.01)
+        assert report['distance'] == pytest.approx(8.0 * SECONDS, rel=0.01)
+        assert report['battery']['start_remaining'] == 100
+        assert report['battery']['consumed_mah'] == pytest.approx(12.5 * SECONDS / 3.6, rel=0.01)
+        assert report['battery']['max_current'] == pytest.approx(12.5)
+        assert [m['mode'] for m in report['modes']] == ['STABILIZE', 'LOITER']
+        assert report['modes'][0]['duration'] == pytest.approx(60, abs=1.0)
+        assert list(report['gps']['fix_samples']) == [3]
+        assert report['gps']['min_satellites'] == 12
+        assert report['gps']['max_hdop'] == pytest.approx(1.21)
+        assert [e['text'] for e in report['errors']] == ["PreArm: Compass not healthy"]
+
+    def test_chunks_start_on_records(self, flight_log):
+        chunks = split_tlog(flight_log, chunk_bytes=20_000)
+        assert len(chunks) > 10
+        assert chunks[0][0] == 0 and chunks[-1][1] == len(open(flight_log, 'rb').read())
+        assert all(a[1] == b[0] for a, b in zip(chunks, chunks[1:]))
+        buf = np.fromfile(flight_log, dtype=np.uint8)
+        record_starts = set((scan_tlog(buf).start - 8).tolist())
+        assert all(start in record_starts for start, _ in chunks)
+
+    def test_chunked_pool_matches_whole_log(self, flight_log):
+        whole = summarize_tlog(flight_log, workers=0).to_dict()
+        pooled = summarize_tlog(flight_log, workers=2, chunk_bytes=20_000).to_dict()
+        assert pooled['distance'] == pytest.approx(whole['distance'])
+        assert pooled['battery'].pop('consumed_mah') == pytest.approx(whole['battery'].pop('consumed_mah'))
+        del pooled['distance'], whole['distance']
+        assert pooled == whole
+
+    def test_merge_with_empty_partial(self, flight_log):
+        summary = summarize_tlog(flight_log, workers=0)
+        assert FlightSummary().merge(summary).merge(FlightSummary()).to_dict() == summary.to_dict()
+
+    def test_many_logs_and_sysid_filter(self, flight_log):
+        summaries = summarize_logs([flight_log, flight_log], workers=0, sysid=2)
+        assert list(summaries) == [flight_log]  # Same path once
+        assert summaries[flight_log].messages == summarize_tlog(flight_log, workers=0).messages
+        assert summaries[flight_log].to_dict()['modes'] == []
+
+    def test_cli_json(self, flight_log, capsys):
+        main([flight_log, '--workers', '0', '--json'])
+        assert '"mode": "LOITER"' in capsys.readouterr().out
+
+    @pytest.mark.parametrize("workers", [0, 2])
+    def test_failed_logs_do_not_stop_the_batch(self, flight_log, tmp_path, monkeypatch, workers):
+        missing = str(tmp_path / "missing.tlog")
+        broken = tmp_path / "broken.tlog"
+        broken.write_bytes(b"\0" * 100)
+        split = flight_summary.split_tlog
+        # A chunk past the end of the file fails in the worker
+        monkeypatch.setattr(flight_summary, "split_tlog",
+                            lambda path, chunk_bytes: [(0, 1000)] if path == str(broken) else split(path, chunk_bytes))
+        failures = {}
+        summaries = summarize_logs([missing, flight_log, str(broken)], workers=workers, failures=failures)
+        assert list(summaries) == [flight_log]
+        assert summaries[flight_log].messages == summarize_tlog(flight_log, workers=0).messages
+        assert isinstance(failures[missing], FileNotFoundError)
+        assert isinstance(failures[str(broken)], ValueError)
+
+    def test_cli_reports_failed_logs(self, flight_log, tmp_path, capsys):
+        missing = str(tmp_path / "missing.tlog")
+        assert main([missing, flight_log, '--workers', '0', '--json']) == 1
+        lines = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+        assert [line["path"] for line in lines] == [flight_log, missing]
+        assert lines[1]["error"].startswith("FileNotFoundError")
+        with pytest.raises(FileNotFoundError):
+            summarize_tlog(missing, workers=0)
@@ -0,0 +1,214 @@
+import random
+import threading
+import time
+
+import pytest
+from pymavlink import mavutil
+
+from core.command_scheduler import CommandScheduler
+from core.log_download import LogDownload, LogListRequest, LOG_DATA_SIZE
+
+
+class SimLogVehicle:
+    """
+    Vehicle side of the LOG_* protocol over an in-process link. Frames are
+    dropped with probability `loss`, and all of them while `down` is set.
+    """
+
+    def __init__(self, logs, loss=0.0, seed=1):
+        self.logs = logs  # Key: log id, Value: bytes
+        self.loss = loss
+        self.down = False
+        self.target_system = 1
+        self.target_component = 1
+        self.transfer = None
+        self.requests = []
+        self.ended = False
+        self.mav = mavutil.mavlink.MAVLink(self, srcSystem=255)  # GCS-side encoder
+        self._vehicle_mav = mavutil.mavlink.MAVLink(_Deliver(self), srcSystem=1, srcComponent=1)
+        self._parser = mavutil.mavlink.MAVLink(None)
+        self._gcs_parser = mavutil.mavlink.MAVLink(None)
+        self._rng = random.Random(seed)
+
+    def _lost(self):
+        return self.down or self._rng.random() < self.loss
+
+    def write(self, data):
+        """GCS -> vehicle."""
+        for msg in self._parser.parse_buffer(bytes(data)) or []:
+            if not self._lost():
+                self.handle(msg)
+
+    def deliver(self, data):
+        """Vehicle -> GCS."""
+        for msg in self._gcs_parser.parse_buffer(bytes(data)) or []:
+            if not self._lost() and self.transfer:
+                self.transfer.handle_message(msg)
+
+    def handle(self, msg):
+        msg_type = msg.get_type()
+        ids = sorted(self.logs)
+        if msg_type == 'LOG_REQUEST_LIST':
+            if not ids:
+                return self._vehicle_mav.log_entry_send(0, 0, 0, 0, 0)
+            for log_id in ids:
+                if msg.start <= log_id <= msg.end:
+                    self._vehicle_mav.log_entry_send(log_id, len(ids), ids[-1], 1700000000 + log_id,
+                                                     len(self.logs[log_id]))
+        elif msg_type == 'LOG_REQUEST_DATA':
+            self.requests.append((msg.ofs, msg.count))
+            content = self.logs[msg.id]
+            end = min(len(content), msg.ofs + msg.count)
+            for ofs in range(msg.ofs, end, LOG_DATA_SIZE):
+                chunk = content[ofs:min(ofs + LOG_DATA_SIZE, end)]
+                self._vehicle_mav.log_data_send(msg.id, ofs, len(chunk), list(chunk.ljust(LOG_DATA_SIZE, b"\0")))
+        elif msg_type == 'LOG_REQUEST_END':
+            self.ended = True
+
+
+class _Deliver:
+    def __init__(self, vehicle):
+        self.vehicle = vehicle
+
+    def write(self, data):
+        self.vehicle.deliver(data)
+
+
+@pytest.fixture
+def scheduler():
+    scheduler = CommandScheduler()
+    scheduler.start()
+    yield scheduler
+    scheduler.stop()
+
+
+def wait_for(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.005)
+    return False
+
+
+def blob(size, seed=0):
+    return random.Random(seed).randbytes(size)
+
+
+def run(vehicle, transfer, timeout=30):
+    done = threading.Event()
+    results = []
+    inner = transfer.on_complete
+
+    def on_complete(*args):
+        results.append(args)
+        if inner:
+            inner(*args)
+        done.set()
+
+    transfer.on_complete = on_complete
+    vehicle.transfer = transfer
+    transfer.start()
+    assert done.wait(timeout)
+    return results[0]
+
+
+class TestLogList:
+    def test_lists_all_logs(self, scheduler):
+        vehicle = SimLogVehicle({1: b"a" * 10, 2: b"b" * 20, 3: b"c" * 30}, loss=0.3, seed=5)
+        scheduler.attach(vehicle)
+        request = LogListRequest(scheduler, 1, 1)
+        request.TIMEOUT = 0.05
+        success, message, entries = run(vehicle, request)
+        assert success, message
+        assert [(e.id, e.size) for e in entries] == [(1, 10), (2, 20), (3, 30)]
+
+    def test_no_logs(self, scheduler):
+        vehicle = SimLogVehicle({})
+        scheduler.attach(vehicle)
+        success, _, entries = run(vehicle, LogListRequest(scheduler, 1, 1))
+        assert success
+        assert entries == []
+
+
+class TestLogDownload:
+    def make(self, scheduler, vehicle, tmp_path, size, progress=None):
+        scheduler.attach(vehicle)
+        transfer = LogDownload(scheduler, 1, 1, 7, size, str(tmp_path / "00000007.BIN"),
+                               on_progress=(lambda *a: progress.append(a)) if progress is not None else None)
+        transfer.STALL_TIMEOUT = 0.05
+        return transfer
+
+    def test_clean_download(self, scheduler, tmp_path):
+        content = blob(100_000)
+        vehicle = SimLogVehicle({7: content})
+        progress = []
+        transfer = self.make(scheduler, vehicle, tmp_path, len(content), progress)
+
+        success, message = run(vehicle, transfer)
+        assert success, message
+        assert (tmp_path / "00000007.BIN").read_bytes() == content
+        assert vehicle.requests == [(0, len(content))]
+        assert progress[-1][:2] == (len(content), len(content))
+        assert wait_for(lambda: vehicle.ended)
+
+    def test_lossy_download_requests_only_holes(self, scheduler, tmp_path):
+        content = blob(200_000, seed=2)
+        vehicle = SimLogVehicle({7: content}, loss=0.03, seed=11)
+        transfer = self.make(scheduler, vehicle, tmp_path, len(content))
+
+        success, message = run(vehicle, transfer)
+        assert success, message
+        assert (tmp_path / "00000007.BIN").read_bytes() == content
+        refetched = sum(count for _, count in vehicle.requests[1:])
+        assert 0 < refetched < len(content) // 2
+
+    def test_survives_link_drop(self, scheduler, tmp_path):
+        content = blob(150_000, seed=3)
+        vehicle = SimLogVehicle({7: content})
+        transfer = self.make(scheduler, vehicle, tmp_path, len(content))
+
+        # Drop the link after roughly a third of the stream, restore it shortly after
+        original = vehicle.deliver
+        delivered = [0]
+
+        def deliver(data):
+            delivered[0] += 1
+            if delivered[0] == 550:
+                vehicle.down = True
+                threading.Timer(0.3, lambda: setattr(vehicle, "down", False)).start()
+            original(data)
+
+        vehicle.deliver = deliver
+        success, message = run(vehicle, transfer)
+        assert success, message
+        assert (tmp_path / "00000007.BIN").read_bytes() == content
+        # Resumed from the hole, not from zero
+        assert all(ofs > 0 for ofs, _ in vehicle.requests[1:])
+
+    def test_unexpected_error_completes_transfer(self, scheduler, tmp_path):
+        vehicle = SimLogVehicle({7: blob(1000)})
+        transfer = self.make(scheduler, vehicle, tmp_path, 1000)
+
+        def malformed(msg):
+            raise IndexError("index out of range")
+        transfer._store = malformed
+        success, message = run(vehicle, transfer)
+        assert not success
+        assert message == "IndexError: index out of range"
+
+    def test_holes_are_merged_when_close(self, scheduler, tmp_path):
+        transfer = LogDownload(scheduler, 1, 1, 7, 10_000, str(tmp_path / "x"))
+        transfer.received.add(0, 1000)
+        transfer.received.add(1090, 1500)  # 410 bytes between holes: cheaper to re-fetch
+        transfer.received.add(1600, 9000)
+        assert transfer.holes() == [(1000, 1600), (9000, 10_000)]
+
+    def test_gives_up_after_stall_limit(self, scheduler, tmp_path):
+        vehicle = SimLogVehicle({7: blob(1000)}, loss=1.0)
+        transfer = self.make(scheduler, vehicle, tmp_path, 1000)
+        transfer.STALL_LIMIT = 0.3
+        success, message = run(vehicle, transfer)
+        assert not success
+        assert "stalled" in message
+        assert transfer.retries > 0
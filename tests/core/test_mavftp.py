@@ -0,0 +1,242 @@
+import os
+import random
+import struct
+import threading
+import time
+
+import pytest
+from pymavlink import mavutil
+
+from core.command_scheduler import CommandScheduler
+from core.mavftp import FtpClient, FtpDownload, FtpPayload, FtpError, OpCode, MAX_DATA
+
+
+class SimFtpServer:
+    """
+    Vehicle side of MAVLink FTP over an in-process lossy link: OpenFileRO,
+    ReadFile, BurstReadFile and TerminateSession on an in-memory file table.
+    """
+    BURST_CHUNKS = 40  # Packets per burst before burst_complete is set
+
+    def __init__(self, files, loss=0.0, seed=1, max_sessions=4):
+        self.files = files
+        self.loss = loss
+        self.max_sessions = max_sessions
+        self.sessions = {}  # Key: session, Value: path
+        self.target_system = 1
+        self.target_component = 1
+        self.client = None
+        self.mav = mavutil.mavlink.MAVLink(self, srcSystem=255)  # GCS-side encoder (scheduler writes here)
+        self._vehicle_mav = mavutil.mavlink.MAVLink(_Deliver(self), srcSystem=1, srcComponent=1)
+        self._parser = mavutil.mavlink.MAVLink(None)
+        self._gcs_parser = mavutil.mavlink.MAVLink(None)
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.requests = []
+
+    def _lost(self):
+        return self._rng.random() < self.loss
+
+    def write(self, data):
+        """GCS -> vehicle."""
+        with self._lock:
+            for msg in self._parser.parse_buffer(bytes(data)) or []:
+                if not self._lost():
+                    self.handle(FtpPayload.unpack(msg.payload))
+
+    def deliver(self, data):
+        """Vehicle -> GCS."""
+        for msg in self._gcs_parser.parse_buffer(bytes(data)) or []:
+            if not self._lost() and self.client:
+                self.client.handle_message(msg)
+
+    def reply(self, request, opcode, data=b"", offset=None, burst_complete=0, seq=None):
+        payload = FtpPayload(opcode, request.session, request.offset if offset is None else offset, data,
+                             seq=(request.seq + 1 if seq is None else seq) & 0xFFFF,
+                             req_opcode=request.opcode, burst_complete=burst_complete)
+        self._vehicle_mav.file_transfer_protocol_send(0, 255, 0, list(payload.pack()))
+
+    def nak(self, request, error):
+        self.reply(request, OpCode.NAK, bytes([error]))
+
+    def handle(self, request):
+        self.requests.append(request.opcode)
+        if request.opcode == OpCode.OPEN_FILE_RO:
+            path = request.data.rstrip(b"\0").decode()
+            if path not in self.files:
+                return self.nak(request, FtpError.FILE_NOT_FOUND)
+            free = [s for s in range(self.max_sessions) if s not in self.sessions]
+            if not free:
+                return self.nak(request, FtpError.NO_SESSIONS_AVAILABLE)
+            request.session = free[0]
+            self.sessions[free[0]] = path
+            self.reply(request, OpCode.ACK, struct.pack('<I', len(self.files[path])))
+        elif request.opcode == OpCode.READ_FILE:
+            content = self.files[self.sessions[request.session]]
+            if request.offset >= len(content):
+                return self.nak(request, FtpError.EOF)
+            self.reply(request, OpCode.ACK, content[request.offset:request.offset + request.size])
+        elif request.opcode == OpCode.BURST_READ_FILE:
+            content = self.files[self.sessions[request.session]]
+            offset, seq = request.offset, request.seq + 1
+            for i in range(self.BURST_CHUNKS):
+                if offset >= len(content):
+                    return self.reply(request, OpCode.NAK, bytes([FtpError.EOF]), offset, 1, seq)
+                chunk = content[offset:offset + MAX_DATA]
+                last = i == self.BURST_CHUNKS - 1
+                self.reply(request, OpCode.ACK, chunk, offset, int(last), seq)
+                offset += len(chunk)
+                seq += 1
+        elif request.opcode == OpCode.TERMINATE_SESSION:
+            self.sessions.pop(request.session, None)
+            self.reply(request, OpCode.ACK)
+
+
+class _Deliver:
+    def __init__(self, server):
+        self.server = server
+
+    def write(self, data):
+        self.server.deliver(data)
+
+
+@pytest.fixture
+def make_client():
+    schedulers = []
+
+    def make(server):
+        scheduler = CommandScheduler()
+        scheduler.attach(server)
+        scheduler.start()
+        schedulers.append(scheduler)
+        client = FtpClient(scheduler, 1, 1)
+        server.client = client
+        return client
+
+    yield make
+    for scheduler in schedulers:
+        scheduler.stop()
+
+
+def download(client, remote, local):
+    done = threading.Event()
+    results = []
+    transfer = client.download(remote, local, on_complete=lambda ok, msg: (results.append((ok, msg)), done.set()))
+    transfer.REQUEST_TIMEOUT = 0.05
+    return transfer, done, results
+
+
+def wait_for(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.005)
+    return False
+
+
+def blob(size, seed=0):
+    return random.Random(seed).randbytes(size)
+
+
+class TestFtpPayload:
+    def test_pack_unpack_round_trip(self):
+        payload = FtpPayload(OpCode.READ_FILE, session=2, offset=4096, data=b"abc", seq=77)
+        packed = payload.pack()
+        assert len(packed) == 251
+        back = FtpPayload.unpack(packed)
+        assert (back.seq, back.session, back.opcode, back.size, back.offset, back.data) == \
+            (77, 2, OpCode.READ_FILE, 3, 4096, b"abc")
+
+
+class TestFtpDownload:
+    def test_burst_download(self, make_client, tmp_path):
+        content = blob(50_000)
+        server = SimFtpServer({"@PARAM/param.pck": content})
+        client = make_client(server)
+        local = tmp_path / "param.pck"
+
+        transfer, done, results = download(client, "@PARAM/param.pck", str(local))
+        assert done.wait(20)
+        assert results[0][0], results[0][1]
+        assert local.read_bytes() == content
+        assert OpCode.BURST_READ_FILE in server.requests
+        assert wait_for(lambda: server.sessions == {})  # Session terminated
+
+    def test_lossy_download_refills_only_holes(self, make_client, tmp_path):
+        content = blob(120_000, seed=1)
+        server = SimFtpServer({"logs/00000001.BIN": content}, loss=0.05, seed=4)
+        client = make_client(server)
+        local = tmp_path / "log.bin"
+
+        transfer, done, results = download(client, "logs/00000001.BIN", str(local))
+        assert done.wait(30)
+        assert results[0][0], results[0][1]
+        assert local.read_bytes() == content
+        assert OpCode.READ_FILE in server.requests
+        assert transfer.stats()["bytes"] == len(content)
+        # Hole filling must not re-read the file: total requests stay near the chunk count
+        assert server.requests.count(OpCode.READ_FILE) < len(content) // MAX_DATA // 2
+
+    def test_concurrent_sessions(self, make_client, tmp_path):
+        files = {"a.bin": blob(30_000, 2), "b.bin": blob(45_000, 3)}
+        server = SimFtpServer(files, loss=0.02, seed=9)
+        client = make_client(server)
+
+        runs = [download(client, name, str(tmp_path / name)) for name in files]
+        for transfer, done, results in runs:
+            assert done.wait(30)
+            assert results[0][0], results[0][1]
+        for name, content in files.items():
+            assert (tmp_path / name).read_bytes() == content
+
+    def test_open_reply_is_expected_before_request_goes_out(self, make_client, tmp_path):
+        server = SimFtpServer({"a.bin": blob(1000)})
+        client = make_client(server)
+        expected = []
+        send = client.send
+
+        def check(payload):
+            if payload.opcode == OpCode.OPEN_FILE_RO:
+                expected.append((payload.seq + 1) & 0xFFFF in client._by_reply_seq)
+            return send(payload)
+
+        client.send = check
+        _, done, results = download(client, "a.bin", str(tmp_path / "a.bin"))
+        assert done.wait(5)
+        assert results[0][0], results[0][1]
+        assert expected == [True]  # Opened once, no retry
+
+    def test_missing_file_fails(self, make_client, tmp_path):
+        server = SimFtpServer({})
+        client = make_client(server)
+        _, done, results = download(client, "nope.txt", str(tmp_path / "nope.txt"))
+        assert done.wait(5)
+        assert results[0] == (False, "Open nope.txt failed: FileNotFound")
+
+    def test_unexpected_error_completes_transfer(self, make_client, tmp_path, monkeypatch):
+        def malformed(self, reply):
+            raise struct.error("unpack requires a buffer of 12 bytes")
+        monkeypatch.setattr(FtpDownload, "_handle_data", malformed)
+        server = SimFtpServer({"a.bin": blob(1000)})
+        client = make_client(server)
+        _, done, results = download(client, "a.bin", str(tmp_path / "a.bin"))
+        assert done.wait(5)
+        assert results[0] == (False, "error: unpack requires a buffer of 12 bytes")
+        assert wait_for(lambda: server.sessions == {})  # Session still terminated
+
+    def test_empty_file(self, make_client, tmp_path):
+        server = SimFtpServer({"empty": b""})
+        client = make_client(server)
+        _, done, results = download(client, "empty", str(tmp_path / "empty"))
+        assert done.wait(5)
+        assert results[0][0]
+        assert os.path.getsize(tmp_path / "empty") == 0
+
+    def test_silent_vehicle_times_out(self, make_client, tmp_path):
+        server = SimFtpServer({"a": b"x"}, loss=1.0)
+        client = make_client(server)
+        transfer, done, results = download(client, "a", str(tmp_path / "a"))
+        assert done.wait(5)
+        assert results[0][0] is False
+        assert transfer.retries == FtpDownload.MAX_RETRIES
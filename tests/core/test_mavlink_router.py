@@ -0,0 +1,147 @@
+import socket
+import time
+
+import pytest
+from pymavlink import mavutil
+
+from core.mavlink_router import MavlinkRouter, Route, parse_output
+
+mavlink = mavutil.mavlink
+
+
+def frame(sysid, msg):
+    mav = mavlink.MAVLink(None, srcSystem=sysid, srcComponent=1)
+    return bytes(msg(mav).pack(mav))
+
+
+def attitude(mav):
+    return mav.attitude_encode(1, 0.1, 0.2, 0.3, 0, 0, 0)
+
+
+def heartbeat(mav):
+    return mav.heartbeat_encode(mavlink.MAV_TYPE_QUADROTOR, mavlink.MAV_AUTOPILOT_ARDUPILOTMEGA, 0, 0, 0)
+
+
+def udp_socket():
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.bind(('127.0.0.1', 0))
+    sock.settimeout(2)
+    return sock
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def wait_for(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.005)
+    return False
+
+
+@pytest.fixture
+def uplink():
+    return []
+
+
+@pytest.fixture
+def router(uplink):
+    router = MavlinkRouter(uplink=uplink.append, buffer_size=4096)
+    yield router
+    router.stop()
+
+
+class TestRoutes:
+    def test_parse_output(self):
+        kind, address, route = parse_output("udpout:127.0.0.1:14560?sysid=1,2&msgs=HEARTBEAT,30&exclude=33")
+        assert (kind, address) == ("udpout", ("127.0.0.1", 14560))
+        assert route.sysids == {1, 2} and route.msg_ids == {0, 30} and route.exclude == {33}
+        assert parse_output("tcpin:0.0.0.0:5760")[2].allows(42, 12345)
+
+    @pytest.mark.parametrize("spec", ["udp:1.2.3.4:5", "udpout:host", "udpout:h:1?sysid=1&speed=2",
+                                      "udpout:h:1?msgs=NOT_A_MESSAGE"])
+    def test_bad_specs(self, spec):
+        with pytest.raises(ValueError):
+            parse_output(spec)
+
+    def test_route(self):
+        route = Route(sysids=[1], exclude=[mavlink.MAVLINK_MSG_ID_RC_CHANNELS])
+        assert route.allows(1, mavlink.MAVLINK_MSG_ID_ATTITUDE)
+        assert not route.allows(2, mavlink.MAVLINK_MSG_ID_ATTITUDE)
+        assert not route.allows(1, mavlink.MAVLINK_MSG_ID_RC_CHANNELS)
+
+
+class TestMavlinkRouter:
+    def test_udpout_forwards_routed_frames_unchanged(self, router):
+        receiver = udp_socket()
+        router.add_output(f"udpout:127.0.0.1:{receiver.getsockname()[1]}?sysid=1")
+        router.start()
+        frames = [frame(2, attitude), frame(1, attitude), frame(1, heartbeat)]
+        for data in frames:
+            router.forward(data[3], data[5], memoryview(data))
+        assert [receiver.recv(300) for _ in range(2)] == frames[1:]
+        assert router.stats()[router.endpoints[0].spec]["frames"] == 2
+
+    def test_udpin_learns_peer_and_merges_uplink(self, router, uplink):
+        port = free_port()
+        router.add_output(f"udpin:127.0.0.1:{port}")
+        router.start()
+        client = udp_socket()
+        command = frame(255, lambda mav: mav.command_long_encode(1, 1, 400, 0, 1, 0, 0, 0, 0, 0, 0))
+        client.sendto(b"junk" + command[:10], ('127.0.0.1', port))  # Partial frames are not forwarded...
+        client.sendto(command[10:], ('127.0.0.1', port))  # ...until they are complete
+        assert wait_for(lambda: uplink)
+        assert uplink == [command]
+        router.forward(1, 30, frame(1, attitude))
+        assert client.recv(300) == frame(1, attitude)
+
+    def test_slow_tcp_client_does_not_block_forwarding(self, router):
+        port = free_port()
+        endpoint = router.add_output(f"tcpin:127.0.0.1:{port}")
+        router.start()
+        client = socket.create_connection(('127.0.0.1', port))
+        client.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4096)
+        assert wait_for(lambda: endpoint.peers)
+        data = frame(1, attitude)
+        start = time.perf_counter()
+        for _ in range(20000):  # Far more than the socket and send buffers hold
+            router.forward(1, 30, data)
+        assert time.perf_counter() - start < 2.0
+        assert router.stats()[endpoint.spec]["dropped"] > 0
+
+        received = bytearray()
+        client.settimeout(0.5)
+        try:
+            while True:
+                chunk = client.recv(65536)
+                if not chunk:
+                    break
+                received += chunk
+        except socket.timeout:
+            pass
+        messages = mavlink.MAVLink(None).parse_buffer(bytes(received))
+        assert messages and all(m.get_type() == 'ATTITUDE' for m in messages)  # Only whole frames were dropped
+        assert len(received) == len(messages) * len(data)
+
+    def test_tcp_output_connects_and_reconnects(self, router):
+        server = socket.socket()
+        server.bind(('127.0.0.1', 0))
+        server.listen()
+        server.settimeout(2)
+        router.RECONNECT_INTERVAL = 0.05
+        endpoint = router.add_output(f"tcp:127.0.0.1:{server.getsockname()[1]}")
+        router.start()
+        conn, _ = server.accept()
+        assert wait_for(lambda: endpoint.peers)
+        conn.close()
+        assert wait_for(lambda: not endpoint.peers)  # Noticed the close...
+        conn, _ = server.accept()  # ...and connected again
+        assert wait_for(lambda: endpoint.peers)
+        router.forward(1, 0, frame(1, heartbeat))
+        conn.settimeout(2)
+        assert conn.recv(300) == frame(1, heartbeat)
@@ -0,0 +1,162 @@
+import random
+import threading
+
+import pytest
+from pymavlink import mavutil
+
+from core.command_scheduler import CommandScheduler
+from core.mission import MissionTable, MissionTransfer
+
+
+class LossyLink:
+    """
+    Scheduler-facing fake connection wired to a simulated vehicle mission
+    handler. Each direction drops frames with the given probability.
+    """
+
+    def __init__(self, loss=0.0, seed=1, mission=None):
+        self.target_system = 1
+        self.target_component = 1
+        self.mav = mavutil.mavlink.MAVLink(self, srcSystem=255)
+        self._rng = random.Random(seed)
+        self.loss = loss
+        self._gcs_parser = mavutil.mavlink.MAVLink(None)
+        self._vehicle_parser = mavutil.mavlink.MAVLink(None)
+        self.vehicle = SimVehicleMission(self, mission)
+        self.transfer = None
+        self.lock = threading.Lock()
+
+    def write(self, data):
+        """GCS -> vehicle."""
+        with self.lock:
+            for msg in self._vehicle_parser.parse_buffer(bytes(data)) or []:
+                if self._rng.random() >= self.loss:
+                    self.vehicle.handle(msg)
+
+    def deliver(self, data):
+        """Vehicle -> GCS."""
+        for msg in self._gcs_parser.parse_buffer(bytes(data)) or []:
+            if self._rng.random() >= self.loss and self.transfer:
+                self.transfer.handle_message(msg)
+
+
+class SimVehicleMission:
+    """Vehicle side of the mission protocol, requesting items one at a time."""
+
+    def __init__(self, link, mission=None):
+        self.mav = mavutil.mavlink.MAVLink(self, srcSystem=1, srcComponent=1)
+        self.link = link
+        self.items = {}
+        self.expected = None
+        self.count = 0
+        self.mission = mission
+
+    def write(self, data):
+        self.link.deliver(data)
+
+    def handle(self, msg):
+        msg_type = msg.get_type()
+        if msg_type == 'MISSION_COUNT':
+            self.count, self.items, self.expected = msg.count, {}, 0
+            self.mav.mission_request_int_send(255, 0, 0)
+        elif msg_type == 'MISSION_ITEM_INT' and self.expected is not None:
+            if msg.seq == self.expected:
+                self.items[msg.seq] = msg
+                self.expected += 1
+            if self.expected == self.count:
+                self.mav.mission_ack_send(255, 0, mavutil.mavlink.MAV_MISSION_ACCEPTED)
+            else:
+                # Duplicate or out-of-order item: ask again for the one we need
+                self.mav.mission_request_int_send(255, 0, self.expected)
+        elif msg_type == 'MISSION_REQUEST_LIST':
+            self.mav.mission_count_send(255, 0, len(self.mission))
+        elif msg_type == 'MISSION_REQUEST_INT':
+            self.mav.send(self.mission.item_message(self.mav, 255, 0, msg.seq))
+
+
+def survey(n):
+    table = MissionTable()
+    for i in range(n):
+        table.add_waypoint(-35.36 + (i // 20) * 1e-4, 149.16 + (i % 20) * 1e-4, 30 + i % 7)
+    return table
+
+
+def run_transfer(link, direction, table=None, timeout=30):
+    scheduler = CommandScheduler()
+    scheduler.attach(link)
+    scheduler.start()
+    done = threading.Event()
+    results = []
+    progress = []
+
+    transfer = MissionTransfer(
+        direction, scheduler, 1, 1, table=table,
+        on_progress=lambda d, t: progress.append((d, t)),
+        on_complete=lambda ok, message: (results.append((ok, message)), done.set())
+    )
+    transfer.ITEM_TIMEOUT = 0.1
+    transfer.MIN_TIMEOUT = 0.01
+    link.transfer = transfer
+    transfer.start()
+    assert done.wait(timeout)
+    scheduler.stop()
+    return transfer, results[0], progress
+
+
+class TestMissionTable:
+    def test_round_trip_through_message(self):
+        table = survey(3)
+        mav = mavutil.mavlink.MAVLink(None)
+        copy = MissionTable(3)
+        for seq in range(3):
+            copy.store_message(table.item_message(mav, 1, 1, seq))
+        assert copy == table
+        assert copy[1]["x"] == int(round(-35.36 * 1e7))
+
+    def test_index_out_of_range(self):
+        with pytest.raises(IndexError):
+            MissionTable(2)[2]
+
+
+class TestMissionTransfer:
+    def test_upload_over_lossy_link(self):
+        link = LossyLink(loss=0.1, seed=7)
+        table = survey(700)
+        transfer, (ok, message), progress = run_transfer(link, MissionTransfer.UPLOAD, table)
+
+        assert ok, message
+        assert len(link.vehicle.items) == 700
+        assert all(link.vehicle.items[s].x == table[s]["x"] for s in range(700))
+        assert progress[-1] == (700, 700)
+        stats = transfer.stats()
+        assert stats["retries"] > 0
+        assert stats["items_per_second"] > 0
+
+    def test_download_reassembles_only_missing_items(self):
+        mission = survey(300)
+        link = LossyLink(loss=0.1, seed=3, mission=mission)
+        transfer, (ok, message), _ = run_transfer(link, MissionTransfer.DOWNLOAD)
+
+        assert ok, message
+        assert transfer.table == mission
+        assert transfer.retries > 0
+
+    def test_download_empty_mission(self):
+        link = LossyLink(mission=MissionTable())
+        transfer, (ok, _), _ = run_transfer(link, MissionTransfer.DOWNLOAD)
+        assert ok
+        assert len(transfer.table) == 0
+
+    def test_upload_rejected(self):
+        link = LossyLink()
+        link.vehicle.handle = lambda msg: (msg.get_type() == 'MISSION_COUNT' and
+                                           link.vehicle.mav.mission_ack_send(255, 0, mavutil.mavlink.MAV_MISSION_NO_SPACE))
+        _, (ok, message), _ = run_transfer(link, MissionTransfer.UPLOAD, survey(5))
+        assert not ok
+        assert "MAV_MISSION_NO_SPACE" in message
+
+    def test_gives_up_when_vehicle_silent(self):
+        link = LossyLink(loss=1.0)
+        transfer, (ok, _), _ = run_transfer(link, MissionTransfer.UPLOAD, survey(5))
+        assert not ok
+        assert transfer.retries == MissionTransfer.MAX_RETRIES
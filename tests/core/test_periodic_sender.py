@@ -0,0 +1,112 @@
+import threading
+import time
+
+import pytest
+from pymavlink import mavutil
+
+from core.command_scheduler import CommandScheduler
+from core.periodic_sender import PeriodicSender, ManualControl, gcs_heartbeat, system_time
+
+
+class FakeMaster:
+    """Stands in for a mavutil connection: encodes for real, records decoded frames with send times."""
+
+    def __init__(self):
+        self.target_system = 1
+        self.target_component = 1
+        self.mav = mavutil.mavlink.MAVLink(self, srcSystem=255)
+        self._parser = mavutil.mavlink.MAVLink(None)
+        self.sent = []
+        self.lock = threading.Lock()
+
+    def write(self, data):
+        now = time.monotonic()
+        with self.lock:
+            for msg in self._parser.parse_buffer(bytes(data)) or []:
+                self.sent.append((now, msg))
+
+    def of_type(self, msg_type):
+        with self.lock:
+            return [(t, m) for t, m in self.sent if m.get_type() == msg_type]
+
+
+@pytest.fixture
+def master():
+    return FakeMaster()
+
+
+@pytest.fixture
+def sender(master):
+    scheduler = CommandScheduler()  # Not started: send_immediate() writes from the caller
+    scheduler.attach(master)
+    sender = PeriodicSender(scheduler)
+    yield sender
+    sender.stop()
+    sender.join(timeout=1)
+
+
+class TestPeriodicSender:
+    def test_sends_gcs_heartbeat(self, sender, master):
+        sender.add("HEARTBEAT", 50, gcs_heartbeat)
+        sender.start()
+        time.sleep(0.1)
+
+        heartbeats = master.of_type('HEARTBEAT')
+        assert heartbeats
+        msg = heartbeats[0][1]
+        assert msg.type == mavutil.mavlink.MAV_TYPE_GCS
+        assert msg.get_srcSystem() == 255
+
+    def test_rate_has_no_cumulative_drift(self, sender, master):
+        sender.add("SYSTEM_TIME", 100, system_time)
+        sender.start()
+        time.sleep(0.5)
+        sender.stop()
+        sender.join(timeout=1)
+
+        times = [t for t, _ in master.of_type('SYSTEM_TIME')]
+        # Deadlines are t0 + n * 10 ms, so the count tracks elapsed time
+        assert 45 <= len(times) <= 52
+        stats = sender.stats()["SYSTEM_TIME"]
+        assert stats["sent"] == len(times)
+        assert stats["jitter_ms_mean"] is not None
+
+    def test_slow_send_skips_missed_deadlines(self, sender, master):
+        def slow_heartbeat(m):
+            time.sleep(0.05)
+            return gcs_heartbeat(m)
+
+        sender.add("HEARTBEAT", 100, slow_heartbeat)
+        sender.start()
+        time.sleep(0.3)
+        sender.stop()
+        sender.join(timeout=1)
+
+        stats = sender.stats()["HEARTBEAT"]
+        assert stats["missed"] > 0
+        # No catch-up burst: never more sends than the slow builder allows
+        assert stats["sent"] <= 7
+
+    def test_remove_stops_task(self, sender, master):
+        sender.add("HEARTBEAT", 100, gcs_heartbeat)
+        sender.start()
+        time.sleep(0.05)
+        sender.remove("HEARTBEAT")
+        time.sleep(0.02)
+        count = len(master.of_type('HEARTBEAT'))
+        time.sleep(0.05)
+        assert len(master.of_type('HEARTBEAT')) == count
+        assert "HEARTBEAT" not in sender.stats()
+
+    def test_nothing_sent_while_detached(self, sender, master):
+        sender.command_scheduler.detach()
+        sender.add("HEARTBEAT", 100, gcs_heartbeat)
+        sender.start()
+        time.sleep(0.05)
+        assert master.of_type('HEARTBEAT') == []
+
+    def test_manual_control_uses_latest_axes(self, master):
+        manual = ManualControl()
+        manual.set_axes(x=100, y=-200, z=700, r=50)
+        msg = manual(master)
+        assert (msg.target, msg.x, msg.y, msg.z, msg.r) == (1, 100, -200, 700, 50)
@@ -0,0 +1,123 @@
+import multiprocessing
+import os
+import time
+
+import numpy as np
+import pytest
+from multiprocessing import shared_memory
+
+from core.shm_ring import HEADER_SIZE, RECORD_SIZE, RingReader, RingWriter
+
+SCHEMA = {"ATTITUDE": ("roll", "pitch", "yaw"), "RC_CHANNELS": tuple(f"chan{i}_raw" for i in range(1, 9))}
+
+
+@pytest.fixture
+def name():
+    return f"gcs_ring_test_{os.getpid()}"
+
+
+@pytest.fixture
+def writer(name):
+    writer = RingWriter(SCHEMA, name, capacity=16)
+    yield writer
+    writer.close()
+
+
+def read_in_child(name, count, results):
+    with RingReader(name, start="oldest") as reader:
+        deadline = time.monotonic() + 5
+        messages = []
+        while len(messages) < count and time.monotonic() < deadline:
+            messages.extend(reader.messages(reader.read()))
+            time.sleep(0.01)
+        results.put([(m["type"], m["sysid"], m["roll"]) for m in messages])
+
+
+class TestShmRing:
+    def test_round_trip(self, writer, name):
+        with RingReader(name, start="oldest") as reader:
+            assert reader.schema == list(SCHEMA.items())
+            writer.write("ATTITUDE", 1, 1, 100.0, (0.1, 0.2, 0.3))
+            writer.write("RC_CHANNELS", 2, 1, 101.0, tuple(range(1100, 1900, 100)))
+            batch = reader.read()
+            assert batch['seq'].tolist() == [2, 4]
+            assert np.isnan(batch['values'][0, 3:]).all()
+            assert list(reader.messages(batch)) == [
+                {"type": "ATTITUDE", "timestamp": 100.0, "sysid": 1, "compid": 1,
+                 "roll": 0.1, "pitch": 0.2, "yaw": 0.3},
+                {"type": "RC_CHANNELS", "timestamp": 101.0, "sysid": 2, "compid": 1,
+                 **{f"chan{i + 1}_raw": 1100.0 + 100 * i for i in range(8)}}]
+            assert type(next(reader.messages(batch))["roll"]) is float
+            assert len(reader.read()) == 0
+
+    def test_reader_starts_at_latest(self, writer, name):
+        writer.write("ATTITUDE", 1, 1, 0.0, (0.0, 0.0, 0.0))
+        with RingReader(name) as reader:
+            writer.write("ATTITUDE", 1, 1, 1.0, (1.0, 0.0, 0.0))
+            assert reader.read()['timestamp'].tolist() == [1.0]
+
+    def test_lapped_reader_counts_lost_records(self, writer, name):
+        with RingReader(name, start="oldest") as reader:
+            for i in range(40):
+                writer.write("ATTITUDE", 1, 1, float(i), (0.0, 0.0, 0.0))
+            assert reader.read(max_records=10)['timestamp'].tolist() == [float(i) for i in range(24, 34)]
+            assert reader.lost == 24
+            assert len(reader.read()) == 6 and reader.lost == 24
+
+    def test_slot_being_rewritten_is_dropped(self, writer, name):
+        with RingReader(name, start="oldest") as reader:
+            for i in range(3):
+                writer.write("ATTITUDE", 1, 1, float(i), (0.0, 0.0, 0.0))
+            reader.records['seq'][1] = 2 * 17 + 1  # Writer is halfway through record 17 in slot 1
+            assert reader.read()['timestamp'].tolist() == [0.0, 2.0]
+            assert reader.lost == 1
+
+    def test_read_from_another_process(self, writer, name):
+        results = multiprocessing.get_context("spawn").Queue()
+        for i in range(5):
+            writer.write("ATTITUDE", 3, 1, float(i), (float(i), 0.0, 0.0))
+        child = multiprocessing.get_context("spawn").Process(target=read_in_child, args=(name, 8, results))
+        child.start()
+        for i in range(5, 8):
+            writer.write("ATTITUDE", 3, 1, float(i), (float(i), 0.0, 0.0))
+        assert results.get(timeout=30) == [("ATTITUDE", 3, float(i)) for i in range(8)]
+        child.join(10)
+        RingReader(name).close()  # Still there after the reader process exited
+
+    def test_stale_ring_is_replaced(self, name):
+        stale = shared_memory.SharedMemory(name=name, create=True, size=HEADER_SIZE + RECORD_SIZE)
+        stale.close()
+        with RingWriter(SCHEMA, name, capacity=4):
+            with RingReader(name) as reader:
+                assert reader.capacity == 4
+
+    def test_live_ring_is_not_taken_over(self, writer, name):
+        with pytest.raises(FileExistsError, match=str(os.getpid())):
+            RingWriter(SCHEMA, name, capacity=4)
+        with RingReader(name) as reader:
+            assert reader.capacity == 16  # The first writer's ring is untouched
+            writer.write("ATTITUDE", 1, 1, 100.0, (0.1, 0.2, 0.3))
+            assert len(reader.read()) == 1
+
+    def test_ring_of_dead_writer_is_replaced(self, name, monkeypatch):
+        child = multiprocessing.Process(target=os._exit, args=(0,))
+        child.start()
+        child.join()
+        with monkeypatch.context() as patch:
+            patch.setattr(os, "getpid", lambda: child.pid)  # As if the child had created it and crashed
+            stale = RingWriter(SCHEMA, name, capacity=4)
+        try:
+            with RingWriter(SCHEMA, name, capacity=8):
+                with RingReader(name) as reader:
+                    assert reader.capacity == 8
+        finally:
+            stale.shm.close()
+
+    def test_rejects_other_shared_memory(self, name):
+        other = shared_memory.SharedMemory(name=name, create=True, size=HEADER_SIZE)
+        try:
+            with pytest.raises(ValueError):
+                RingReader(name)
+        finally:
+            other.close()
+            other.unlink()
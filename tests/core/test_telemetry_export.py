@@ -0,0 +1,130 @@
+import json
+import math
+import struct
+
+import numpy as np
+import pytest
+
+from core.telemetry_export import ColumnReader, ColumnWriter, export_tlog
+from sim.vehicle import SimVehicle
+
+T0 = 1_700_000_000.0
+
+
+def attitude(t, roll):
+    return {"type": "ATTITUDE", "timestamp": T0 + t, "roll": roll, "pitch": 0.5, "yaw": 90.0}
+
+
+def heartbeat(t, mode="STABILIZE", armed=False):
+    return {"type": "HEARTBEAT", "timestamp": T0 + t, "mode": mode, "armed": armed, "system_status": 3}
+
+
+class TestColumnStore:
+    @pytest.mark.parametrize("compress", [True, False])
+    def test_streaming_round_trip(self, tmp_path, compress):
+        path = str(tmp_path / "store")
+        with ColumnWriter(path, chunk_rows=7, compress=compress) as writer:
+            for i in range(30):
+                writer.append(heartbeat(i, "LOITER" if i >= 20 else "STABILIZE") if i % 5 == 0
+                              else attitude(i, float(i)))
+            writer.append({"type": "RC_CHANNELS", "timestamp": T0 + 30, "rc_channels": [1100, 1900]})
+            writer.append({"type": "SYS_STATUS", "timestamp": T0 + 31, "battery_current": None})
+
+        store = ColumnReader(path)
+        assert len(store) == 32
+        assert len(store.manifest["chunks"]) == 5
+        times, roll = store.column("roll")
+        np.testing.assert_array_equal(times, T0 + np.arange(32))
+        expected = [np.nan if i % 5 == 0 or i >= 30 else float(i) for i in range(32)]
+        np.testing.assert_array_equal(roll, expected)
+        _, mode = store.column("mode")
+        assert [m for m in mode.tolist() if m] == ["STABILIZE"] * 4 + ["LOITER"] * 2
+        assert store.column("rc_channels[1]")[1][-2] == 1900
+        assert np.isnan(store.column("battery_current")[1]).all()
+        assert store.manifest["columns"]["mode"] == 'str'
+
+    def test_uncompressed_columns_are_memory_mapped(self, tmp_path):
+        path = str(tmp_path / "store")
+        with ColumnWriter(path, chunk_rows=100, max_chunk_seconds=1000, compress=False) as writer:
+            for i in range(250):
+                writer.append(attitude(i, float(i)))
+        chunks = list(ColumnReader(path).iter_chunks("roll"))
+        assert len(chunks) == 3
+        assert all(isinstance(values, np.memmap) for _, values in chunks)
+        assert np.concatenate([v for _, v in chunks]).tolist() == [float(i) for i in range(250)]
+
+    def test_time_range_reads_only_overlapping_chunks(self, tmp_path):
+        path = str(tmp_path / "store")
+        with ColumnWriter(path, chunk_rows=10) as writer:
+            for i in range(100):
+                writer.append(attitude(i, float(i)))
+        store = ColumnReader(path)
+        assert len(list(store.iter_chunks("roll", T0 + 42, T0 + 47))) == 1
+        times, roll = store.column("roll", T0 + 42, T0 + 47)
+        assert roll.tolist() == [42.0, 43.0, 44.0, 45.0, 46.0, 47.0]
+        data = store.read(["roll", "pitch"], start=T0 + 98)
+        assert list(data) == ["time", "roll", "pitch"] and data["pitch"].tolist() == [0.5, 0.5]
+
+    def test_chunks_are_readable_while_recording(self, tmp_path):
+        path = str(tmp_path / "store")
+        writer = ColumnWriter(path, chunk_rows=1000, max_chunk_seconds=5.0)
+        for i in range(12):
+            writer.append(attitude(i, float(i)))  # Chunk due at t=5 and t=11
+        writer.flush()
+        assert ColumnReader(path).column("roll")[1].tolist() == [float(i) for i in range(12)]
+        writer.append(attitude(12, 12.0))
+        assert len(ColumnReader(path)) == 12  # Pending row not yet visible
+        writer.close()
+        assert len(ColumnReader(path)) == 13
+
+    def test_append_racing_close(self, tmp_path):
+        writer = ColumnWriter(str(tmp_path / "store"))
+        flush = writer.flush
+
+        def flush_then_append():
+            flush()
+            writer.append(attitude(1.0, 0.5))  # The telemetry thread, just after the final flush
+        writer.flush = flush_then_append
+        writer.append(attitude(0.0, 0.25))
+        writer.close()
+        assert writer._pending == []  # Rejected, not stranded
+        writer.append(attitude(2.0, 0.75))  # After shutdown: ignored, no RuntimeError
+        assert ColumnReader(str(tmp_path / "store")).column("roll")[1].tolist() == [0.25]
+
+    def test_refuses_to_overwrite_a_store(self, tmp_path):
+        ColumnWriter(str(tmp_path)).close()
+        with pytest.raises(FileExistsError):
+            ColumnWriter(str(tmp_path))
+
+    def test_unknown_column(self, tmp_path):
+        ColumnWriter(str(tmp_path)).close()
+        with pytest.raises(KeyError):
+            ColumnReader(str(tmp_path)).column("nope")
+
+
+class TestExportTlog:
+    def test_matches_live_telemetry(self, tmp_path):
+        clock = [0.0]
+        vehicle = SimVehicle(clock=lambda: clock[0])
+        records = []
+        for step in range(3000):
+            clock[0] = t = step * 0.01
+            records.extend(struct.pack('>Q', int((T0 + t) * 1e6)) + bytes(frame) for frame in vehicle.due(t))
+        tlog = tmp_path / "flight.tlog"
+        tlog.write_bytes(b"".join(records))
+
+        path = str(tmp_path / "store")
+        rows = export_tlog(str(tlog), path, chunk_rows=100)
+        store = ColumnReader(path)
+        assert rows == len(store) == len(records)
+        times, kind = store.column("type")
+        assert np.all(np.diff(times) >= 0)
+        roll = store.column("roll")[1][kind == 'ATTITUDE']
+        assert roll == pytest.approx(math.degrees(-math.atan(8.0 * 0.1 / 9.81)), abs=1e-4)
+        lat = store.column("lat")[1]
+        assert np.isnan(lat[kind != 'GLOBAL_POSITION_INT']).all()
+        assert lat[kind == 'GLOBAL_POSITION_INT'] == pytest.approx(-35.3633, abs=0.001)
+        assert set(store.column("mode")[1][kind == 'HEARTBEAT'].tolist()) == {"STABILIZE"}
+        assert store.column("rc_channels[2]")[1][kind == 'RC_CHANNELS'].tolist() == [1100.0] * 30
+        with open(f"{path}/manifest.json") as f:
+            assert json.load(f)["rows"] == rows
@@ -1,84 +1,230 @@
+import json
+import math
+import os
+import socket
+import urllib.request
+
+import numpy as np
 import pytest
-from unittest.mock import Mock, patch
-from core.telemetry_manager import TelemetryManager
+from pymavlink import mavutil
+
+from core.mission import MissionTable
+from core.shm_ring import RingReader
 from core.signal_manager import SignalManager
+from core.telemetry_export import ColumnReader
+from core.telemetry_manager import TelemetryManager, default_uplink_budget
+from sim.autopilot import SimulatedAutopilot
+
+ARM = mavutil.mavlink.MAV_CMD_COMPONENT_ARM_DISARM
+
+
+def free_udp_port():
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+class Recorder:
+    """Collects everything the TelemetryManager publishes."""
+
+    def __init__(self, signal_manager):
+        self.statuses = []
+        self.telemetry = []
+        self.command_results = []
+        self.mission_results = []
+        self.status_texts = []
+        signal_manager.connection_status_changed.connect(lambda status, msg: self.statuses.append(status))
+        signal_manager.telemetry_update.connect(self.telemetry.append)
+        signal_manager.command_result.connect(lambda *args: self.command_results.append(args))
+        signal_manager.mission_transfer_complete.connect(lambda *args: self.mission_results.append(args))
+        signal_manager.status_text_received.connect(lambda text, severity: self.status_texts.append(text))
+
+    def latest(self, msg_type):
+        matches = [d for d in self.telemetry if d["type"] == msg_type]
+        return matches[-1] if matches else None
+
+
+@pytest.fixture(params=[False, True], ids=["pymavlink", "fast_decode"])
+def setup(qtbot, request):
+    """A TelemetryManager connected over UDP loopback to a simulated vehicle."""
+    port = free_udp_port()
+    sim = SimulatedAutopilot('udp', f'127.0.0.1:{port}', seed=1)
+    signal_manager = SignalManager()
+    recorder = Recorder(signal_manager)
+    manager = TelemetryManager(f'udpin:127.0.0.1:{port}', signal_manager=signal_manager, fast_decode=request.param)
+    manager.connect()
+    sim.start()
+    qtbot.waitUntil(lambda: manager.current_status == "CONNECTED", timeout=5000)
+    yield manager, sim, recorder
+    manager.stop()
+    manager.command_scheduler.stop()
+    manager.periodic_sender.stop()
+    sim.stop()
+
 
 class TestTelemetryManager:
-    @pytest.fixture
-    def signal_manager(self):
-        return SignalManager()
-
-    @pytest.fixture
-    def telemetry_manager(self, signal_manager):
-        return TelemetryManager(signal_manager)
-
-    def test_telemetry_manager_initialization(self, telemetry_manager, signal_manager):
-        """Test that the telemetry manager initializes correctly."""
-        assert telemetry_manager.signal_manager == signal_manager
-        assert telemetry_manager.connection_string == ""
-        assert telemetry_manager.baud_rate == 57600
-        assert telemetry_manager.vehicle is None
-        assert telemetry_manager.connection_thread is None
-        assert not telemetry_manager.is_connected
-
-    @patch('pymavlink.mavutil.mavlink_connection')
-    def test_connect_success(self, mock_mavlink_connection, telemetry_manager):
-        """Test successful connection to a vehicle."""
-        mock_vehicle = Mock()
-        mock_mavlink_connection.return_value = mock_vehicle
-        
-        telemetry_manager.connection_string = "udpin:localhost:14550"
-        telemetry_manager.connect()
-        
-        mock_mavlink_connection.assert_called_once_with(
-            "udpin:localhost:14550",
-            baud=57600
-        )
-        assert telemetry_manager.vehicle == mock_vehicle
-        assert telemetry_manager.connection_thread is not None
-        assert telemetry_manager.is_connected
-
-    def test_connect_invalid_connection_string(self, telemetry_manager):
-        """Test connection with invalid connection string."""
-        telemetry_manager.connection_string = ""
-        telemetry_manager.connect()
-        
-        assert telemetry_manager.vehicle is None
-        assert telemetry_manager.connection_thread is None
-        assert not telemetry_manager.is_connected
-
-    def test_disconnect(self, telemetry_manager):
-        """Test disconnecting from a vehicle."""
-        # Setup a mock vehicle
-        mock_vehicle = Mock()
-        telemetry_manager.vehicle = mock_vehicle
-        telemetry_manager.is_connected = True
-        
-        telemetry_manager.disconnect()
-        
-        assert telemetry_manager.vehicle is None
-        assert not telemetry_manager.is_connected
-        mock_vehicle.close.assert_called_once()
-
-    @patch('pymavlink.mavutil.mavlink_connection')
-    def test_telemetry_processing(self, mock_mavlink_connection, telemetry_manager):
-        """Test processing of telemetry data."""
-        # Setup mock vehicle and message
-        mock_vehicle = Mock()
-        mock_message = Mock()
-        mock_message.get_type.return_value = 'GLOBAL_POSITION_INT'
-        mock_message.relative_alt = 1000
-        mock_message.hdg = 45
-        
-        mock_vehicle.recv_match.return_value = mock_message
-        mock_mavlink_connection.return_value = mock_vehicle
-        
-        # Connect to vehicle
-        telemetry_manager.connection_string = "udpin:localhost:14550"
-        telemetry_manager.connect()
-        
-        # Process a message
-        telemetry_manager._process_message(mock_message)
-        
-        # Verify the message was processed correctly
-        mock_message.get_type.assert_called_once() 
\ No newline at end of file
+    def test_initial_state(self):
+        manager = TelemetryManager('udpin:127.0.0.1:0')
+        try:
+            assert manager.current_status == "DISCONNECTED"
+            assert manager.master is None
+            assert manager.send_command(ARM, (1,)) is False
+            assert manager.upload_mission(MissionTable()) is False
+        finally:
+            manager.command_scheduler.stop()
+            manager.periodic_sender.stop()
+
+    def test_connects_and_publishes_telemetry(self, qtbot, setup):
+        manager, sim, recorder = setup
+        assert "CONNECTED" in recorder.statuses
+        qtbot.waitUntil(lambda: recorder.latest('GLOBAL_POSITION_INT') is not None, timeout=3000)
+        position = recorder.latest('GLOBAL_POSITION_INT')
+        assert position["lat"] == pytest.approx(-35.3633, abs=0.01)
+        assert position["alt_agl"] == pytest.approx(30, abs=3)
+        # Telemetry is delivered through queued signals: the heartbeat may still be in flight
+        qtbot.waitUntil(lambda: recorder.latest('HEARTBEAT') is not None, timeout=3000)
+        heartbeat = recorder.latest('HEARTBEAT')
+        assert heartbeat["mode"] == "STABILIZE"
+        assert heartbeat["armed"] is False
+        qtbot.waitUntil(lambda: recorder.latest('RC_CHANNELS') is not None, timeout=3000)
+        assert recorder.latest('RC_CHANNELS')["rc_channels"][:3] == [1500, 1500, 1100]
+        if manager.thread.fast_decoder:
+            assert manager.thread.fast_decoder.stats()["fast"] > 0
+
+    def test_requested_stream_intervals_are_applied(self, qtbot, setup):
+        manager, sim, recorder = setup
+        vehicle = sim.vehicles[0]
+        attitude = mavutil.mavlink.MAVLINK_MSG_ID_ATTITUDE
+        expected = manager.message_frequencies[attitude] / 1e6
+        qtbot.waitUntil(lambda: vehicle.intervals[attitude] == expected, timeout=3000)
+
+    def test_arm_round_trip(self, qtbot, setup):
+        manager, sim, recorder = setup
+        manager.handle_arm_request()
+        qtbot.waitUntil(lambda: (ARM, mavutil.mavlink.MAV_RESULT_ACCEPTED) in
+                        [r[:2] for r in recorder.command_results], timeout=3000)
+        assert sim.vehicles[0].armed
+        qtbot.waitUntil(lambda: (recorder.latest('HEARTBEAT') or {}).get("armed") is True, timeout=3000)
+        qtbot.waitUntil(lambda: "Arming motors" in recorder.status_texts, timeout=3000)
+
+    def test_mode_change(self, qtbot, setup):
+        manager, sim, recorder = setup
+        manager.handle_mode_change_request("GUIDED")
+        qtbot.waitUntil(lambda: (recorder.latest('HEARTBEAT') or {}).get("mode") == "GUIDED", timeout=3000)
+
+    def test_mission_upload(self, qtbot, setup):
+        manager, sim, recorder = setup
+        table = MissionTable()
+        for i in range(25):
+            table.add_waypoint(-35.36 + i * 1e-4, 149.16, 30 + i)
+        assert manager.upload_mission(table)
+        qtbot.waitUntil(lambda: len(recorder.mission_results) > 0, timeout=5000)
+        direction, success, message = recorder.mission_results[0]
+        assert success, message
+        stored = sim.vehicles[0].mission
+        assert [item.z for item in stored] == [30 + i for i in range(25)]
+
+    def test_arm_overtakes_mission_upload_on_budgeted_uplink(self, qtbot, setup):
+        manager, sim, recorder = setup
+        manager.stop()
+        manager.uplink_budget = 1500  # bytes/s: about 30 MISSION_ITEM_INTs a second
+        manager.connect()
+        qtbot.waitUntil(lambda: manager.current_status == "CONNECTED", timeout=5000)
+        assert manager.command_scheduler.bandwidth_limit == 1500
+        progress = []
+        manager.signal_manager.mission_progress.connect(lambda direction, done, total: progress.append(done))
+        table = MissionTable()
+        for i in range(60):
+            table.add_waypoint(-35.36 + i * 1e-4, 149.16, 30 + i)
+        assert manager.upload_mission(table)
+        qtbot.waitUntil(lambda: bool(progress) and progress[-1] >= 5, timeout=5000)
+        manager.handle_arm_request()
+        qtbot.waitUntil(lambda: ARM in [r[0] for r in recorder.command_results], timeout=3000)
+        assert not recorder.mission_results  # The upload is still going on
+        command, result, rtt_ms = [r for r in recorder.command_results if r[0] == ARM][0]
+        assert result == mavutil.mavlink.MAV_RESULT_ACCEPTED
+        assert rtt_ms < 300
+        qtbot.waitUntil(lambda: len(recorder.mission_results) > 0, timeout=10000)
+        assert recorder.mission_results[0][1]
+
+    def test_default_uplink_budget(self):
+        assert default_uplink_budget('/dev/ttyUSB0', 57600) == pytest.approx(4608)
+        assert default_uplink_budget('udpin:0.0.0.0:14550', 57600) is None
+        assert default_uplink_budget('tcp:127.0.0.1:5760', 115200) is None
+
+    def test_recording(self, qtbot, setup, tmp_path):
+        manager, sim, recorder = setup
+        manager.start_recording(str(tmp_path / "flight"))
+        start = len(recorder.telemetry)
+        # The recorder slot is queued and can lag behind: the second heartbeat is surely recorded
+        qtbot.waitUntil(lambda: [d["type"] for d in recorder.telemetry[start:]].count('HEARTBEAT') >= 2,
+                        timeout=5000)
+        manager.stop_recording()
+        store = ColumnReader(str(tmp_path / "flight"))
+        times, roll = store.column('roll')
+        assert len(times) > 0 and store.columns.count('roll') == 1
+        assert roll[~np.isnan(roll)] == pytest.approx(-4.66, abs=0.01)  # Banked circle
+        assert {"mode", "armed", "lat"} <= set(store.columns)
+
+    def test_shared_memory_ring(self, qtbot, setup):
+        manager, sim, recorder = setup
+        manager.start_ring(f"gcs_test_{os.getpid()}", capacity=256)
+        messages = []
+        try:
+            with RingReader(f"gcs_test_{os.getpid()}") as reader:
+                qtbot.waitUntil(lambda: messages.extend(reader.messages(reader.read())) or
+                                {'HEARTBEAT', 'ATTITUDE'} <= {m["type"] for m in messages}, timeout=5000)
+        finally:
+            manager.stop_ring()
+        attitude = [m for m in messages if m["type"] == 'ATTITUDE'][-1]
+        assert (attitude["sysid"], attitude["compid"]) == (1, 1)
+        assert attitude["roll"] == pytest.approx(math.radians(-4.66), abs=1e-3)  # Raw MAVLink fields
+
+    def test_router_forwards_frames_and_merges_uplink(self, qtbot, setup):
+        manager, sim, recorder = setup
+        tool = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)  # E.g. a second GCS
+        tool.bind(('127.0.0.1', 0))
+        tool.setblocking(False)
+        manager.start_router([f"udpout:127.0.0.1:{tool.getsockname()[1]}"])
+        parser = mavutil.mavlink.MAVLink(None)
+        received, router_address = [], []
+
+        def poll():
+            try:
+                data, address = tool.recvfrom(512)
+            except BlockingIOError:
+                return False
+            router_address[:] = [address]
+            received.extend(parser.parse_buffer(data) or [])
+            return {'HEARTBEAT', 'ATTITUDE'} <= {m.get_type() for m in received}
+        try:
+            qtbot.waitUntil(poll, timeout=5000)
+            mav = mavutil.mavlink.MAVLink(None, srcSystem=254, srcComponent=190)
+            tool.sendto(mav.command_long_encode(1, 1, ARM, 0, 1, 0, 0, 0, 0, 0, 0).pack(mav), router_address[0])
+            qtbot.waitUntil(lambda: sim.vehicles[0].armed, timeout=3000)
+        finally:
+            manager.stop_router()
+            tool.close()
+        assert all(m.get_srcSystem() == 1 for m in received)
+
+    def test_telemetry_server_state(self, qtbot, setup):
+        manager, sim, recorder = setup
+        server = manager.start_server(port=0)
+
+        def state():
+            with urllib.request.urlopen(f"http://127.0.0.1:{server.port}/state", timeout=2) as response:
+                return json.load(response)
+        try:
+            qtbot.waitUntil(lambda: {"roll", "mode"} <= set(state().get("1", {})), timeout=5000)
+            current = state()
+        finally:
+            manager.stop_server()
+        assert current["link"]["status"] == "CONNECTED"
+        assert current["1"]["mode"] == "STABILIZE"
+        assert current["1"]["roll"] == pytest.approx(-4.66, abs=0.01)
+
+    def test_disconnect(self, qtbot, setup):
+        manager, sim, recorder = setup
+        manager.handle_disconnect_request()
+        assert manager.current_status == "DISCONNECTED"
+        assert manager.master is None
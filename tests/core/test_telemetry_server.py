@@ -0,0 +1,193 @@
+import base64
+import json
+import os
+import socket
+import struct
+import threading
+import urllib.request
+
+import pytest
+
+from core.telemetry_server import Subscription, TelemetryServer
+
+
+class WsClient:
+    """Minimal blocking WebSocket client (masked frames, as browsers send them)."""
+
+    def __init__(self, port, path="/ws"):
+        self.sock = socket.create_connection(('127.0.0.1', port), timeout=2)
+        key = base64.b64encode(os.urandom(16)).decode()
+        self.sock.sendall(f"GET {path} HTTP/1.1\r\nHost: localhost\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+                          f"Sec-WebSocket-Key: {key}\r\nSec-WebSocket-Version: 13\r\n\r\n".encode())
+        self.file = self.sock.makefile('rb')
+        assert self.file.readline().startswith(b"HTTP/1.1 101")
+        while self.file.readline() not in (b'\r\n', b''):
+            pass
+
+    def recv(self):
+        first, second = self.file.read(2)
+        length = second & 0x7F
+        if length == 126:
+            length, = struct.unpack('!H', self.file.read(2))
+        elif length == 127:
+            length, = struct.unpack('!Q', self.file.read(8))
+        payload = self.file.read(length)
+        assert first == 0x81
+        return json.loads(payload)
+
+    def send(self, message, opcode=0x1):
+        payload = json.dumps(message).encode() if opcode == 0x1 else message
+        mask = os.urandom(4)
+        self.sock.sendall(struct.pack('!BBI', 0x80 | opcode, 0x80 | len(payload), int.from_bytes(mask, 'big'))
+                          + bytes(b ^ mask[i & 3] for i, b in enumerate(payload)))
+
+    def close(self):
+        self.file.close()
+        self.sock.close()
+
+
+@pytest.fixture
+def server():
+    server = TelemetryServer(port=0).start()
+    yield server
+    server.stop()
+
+
+def attitude(roll, pitch=0.5, sysid=1):
+    return {"type": "ATTITUDE", "timestamp": 1.0, "sysid": sysid, "roll": roll, "pitch": pitch, "yaw": 90.0}
+
+
+def http_get(server, path):
+    with urllib.request.urlopen(f"http://127.0.0.1:{server.port}{path}", timeout=2) as response:
+        return json.load(response)
+
+
+def test_http_state(server):
+    server.update(attitude(1.5))
+    server.update({"type": "HEARTBEAT", "timestamp": 2.0, "sysid": 1, "mode": "LOITER", "armed": True})
+    server.update_status("CONNECTED", "udp:localhost:14550")
+    assert http_get(server, "/state") == {
+        "link": {"status": "CONNECTED", "message": "udp:localhost:14550"},
+        "1": {"roll": 1.5, "pitch": 0.5, "yaw": 90.0, "mode": "LOITER", "armed": True},
+    }
+    with pytest.raises(urllib.error.HTTPError) as error:
+        http_get(server, "/nope")
+    assert error.value.code == 404
+
+
+def test_snapshot_then_changed_fields_only(server):
+    server.update(attitude(1.0))
+    client = WsClient(server.port, "/ws?fields=roll,pitch&rate=50")
+    try:
+        first = client.recv()
+        assert first["t"] == "snapshot" and first["seq"] == 0
+        assert first["state"]["1"] == {"roll": 1.0, "pitch": 0.5}
+        server.update(attitude(2.0))  # Only roll changes
+        delta = client.recv()
+        assert delta["t"] == "delta" and delta["seq"] == 1
+        assert delta["changed"] == {"1": {"roll": 2.0}}
+        server.update({"type": "VFR_HUD", "timestamp": 3.0, "sysid": 1, "groundspeed": 4.0})  # Not subscribed
+        server.update(attitude(2.0, pitch=0.25))
+        assert client.recv()["changed"] == {"1": {"pitch": 0.25}}
+    finally:
+        client.close()
+
+
+def test_sysid_filter_and_resubscribe(server):
+    server.update(attitude(1.0, sysid=1))
+    server.update(attitude(-1.0, sysid=2))
+    client = WsClient(server.port, "/ws?sysid=2&fields=roll&rate=50")
+    try:
+        assert set(client.recv()["state"]) == {"link", "2"}
+        client.send({"fields": ["yaw"], "sysid": None, "rate": 50})
+        snapshot = client.recv()
+        while snapshot["t"] != "snapshot":  # A delta may already be on its way
+            snapshot = client.recv()
+        assert snapshot["state"]["1"] == {"yaw": 90.0} and snapshot["state"]["2"] == {"yaw": 90.0}
+        client.send({"rate": "fast"})
+        assert client.recv()["t"] == "error"
+    finally:
+        client.close()
+
+
+def test_one_serialization_per_tick_for_shared_subscriptions(server):
+    server.update(attitude(0.0))
+    clients = [WsClient(server.port, "/ws?fields=roll&rate=20") for _ in range(5)]
+    try:
+        for client in clients:
+            assert client.recv()["t"] == "snapshot"
+        before = server.stats()
+        assert before["channels"] == 1
+        server.update(attitude(1.0))
+        received = [client.recv() for client in clients]
+        assert {json.dumps(m["changed"]) for m in received} == {'{"1": {"roll": 1.0}}'}
+        assert len({m["seq"] for m in received}) == 1  # One frame, written to every client
+        after = server.stats()
+        assert after["serializations"] - before["serializations"] == 1
+        assert after["messages"] - before["messages"] == 5
+    finally:
+        for client in clients:
+            client.close()
+
+
+def test_joining_a_running_channel_leaves_other_clients_alone(server):
+    server.update(attitude(1.0))
+    first = WsClient(server.port, "/ws?fields=roll&rate=0.1")  # Ticks every 10 s
+    try:
+        assert first.recv()["t"] == "snapshot"
+        server.update(attitude(2.0))
+        second = WsClient(server.port, "/ws?fields=roll&rate=0.1")
+        try:
+            snapshot = second.recv()
+            # State as of the channel's last tick, numbered like the delta that follows it
+            assert (snapshot["t"], snapshot["seq"]) == ("snapshot", 1)
+            assert snapshot["state"]["1"] == {"roll": 1.0}
+            first.sock.settimeout(0.3)
+            with pytest.raises(socket.timeout):
+                first.recv()  # No extra delta for the client already there
+        finally:
+            second.close()
+    finally:
+        first.close()
+
+
+@pytest.mark.parametrize("query", ["rate=fast", "rate=nan", "sysid=one"])
+def test_bad_query_is_rejected(server, query):
+    with socket.create_connection(('127.0.0.1', server.port), timeout=2) as sock:
+        sock.sendall(f"GET /ws?{query} HTTP/1.1\r\nHost: localhost\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+                     f"Sec-WebSocket-Key: {base64.b64encode(os.urandom(16)).decode()}\r\n\r\n".encode())
+        response = sock.makefile('rb').read()
+    assert response.startswith(b"HTTP/1.1 400")
+    assert b"Bad subscription" in response
+
+
+def test_close_and_ping(server):
+    client = WsClient(server.port)
+    client.recv()
+    client.send(b"hi", opcode=0x9)
+    while True:
+        first, second = client.file.read(2)
+        payload = client.file.read(second & 0x7F)
+        if first == 0x8A:  # Pong, possibly after a delta
+            assert payload == b"hi"
+            break
+    client.send(struct.pack('!H', 1000), opcode=0x8)
+    while client.file.read(2)[0] != 0x88:
+        pass
+    client.close()
+
+
+def test_updates_from_other_threads(server):
+    threads = [threading.Thread(target=lambda s=sysid: [server.update(attitude(float(i), sysid=s)) for i in range(500)])
+               for sysid in (1, 2, 3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    state = server.snapshot_state()
+    assert [state[str(s)]["roll"] for s in (1, 2, 3)] == [499.0] * 3
+
+
+def test_subscription_rate_is_clamped():
+    assert Subscription(rate=1000).rate == 50.0
+    assert Subscription.from_query("fields=roll,yaw&sysid=1").key == (frozenset({"roll", "yaw"}), frozenset({"1"}), 5.0)
@@ -0,0 +1,140 @@
+import struct
+
+import numpy as np
+import pytest
+from pymavlink import mavutil
+from pymavlink.generator.mavcrc import x25crc
+
+from core.tlog_arrays import decode_tlog, message_dtype, scan_tlog
+from sim.vehicle import SimVehicle
+
+mavlink = mavutil.mavlink
+T0 = 1_700_000_000.0
+
+
+def record(t, frame):
+    return struct.pack('>Q', int(t * 1e6)) + bytes(frame)
+
+
+def v2_frame(msg, sysid=1, compid=1, seq=0):
+    """MAVLink2 framing with payload zero-truncation, done by hand."""
+    payload = bytes(msg.pack(mavlink.MAVLink(None, srcSystem=sysid)))[6:-2].rstrip(b"\0") or b"\0"
+    msg_id = msg.get_msgId()
+    header = struct.pack('<BBBBBBBHB', 0xFD, len(payload), 0, 0, seq, sysid, compid, msg_id & 0xFFFF, msg_id >> 16)
+    return header + payload + struct.pack('<H', x25crc(header[1:] + payload + bytes((msg.crc_extra,))).crc)
+
+
+def simulated_records(seconds, rate_scale=5.0):
+    clock = [0.0]
+    vehicle = SimVehicle(clock=lambda: clock[0], rate_scale=rate_scale)
+    records = []
+    t = 0.0
+    while t < seconds:
+        clock[0] = t
+        records.extend(record(T0 + t, frame) for frame in vehicle.due(t))
+        t += 0.01
+    return records
+
+
+def pymavlink_rows(path, msg_type):
+    log = mavutil.mavlink_connection(str(path))
+    rows = []
+    while True:
+        msg = log.recv_match(type=msg_type)
+        if msg is None:
+            break
+        rows.append(msg)
+    return rows
+
+
+class TestTlogArrays:
+    def test_matches_pymavlink(self, tmp_path):
+        path = tmp_path / "flight.tlog"
+        path.write_bytes(b"".join(simulated_records(20)))
+
+        arrays = decode_tlog(str(path))
+        for msg_type in ('ATTITUDE', 'GLOBAL_POSITION_INT', 'HEARTBEAT', 'RC_CHANNELS'):
+            reference = pymavlink_rows(path, msg_type)
+            columns = arrays[msg_type]
+            assert len(columns) == len(reference) > 0
+            np.testing.assert_allclose(columns.timestamp, [m._timestamp for m in reference])
+            for name in reference[0].get_fieldnames():
+                np.testing.assert_allclose(columns[name], [getattr(m, name) for m in reference], rtol=1e-6)
+        assert set(arrays['ATTITUDE'].src_system) == {1}
+
+    def test_mixed_versions_truncation_and_corruption(self, tmp_path):
+        mav = mavlink.MAVLink(None, srcSystem=1)
+        records = []
+        for i in range(300):
+            msg = mav.vfr_hud_encode(float(i), 0.0, i % 360, 0, 10.0, 0.0)  # groundspeed 0: truncated in v2
+            frame = v2_frame(msg, seq=i % 256) if i % 2 else bytes(msg.pack(mav))
+            records.append(record(T0 + i, frame))
+        corrupt = bytearray(records[100])
+        corrupt[20] ^= 0x55
+        records[100] = bytes(corrupt)
+        records[200] = records[200][:12]  # Truncated record in the middle
+        stream = b"\xfe\xfd junk" + b"".join(records) + records[5][:15]  # Cut-off tail
+
+        path = tmp_path / "mixed.tlog"
+        path.write_bytes(stream)
+        vfr = decode_tlog(str(path))['VFR_HUD']
+        expected = [i for i in range(300) if i not in (100, 200)]
+        assert vfr['airspeed'].tolist() == expected
+        assert vfr['heading'].tolist() == [i % 360 for i in expected]
+        assert vfr['groundspeed'].tolist() == [0.0] * len(expected)
+        np.testing.assert_allclose(vfr.timestamp, [T0 + i for i in expected])
+
+    def test_message_type_filter(self, tmp_path):
+        path = tmp_path / "flight.tlog"
+        path.write_bytes(b"".join(simulated_records(5)))
+        arrays = decode_tlog(str(path), message_types=['ATTITUDE'])
+        assert list(arrays) == ['ATTITUDE']
+
+    def test_scan_reports_bad_checksums(self, tmp_path):
+        records = simulated_records(3)
+        bad = bytearray(records[10])
+        bad[-1] ^= 0xFF  # CRC byte
+        records[10] = bytes(bad)
+        buf = np.frombuffer(b"".join(records), dtype=np.uint8)
+        frames = scan_tlog(buf)
+        assert len(frames) == len(records) - 1
+        assert frames.crc_errors == 1
+
+    def test_all_checksums_bad(self):
+        records = []
+        for rec in simulated_records(1)[:4]:
+            rec = bytearray(rec)
+            rec[-1] ^= 0xFF
+            records.append(bytes(rec))
+        frames = scan_tlog(np.frombuffer(b"".join(records), dtype=np.uint8))
+        assert len(frames) == 0
+        assert frames.crc_errors == 4
+
+    @pytest.mark.parametrize("count", [1, 2, 3])
+    def test_short_logs(self, count):
+        records = simulated_records(1)[:count]
+        buf = np.frombuffer(b"".join(records), dtype=np.uint8)
+        assert len(scan_tlog(buf)) == count
+        # Trailing bytes: a short run no longer spans the buffer, a run of three still links up
+        padded = np.concatenate((buf, np.zeros(4, dtype=np.uint8)))
+        assert len(scan_tlog(padded)) == (count if count == 3 else 0)
+
+    def test_dtype_matches_wire_layout(self):
+        for msg_type in ('ATTITUDE', 'STATUSTEXT', 'RC_CHANNELS', 'MISSION_ITEM_INT'):
+            cls = mavlink.mavlink_map[getattr(mavlink, f"MAVLINK_MSG_ID_{msg_type}")]
+            assert message_dtype(msg_type).itemsize == cls.unpacker.size
+
+    @pytest.mark.parametrize("content", [b"", b"\0" * 64])
+    def test_empty_file(self, tmp_path, content):
+        path = tmp_path / "empty.tlog"
+        path.write_bytes(content)
+        assert decode_tlog(str(path)) == {}
+
+    @pytest.mark.parametrize("verify_crc", [True, False])
+    def test_statustext_strings(self, tmp_path, verify_crc):
+        mav = mavlink.MAVLink(None, srcSystem=1)
+        texts = [f"message {i}".encode() for i in range(5)]
+        records = [record(T0 + i, mav.statustext_encode(6, text).pack(mav)) for i, text in enumerate(texts)]
+        path = tmp_path / "text.tlog"
+        path.write_bytes(b"".join(records))
+        assert decode_tlog(str(path), verify_crc=verify_crc)['STATUSTEXT']['text'].tolist() == texts
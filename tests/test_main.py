@@ -19,4 +19,42 @@ def test_main_application(app):
         main()
         
         # Verify that the application started
-        assert QApplication.instance() is not None 
\ No newline at end of file
+        assert QApplication.instance() is not None 
+
+def test_headless_runs_without_widgets(tmp_path):
+    """--headless connects on its own, records, stops on SIGTERM and never imports widgets or QtWebEngine."""
+    import os
+    import signal
+    import socket
+    import subprocess
+    import time
+    from sim.autopilot import SimulatedAutopilot
+
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+    sim = SimulatedAutopilot('udp', f'127.0.0.1:{port}', seed=1)
+    sim.start()
+    script = ("import sys, main\n"
+              "code = main.main(sys.argv)\n"
+              "print('GUI MODULES', sorted(m for m in sys.modules if m.startswith(('PySide6.QtWidgets', "
+              "'PySide6.QtGui', 'PySide6.QtWebEngine', 'ui'))), flush=True)\n"
+              "sys.exit(code)\n")
+    proc = subprocess.Popen([sys.executable, '-c', script, '--headless', '--connect', f'udpin:127.0.0.1:{port}',
+                             '--record', str(tmp_path / 'store')],
+                            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                            stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+    try:
+        deadline = time.monotonic() + 10
+        while time.monotonic() < deadline and not sim.stats()['frames_received']:
+            time.sleep(0.1)
+        time.sleep(1.0)
+        proc.send_signal(signal.SIGTERM)
+        output, _ = proc.communicate(timeout=10)
+    finally:
+        proc.kill()
+        sim.stop()
+    assert "Connection Status: CONNECTED" in output
+    assert "GUI MODULES []" in output
+    assert "Footprint: RSS" in output
+    assert (tmp_path / 'store' / 'manifest.json').exists()
@@ -0,0 +1,38 @@
+from ui.frame_clock import FrameClock
+
+
+def test_clock_idles_until_a_frame_is_requested(qtbot):
+    clock = FrameClock()
+    ticks = []
+    clock.tick.connect(lambda: ticks.append(1))
+    qtbot.wait(50)
+    assert not clock.active and ticks == []
+    clock.request_frame()
+    clock.request_frame()  # Coalesced into the same tick
+    assert clock.active
+    qtbot.waitUntil(lambda: not clock.active, timeout=1000)
+    assert ticks == [1]
+
+
+def test_requests_during_a_tick_keep_the_clock_running(qtbot):
+    clock = FrameClock()
+    ticks = []
+
+    def on_tick():
+        ticks.append(1)
+        if len(ticks) < 3:
+            clock.request_frame()
+    clock.tick.connect(on_tick)
+    clock.request_frame()
+    qtbot.waitUntil(lambda: len(ticks) == 3, timeout=1000)
+    qtbot.waitUntil(lambda: not clock.active, timeout=1000)
+    assert len(ticks) == 3
+
+
+def test_stopped_clock_keeps_requests_for_start(qtbot):
+    clock = FrameClock()
+    clock.stop()
+    clock.request_frame()
+    assert not clock.active
+    clock.start()
+    assert clock.active
@@ -0,0 +1,98 @@
+import pytest
+from PySide6.QtGui import QColor, QImage
+
+from ui.frame_clock import FrameClock
+from ui.layouts.instruments_layout import GROUND_COLOR, SKY_COLOR, AttitudeIndicator, Compass, InstrumentsLayout
+
+
+def attitude(roll=0.0, pitch=0.0, yaw=0.0, sysid=1):
+    return {"type": "ATTITUDE", "timestamp": 0.0, "sysid": sysid, "roll": roll, "pitch": pitch, "yaw": yaw}
+
+
+@pytest.fixture
+def clock():
+    clock = FrameClock()
+    clock.stop()  # Frames are ticked by hand
+    yield clock
+    clock.deleteLater()
+
+
+@pytest.fixture
+def panel(qtbot, clock):
+    layout = InstrumentsLayout(frame_clock=clock)
+    qtbot.addWidget(layout)
+    layout.resize(460, 250)
+    layout.show()
+    qtbot.waitExposed(layout)
+    return layout
+
+
+def tick(qtbot, clock, canvas):
+    frames = canvas.frames
+    clock.tick.emit()
+    qtbot.waitUntil(lambda: canvas.frames > frames)
+
+
+def centre_colour(canvas, dy):
+    """Colour `dy` face units below the centre of the canvas."""
+    image = QImage(canvas.size(), QImage.Format_ARGB32)
+    canvas.render(image)
+    side = canvas.face_side()
+    return QColor(image.pixel(canvas.width() // 2, round(canvas.height() / 2 + dy * side / (2 * canvas.RADIUS))))
+
+
+class TestInstruments:
+    def test_updates_are_coalesced_into_frames(self, panel, clock, qtbot):
+        canvas = panel.attitude_indicator.get_ui_element()
+        tick(qtbot, clock, canvas)
+        frames = canvas.frames
+        for i in range(20):
+            panel.update_telemetry(attitude(roll=i, pitch=i / 2))
+        qtbot.wait(20)
+        assert canvas.frames == frames  # Nothing is painted between ticks
+        tick(qtbot, clock, canvas)
+        assert canvas.frames == frames + 1
+        assert (canvas.roll, canvas.pitch) == (19, 9.5)
+        clock.tick.emit()  # Not dirty: no repaint
+        qtbot.wait(20)
+        assert canvas.frames == frames + 1
+
+    def test_static_layers_are_cached_per_size(self, panel, clock, qtbot):
+        canvas = panel.compass.get_ui_element()
+        tick(qtbot, clock, canvas)
+        layers = canvas._layers
+        panel.update_telemetry(attitude(yaw=45.0))
+        tick(qtbot, clock, canvas)
+        assert canvas._layers is layers
+        panel.resize(600, 320)
+        qtbot.waitUntil(lambda: canvas._layers is not layers)
+        assert canvas._layers[0].width() == canvas.face_side() * canvas.devicePixelRatioF()
+
+    def test_horizon_moves_with_pitch(self, panel):
+        canvas = panel.attitude_indicator.get_ui_element()
+        panel.update_telemetry(attitude(pitch=10.0))  # Horizon 30 units below the centre
+        assert centre_colour(canvas, 24) == SKY_COLOR
+        panel.update_telemetry(attitude(pitch=-10.0))
+        assert centre_colour(canvas, -24) == GROUND_COLOR
+        canvas.cache_layers = False
+        assert centre_colour(canvas, -24) == GROUND_COLOR
+
+    def test_heading_and_sysid_filter(self, qtbot, clock):
+        compass = Compass(sysid=2, frame_clock=clock)
+        indicator = AttitudeIndicator(sysid=2, frame_clock=clock)
+        for instrument in (compass, indicator):
+            qtbot.addWidget(instrument.get_ui_element())
+            instrument.update_data(attitude(roll=5.0, yaw=-60.0, sysid=2))
+            instrument.update_data(attitude(roll=30.0, yaw=10.0, sysid=1))
+            instrument.update_data({"type": "VFR_HUD", "sysid": 2, "heading": 90})
+        assert compass.get_ui_element().heading == 300.0
+        assert indicator.get_ui_element().roll == 5.0
+
+    def test_hidden_canvas_is_not_repainted(self, panel, clock, qtbot):
+        canvas = panel.attitude_indicator.get_ui_element()
+        tick(qtbot, clock, canvas)
+        panel.hide()
+        panel.update_telemetry(attitude(roll=10.0))
+        clock.tick.emit()
+        qtbot.wait(20)
+        assert canvas._dirty  # Painted once shown again
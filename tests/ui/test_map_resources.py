@@ -0,0 +1,77 @@
+import os
+
+import pytest
+
+pytest.importorskip("PySide6.QtWebEngineCore", exc_type=ImportError)  # Needs the QtWebEngine system libraries
+
+from PySide6.QtCore import QObject, QUrl
+from PySide6.QtWebEngineCore import QWebEngineUrlRequestJob
+
+from ui.layouts import map_resources
+from ui.layouts.map_resources import MAP_HTML, MapSchemeHandler
+
+
+class FakeJob(QObject):
+    """Stands in for QWebEngineUrlRequestJob, which only the web engine can create."""
+    def __init__(self, url):
+        super().__init__()
+        self.url = QUrl(url)
+        self.error = None
+        self.mime = None
+        self.data = None
+
+    def requestUrl(self):
+        return self.url
+
+    def fail(self, error):
+        self.error = error
+
+    def reply(self, mime, device):
+        self.mime = bytes(mime)
+        self.data = bytes(device.readAll())
+
+
+def request(handler, url):
+    job = FakeJob(url)
+    handler.requestStarted(job)
+    return job
+
+
+def resource_bytes(rel_path):
+    with open(os.path.join(map_resources._RESOURCE_DIR, rel_path), "rb") as f:
+        return f.read()
+
+
+@pytest.fixture
+def handler(qapp):
+    return MapSchemeHandler()
+
+
+class TestMapSchemeHandler:
+    def test_serves_map_page(self, handler):
+        job = request(handler, "gcs://map/index.html")
+        assert job.error is None
+        assert job.mime == b"text/html"
+        assert job.data == MAP_HTML.encode("utf-8")
+
+    @pytest.mark.parametrize("path, mime", [
+        ("leaflet/leaflet.js", b"application/javascript"),
+        ("leaflet/leaflet.css", b"text/css"),
+        ("images/drone-icon.png", b"image/png"),
+    ])
+    def test_serves_static_assets(self, handler, path, mime):
+        job = request(handler, f"gcs://map/{path}")
+        assert job.error is None
+        assert job.mime == mime
+        assert job.data == resource_bytes(path)
+        assert request(handler, f"gcs://map/{path}").data == job.data  # Served from memory the second time
+
+    @pytest.mark.parametrize("url", [
+        "gcs://map/missing.js",
+        "gcs://map/../main.py",
+        "gcs://other/index.html",
+    ])
+    def test_unknown_urls_fail(self, handler, url):
+        job = request(handler, url)
+        assert job.error == QWebEngineUrlRequestJob.UrlNotFound
+        assert job.mime is None
@@ -0,0 +1,53 @@
+import pytest
+from PySide6.QtCore import QPointF
+
+from ui.layouts.native_map_layout import NativeMapLayout, TileCache
+
+
+@pytest.fixture
+def map_layout(qtbot, tmp_path):
+    cache = TileCache(cache_dir=str(tmp_path), offline=True)
+    layout = NativeMapLayout(tile_cache=cache)
+    qtbot.addWidget(layout)
+    layout.resize(800, 600)
+    return layout
+
+
+class TestNativeMapLayout:
+    def test_position_update_follows_vehicle_and_records_track(self, map_layout):
+        map_layout.update_position(47.397742, 8.545594)
+        map_layout.update_position(47.397800, 8.545700)
+
+        lat, lon = map_layout.map_view.center_latlon()
+        assert lat == pytest.approx(47.397800, abs=1e-9)
+        assert lon == pytest.approx(8.545700, abs=1e-9)
+        assert len(map_layout.map_view._track) == 2
+
+    def test_none_position_is_ignored(self, map_layout):
+        map_layout.update_position(None, None)
+        assert map_layout.map_view.vehicle_position is None
+
+    def test_heading_update(self, map_layout):
+        map_layout.update_heading(270)
+        assert map_layout.map_view.vehicle_heading == 270
+
+    def test_zoom_keeps_anchor_point_fixed(self, map_layout):
+        canvas = map_layout.map_view
+        canvas.resize(800, 600)
+        anchor = QPointF(100, 100)
+        before = canvas._to_screen(*canvas._center)
+        world_x = canvas._center[0] + (anchor.x() - canvas.width() / 2) / canvas._scale()
+        world_y = canvas._center[1] + (anchor.y() - canvas.height() / 2) / canvas._scale()
+
+        canvas.set_zoom(canvas.zoom + 2, anchor)
+
+        after = canvas._to_screen(world_x, world_y)
+        assert after.x() == pytest.approx(anchor.x())
+        assert after.y() == pytest.approx(anchor.y())
+        assert before != after
+
+    def test_paint_with_offline_cache(self, map_layout):
+        map_layout.update_position(47.397742, 8.545594)
+        map_layout.update_heading(90)
+        map_layout.show()
+        map_layout.map_view.repaint()
@@ -0,0 +1,128 @@
+import pytest
+from PySide6.QtCore import QPointF, Qt
+
+from ui.frame_clock import FrameClock
+from ui.layouts.plot_layout import PlotLayout, StripChart, nice_step
+
+T0 = 1_700_000_000.0
+
+
+def attitude(t, roll, sysid=1):
+    return {"type": "ATTITUDE", "timestamp": T0 + t, "sysid": sysid, "roll": roll, "pitch": -roll, "yaw": 90.0}
+
+
+@pytest.fixture
+def plot(qtbot):
+    layout = PlotLayout()
+    qtbot.addWidget(layout)
+    layout.resize(600, 300)
+    return layout
+
+
+class TestStripChart:
+    def test_default_fields_and_picker(self, plot):
+        plot.update_telemetry(attitude(0, 1.0))
+        plot.update_telemetry({"type": "HEARTBEAT", "timestamp": T0, "mode": "LOITER", "armed": True})
+        assert list(plot.chart.series) == ["roll", "pitch"]
+        items = [plot.field_combo.itemText(i) for i in range(plot.field_combo.count())]
+        assert items == ["Add field...", "roll", "pitch", "yaw"]  # Strings and bools are not offered
+        plot._on_field_selected(3)
+        assert list(plot.chart.series) == ["roll", "pitch", "yaw"]
+        assert plot.field_combo.currentIndex() == 0
+
+    def test_live_view_follows_data(self, plot):
+        chart = plot.chart
+        for i in range(200):
+            plot.update_telemetry(attitude(i * 0.5, float(i)))
+        assert chart.view_range() == (T0 + 99.5 - chart.span, T0 + 99.5)
+        assert len(chart.series["roll"].buffer) == 200
+
+    def test_pause_scroll_and_resume(self, plot, qtbot):
+        chart = plot.chart
+        plot.update_telemetry(attitude(0, 0.0))
+        plot.update_telemetry(attitude(100, 1.0))
+        chart.scroll(-30)
+        assert chart.paused and plot.pause_button.isChecked()
+        assert chart.view_range()[1] == T0 + 70
+        plot.update_telemetry(attitude(200, 2.0))  # Keeps recording while paused
+        assert chart.view_range()[1] == T0 + 70
+        assert len(chart.series["roll"].buffer) == 3
+        plot.pause_button.setChecked(False)
+        assert not chart.paused and chart.view_range()[1] == T0 + 200
+
+    def test_zoom_keeps_anchor_while_paused(self, plot):
+        chart = plot.chart
+        plot.update_telemetry(attitude(100, 1.0))
+        chart.set_paused(True)
+        t0, t1 = chart.view_range()
+        anchor = t0 + 0.25 * (t1 - t0)
+        chart.set_span(chart.span / 2, anchor)
+        t0, t1 = chart.view_range()
+        assert (anchor - t0) / (t1 - t0) == pytest.approx(0.25)
+        chart.set_span(1e9)
+        assert chart.span == StripChart.MAX_SPAN
+
+    def test_sysid_series(self, plot):
+        chart = plot.chart
+        chart.add_series("roll", sysid=2)
+        plot.update_telemetry(attitude(0, 1.0, sysid=1))
+        plot.update_telemetry(attitude(1, 2.0, sysid=2))
+        assert len(chart.series["roll"].buffer) == 2
+        assert chart.series["roll[2]"].buffer.last() == (T0 + 1, 2.0)
+
+    def test_repaints_per_frame_not_per_message(self, plot, qtbot):
+        plot.show()
+        qtbot.waitExposed(plot)
+        chart = plot.chart
+        qtbot.wait(100)
+        frames = chart.frames
+        for i in range(500):
+            plot.update_telemetry(attitude(i * 0.02, float(i % 10)))
+        qtbot.waitUntil(lambda: chart.frames > frames, timeout=1000)
+        assert chart.frames - frames < 5
+
+    def test_runs_on_the_frame_clock(self, qtbot):
+        clock = FrameClock()
+        clock.stop()  # Frames are ticked by hand
+        plot = PlotLayout(frame_clock=clock)
+        qtbot.addWidget(plot)
+        plot.resize(600, 300)
+        plot.show()
+        qtbot.waitExposed(plot)
+        chart = plot.chart
+        assert chart.frame_clock is clock
+        qtbot.wait(100)
+        frames = chart.frames
+        plot.update_telemetry(attitude(0.0, 1.0))
+        qtbot.wait(100)
+        assert chart.frames == frames  # Nothing repaints between ticks
+        clock.tick.emit()
+        qtbot.waitUntil(lambda: chart.frames > frames, timeout=1000)
+
+    def test_paint_hours_of_data(self, plot, qtbot):
+        import numpy as np
+        chart = plot.chart
+        plot.update_telemetry(attitude(0, 0.0))
+        times = T0 + np.arange(540_000) * 0.02  # 3 h at 50 Hz
+        chart.series["roll"].buffer.extend(times, np.sin(times / 60))
+        chart.set_span(3 * 3600)
+        plot.show()
+        qtbot.waitExposed(plot)
+        chart.repaint()
+        image = chart.grab().toImage()
+        assert image.width() == chart.width()
+
+    def test_mouse_interaction(self, plot, qtbot):
+        chart = plot.chart
+        plot.update_telemetry(attitude(100, 1.0))
+        plot.show()
+        qtbot.waitExposed(plot)
+        qtbot.keyClick(chart, Qt.Key_Space)
+        assert chart.paused
+        qtbot.mouseDClick(chart, Qt.LeftButton, pos=QPointF(100, 100).toPoint())
+        assert not chart.paused
+
+
+@pytest.mark.parametrize("span, ticks, step", [(10, 5, 2), (1.0, 4, 0.5), (360, 5, 100), (0.03, 3, 0.01)])
+def test_nice_step(span, ticks, step):
+    assert nice_step(span, ticks) == pytest.approx(step)
@@ -2,10 +2,12 @@
 
 import pytest
 import logging
+import threading
+import time
 from unittest.mock import Mock
 
 # Adjust import path if necessary
-from utils.event_bus import EventBus, Events
+from utils.event_bus import Context, EventBus, Events, Overflow, TopicPolicy
 
 # --- Fixtures ---
 
@@ -14,6 +16,13 @@ def bus():
     """Provides a fresh EventBus instance for each test."""
     return EventBus()
 
+@pytest.fixture
+def threaded_bus():
+    """An EventBus whose worker threads are stopped after the test."""
+    bus = EventBus(worker_threads=1, default_policy=TopicPolicy(Overflow.DROP_OLDEST, maxsize=8))
+    yield bus
+    bus.shutdown(timeout=2)
+
 @pytest.fixture
 def mock_handler():
     """Provides a generic mock handler function with a name attribute."""
@@ -138,4 +147,292 @@ def test_handler_exception_logged(bus, caplog):
 # --- Removed Tests Related to UI Scheduling Mocks ---
 # test_publish_safe_calls_non_ui_directly (Covered by test_publish_calls_subscribed_handler now)
 # test_publish_safe_schedules_ui_handler (Removed)
-# test_publish_safe_without_tk_app_ref (Removed)
\ No newline at end of file
+# test_publish_safe_without_tk_app_ref (Removed)
+
+# --- Hot path ---
+
+class CountingRepr:
+    """Callable without __name__ that counts how often it is formatted."""
+    def __init__(self):
+        self.reprs = 0
+        self.calls = 0
+
+    def __call__(self, *args, **kwargs):
+        self.calls += 1
+
+    def __repr__(self):
+        self.reprs += 1
+        return "CountingRepr()"
+
+def test_publish_uses_precomputed_handler_names(bus):
+    """Handler names are worked out at subscribe time, not per publish."""
+    handler = CountingRepr()
+    bus.subscribe("hot_event", handler)
+    reprs = handler.reprs
+    for _ in range(10):
+        bus.publish("hot_event")
+    assert handler.calls == 10
+    assert handler.reprs == reprs
+
+def test_publish_does_not_format_args_without_debug(bus, caplog):
+    """Debug messages (and the args in them) are not formatted when debug logging is off."""
+    payload = CountingRepr()
+    bus.subscribe("hot_event", Mock(name='hot_handler'))
+    with caplog.at_level(logging.INFO):
+        bus.publish("hot_event", payload)
+        bus.publish("no_subs_event", payload)
+    assert payload.reprs == 0
+
+def test_unsubscribe_during_publish_applies_to_next_publish(bus):
+    """Publish works on a snapshot of the subscriber tuple."""
+    event_type = "snapshot_event"
+    second = Mock(name='second')
+    def first(*args):
+        bus.unsubscribe(event_type, second)
+    bus.subscribe(event_type, first)
+    bus.subscribe(event_type, second)
+    bus.publish(event_type)
+    second.assert_called_once_with()
+    bus.publish(event_type)
+    second.assert_called_once_with()
+    assert bus._subscribers[event_type] == (first,)
+
+
+# --- Execution contexts ---
+
+def test_unknown_context_rejected(bus, mock_handler):
+    with pytest.raises(ValueError):
+        bus.subscribe("ctx_event", mock_handler, context="tk")
+    assert "ctx_event" not in bus._subscribers
+
+def test_worker_handler_does_not_stall_publisher(threaded_bus):
+    """A slow WORKER subscriber runs off the publishing thread."""
+    release = threading.Event()
+    seen = []
+    def slow_exporter(data):
+        release.wait(2)
+        seen.append((data, threading.current_thread().name))
+    threaded_bus.subscribe("export_event", slow_exporter, context=Context.WORKER)
+    inline = Mock(name='inline_handler')
+    threaded_bus.subscribe("export_event", inline)
+
+    start = time.perf_counter()
+    for i in range(3):
+        threaded_bus.publish("export_event", i)
+    assert time.perf_counter() - start < 0.5
+    assert inline.call_count == 3  # Inline handlers ran right away
+    release.set()
+    threaded_bus.shutdown(timeout=2)
+    assert [data for data, _ in seen] == [0, 1, 2]
+    assert all(name.startswith("EventBusWorker") for _, name in seen)
+
+def test_full_queue_drops_oldest_and_counts(threaded_bus, caplog):
+    """A stuck subscriber fills its bounded queue; the oldest events make room, the publisher never waits."""
+    release = threading.Event()
+    started = threading.Event()
+    seen = []
+    def stuck(data):
+        started.set()
+        release.wait(2)
+        seen.append(data)
+    threaded_bus.subscribe("burst", stuck, context=Context.WORKER)
+    threaded_bus.publish("burst", 0)
+    assert started.wait(2)  # The worker holds event 0; the queue is empty again
+    with caplog.at_level(logging.WARNING):
+        for i in range(1, 21):
+            threaded_bus.publish("burst", i)
+    metrics = threaded_bus.metrics()["burst"]
+    assert (metrics["queued"], metrics["dropped"], metrics["pending"]) == (21, 12, 8)
+    assert "dropping events" in caplog.text
+    release.set()
+    threaded_bus.shutdown(timeout=2)
+    assert seen == [0] + list(range(13, 21))
+    assert threaded_bus.metrics()["burst"]["delivered"] == 9
+
+def test_worker_handler_exception_logged(threaded_bus, caplog):
+    def failing_worker(*args):
+        raise ValueError("worker failed")
+    threaded_bus.subscribe("worker_error", failing_worker, context=Context.WORKER)
+    with caplog.at_level(logging.ERROR):
+        threaded_bus.publish("worker_error")
+        threaded_bus.shutdown(timeout=2)
+    assert "Error executing non-UI handler failing_worker" in caplog.text
+
+def test_qt_handler_runs_on_main_thread(qtbot, bus):
+    """QT subscribers published to from another thread are called on the Qt main thread."""
+    calls = []
+    bus.subscribe(Events.STATUS_TEXT_RECEIVED, lambda text: calls.append((text, threading.current_thread())),
+                  context=Context.QT)
+    publisher = threading.Thread(target=lambda: [bus.publish(Events.STATUS_TEXT_RECEIVED, f"msg {i}")
+                                                 for i in range(5)])
+    publisher.start()
+    publisher.join()
+    qtbot.waitUntil(lambda: len(calls) == 5, timeout=2000)
+    assert [text for text, _ in calls] == [f"msg {i}" for i in range(5)]
+    assert all(thread is threading.main_thread() for _, thread in calls)
+
+def test_qt_handler_called_directly_from_main_thread(qtbot, bus, mock_handler):
+    bus.subscribe("ui_event", mock_handler, context=Context.QT)
+    bus.publish("ui_event", 1)
+    mock_handler.assert_called_once_with(1)
+    assert bus.metrics()["ui_event"]["queued"] == 0
+
+
+# --- Overflow policies ---
+
+def blocked_worker(bus, event_type):
+    """Subscribes a WORKER handler that holds its first event until released; returns (release, seen)."""
+    release, started, seen = threading.Event(), threading.Event(), []
+    def handler(*args):
+        started.set()
+        release.wait(2)
+        seen.append(args)
+    bus.subscribe(event_type, handler, context=Context.WORKER)
+    bus.publish(event_type, {"type": "first"})
+    assert started.wait(2)
+    return release, seen
+
+def test_keep_latest_coalesces_telemetry_per_type(threaded_bus):
+    """Telemetry for a lagging subscriber is coalesced to the newest message of each type."""
+    release, seen = blocked_worker(threaded_bus, Events.TELEMETRY_UPDATE)
+    for i in range(100):
+        for msg_type in ("ATTITUDE", "VFR_HUD", "GPS_RAW_INT"):
+            threaded_bus.publish(Events.TELEMETRY_UPDATE, {"type": msg_type, "seq": i})
+    metrics = threaded_bus.metrics()[Events.TELEMETRY_UPDATE]
+    assert metrics["pending"] == 3 and metrics["coalesced"] == 297 and metrics["dropped"] == 0
+    release.set()
+    threaded_bus.shutdown(timeout=2)
+    assert seen[1:] == [({"type": t, "seq": 99},) for t in ("ATTITUDE", "VFR_HUD", "GPS_RAW_INT")]
+
+def test_sample_every_nth(threaded_bus):
+    threaded_bus.set_policy("replay", TopicPolicy(Overflow.SAMPLE, every=5))
+    seen = []
+    threaded_bus.subscribe("replay", seen.append, context=Context.WORKER)
+    for i in range(50):
+        threaded_bus.publish("replay", i)
+    threaded_bus.shutdown(timeout=2)
+    assert seen == list(range(0, 50, 5))
+    assert threaded_bus.metrics()["replay"]["sampled_out"] == 40
+
+def test_block_waits_for_room_without_dropping(threaded_bus):
+    threaded_bus.set_policy("command", TopicPolicy(Overflow.BLOCK, maxsize=2, block_timeout=5))
+    seen = []
+    def slow(i):
+        time.sleep(0.005)
+        seen.append(i)
+    threaded_bus.subscribe("command", slow, context=Context.WORKER)
+    for i in range(20):
+        threaded_bus.publish("command", i)
+    threaded_bus.shutdown(timeout=2)
+    assert seen == list(range(20))
+    metrics = threaded_bus.metrics()["command"]
+    assert metrics["dropped"] == 0 and metrics["blocked"] > 0
+
+def test_block_gives_up_after_timeout(threaded_bus):
+    threaded_bus.set_policy("command", TopicPolicy(Overflow.BLOCK, maxsize=1, block_timeout=0.05))
+    release, seen = blocked_worker(threaded_bus, "command")
+    threaded_bus.publish("command", 1)  # Fills the queue
+    start = time.perf_counter()
+    threaded_bus.publish("command", 2)  # Waits, then drops the oldest
+    assert 0.04 < time.perf_counter() - start < 1.0
+    assert threaded_bus.metrics()["command"]["dropped"] == 1
+    release.set()
+
+def test_flood_stays_bounded_and_other_topics_flow():
+    """A STATUSTEXT flood to a slow subscriber keeps a bounded queue and does not hold up arm requests."""
+    bus = EventBus(worker_threads=1)
+    arms = []
+    def slow_logger(text):
+        time.sleep(0.002)
+    try:
+        bus.subscribe(Events.STATUS_TEXT_RECEIVED, slow_logger, context=Context.WORKER)
+        bus.subscribe(Events.ARM_REQUEST, lambda: arms.append(time.perf_counter()), context=Context.WORKER)
+        for i in range(5000):
+            bus.publish(Events.STATUS_TEXT_RECEIVED, f"flood {i}")
+        published = time.perf_counter()
+        bus.publish(Events.ARM_REQUEST)
+        deadline = time.perf_counter() + 2
+        while not arms and time.perf_counter() < deadline:
+            time.sleep(0.001)
+        assert arms and arms[0] - published < 0.5  # One logger batch at most, not the whole backlog
+        metrics = bus.metrics()[Events.STATUS_TEXT_RECEIVED]
+        assert metrics["pending"] <= bus.policy(Events.STATUS_TEXT_RECEIVED).maxsize
+        assert metrics["dropped"] > 4000
+    finally:
+        bus.shutdown(timeout=5)
+
+
+# --- Hierarchical topics ---
+
+@pytest.mark.parametrize("pattern, matches", [
+    ("telemetry.3.ATTITUDE", ["telemetry.3.ATTITUDE"]),
+    ("telemetry.3.*", ["telemetry.3.ATTITUDE", "telemetry.3.VFR_HUD"]),
+    ("telemetry.*.ATTITUDE", ["telemetry.3.ATTITUDE", "telemetry.4.ATTITUDE"]),
+    ("telemetry.3.#", ["telemetry.3", "telemetry.3.ATTITUDE", "telemetry.3.VFR_HUD", "telemetry.3.ATTITUDE.extra"]),
+    ("telemetry.*", ["telemetry.3"]),
+    ("*.*.ATTITUDE", ["telemetry.3.ATTITUDE", "telemetry.4.ATTITUDE"]),
+    ("#", ["telemetry", "telemetry.3", "telemetry.3.ATTITUDE", "telemetry.3.VFR_HUD", "telemetry.4.ATTITUDE",
+           "telemetry.3.ATTITUDE.extra", "command_ack.3.400"]),
+])
+def test_wildcard_matching(bus, pattern, matches):
+    topics = ["telemetry", "telemetry.3", "telemetry.3.ATTITUDE", "telemetry.3.VFR_HUD", "telemetry.4.ATTITUDE",
+              "telemetry.3.ATTITUDE.extra", "command_ack.3.400"]
+    seen = []
+    bus.subscribe(pattern, seen.append)
+    for topic in topics:
+        bus.publish(topic, topic)
+    assert seen == matches
+
+def test_exact_then_wildcard_handlers_each_called_once(bus):
+    calls = []
+    everything = lambda data: calls.append("everything")
+    bus.subscribe("telemetry.#", everything)
+    bus.subscribe("telemetry.*.ATTITUDE", everything)  # Overlaps: still one call
+    bus.subscribe("telemetry.1.*", lambda data: calls.append("vehicle"))
+    bus.subscribe("telemetry.1.ATTITUDE", lambda data: calls.append("exact"))
+    bus.publish("telemetry.1.ATTITUDE", {})
+    assert calls == ["exact", "everything", "vehicle"]
+
+def test_subscription_changes_reach_cached_topics(bus):
+    handler = Mock(name='vehicle_handler')
+    bus.publish("telemetry.2.GPS_RAW_INT", 1)  # Cached with no subscribers
+    bus.subscribe("telemetry.2.#", handler)
+    bus.publish("telemetry.2.GPS_RAW_INT", 2)
+    bus.unsubscribe("telemetry.2.#", handler)
+    bus.publish("telemetry.2.GPS_RAW_INT", 3)
+    handler.assert_called_once_with(2)
+    assert "telemetry.2.#" not in bus._subscribers and bus._index is None
+
+@pytest.mark.parametrize("pattern", ["telemetry.#.ATTITUDE", "telemetry.3*", "tele#"])
+def test_malformed_pattern_rejected(bus, mock_handler, pattern):
+    with pytest.raises(ValueError):
+        bus.subscribe(pattern, mock_handler)
+    assert not bus._subscribers
+
+def test_publishing_to_a_pattern_rejected(bus):
+    with pytest.raises(ValueError):
+        bus.publish("telemetry.*.ATTITUDE", {})
+
+def test_wildcard_subscriber_coalesces_per_topic(threaded_bus):
+    """Hierarchical topics inherit their parent's policy; KEEP_LATEST keeps one pending event per topic."""
+    assert threaded_bus.policy("telemetry.5.ATTITUDE") is threaded_bus.policy(Events.TELEMETRY)
+    threaded_bus.set_policy("telemetry.5", TopicPolicy(Overflow.SAMPLE, every=2))
+    assert threaded_bus.policy("telemetry.5.ATTITUDE").overflow == Overflow.SAMPLE
+
+    release = threading.Event()
+    started = threading.Event()
+    seen = []
+    def slow(data):
+        started.set()
+        release.wait(2)
+        seen.append(data)
+    threaded_bus.subscribe("telemetry.*.#", slow, context=Context.WORKER)
+    threaded_bus.publish("telemetry.1.HEARTBEAT", "first")
+    assert started.wait(2)
+    for i in range(5):
+        for sysid in (1, 2):
+            threaded_bus.publish(f"telemetry.{sysid}.ATTITUDE", (sysid, i))
+    release.set()
+    threaded_bus.shutdown(timeout=2)
+    assert seen == ["first", (1, 4), (2, 4)]
+    assert threaded_bus.metrics()["telemetry.*.#"]["coalesced"] == 8
@@ -0,0 +1,18 @@
+import time
+
+from utils.footprint import Footprint, peak_rss_bytes, rss_bytes
+
+
+def test_rss_is_reported():
+    assert 0 < rss_bytes() <= peak_rss_bytes() * 1.01
+
+
+def test_cpu_percent_of_a_busy_loop():
+    footprint = Footprint()
+    deadline = time.process_time() + 0.2
+    while time.process_time() < deadline:
+        pass
+    stats = footprint.sample()
+    assert 50 < stats['cpu_percent'] <= 110
+    time.sleep(0.2)
+    assert footprint.sample()['cpu_percent'] < 50
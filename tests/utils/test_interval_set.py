@@ -0,0 +1,51 @@
+from utils.interval_set import IntervalSet
+from utils.offset_file import OffsetFile
+
+
+def make(*ranges):
+    s = IntervalSet()
+    for start, end in ranges:
+        s.add(start, end)
+    return s
+
+
+def test_add_merges_overlapping_and_adjacent():
+    s = make((0, 10), (20, 30), (10, 15), (25, 40))
+    assert list(s) == [(0, 15), (20, 40)]
+    s.add(15, 20)
+    assert list(s) == [(0, 40)]
+
+
+def test_add_bridging_several_ranges():
+    s = make((0, 2), (4, 6), (8, 10), (12, 14))
+    s.add(1, 9)
+    assert list(s) == [(0, 10), (12, 14)]
+
+
+def test_empty_range_is_ignored():
+    assert len(make((5, 5))) == 0
+
+
+def test_contains():
+    s = make((0, 10), (20, 30))
+    assert s.contains(2, 8)
+    assert s.contains(20, 30)
+    assert not s.contains(5, 25)
+    assert not s.contains(10, 11)
+
+
+def test_gaps_and_coverage():
+    s = make((10, 20), (30, 40))
+    assert s.gaps(0, 50) == [(0, 10), (20, 30), (40, 50)]
+    assert s.gaps(15, 35) == [(20, 30)]
+    assert s.gaps(10, 20) == []
+    assert s.covered() == 20
+    assert s.end() == 40
+
+
+def test_offset_file_out_of_order_writes(tmp_path):
+    path = tmp_path / "out.bin"
+    with OffsetFile(str(path), 10) as f:
+        f.write_at(6, b"6789")
+        f.write_at(0, b"012345")
+    assert path.read_bytes() == b"0123456789"
@@ -0,0 +1,74 @@
+import numpy as np
+import pytest
+
+from utils.series_buffer import BLOCK, SeriesBuffer
+
+
+def brute_force(times, values, t0, t1, columns):
+    """Per-column (min, max) of the samples inside [t0, t1)."""
+    column = np.floor((times - t0) / (t1 - t0) * columns).astype(int)
+    inside = (column >= 0) & (column < columns)
+    column, values = column[inside], values[inside]
+    used, starts = np.unique(column, return_index=True)  # Times are sorted, so columns are too
+    return dict(zip(used, zip(np.minimum.reduceat(values, starts), np.maximum.reduceat(values, starts))))
+
+
+class TestSeriesBuffer:
+    def test_append_keeps_latest_capacity_samples(self):
+        buffer = SeriesBuffer(capacity=BLOCK * 2)
+        for i in range(BLOCK * 9 + 17):
+            buffer.append(float(i), float(i % 7))
+        assert len(buffer) == BLOCK * 2
+        assert buffer.times[0] == BLOCK * 7 + 17 and buffer.times[-1] == BLOCK * 9 + 16
+        assert np.all(np.diff(buffer.times) == 1)
+        assert buffer.last() == (BLOCK * 9 + 16, float((BLOCK * 9 + 16) % 7))
+
+    def test_extend_matches_append(self):
+        rng = np.random.default_rng(1)
+        times = np.cumsum(rng.uniform(0.01, 0.03, 5000))
+        values = rng.normal(size=5000)
+        appended, extended = SeriesBuffer(capacity=3000), SeriesBuffer(capacity=3000)
+        for t, v in zip(times, values):
+            appended.append(t, v)
+        for chunk in range(0, 5000, 700):
+            extended.extend(times[chunk:chunk + 700], values[chunk:chunk + 700])
+        np.testing.assert_array_equal(appended.times, extended.times)
+        np.testing.assert_array_equal(appended.window(times[0], times[-1], 10)[1],
+                                      extended.window(times[0], times[-1], 10)[1])
+
+    def test_clock_steps_back_and_nan_are_absorbed(self):
+        buffer = SeriesBuffer(capacity=BLOCK)
+        buffer.append(10.0, 1.0)
+        buffer.append(9.0, 2.0)
+        buffer.append(11.0, float('nan'))
+        assert buffer.times.tolist() == [10.0, 10.0]
+
+    def test_sparse_window_returns_samples_and_neighbours(self):
+        buffer = SeriesBuffer()
+        buffer.extend(np.arange(100.0), np.arange(100.0) * 2)
+        times, values = buffer.window(10.5, 20.5, 400)
+        assert times.tolist() == list(range(10, 22))
+        assert values.tolist() == [t * 2 for t in range(10, 22)]
+
+    @pytest.mark.parametrize("samples, columns", [(20_000, 100), (2_000_000, 300)], ids=["raw", "blocks"])
+    def test_minmax_decimation(self, samples, columns):
+        rng = np.random.default_rng(2)
+        times = np.arange(samples) * 0.02
+        values = np.sin(times / 50) + rng.normal(scale=0.1, size=samples)
+        values[samples // 3] = 25.0  # A spike must survive decimation
+        buffer = SeriesBuffer(capacity=samples)
+        buffer.extend(times, values)
+        t0, t1 = times[samples // 10], times[-1]
+
+        xs, ys = buffer.window(t0, t1, columns)
+        assert len(xs) <= 2 * columns
+        assert ys.max() == 25.0
+        expected = brute_force(times, values, t0, t1, columns)
+        column = np.floor((xs[::2] - t0) / (t1 - t0) * columns).astype(int)
+        lows, highs = ys[::2], ys[1::2]
+        if samples < 4 * BLOCK * columns:  # Exact per column
+            assert {c: (lo, hi) for c, lo, hi in zip(column, lows, highs)} == expected
+        else:  # Block-snapped: within the neighbouring columns' range
+            for c, lo, hi in zip(column, lows, highs):
+                near = [expected[k] for k in (c - 1, c, c + 1) if k in expected]
+                assert min(n[0] for n in near) <= lo and hi <= max(n[1] for n in near)
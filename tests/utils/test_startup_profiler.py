@@ -0,0 +1,46 @@
+import time
+
+from utils.startup_profiler import StartupProfiler
+
+
+def test_phases_are_recorded_in_order():
+    profiler = StartupProfiler()
+    with profiler.phase("first"):
+        time.sleep(0.01)
+    profiler.mark("milestone")
+    with profiler.phase("second"):
+        pass
+
+    names = [name for name, _, _ in profiler.phases]
+    assert names == ["first", "milestone", "second"]
+    first_duration = profiler.phases[0][2]
+    assert first_duration >= 0.009
+    assert profiler.phases[1][2] == 0.0
+    assert profiler.phases[2][1] >= profiler.phases[0][1] + first_duration
+
+
+def test_phase_recorded_when_block_raises():
+    profiler = StartupProfiler()
+    try:
+        with profiler.phase("failing"):
+            raise RuntimeError("boom")
+    except RuntimeError:
+        pass
+    assert profiler.phases[0][0] == "failing"
+
+
+def test_disabled_profiler_records_nothing():
+    profiler = StartupProfiler(enabled=False)
+    with profiler.phase("ignored"):
+        pass
+    profiler.mark("ignored")
+    assert profiler.phases == []
+
+
+def test_report_lists_every_phase():
+    profiler = StartupProfiler()
+    with profiler.phase("import something"):
+        pass
+    report = profiler.report()
+    assert "import something" in report
+    assert "Total" in report
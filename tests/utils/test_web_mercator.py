@@ -0,0 +1,48 @@
+import pytest
+
+from utils.web_mercator import (
+    TILE_SIZE, MAX_LATITUDE,
+    latlon_to_world, world_to_latlon, tile_for_latlon, visible_tiles, wrap_tile_x
+)
+
+
+def test_origin_maps_to_world_centre():
+    x, y = latlon_to_world(0.0, 0.0, zoom=0)
+    assert x == pytest.approx(TILE_SIZE / 2)
+    assert y == pytest.approx(TILE_SIZE / 2)
+
+
+def test_round_trip():
+    for lat, lon, zoom in [(21.146, 79.08, 10), (-33.86, 151.21, 15), (51.5, -0.12, 3)]:
+        x, y = latlon_to_world(lat, lon, zoom)
+        back_lat, back_lon = world_to_latlon(x, y, zoom)
+        assert back_lat == pytest.approx(lat, abs=1e-9)
+        assert back_lon == pytest.approx(lon, abs=1e-9)
+
+
+def test_latitude_is_clamped_at_poles():
+    _, y_top = latlon_to_world(90.0, 0.0)
+    _, y_limit = latlon_to_world(MAX_LATITUDE, 0.0)
+    assert y_top == pytest.approx(y_limit)
+    assert y_top == pytest.approx(0.0, abs=1e-6)
+
+
+def test_tile_for_latlon_matches_slippy_map_convention():
+    # Reference values from the OSM slippy map tile naming scheme
+    assert tile_for_latlon(51.5074, -0.1278, 10) == (511, 340)
+    assert tile_for_latlon(-90.0, 180.0, 2) == (3, 3)
+
+
+def test_visible_tiles_cover_viewport():
+    tiles = visible_tiles(512.0, 512.0, 600, 400, zoom=2)
+    xs = {tx for tx, _ in tiles}
+    ys = {ty for _, ty in tiles}
+    assert xs == {0, 1, 2, 3}
+    assert ys == {1, 2}
+
+
+def test_visible_tiles_skip_rows_outside_world_and_wrap_columns():
+    tiles = visible_tiles(0.0, 0.0, 512, 512, zoom=1)
+    assert all(0 <= ty < 2 for _, ty in tiles)
+    assert (-1, 0) in tiles
+    assert wrap_tile_x(-1, 1) == 1
@@ -1,7 +1,11 @@
 # ui/abstract/base_instrument.py
 
-from abc import ABC # No need for abstractmethod if no new methods are added yet
+from PySide6.QtCore import QPointF, QRectF, QSize, Qt
+from PySide6.QtGui import QPainter, QPixmap
+from PySide6.QtWidgets import QSizePolicy, QWidget
+
 from .base_widget import AbstractWidget
+from ui.frame_clock import FrameClock
 
 class AbstractInstrument(AbstractWidget):
     """
@@ -9,11 +13,125 @@ class AbstractInstrument(AbstractWidget):
     Inherits the basic requirements from AbstractWidget.
     """
 
-    # No additional abstract methods are strictly required by all instruments *yet*.
-    # Specific instrument implementations will define how they use `update_data`
-    # or might implement more specific update methods like `update_attitude`.
-    # If common methods emerge (e.g., set_range, set_units), they could be added here.
+    # Concrete instruments draw on an InstrumentCanvas (their UI element) and
+    # implement update_data to pass the fields they show on to it.
     def __init__(self, parent, event_bus, *args, **kwargs):
         super().__init__(parent, event_bus, *args, **kwargs)
 
-    # Inherits abstract method update_data(self, data) from AbstractWidget
\ No newline at end of file
+    # Inherits abstract method update_data(self, data) from AbstractWidget
+
+
+class InstrumentCanvas(QWidget):
+    """
+    Round instrument face painted in three layers:
+
+      background   painted once per size into a cached QPixmap
+      dynamic      painted every frame (the moving parts)
+      foreground   painted once per size into a cached QPixmap (bezel,
+                   scales, fixed symbols); it masks everything outside the
+                   face, so the dynamic layer needs no clipping
+
+    Layer hooks paint in face coordinates: origin at the centre, RADIUS
+    units to the rim. Setters call mark_dirty(); the frame clock repaints
+    dirty canvases at most once per tick and only runs while a canvas is
+    dirty.
+    """
+    RADIUS = 100.0
+
+    def __init__(self, frame_clock=None, cache_layers=True, parent=None):
+        super().__init__(parent)
+        self.cache_layers = cache_layers  # False paints every layer every frame (for comparison)
+        self.frames = 0  # Paints so far
+        self._layers = None  # (background, foreground) QPixmaps for _layer_key
+        self._layer_key = None
+        self._dirty = True
+        self.frame_clock = frame_clock or FrameClock.shared()
+        self.frame_clock.tick.connect(self._on_frame)
+        self.setMinimumSize(120, 120)
+        size_policy = QSizePolicy(QSizePolicy.Preferred, QSizePolicy.Preferred)
+        size_policy.setHeightForWidth(True)
+        self.setSizePolicy(size_policy)
+
+    def sizeHint(self):
+        return QSize(200, 200)
+
+    def hasHeightForWidth(self):
+        return True
+
+    def heightForWidth(self, width):
+        return width
+
+    def mark_dirty(self):
+        """Repaint on the next frame."""
+        self._dirty = True
+        self.frame_clock.request_frame()
+
+    def invalidate_layers(self):
+        """Re-render the cached layers (e.g. after a style change)."""
+        self._layer_key = None
+        self.mark_dirty()
+
+    def _on_frame(self):
+        if self._dirty and self.isVisible():
+            self._dirty = False
+            self.update()
+
+    # --- Painting ---
+
+    def face_side(self):
+        return min(self.width(), self.height())
+
+    def paintEvent(self, event):
+        side = self.face_side()
+        if side <= 0:
+            return
+        self.frames += 1
+        origin = QPointF((self.width() - side) / 2.0, (self.height() - side) / 2.0)
+        painter = QPainter(self)
+        if self.cache_layers:
+            key = (side, self.devicePixelRatioF())
+            if key != self._layer_key:
+                self._layers = (self._render_layer(self.paint_background, side),
+                                self._render_layer(self.paint_foreground, side))
+                self._layer_key = key
+            background, foreground = self._layers
+            painter.drawPixmap(origin, background)
+            self._paint_face(painter, origin, side, self.paint_dynamic)
+            painter.drawPixmap(origin, foreground)
+        else:
+            for paint in (self.paint_background, self.paint_dynamic, self.paint_foreground):
+                self._paint_face(painter, origin, side, paint)
+        painter.end()
+
+    def _paint_face(self, painter, origin, side, paint):
+        painter.save()
+        painter.setClipRect(QRectF(origin.x(), origin.y(), side, side))  # Keep the dynamic layer off the margins
+        painter.setRenderHint(QPainter.Antialiasing, True)
+        painter.translate(origin.x() + side / 2.0, origin.y() + side / 2.0)
+        painter.scale(side / (2 * self.RADIUS), side / (2 * self.RADIUS))
+        paint(painter)
+        painter.restore()
+
+    def _render_layer(self, paint, side):
+        pixmap = self.create_pixmap(side, side)
+        painter = QPainter(pixmap)
+        self._paint_face(painter, QPointF(0, 0), side, paint)
+        painter.end()
+        return pixmap
+
+    def create_pixmap(self, width, height):
+        """A transparent pixmap of `width` x `height` logical pixels at the screen's pixel ratio."""
+        ratio = self.devicePixelRatioF()
+        pixmap = QPixmap(round(width * ratio), round(height * ratio))
+        pixmap.setDevicePixelRatio(ratio)
+        pixmap.fill(Qt.transparent)
+        return pixmap
+
+    def paint_background(self, painter):
+        pass
+
+    def paint_dynamic(self, painter):
+        pass
+
+    def paint_foreground(self, painter):
+        pass
@@ -0,0 +1,69 @@
+# ui/frame_clock.py
+
+from PySide6.QtCore import QObject, QTimer, Qt, Signal
+
+
+class FrameClock(QObject):
+    """
+    Fixed-rate tick for views that repaint from their latest state instead
+    of on every telemetry message. Views mark themselves dirty when their
+    data changes, call request_frame() and repaint on the next tick, so a
+    50 Hz ATTITUDE stream and a 60 Hz display never multiply into extra
+    paints.
+
+    The timer only runs while frames are requested: a tick after which no
+    view asked for another frame stops it, so an idle window does not wake
+    up at the frame rate.
+    """
+    tick = Signal()
+    DEFAULT_FPS = 60
+    _shared = None
+
+    def __init__(self, fps=DEFAULT_FPS, parent=None):
+        super().__init__(parent)
+        self._timer = QTimer(self)
+        self._timer.setTimerType(Qt.PreciseTimer)
+        self._timer.timeout.connect(self._on_timeout)
+        self.set_fps(fps)
+        self._running = True  # False after stop(): ticks are emitted by hand
+        self._requested = False  # A frame was requested since the last tick
+
+    @classmethod
+    def shared(cls):
+        """The application-wide clock (created on first use, on the GUI thread)."""
+        if cls._shared is None:
+            cls._shared = cls()
+        return cls._shared
+
+    @property
+    def fps(self):
+        return 1000.0 / self._timer.interval()
+
+    @property
+    def active(self):
+        """Whether the timer is currently running."""
+        return self._timer.isActive()
+
+    def set_fps(self, fps):
+        self._timer.setInterval(max(1, round(1000.0 / fps)))
+
+    def request_frame(self):
+        """Asks for a tick within one frame interval (GUI thread only)."""
+        self._requested = True
+        if self._running and not self._timer.isActive():
+            self._timer.start()
+
+    def _on_timeout(self):
+        self._requested = False
+        self.tick.emit()
+        if not self._requested:
+            self._timer.stop()  # Idle until the next request_frame()
+
+    def stop(self):
+        self._running = False
+        self._timer.stop()
+
+    def start(self):
+        self._running = True
+        if self._requested:
+            self._timer.start()
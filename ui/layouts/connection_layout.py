@@ -2,12 +2,36 @@ from PySide6.QtWidgets import (
     QGroupBox, QHBoxLayout, QLabel, QComboBox,
     QPushButton, QSizePolicy
 )
-from PySide6.QtCore import Qt
-import serial.tools.list_ports
+from PySide6.QtCore import Qt, QThread, Signal
+
+# Common UDP addresses offered alongside serial ports
+UDP_PORTS = [
+    'udpin:localhost:14550',
+    'udpin:0.0.0.0:14550',
+    'udpout:localhost:14550',
+    'udpout:0.0.0.0:14550'
+]
+
+class PortScanThread(QThread):
+    """Enumerates serial ports off the UI thread."""
+    ports_found = Signal(list)  # Data: list of device names
+    
+    def run(self):
+        try:
+            # pyserial is imported here so startup does not pay for it
+            import serial.tools.list_ports
+            ports = [p.device for p in serial.tools.list_ports.comports()]
+        except Exception as e:
+            print(f"Warning: Could not list serial ports - {e}")
+            # Fallback options
+            ports = ['/dev/ttyACM0', 'COM3']
+        self.ports_found.emit(ports)
 
 class ConnectionLayout(QGroupBox):
     def __init__(self, parent=None):
         super().__init__("", parent)
+        self._port_scan_thread = None
+        self.serial_ports = []
         self.setup_ui()
         
     def setup_ui(self):
@@ -37,46 +61,75 @@ class ConnectionLayout(QGroupBox):
         self.connect_button.setFixedHeight(30)
         layout.addWidget(self.connect_button)
         
+        # Auto-detect button: probes every listed port/baud and the standard endpoints
+        self.auto_connect_button = QPushButton("Auto")
+        self.auto_connect_button.setFixedHeight(30)
+        self.auto_connect_button.setToolTip("Probe all ports, baud rates and UDP/TCP endpoints for a vehicle")
+        layout.addWidget(self.auto_connect_button)
+        
         self.setLayout(layout)
         self.setFixedHeight(50)  # Fixed height for the entire layout
         
     def populate_ports(self):
-        """Populates the connection combo box with available serial ports."""
-        try:
-            # Get list of serial ports
-            ports = [p.device for p in serial.tools.list_ports.comports()]
-            
-            # Add common UDP addresses
-            udp_ports = [
-                'udpin:localhost:14550',
-                'udpin:0.0.0.0:14550',
-                'udpout:localhost:14550',
-                'udpout:0.0.0.0:14550'
-            ]
-            
-            # Clear and add all ports
-            self.connection_input.clear()
-            self.connection_input.addItems(ports + udp_ports)
-            
-            # Set default to first UDP port
-            self.connection_input.setCurrentText('udpin:localhost:14550')
-            
-        except Exception as e:
-            print(f"Warning: Could not list serial ports - {e}")
-            # Add fallback options
-            self.connection_input.addItems([
-                'udpin:localhost:14550',
-                '/dev/ttyACM0',
-                'COM3'
-            ])
+        """
+        Populates the connection combo box with the UDP defaults and starts
+        a background scan for serial ports, which are added when found.
+        """
+        self.connection_input.clear()
+        self.connection_input.addItems(UDP_PORTS)
+        
+        # Set default to first UDP port
+        self.connection_input.setCurrentText('udpin:localhost:14550')
+        
+        if self._port_scan_thread and self._port_scan_thread.isRunning():
+            return
+        self._port_scan_thread = PortScanThread(self)
+        self._port_scan_thread.ports_found.connect(self.on_ports_found)
+        self._port_scan_thread.start()
+        
+    def on_ports_found(self, ports):
+        """Adds the scanned serial ports ahead of the UDP entries."""
+        self.serial_ports = ports
+        current = self.connection_input.currentText()
+        self.connection_input.clear()
+        self.connection_input.addItems(ports + UDP_PORTS)
+        self.connection_input.setCurrentText(current)
+        
+    def wait_for_port_scan(self, timeout_ms=2000):
+        """Blocks until a running port scan has finished (used on shutdown)."""
+        if self._port_scan_thread:
+            self._port_scan_thread.wait(timeout_ms)
             
+    def connection_candidates(self):
+        """Returns every connection string and baud rate offered in the combo boxes."""
+        conn_strings = [self.connection_input.itemText(i) for i in range(self.connection_input.count())]
+        current = self.connection_input.currentText()
+        if current and current not in conn_strings:
+            conn_strings.insert(0, current)
+        bauds = []
+        for i in range(self.baud_rate_combo.count()):
+            try:
+                bauds.append(int(self.baud_rate_combo.itemText(i)))
+            except ValueError:
+                continue
+        # Try the selected baud rate first
+        try:
+            selected = int(self.baud_rate_combo.currentText())
+            bauds.remove(selected)
+            bauds.insert(0, selected)
+        except ValueError:
+            pass
+        return conn_strings, bauds
+        
     def set_connected(self, connected: bool):
         """Update the connect button state based on connection status."""
         if connected:
             self.connect_button.setText("Disconnect")
             self.connection_input.setEnabled(False)
             self.baud_rate_combo.setEnabled(False)
+            self.auto_connect_button.setEnabled(False)
         else:
             self.connect_button.setText("Connect")
             self.connection_input.setEnabled(True)
-            self.baud_rate_combo.setEnabled(True) 
\ No newline at end of file
+            self.baud_rate_combo.setEnabled(True)
+            self.auto_connect_button.setEnabled(True) 
\ No newline at end of file
@@ -6,6 +6,20 @@ from PySide6.QtCore import Qt, Signal
 from PySide6.QtGui import QIcon
 from ui.layouts.connection_layout import ConnectionLayout
 
+ARM_BUTTON_STYLE = """
+    QPushButton {{
+        background-color: {color};
+        color: white;
+        border: none;
+        padding: 5px 10px;
+        border-radius: 3px;
+    }}
+    QPushButton:disabled {{
+        background-color: #cccccc;
+        color: #222;
+    }}
+"""
+
 class HeaderLayout(QWidget):
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -47,19 +61,7 @@ class HeaderLayout(QWidget):
         # Arm/Disarm button
         self.arm_button = QPushButton("ARM")
         self.arm_button.setEnabled(False)
-        self.arm_button.setStyleSheet("""
-            QPushButton {
-                background-color: #4CAF50;
-                color: white;
-                border: none;
-                padding: 5px 10px;
-                border-radius: 3px;
-            }
-            QPushButton:disabled {
-                background-color: #cccccc;
-                color: #222;
-            }
-        """)
+        self.arm_button.setStyleSheet(ARM_BUTTON_STYLE.format(color="#4CAF50"))
         left_section.addWidget(self.arm_button)
         
         # GPS status
@@ -159,6 +161,14 @@ class HeaderLayout(QWidget):
         self.connection_status.setText(status_text)
         self.connection_status.setStyleSheet(f"color: {status_color};")
         
+    def update_armed(self, armed):
+        """Switch the arm button between ARM and DISARM."""
+        text = "DISARM" if armed else "ARM"
+        if self.arm_button.text() == text:
+            return  # Called on every heartbeat; restyling is not free
+        self.arm_button.setText(text)
+        self.arm_button.setStyleSheet(ARM_BUTTON_STYLE.format(color="#f44336" if armed else "#4CAF50"))
+        
     def update_mode(self, mode):
         """Update flight mode display."""
         self.mode_label.setText(f"Mode: {mode}")
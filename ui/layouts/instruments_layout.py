@@ -0,0 +1,262 @@
+import math
+
+from PySide6.QtCore import QPointF, QRectF, Qt
+from PySide6.QtGui import QBrush, QColor, QFont, QPainter, QPainterPath, QPen, QPolygonF
+from PySide6.QtWidgets import QGroupBox, QHBoxLayout
+
+from ui.abstract.base_instrument import AbstractInstrument, InstrumentCanvas
+
+SKY_COLOR = QColor("#3b83c4")
+GROUND_COLOR = QColor("#8b5a2b")
+FACE_COLOR = QColor("#202428")
+BEZEL_COLOR = QColor("#3a3f44")
+MARKING_COLOR = QColor("#f0f0f0")
+SYMBOL_COLOR = QColor("#ffb000")
+
+
+def paint_bezel(painter, radius, background):
+    """Masks everything outside the face with `background` and draws the rim."""
+    mask = QPainterPath()
+    mask.setFillRule(Qt.OddEvenFill)
+    mask.addRect(QRectF(-radius - 2, -radius - 2, 2 * radius + 4, 2 * radius + 4))
+    mask.addEllipse(QPointF(0, 0), radius - 4, radius - 4)
+    painter.fillPath(mask, background)
+    painter.setPen(QPen(BEZEL_COLOR, 8))
+    painter.setBrush(Qt.NoBrush)
+    painter.drawEllipse(QPointF(0, 0), radius - 4, radius - 4)
+
+
+def paint_scale(painter, ticks, inner, outer, width=1.5):
+    """Radial tick marks at `ticks` degrees (clockwise from the top), from radius `inner` to `outer`."""
+    painter.setPen(QPen(MARKING_COLOR, width))
+    for angle in ticks:
+        a = math.radians(angle)
+        s, c = math.sin(a), -math.cos(a)
+        painter.drawLine(QPointF(inner * s, inner * c), QPointF(outer * s, outer * c))
+
+
+class AttitudeCanvas(InstrumentCanvas):
+    """
+    Artificial horizon. The sky/ground card with its pitch ladder is
+    rendered once per size and only moved per frame (rotated by roll,
+    shifted by pitch); the roll scale and the aircraft symbol are cached
+    in the foreground layer.
+    """
+    UNITS_PER_DEGREE = 3.0  # Pitch ladder spacing; about +-30 degrees are visible
+    CARD_HALF_WIDTH = 150.0  # Covers the face at any roll (> RADIUS * sqrt(2))
+    CARD_HALF_HEIGHT = 90 * UNITS_PER_DEGREE + CARD_HALF_WIDTH
+
+    def __init__(self, frame_clock=None, cache_layers=True, parent=None):
+        super().__init__(frame_clock, cache_layers, parent)
+        self.roll = 0.0
+        self.pitch = 0.0
+        self._card = None
+        self._card_key = None
+
+    def set_attitude(self, roll, pitch):
+        """Roll and pitch in degrees (positive: right wing down, nose up)."""
+        pitch = max(-90.0, min(90.0, pitch))
+        if (roll, pitch) != (self.roll, self.pitch):
+            self.roll, self.pitch = roll, pitch
+            self.mark_dirty()
+
+    def _card_rect(self):
+        return QRectF(-self.CARD_HALF_WIDTH, -self.CARD_HALF_HEIGHT, 2 * self.CARD_HALF_WIDTH,
+                      2 * self.CARD_HALF_HEIGHT)
+
+    def _horizon_card(self):
+        key = (self.face_side(), self.devicePixelRatioF())
+        if key != self._card_key:
+            scale = self.face_side() / (2 * self.RADIUS)
+            rect = self._card_rect()
+            self._card = self.create_pixmap(math.ceil(rect.width() * scale), math.ceil(rect.height() * scale))
+            painter = QPainter(self._card)
+            painter.setRenderHint(QPainter.Antialiasing, True)
+            painter.scale(scale, scale)
+            painter.translate(-rect.left(), -rect.top())
+            self._paint_card(painter)
+            painter.end()
+            self._card_key = key
+        return self._card
+
+    def _paint_card(self, painter):
+        rect = self._card_rect()
+        painter.fillRect(QRectF(rect.left(), rect.top(), rect.width(), -rect.top()), SKY_COLOR)
+        painter.fillRect(QRectF(rect.left(), 0, rect.width(), rect.bottom()), GROUND_COLOR)
+        painter.setPen(QPen(MARKING_COLOR, 1.5))
+        painter.drawLine(QPointF(rect.left(), 0), QPointF(rect.right(), 0))
+        font = QFont(painter.font())
+        font.setPixelSize(9)
+        painter.setFont(font)
+        painter.setPen(QPen(MARKING_COLOR, 1))
+        for degrees in range(-85, 90, 5):
+            if degrees == 0:
+                continue
+            y = -degrees * self.UNITS_PER_DEGREE
+            half = 20.0 if degrees % 10 == 0 else 10.0
+            painter.drawLine(QPointF(-half, y), QPointF(half, y))
+            if degrees % 10 == 0:
+                label = str(abs(degrees))
+                painter.drawText(QRectF(half + 2, y - 6, 20, 12), Qt.AlignLeft | Qt.AlignVCenter, label)
+                painter.drawText(QRectF(-half - 22, y - 6, 20, 12), Qt.AlignRight | Qt.AlignVCenter, label)
+
+    def paint_dynamic(self, painter):
+        painter.rotate(-self.roll)
+        painter.save()
+        painter.translate(0, self.pitch * self.UNITS_PER_DEGREE)
+        if self.cache_layers:
+            painter.setRenderHint(QPainter.SmoothPixmapTransform, True)
+            card = self._horizon_card()
+            painter.drawPixmap(self._card_rect(), card, QRectF(card.rect()))
+        else:
+            self._paint_card(painter)
+        painter.restore()
+        # The roll pointer turns with the horizon, against the fixed roll scale
+        painter.setPen(Qt.NoPen)
+        painter.setBrush(SYMBOL_COLOR)
+        painter.drawPolygon(QPolygonF([QPointF(0, -80), QPointF(-5, -71), QPointF(5, -71)]))
+
+    def paint_foreground(self, painter):
+        paint_bezel(painter, self.RADIUS, self.palette().window())
+        # Roll scale: fixed ticks at 10, 20, 30, 45 and 60 degrees either side
+        paint_scale(painter, (-30, 30, -60, 60), 82, 94, 2)
+        paint_scale(painter, (-10, 10, -20, 20, -45, 45), 82, 89)
+        painter.setPen(Qt.NoPen)
+        painter.setBrush(MARKING_COLOR)
+        painter.drawPolygon(QPolygonF([QPointF(0, -82), QPointF(-5, -92), QPointF(5, -92)]))
+        # Aircraft symbol
+        painter.setPen(QPen(SYMBOL_COLOR, 4, Qt.SolidLine, Qt.RoundCap, Qt.RoundJoin))
+        painter.drawPolyline(QPolygonF([QPointF(-50, 0), QPointF(-18, 0), QPointF(-10, 8)]))
+        painter.drawPolyline(QPolygonF([QPointF(50, 0), QPointF(18, 0), QPointF(10, 8)]))
+        painter.drawPoint(QPointF(0, 0))
+
+
+class CompassCanvas(InstrumentCanvas):
+    """
+    Heading compass. The card (ticks and labels) is rendered once per size
+    and only rotated per frame; the lubber line and aircraft symbol are
+    cached in the foreground layer, leaving the digital readout as the only
+    text drawn per frame.
+    """
+    CARDINALS = {0: "N", 90: "E", 180: "S", 270: "W"}
+
+    def __init__(self, frame_clock=None, cache_layers=True, parent=None):
+        super().__init__(frame_clock, cache_layers, parent)
+        self.heading = 0.0
+        self._card = None
+        self._card_key = None
+
+    def set_heading(self, heading):
+        """Heading in degrees, clockwise from north."""
+        heading = heading % 360.0
+        if heading != self.heading:
+            self.heading = heading
+            self.mark_dirty()
+
+    def _compass_card(self):
+        key = (self.face_side(), self.devicePixelRatioF())
+        if key != self._card_key:
+            self._card = self._render_layer(self._paint_card, self.face_side())
+            self._card_key = key
+        return self._card
+
+    def _paint_card(self, painter):
+        paint_scale(painter, [a for a in range(0, 360, 5) if a % 10], 80, 86, 1)
+        paint_scale(painter, [a for a in range(0, 360, 10) if a % 30], 78, 86, 1.5)
+        paint_scale(painter, range(0, 360, 30), 74, 86, 2)
+        font = QFont(painter.font())
+        for angle in range(0, 360, 30):
+            cardinal = self.CARDINALS.get(angle)
+            font.setPixelSize(16 if cardinal else 11)
+            font.setBold(bool(cardinal))
+            painter.setFont(font)
+            painter.setPen(SYMBOL_COLOR if angle == 0 else MARKING_COLOR)
+            painter.save()
+            painter.rotate(angle)
+            painter.drawText(QRectF(-15, -73, 30, 18), Qt.AlignCenter, cardinal or str(angle // 10))
+            painter.restore()
+
+    def paint_background(self, painter):
+        painter.setPen(Qt.NoPen)
+        painter.setBrush(FACE_COLOR)
+        painter.drawEllipse(QPointF(0, 0), self.RADIUS, self.RADIUS)
+
+    def paint_dynamic(self, painter):
+        painter.save()
+        painter.rotate(-self.heading)
+        if self.cache_layers:
+            painter.setRenderHint(QPainter.SmoothPixmapTransform, True)
+            radius = self.RADIUS
+            card = self._compass_card()
+            painter.drawPixmap(QRectF(-radius, -radius, 2 * radius, 2 * radius), card, QRectF(card.rect()))
+        else:
+            self._paint_card(painter)
+        painter.restore()
+        painter.setPen(QPen(MARKING_COLOR, 1))
+        painter.setBrush(QBrush(QColor(0, 0, 0, 160)))
+        painter.drawRoundedRect(QRectF(-22, 30, 44, 20), 3, 3)
+        font = QFont(painter.font())
+        font.setPixelSize(13)
+        painter.setFont(font)
+        painter.drawText(QRectF(-22, 30, 44, 20), Qt.AlignCenter, f"{self.heading:03.0f}°")
+
+    def paint_foreground(self, painter):
+        paint_bezel(painter, self.RADIUS, self.palette().window())
+        # Lubber line and aircraft symbol
+        painter.setPen(Qt.NoPen)
+        painter.setBrush(SYMBOL_COLOR)
+        painter.drawPolygon(QPolygonF([QPointF(0, -78), QPointF(-6, -92), QPointF(6, -92)]))
+        painter.setPen(QPen(SYMBOL_COLOR, 3, Qt.SolidLine, Qt.RoundCap, Qt.RoundJoin))
+        painter.drawLine(QPointF(0, -22), QPointF(0, 20))
+        painter.drawLine(QPointF(-20, 0), QPointF(20, 0))
+        painter.drawLine(QPointF(-8, 16), QPointF(8, 16))
+
+
+class AttitudeIndicator(AbstractInstrument):
+    """Artificial horizon fed by ATTITUDE messages."""
+
+    def __init__(self, parent=None, event_bus=None, sysid=None, frame_clock=None):
+        super().__init__(parent, event_bus)
+        self.sysid = sysid
+        self._ui_element = AttitudeCanvas(frame_clock, parent=parent)
+
+    def update_data(self, data):
+        if data.get("type") != "ATTITUDE" or (self.sysid is not None and data.get("sysid") != self.sysid):
+            return
+        self._ui_element.set_attitude(data.get("roll", 0.0), data.get("pitch", 0.0))
+
+
+class Compass(AbstractInstrument):
+    """Heading compass fed by the ATTITUDE yaw."""
+
+    def __init__(self, parent=None, event_bus=None, sysid=None, frame_clock=None):
+        super().__init__(parent, event_bus)
+        self.sysid = sysid
+        self._ui_element = CompassCanvas(frame_clock, parent=parent)
+
+    def update_data(self, data):
+        if data.get("type") != "ATTITUDE" or (self.sysid is not None and data.get("sysid") != self.sysid):
+            return
+        self._ui_element.set_heading(data.get("yaw", 0.0))
+
+
+class InstrumentsLayout(QGroupBox):
+    """Instrument panel: artificial horizon and compass side by side."""
+
+    def __init__(self, parent=None, frame_clock=None):
+        super().__init__("Instruments", parent)
+        self.attitude_indicator = AttitudeIndicator(self, frame_clock=frame_clock)
+        self.compass = Compass(self, frame_clock=frame_clock)
+        self.setup_ui()
+
+    def setup_ui(self):
+        """Creates and arranges the instruments."""
+        layout = QHBoxLayout()
+        layout.addWidget(self.attitude_indicator.get_ui_element())
+        layout.addWidget(self.compass.get_ui_element())
+        self.setLayout(layout)
+
+    def update_telemetry(self, data):
+        """Passes a telemetry update on to each instrument; they repaint on the next frame."""
+        self.attitude_indicator.update_data(data)
+        self.compass.update_data(data)
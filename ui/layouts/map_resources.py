@@ -0,0 +1,235 @@
+# ui/layouts/map_resources.py
+
+from PySide6.QtCore import Qt, QBuffer, QByteArray, QUrl
+from PySide6.QtWebEngineCore import (
+    QWebEngineProfile, QWebEnginePage, QWebEngineSettings,
+    QWebEngineUrlScheme, QWebEngineUrlSchemeHandler, QWebEngineUrlRequestJob
+)
+import logging
+import os
+
+# The map page and its assets are served from memory under gcs://map/
+MAP_SCHEME = b"gcs"
+MAP_HOST = "map"
+MAP_URL = QUrl("gcs://map/index.html")
+
+MAP_HTML = '''<!DOCTYPE html>
+<html>
+<head>
+    <meta charset="utf-8" />
+    <meta http-equiv="Content-Security-Policy" content="default-src 'self' data: gap: https://ssl.gstatic.com 'unsafe-eval' 'unsafe-inline'; style-src 'self' 'unsafe-inline'; media-src *; img-src 'self' data: content: https://*.tile.openstreetmap.org;">
+    <title>Drone Map</title>
+    <link rel="stylesheet" href="./leaflet/leaflet.css" />
+    <script src="./leaflet/leaflet.js"></script>
+    <style>
+        html, body { 
+            height: 100%; 
+            width: 100%;
+            margin: 0; 
+            padding: 0; 
+        }
+        #map { 
+            height: 100%; 
+            width: 100%;
+        }
+    </style>
+</head>
+<body>
+    <div id="map"></div>
+    <script>
+        // Initialize the map
+        var map = L.map('map').setView([21.146, 79.08], 10);
+        
+        // Try multiple tile providers
+        function addTileLayer() {
+            // First try OpenStreetMap
+            var osmTiles = L.tileLayer('https://{s}.tile.openstreetmap.org/{z}/{x}/{y}.png', {
+                maxZoom: 19,
+                attribution: '&copy; <a href="https://www.openstreetmap.org/copyright">OpenStreetMap</a> contributors',
+                subdomains: 'abc'
+            });
+            
+            // Add the tile layer to the map
+            osmTiles.addTo(map);
+            
+            // Handle tile loading errors
+            osmTiles.on('tileerror', function(error) {
+                console.log('OSM Tile loading error, trying alternative source');
+                osmTiles.remove();
+                
+                // Try Carto as a fallback
+                var cartoTiles = L.tileLayer('https://{s}.basemaps.cartocdn.com/light_all/{z}/{x}/{y}{r}.png', {
+                    attribution: '&copy; <a href="https://www.openstreetmap.org/copyright">OpenStreetMap</a> contributors &copy; <a href="https://carto.com/attributions">CARTO</a>',
+                    subdomains: 'abcd',
+                    maxZoom: 19
+                }).addTo(map);
+            });
+        }
+        
+        // Add tile layer
+        addTileLayer();
+        
+        var droneIcon = L.icon({
+            iconUrl: 'images/drone-icon.png',
+            shadowUrl: 'images/shadow-icon.png',
+
+            iconSize:     [64, 64], // size of the icon
+            shadowSize:   [48, 48], // size of the shadow
+        });
+
+        // Add initial marker
+        var marker = L.marker([0, 0], {icon: droneIcon}).addTo(map);
+        
+        // Function to update marker position
+        function updateMarkerPosition(lat, lon) {
+            if (marker) {
+                marker.setLatLng([lat, lon]);
+                map.panTo([lat, lon]);
+            }
+        }
+        
+        // Function to rotate the marker to the vehicle heading
+        function updateMarkerHeading(heading) {
+            if (marker && marker._icon) {
+                // 'rotate' composes with the transform Leaflet uses for positioning
+                marker._icon.style.rotate = heading + 'deg';
+            }
+        }
+        
+        // Debug tile loading
+        map.on('tileerror', function(e) {
+            console.log('Tile error:', e);
+        });
+        
+        // Log when map is ready
+        map.whenReady(function() {
+            console.log('Map is ready and initialized');
+        });
+    </script>
+</body>
+</html>
+'''
+
+_RESOURCE_DIR = os.path.dirname(os.path.abspath(__file__))
+# Key: URL path, Value: (mime type, file relative to this directory)
+_STATIC_FILES = {
+    "/leaflet/leaflet.js": (b"application/javascript", "leaflet/leaflet.js"),
+    "/leaflet/leaflet.css": (b"text/css", "leaflet/leaflet.css"),
+    "/images/drone-icon.png": (b"image/png", "images/drone-icon.png"),
+    "/images/shadow-icon.png": (b"image/png", "images/shadow-icon.png"),
+}
+
+_profile = None
+_handler = None
+_preloaded_page = None
+
+
+def register_map_scheme():
+    """
+    Registers the gcs:// scheme with QtWebEngine.
+    Must be called before the QApplication is created.
+    """
+    scheme = QWebEngineUrlScheme(MAP_SCHEME)
+    scheme.setSyntax(QWebEngineUrlScheme.Syntax.Host)
+    scheme.setFlags(QWebEngineUrlScheme.SecureScheme | QWebEngineUrlScheme.CorsEnabled)
+    QWebEngineUrlScheme.registerScheme(scheme)
+
+
+class MapSchemeHandler(QWebEngineUrlSchemeHandler):
+    """Serves the map page, Leaflet and marker icons from memory."""
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._resources = {"/index.html": (b"text/html", MAP_HTML.encode("utf-8"))}
+
+    def _load(self, path):
+        """Returns (mime, data) for a path, reading static files once on first use."""
+        resource = self._resources.get(path)
+        if resource is not None:
+            return resource
+        entry = _STATIC_FILES.get(path)
+        if entry is None:
+            return None
+        mime, rel_path = entry
+        try:
+            with open(os.path.join(_RESOURCE_DIR, rel_path), "rb") as f:
+                resource = (mime, f.read())
+        except OSError as e:
+            logging.error(f"Map resource {rel_path} not available: {e}")
+            return None
+        self._resources[path] = resource
+        return resource
+
+    def requestStarted(self, job):
+        url = job.requestUrl()
+        resource = self._load(url.path()) if url.host() == MAP_HOST else None
+        if resource is None:
+            job.fail(QWebEngineUrlRequestJob.UrlNotFound)
+            return
+        mime, data = resource
+        buffer = QBuffer(job)
+        buffer.setData(QByteArray(data))
+        buffer.open(QBuffer.ReadOnly)
+        job.reply(mime, buffer)
+
+
+class MapWebPage(QWebEnginePage):
+    """Map page that forwards JavaScript console output to the log."""
+    def javaScriptConsoleMessage(self, level, message, line, source):
+        levels = {
+            QWebEnginePage.InfoMessageLevel: "INFO",
+            QWebEnginePage.WarningMessageLevel: "WARNING",
+            QWebEnginePage.ErrorMessageLevel: "ERROR"
+        }
+        level_str = levels.get(level, "UNKNOWN")
+        print(f"JS {level_str}: {message} (line {line}, source: {source})")
+
+
+def map_profile():
+    """Returns the shared web profile with the gcs:// handler installed."""
+    global _profile, _handler
+    if _profile is None:
+        _profile = QWebEngineProfile.defaultProfile()
+        _profile.setHttpUserAgent("Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36")
+        _handler = MapSchemeHandler(_profile)
+        _profile.installUrlSchemeHandler(MAP_SCHEME, _handler)
+    return _profile
+
+
+def create_map_page(parent=None):
+    """Creates a map page on the shared profile and starts loading it."""
+    page = MapWebPage(map_profile(), parent)
+
+    settings = page.settings()
+    settings.setAttribute(QWebEngineSettings.LocalContentCanAccessRemoteUrls, True)
+    settings.setAttribute(QWebEngineSettings.JavascriptEnabled, True)
+    settings.setAttribute(QWebEngineSettings.PluginsEnabled, True)
+    settings.setAttribute(QWebEngineSettings.JavascriptCanOpenWindows, True)
+    settings.setAttribute(QWebEngineSettings.WebGLEnabled, True)
+    settings.setAttribute(QWebEngineSettings.Accelerated2dCanvasEnabled, True)
+    settings.setAttribute(QWebEngineSettings.AllowRunningInsecureContent, True)
+
+    page.setBackgroundColor(Qt.white)
+    page.load(MAP_URL)
+    return page
+
+
+def preload_map_page():
+    """
+    Starts loading the map page ahead of the window so the web engine
+    process, Leaflet and the first tiles spin up while the rest of the UI builds.
+    """
+    global _preloaded_page
+    if _preloaded_page is None:
+        _preloaded_page = create_map_page()
+    return _preloaded_page
+
+
+def take_map_page(parent=None):
+    """Returns the preloaded map page (if any) or creates a new one."""
+    global _preloaded_page
+    page, _preloaded_page = _preloaded_page, None
+    if page is None:
+        return create_map_page(parent)
+    if parent is not None:
+        page.setParent(parent)
+    return page
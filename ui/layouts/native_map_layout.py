@@ -0,0 +1,306 @@
+from PySide6.QtWidgets import (
+    QGroupBox, QVBoxLayout, QWidget, QSizePolicy
+)
+from PySide6.QtCore import Qt, QObject, QPointF, QStandardPaths, QUrl, Signal
+from PySide6.QtGui import QColor, QImage, QPainter, QPen, QPixmap, QPolygonF
+from PySide6.QtNetwork import QNetworkAccessManager, QNetworkReply, QNetworkRequest
+from collections import OrderedDict, deque
+import logging
+import os
+
+from utils.web_mercator import (
+    TILE_SIZE, MIN_ZOOM, MAX_ZOOM,
+    latlon_to_world, world_to_latlon, visible_tiles, wrap_tile_x
+)
+
+TILE_URL = "https://tile.openstreetmap.org/{z}/{x}/{y}.png"
+USER_AGENT = "gcs_basic/1.0 (ArduPilot GCS)"
+
+
+class TileCache(QObject):
+    """
+    Raster tile cache for the native map.
+
+    Tiles are looked up in memory first, then in the on-disk cache directory,
+    and are only fetched from the tile server when missing from both.
+    """
+    tile_loaded = Signal(int, int, int)  # Data: zoom, x, y
+
+    def __init__(self, cache_dir=None, max_memory_tiles=256, offline=False, parent=None):
+        super().__init__(parent)
+        if cache_dir is None:
+            base = QStandardPaths.writableLocation(QStandardPaths.CacheLocation)
+            cache_dir = os.path.join(base or os.path.expanduser("~/.cache/gcs_basic"), "tiles")
+        self.cache_dir = cache_dir
+        self.max_memory_tiles = max_memory_tiles
+        self.offline = offline
+        self._memory = OrderedDict()  # Key: (z, x, y), Value: QPixmap
+        self._pending = set()
+        self._failed = set()
+        self._replies = {}  # Key: QNetworkReply, Value: (z, x, y)
+        self._network = None  # Created on first fetch
+
+    def _tile_path(self, z, x, y):
+        return os.path.join(self.cache_dir, str(z), str(x), f"{y}.png")
+
+    def get(self, z, x, y):
+        """Returns the cached QPixmap for a tile, or None and schedules a load."""
+        key = (z, x, y)
+        pixmap = self._memory.get(key)
+        if pixmap is not None:
+            self._memory.move_to_end(key)
+            return pixmap
+
+        path = self._tile_path(z, x, y)
+        if os.path.exists(path):
+            pixmap = QPixmap(path)
+            if not pixmap.isNull():
+                self._store(key, pixmap)
+                return pixmap
+
+        self._fetch(z, x, y)
+        return None
+
+    def _store(self, key, pixmap):
+        self._memory[key] = pixmap
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_tiles:
+            self._memory.popitem(last=False)
+
+    def _fetch(self, z, x, y):
+        key = (z, x, y)
+        if self.offline or key in self._pending or key in self._failed:
+            return
+        if self._network is None:
+            self._network = QNetworkAccessManager(self)
+            self._network.finished.connect(self._on_reply)
+
+        request = QNetworkRequest(QUrl(TILE_URL.format(z=z, x=x, y=y)))
+        request.setHeader(QNetworkRequest.UserAgentHeader, USER_AGENT)
+        self._pending.add(key)
+        reply = self._network.get(request)
+        self._replies[reply] = key
+
+    def _on_reply(self, reply):
+        key = self._replies.pop(reply, None)
+        self._pending.discard(key)
+        try:
+            if reply.error() != QNetworkReply.NoError:
+                logging.warning(f"Tile {key} download failed: {reply.errorString()}")
+                self._failed.add(key)
+                return
+            data = reply.readAll().data()
+            image = QImage.fromData(data)
+            if image.isNull():
+                self._failed.add(key)
+                return
+
+            z, x, y = key
+            path = self._tile_path(z, x, y)
+            try:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with open(path, "wb") as f:
+                    f.write(data)
+            except OSError as e:
+                logging.debug(f"Could not write tile cache {path}: {e}")
+
+            self._store(key, QPixmap.fromImage(image))
+            self.tile_loaded.emit(z, x, y)
+        finally:
+            reply.deleteLater()
+
+
+class MapCanvas(QWidget):
+    """QPainter-based slippy map showing tiles, the vehicle track and marker."""
+    MAX_TRACK_POINTS = 5000
+    MARKER_SIZE = 48
+
+    def __init__(self, tile_cache=None, parent=None):
+        super().__init__(parent)
+        self.tile_cache = tile_cache or TileCache(parent=self)
+        self.tile_cache.tile_loaded.connect(self._on_tile_loaded)
+
+        self.zoom = 10
+        # Map centre in zoom-0 world pixels so it is independent of zoom
+        self._center = latlon_to_world(21.146, 79.08)
+        self.follow_vehicle = True
+        self.vehicle_position = None  # (lat, lon)
+        self.vehicle_heading = 0.0
+        # Track points stored in zoom-0 world pixels
+        self._track = deque(maxlen=self.MAX_TRACK_POINTS)
+        self._drag_origin = None
+        self._marker = self._load_marker()
+
+        self.setMouseTracking(False)
+        self.setFocusPolicy(Qt.StrongFocus)
+
+    def _load_marker(self):
+        """Loads and pre-scales the drone icon once."""
+        icon_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "images", "drone-icon.png")
+        pixmap = QPixmap(icon_path)
+        if pixmap.isNull():
+            return None
+        return pixmap.scaled(self.MARKER_SIZE, self.MARKER_SIZE, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+
+    def _scale(self):
+        return float(1 << self.zoom)
+
+    def _to_screen(self, wx, wy):
+        """Converts zoom-0 world pixels to widget coordinates."""
+        scale = self._scale()
+        return QPointF((wx - self._center[0]) * scale + self.width() / 2.0,
+                       (wy - self._center[1]) * scale + self.height() / 2.0)
+
+    def center_on(self, lat, lon):
+        """Centres the view on a position."""
+        self._center = latlon_to_world(lat, lon)
+        self.update()
+
+    def center_latlon(self):
+        """Returns the (lat, lon) at the centre of the view."""
+        return world_to_latlon(*self._center)
+
+    def set_zoom(self, zoom, anchor=None):
+        """Sets the zoom level, keeping the widget point `anchor` fixed on the map."""
+        zoom = max(MIN_ZOOM, min(MAX_ZOOM, int(zoom)))
+        if zoom == self.zoom:
+            return
+        if anchor is not None:
+            old_scale = self._scale()
+            dx = anchor.x() - self.width() / 2.0
+            dy = anchor.y() - self.height() / 2.0
+            wx = self._center[0] + dx / old_scale
+            wy = self._center[1] + dy / old_scale
+            new_scale = float(1 << zoom)
+            self._center = (wx - dx / new_scale, wy - dy / new_scale)
+        self.zoom = zoom
+        self.update()
+
+    def set_vehicle_position(self, lat, lon):
+        self.vehicle_position = (lat, lon)
+        point = latlon_to_world(lat, lon)
+        if not self._track or self._track[-1] != point:
+            self._track.append(point)
+        if self.follow_vehicle:
+            self._center = point
+        self.update()
+
+    def set_vehicle_heading(self, heading):
+        self.vehicle_heading = heading
+        self.update()
+
+    def clear_track(self):
+        self._track.clear()
+        self.update()
+
+    def _on_tile_loaded(self, z, x, y):
+        if z == self.zoom:
+            self.update()
+
+    # --- Painting ---
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.fillRect(self.rect(), QColor("#e5e3df"))
+        self._paint_tiles(painter)
+        self._paint_track(painter)
+        self._paint_marker(painter)
+        painter.end()
+
+    def _paint_tiles(self, painter):
+        scale = self._scale()
+        cx, cy = self._center[0] * scale, self._center[1] * scale
+        left = cx - self.width() / 2.0
+        top = cy - self.height() / 2.0
+        for tx, ty in visible_tiles(cx, cy, self.width(), self.height(), self.zoom):
+            pixmap = self.tile_cache.get(self.zoom, wrap_tile_x(tx, self.zoom), ty)
+            if pixmap is None:
+                continue
+            painter.drawPixmap(QPointF(tx * TILE_SIZE - left, ty * TILE_SIZE - top), pixmap)
+
+    def _paint_track(self, painter):
+        if len(self._track) < 2:
+            return
+        polygon = QPolygonF([self._to_screen(wx, wy) for wx, wy in self._track])
+        painter.setRenderHint(QPainter.Antialiasing, True)
+        painter.setPen(QPen(QColor("#d62728"), 2))
+        painter.drawPolyline(polygon)
+
+    def _paint_marker(self, painter):
+        if self.vehicle_position is None:
+            return
+        pos = self._to_screen(*latlon_to_world(*self.vehicle_position))
+        painter.save()
+        painter.setRenderHint(QPainter.SmoothPixmapTransform, True)
+        painter.translate(pos)
+        painter.rotate(self.vehicle_heading)
+        if self._marker is not None:
+            painter.drawPixmap(QPointF(-self._marker.width() / 2.0, -self._marker.height() / 2.0), self._marker)
+        else:
+            painter.setBrush(QColor("#1f77b4"))
+            painter.drawPolygon(QPolygonF([QPointF(0, -12), QPointF(8, 10), QPointF(-8, 10)]))
+        painter.restore()
+
+    # --- Interaction ---
+
+    def mousePressEvent(self, event):
+        if event.button() == Qt.LeftButton:
+            self._drag_origin = event.position()
+
+    def mouseMoveEvent(self, event):
+        if self._drag_origin is None:
+            return
+        delta = event.position() - self._drag_origin
+        self._drag_origin = event.position()
+        scale = self._scale()
+        self._center = (self._center[0] - delta.x() / scale, self._center[1] - delta.y() / scale)
+        self.follow_vehicle = False
+        self.update()
+
+    def mouseReleaseEvent(self, event):
+        self._drag_origin = None
+
+    def mouseDoubleClickEvent(self, event):
+        """Re-centres on the vehicle and resumes following it."""
+        self.follow_vehicle = True
+        if self.vehicle_position is not None:
+            self.center_on(*self.vehicle_position)
+
+    def wheelEvent(self, event):
+        steps = event.angleDelta().y() // 120
+        if steps:
+            self.set_zoom(self.zoom + steps, event.position())
+
+
+class NativeMapLayout(QGroupBox):
+    """Map panel rendered natively with QPainter, without QtWebEngine."""
+    def __init__(self, parent=None, tile_cache=None):
+        super().__init__("Map", parent)
+        self.tile_cache = tile_cache
+        self.setup_ui()
+        self.current_position = (0.0, 0.0)
+        self.current_heading = 0.0
+
+    def setup_ui(self):
+        """Creates and arranges the map display."""
+        layout = QVBoxLayout()
+        layout.setContentsMargins(0, 0, 0, 0)
+
+        self.map_view = MapCanvas(self.tile_cache)
+        self.map_view.setMinimumSize(600, 600)
+        self.map_view.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
+
+        layout.addWidget(self.map_view)
+        self.setLayout(layout)
+
+    def update_position(self, lat, lon):
+        """Update the map with the current vehicle position."""
+        if lat is not None and lon is not None:
+            self.current_position = (lat, lon)
+            self.map_view.set_vehicle_position(lat, lon)
+
+    def update_heading(self, heading):
+        """Rotate the vehicle marker to the current heading (degrees)."""
+        if heading is not None:
+            self.current_heading = heading
+            self.map_view.set_vehicle_heading(heading)
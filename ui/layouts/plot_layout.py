@@ -0,0 +1,345 @@
+from PySide6.QtWidgets import (
+    QGroupBox, QVBoxLayout, QHBoxLayout, QWidget, QComboBox, QPushButton, QSizePolicy
+)
+from PySide6.QtCore import Qt, QPointF, QRectF, Signal
+from PySide6.QtGui import QColor, QPainter, QPen, QPolygonF
+import math
+import time
+
+from ui.frame_clock import FrameClock
+
+SERIES_COLORS = ["#1f77b4", "#d62728", "#2ca02c", "#ff7f0e", "#9467bd", "#8c564b", "#e377c2", "#17becf"]
+TIME_STEPS = (0.1, 0.2, 0.5, 1, 2, 5, 10, 15, 30, 60, 120, 300, 600, 900, 1800, 3600, 7200, 10800, 21600, 43200)
+
+
+def nice_step(span, target_ticks):
+    """Rounds span / target_ticks up to 1, 2 or 5 times a power of ten."""
+    raw = span / max(1, target_ticks)
+    magnitude = 10 ** math.floor(math.log10(raw))
+    for factor in (1, 2, 5, 10):
+        if raw <= factor * magnitude:
+            return factor * magnitude
+    return 10 * magnitude
+
+
+def array_to_polygon(xs, ys):
+    """A QPolygonF filled from coordinate arrays in one copy, without a QPointF per point."""
+    # Imported here so building the window shell does not load NumPy
+    import numpy as np
+    from shiboken6 import VoidPtr
+    polygon = QPolygonF()
+    polygon.resize(len(xs))
+    points = np.frombuffer(VoidPtr(polygon.data(), len(xs) * 16, True), dtype=np.float64).reshape(-1, 2)
+    points[:, 0] = xs
+    points[:, 1] = ys
+    return polygon
+
+
+class Series:
+    """One plotted field: its history and how it is drawn."""
+
+    def __init__(self, field, sysid=None, label=None, color="#1f77b4", capacity=1 << 20):
+        self.field = field
+        self.sysid = sysid
+        self.label = label or (field if sysid is None else f"{field}[{sysid}]")
+        self.color = QColor(color)
+        self.pen = QPen(self.color, 1)
+        # Imported here so building the window shell does not load NumPy
+        from utils.series_buffer import SeriesBuffer
+        self.buffer = SeriesBuffer(capacity)
+
+
+class StripChart(QWidget):
+    """
+    QPainter strip chart of telemetry fields over time.
+
+    Each series keeps its history in a SeriesBuffer and is drawn from the
+    per-pixel-column min/max of the visible window, so a frame costs the
+    same for one minute or hours of 50 Hz data. It repaints on the shared
+    frame clock, only when data arrived or the view changed, never per
+    message.
+
+    The live view follows the newest sample. Dragging pans back in time
+    (and pauses), the wheel zooms around the cursor, space toggles pause
+    and a double-click returns to the live view.
+    """
+    paused_changed = Signal(bool)
+
+    MIN_SPAN = 1.0  # seconds
+    MAX_SPAN = 24 * 3600.0
+    ZOOM_FACTOR = 0.8  # Span multiplier per wheel step
+    MARGINS = (52, 6, 8, 20)  # left, top, right, bottom
+
+    def __init__(self, span=60.0, capacity=1 << 20, parent=None, frame_clock=None):
+        super().__init__(parent)
+        self.span = span
+        self.capacity = capacity
+        self.series = {}  # Key: label, Value: Series
+        self.paused = False
+        self._view_end = None  # End of the view while paused
+        self._drag_origin = None
+        self._dirty = False
+        self.frames = 0  # Paints so far
+
+        self.frame_clock = frame_clock or FrameClock.shared()
+        self.frame_clock.tick.connect(self._on_frame)
+
+        self.setFocusPolicy(Qt.StrongFocus)
+        self.setMinimumHeight(160)
+
+    # --- Data ---
+
+    def add_series(self, field, sysid=None, label=None, color=None):
+        """Plots `field` (of vehicle `sysid`, or of any vehicle) from now on."""
+        series = Series(field, sysid, label, color or SERIES_COLORS[len(self.series) % len(SERIES_COLORS)],
+                        self.capacity)
+        self.series[series.label] = series
+        self.mark_dirty()
+        return series
+
+    def remove_series(self, label):
+        self.series.pop(label, None)
+        self.mark_dirty()
+
+    def clear(self):
+        self.series.clear()
+        self.mark_dirty()
+
+    def append(self, data):
+        """Appends the fields of one telemetry update to the series plotting them."""
+        timestamp = data.get("timestamp")
+        if timestamp is None:
+            return
+        for series in self.series.values():
+            value = data.get(series.field)
+            if value.__class__ not in (int, float):  # Missing, bool or not numeric
+                continue
+            if series.sysid is not None and data.get("sysid") != series.sysid:
+                continue
+            series.buffer.append(timestamp, value)
+            self.mark_dirty()
+
+    # --- View ---
+
+    def latest_time(self):
+        last = [s.buffer.last() for s in self.series.values()]
+        times = [entry[0] for entry in last if entry is not None]
+        return max(times) if times else time.time()
+
+    def view_range(self):
+        """The (start, end) times currently shown."""
+        end = self._view_end if self.paused and self._view_end is not None else self.latest_time()
+        return end - self.span, end
+
+    def set_paused(self, paused):
+        if paused == self.paused:
+            return
+        self._view_end = self.view_range()[1] if paused else None
+        self.paused = paused
+        self.mark_dirty()
+        self.paused_changed.emit(paused)
+
+    def set_span(self, span, anchor_time=None):
+        """Sets the visible duration, keeping `anchor_time` in place while paused."""
+        span = max(self.MIN_SPAN, min(self.MAX_SPAN, span))
+        if self.paused and anchor_time is not None:
+            t0, t1 = self.view_range()
+            fraction = (anchor_time - t0) / (t1 - t0)
+            self._view_end = anchor_time + (1.0 - fraction) * span
+        self.span = span
+        self.mark_dirty()
+
+    def scroll(self, seconds):
+        """Moves the view back (negative) or forward in time; pauses the live view."""
+        if not self.paused:
+            self.set_paused(True)
+        self._view_end += seconds
+        self.mark_dirty()
+
+    def mark_dirty(self):
+        """Repaint on the next frame."""
+        self._dirty = True
+        self.frame_clock.request_frame()
+
+    def _on_frame(self):
+        if self._dirty and self.isVisible():
+            self._dirty = False
+            self.update()
+
+    def _plot_rect(self):
+        left, top, right, bottom = self.MARGINS
+        return QRectF(left, top, max(1, self.width() - left - right), max(1, self.height() - top - bottom))
+
+    # --- Painting ---
+
+    def paintEvent(self, event):
+        self.frames += 1
+        painter = QPainter(self)
+        painter.fillRect(self.rect(), QColor("white"))
+        plot = self._plot_rect()
+        t0, t1 = self.view_range()
+        columns = int(plot.width())
+        windows = [(series, *series.buffer.window(t0, t1, columns)) for series in self.series.values()]
+        low, high = self._value_range([values for _, _, values in windows])
+
+        self._paint_grid(painter, plot, t0, t1, low, high)
+        painter.setClipRect(plot)
+        x_scale = plot.width() / (t1 - t0)
+        y_scale = plot.height() / (high - low)
+        for series, times, values in windows:
+            if len(times) < 2:
+                continue
+            painter.setPen(series.pen)
+            painter.drawPolyline(array_to_polygon(plot.left() + (times - t0) * x_scale,
+                                                  plot.bottom() - (values - low) * y_scale))
+        painter.setClipping(False)
+        self._paint_legend(painter, plot)
+        painter.end()
+
+    def _value_range(self, value_arrays):
+        """Autoscaled value axis: the visible extremes plus a 5% margin."""
+        arrays = [v for v in value_arrays if len(v)]
+        if not arrays:
+            return -1.0, 1.0
+        low = min(float(v.min()) for v in arrays)
+        high = max(float(v.max()) for v in arrays)
+        if high - low < 1e-9:
+            return low - 1.0, high + 1.0
+        margin = (high - low) * 0.05
+        return low - margin, high + margin
+
+    def _paint_grid(self, painter, plot, t0, t1, low, high):
+        grid_pen = QPen(QColor("#e0e0e0"), 1)
+        text_pen = QPen(QColor("#555555"))
+        painter.setPen(QPen(QColor("#999999"), 1))
+        painter.drawRect(plot)
+
+        step = nice_step(high - low, plot.height() // 40)
+        value = math.ceil(low / step) * step
+        while value <= high:
+            y = plot.bottom() - (value - low) / (high - low) * plot.height()
+            painter.setPen(grid_pen)
+            painter.drawLine(QPointF(plot.left(), y), QPointF(plot.right(), y))
+            painter.setPen(text_pen)
+            painter.drawText(QRectF(0, y - 8, plot.left() - 4, 16), Qt.AlignRight | Qt.AlignVCenter,
+                             f"{value:.{max(0, -math.floor(math.log10(step)))}f}")
+            value += step
+
+        target = max(1, plot.width() // 90)
+        step = next((s for s in TIME_STEPS if (t1 - t0) / s <= target), TIME_STEPS[-1])
+        t = math.ceil(t0 / step) * step
+        fmt = "%H:%M:%S" if step >= 1 else "%M:%S"
+        while t <= t1:
+            x = plot.left() + (t - t0) / (t1 - t0) * plot.width()
+            painter.setPen(grid_pen)
+            painter.drawLine(QPointF(x, plot.top()), QPointF(x, plot.bottom()))
+            painter.setPen(text_pen)
+            label = time.strftime(fmt, time.localtime(t)) + (f".{int(round(t * 10)) % 10}" if step < 1 else "")
+            painter.drawText(QRectF(x - 45, plot.bottom() + 2, 90, 16), Qt.AlignHCenter | Qt.AlignTop, label)
+            t += step
+
+    def _paint_legend(self, painter, plot):
+        x, y = plot.left() + 6, plot.top() + 14
+        for series in self.series.values():
+            last = series.buffer.last()
+            painter.setPen(series.color)
+            text = series.label if last is None else f"{series.label}: {last[1]:.2f}"
+            painter.drawText(QPointF(x, y), text)
+            y += 14
+        if self.paused:
+            painter.setPen(QColor("#d62728"))
+            painter.drawText(QRectF(plot.left(), plot.top() + 2, plot.width() - 6, 16),
+                             Qt.AlignRight | Qt.AlignTop, "PAUSED")
+
+    # --- Interaction ---
+
+    def mousePressEvent(self, event):
+        if event.button() == Qt.LeftButton:
+            self._drag_origin = event.position()
+
+    def mouseMoveEvent(self, event):
+        if self._drag_origin is None:
+            return
+        dx = event.position().x() - self._drag_origin.x()
+        self._drag_origin = event.position()
+        self.scroll(-dx / self._plot_rect().width() * self.span)
+
+    def mouseReleaseEvent(self, event):
+        self._drag_origin = None
+
+    def mouseDoubleClickEvent(self, event):
+        """Returns to the live view."""
+        self.set_paused(False)
+
+    def wheelEvent(self, event):
+        steps = event.angleDelta().y() / 120
+        if not steps:
+            return
+        plot = self._plot_rect()
+        t0, t1 = self.view_range()
+        anchor = t0 + (event.position().x() - plot.left()) / plot.width() * (t1 - t0)
+        self.set_span(self.span * self.ZOOM_FACTOR ** steps, anchor)
+
+    def keyPressEvent(self, event):
+        if event.key() == Qt.Key_Space:
+            self.set_paused(not self.paused)
+        else:
+            super().keyPressEvent(event)
+
+
+class PlotLayout(QGroupBox):
+    """Plot panel: a strip chart with a field picker and pause/clear buttons."""
+    DEFAULT_FIELDS = ("roll", "pitch")
+
+    def __init__(self, parent=None, fields=DEFAULT_FIELDS, frame_clock=None):
+        super().__init__("Plot", parent)
+        self.frame_clock = frame_clock
+        self._known_fields = set()
+        self._pending_fields = tuple(fields)  # Added with the first update, once NumPy is loaded anyway
+        self.setup_ui()
+
+    def setup_ui(self):
+        """Creates and arranges the plot display."""
+        layout = QVBoxLayout()
+
+        controls = QHBoxLayout()
+        self.field_combo = QComboBox()
+        self.field_combo.addItem("Add field...")
+        self.field_combo.activated.connect(self._on_field_selected)
+        controls.addWidget(self.field_combo, 1)
+        self.pause_button = QPushButton("Pause")
+        self.pause_button.setCheckable(True)
+        controls.addWidget(self.pause_button)
+        self.clear_button = QPushButton("Clear")
+        controls.addWidget(self.clear_button)
+        layout.addLayout(controls)
+
+        self.chart = StripChart(frame_clock=self.frame_clock)
+        self.chart.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
+        layout.addWidget(self.chart)
+        self.setLayout(layout)
+
+        self.pause_button.toggled.connect(self.chart.set_paused)
+        self.chart.paused_changed.connect(self.pause_button.setChecked)
+        self.clear_button.clicked.connect(self.chart.clear)
+
+    def add_field(self, field):
+        if field not in self.chart.series:
+            self.chart.add_series(field)
+
+    def _on_field_selected(self, index):
+        if index > 0:
+            self.add_field(self.field_combo.itemText(index))
+        self.field_combo.setCurrentIndex(0)
+
+    def update_telemetry(self, data):
+        """Adds the update to the plotted series and offers new numeric fields in the picker."""
+        if self._pending_fields:
+            for field in self._pending_fields:
+                self.add_field(field)
+            self._pending_fields = ()
+        for name, value in data.items():
+            if name not in self._known_fields and value.__class__ in (int, float) and name not in ("timestamp", "sysid"):
+                self._known_fields.add(name)
+                self.field_combo.addItem(name)
+        self.chart.append(data)
@@ -6,15 +6,21 @@ from PySide6.QtCore import Qt, Slot
 
 from ui.layouts.header_layout import HeaderLayout
 from ui.layouts.telemetry_layout import TelemetryLayout
-from ui.layouts.map_layout import MapLayout
+from ui.layouts.instruments_layout import InstrumentsLayout
+from ui.layouts.plot_layout import PlotLayout
 from ui.layouts.status_layout import StatusLayout
 from core.signal_manager import SignalManager
 
 class MainWindow(QMainWindow):
-    def __init__(self, signal_manager: SignalManager):
+    def __init__(self, signal_manager: SignalManager, map_backend: str = "web", defer_map: bool = False):
         super().__init__()
         self.signal_manager = signal_manager
+        self.map_backend = map_backend
+        self.map_layout = None
+        self.vehicle_armed = False
         self.setup_ui()
+        if not defer_map:
+            self.init_map()
         self.connect_signals()
         
     def setup_ui(self):
@@ -49,6 +55,14 @@ class MainWindow(QMainWindow):
         self.telemetry_layout = TelemetryLayout()
         left_layout.addWidget(self.telemetry_layout)
         
+        # Add attitude indicator and compass
+        self.instruments_layout = InstrumentsLayout()
+        left_layout.addWidget(self.instruments_layout)
+        
+        # Add strip chart of telemetry fields
+        self.plot_layout = PlotLayout()
+        left_layout.addWidget(self.plot_layout)
+        
         # Add status layout at the bottom of left panel
         self.status_layout = StatusLayout()
         left_layout.addWidget(self.status_layout)
@@ -58,11 +72,14 @@ class MainWindow(QMainWindow):
         
         # Right panel for map
         right_panel = QWidget()
-        right_layout = QVBoxLayout(right_panel)
-        right_layout.setContentsMargins(0, 0, 0, 0)
+        self.right_layout = QVBoxLayout(right_panel)
+        self.right_layout.setContentsMargins(0, 0, 0, 0)
         
-        self.map_layout = MapLayout()
-        right_layout.addWidget(self.map_layout)
+        # Placeholder until init_map() builds the (possibly heavy) map backend
+        self.map_placeholder = QLabel("Loading map...")
+        self.map_placeholder.setAlignment(Qt.AlignCenter)
+        self.map_placeholder.setMinimumSize(600, 600)
+        self.right_layout.addWidget(self.map_placeholder)
         
         # Add right panel to splitter
         splitter.addWidget(right_panel)
@@ -76,25 +93,49 @@ class MainWindow(QMainWindow):
         # Add content area to main layout
         main_layout.addWidget(content_widget)
         
+    def init_map(self):
+        """Creates the map panel and swaps it in for the placeholder."""
+        if self.map_layout is not None:
+            return
+        self.map_layout = self.create_map_layout()
+        self.right_layout.replaceWidget(self.map_placeholder, self.map_layout)
+        self.map_placeholder.deleteLater()
+        self.map_placeholder = None
+        
+    def create_map_layout(self):
+        """Creates the map panel for the selected backend."""
+        # Imported here so the native backend never loads QtWebEngine
+        if self.map_backend == "native":
+            from ui.layouts.native_map_layout import NativeMapLayout
+            return NativeMapLayout()
+        from ui.layouts.map_layout import MapLayout
+        return MapLayout()
+        
     def connect_signals(self):
         """Connects UI signals to slots."""
         # Connect button signals
         self.header_layout.connection_layout.connect_button.clicked.connect(self.on_connect_clicked)
+        self.header_layout.connection_layout.auto_connect_button.clicked.connect(self.on_auto_connect_clicked)
         self.header_layout.arm_button.clicked.connect(self.on_arm_clicked)
         
         # Connect signal manager signals to slots
         self.signal_manager.telemetry_update.connect(self.update_telemetry)
         self.signal_manager.connection_status_changed.connect(self.update_connection_status)
         self.signal_manager.status_text_received.connect(self.update_status_message)
+        self.signal_manager.command_result.connect(self.on_command_result)
         
     def update_telemetry(self, data):
         """Update telemetry display with new data."""
         # Update telemetry layout
         self.telemetry_layout.update_telemetry(data)
+        self.instruments_layout.update_telemetry(data)
+        self.plot_layout.update_telemetry(data)
         
         # Update header with relevant information
         if data.get("type") == "HEARTBEAT":
             self.header_layout.update_mode(data.get("mode", "---"))
+            self.vehicle_armed = data.get("armed", False)
+            self.header_layout.update_armed(self.vehicle_armed)
             
         elif data.get("type") == "GPS_RAW_INT":
             self.header_layout.update_gps_status(
@@ -109,11 +150,16 @@ class MainWindow(QMainWindow):
             )
             
         # Update map if position data is available
+        if self.map_layout is None:
+            return
         if data.get("type") == "GLOBAL_POSITION_INT":
             lat = data.get('lat')
             lon = data.get('lon')
             self.map_layout.update_position(lat, lon)
             
+        elif data.get("type") == "VFR_HUD":
+            self.map_layout.update_heading(data.get('heading'))
+            
     def update_connection_status(self, status, message=""):
         """Update connection status display."""
         self.header_layout.update_connection_status(status, message)
@@ -144,7 +190,36 @@ class MainWindow(QMainWindow):
             # Emit disconnect request signal
             self.signal_manager.disconnect_request.emit()
             
+    def on_auto_connect_clicked(self):
+        """Handles auto-connect button click."""
+        conn_strings, bauds = self.header_layout.connection_layout.connection_candidates()
+        self.signal_manager.auto_connect_request.emit(conn_strings, bauds)
+        
     def on_arm_clicked(self):
         """Handles arm/disarm button click."""
-        # TODO: Implement arm/disarm functionality
-        pass
\ No newline at end of file
+        if self.vehicle_armed:
+            self.signal_manager.disarm_request.emit()
+        else:
+            self.signal_manager.arm_request.emit()
+
+    def on_command_result(self, command, result, rtt_ms):
+        """Reports a command acknowledgement (or timeout) in the status panel."""
+        # Imported here so building the window shell never loads pymavlink
+        from pymavlink import mavutil
+        from core.command_scheduler import RESULT_TIMEOUT
+
+        cmd_enum = mavutil.mavlink.enums['MAV_CMD'].get(command)
+        name = cmd_enum.name.replace('MAV_CMD_', '') if cmd_enum else str(command)
+        if result == RESULT_TIMEOUT:
+            self.status_layout.add_message(f"{name}: no acknowledgement", mavutil.mavlink.MAV_SEVERITY_WARNING)
+            return
+        result_enum = mavutil.mavlink.enums['MAV_RESULT'].get(result)
+        result_name = result_enum.name.replace('MAV_RESULT_', '') if result_enum else str(result)
+        severity = (mavutil.mavlink.MAV_SEVERITY_INFO if result == mavutil.mavlink.MAV_RESULT_ACCEPTED
+                    else mavutil.mavlink.MAV_SEVERITY_WARNING)
+        self.status_layout.add_message(f"{name}: {result_name} ({rtt_ms:.0f} ms)", severity)
+        
+    def closeEvent(self, event):
+        """Waits for background helpers before the window is destroyed."""
+        self.header_layout.connection_layout.wait_for_port_scan()
+        super().closeEvent(event)
@@ -3,6 +3,7 @@
 import collections
 import threading
 import queue
+import time
 import logging # Use logging for better feedback
 
 # Optional: Define standard event names using an Enum or just constants
@@ -25,147 +26,569 @@ class Events:
     DISARM_REQUEST = "disarm_request" # Data: None
     # Add more events as needed
 
+    # Hierarchical topics: dotted levels, subscribable with '*' (one level) and '#' (any number of levels),
+    # e.g. "telemetry.3.#" for everything from vehicle 3 or "command_ack.#" for every command ACK
+    TELEMETRY = "telemetry" # telemetry.<sysid>.<MSG_TYPE>, Data: dict (TELEMETRY_UPDATE data)
+    COMMAND_ACK = "command_ack" # command_ack.<sysid>.<command>, Data: dict {'sysid', 'command', 'result', 'rtt_ms'}
+
+    @staticmethod
+    def topic(*levels):
+        """Joins topic levels, e.g. Events.topic(Events.TELEMETRY, 3, 'ATTITUDE') -> 'telemetry.3.ATTITUDE'."""
+        return ".".join(str(level) for level in levels)
+
+
+class Context:
+    """Where a subscriber's handler runs."""
+    INLINE = "inline"  # In the publisher's thread, before publish() returns
+    QT = "qt"          # On the Qt main thread, through a queued signal
+    WORKER = "worker"  # On the bus's shared worker threads
+
+
+class Overflow:
+    """What a QT/WORKER subscriber's queue does when the subscriber falls behind."""
+    KEEP_LATEST = "keep_latest"  # A new event replaces the queued one with the same coalesce key
+    DROP_OLDEST = "drop_oldest"  # The oldest queued event makes room
+    BLOCK = "block"              # The publisher waits for room (up to block_timeout, then drops)
+    SAMPLE = "sample"            # Only every Nth event is queued; when full, the oldest makes room
+
+
+class TopicPolicy:
+    """Overflow handling for one topic; applies to each queued subscriber separately."""
+
+    def __init__(self, overflow=Overflow.DROP_OLDEST, maxsize=1024, key=None, every=1, block_timeout=1.0):
+        self.overflow = overflow
+        self.maxsize = maxsize  # Queued calls per subscriber (distinct keys for KEEP_LATEST)
+        self.key = key  # KEEP_LATEST: callable(*args, **kwargs) -> coalesce key; None keeps one event
+        self.every = every  # SAMPLE: queue every Nth event
+        self.block_timeout = block_timeout  # BLOCK: seconds a publisher waits before dropping
+
+    def __repr__(self):
+        return f"TopicPolicy({self.overflow}, maxsize={self.maxsize})"
+
+
+# Overflow policy of each topic for QT and WORKER subscribers; inline handlers are never queued.
+# Telemetry is coalesced per message type, a STATUSTEXT flood only keeps the newest messages
+# and commands and connection changes are never dropped silently. Topics published from the
+# telemetry receive thread must never BLOCK, so a slow subscriber cannot stall the receive loop.
+TOPIC_POLICIES = {
+    Events.TELEMETRY_UPDATE: TopicPolicy(Overflow.KEEP_LATEST, maxsize=256, key=lambda data: data.get("type")),
+    Events.STATUS_TEXT_RECEIVED: TopicPolicy(Overflow.DROP_OLDEST, maxsize=256),
+    Events.CONNECTION_REQUEST: TopicPolicy(Overflow.BLOCK, maxsize=64),
+    Events.DISCONNECT_REQUEST: TopicPolicy(Overflow.BLOCK, maxsize=64),
+    Events.CONNECTION_STATUS_CHANGED: TopicPolicy(Overflow.BLOCK, maxsize=64),
+    Events.ARM_REQUEST: TopicPolicy(Overflow.BLOCK, maxsize=64),
+    Events.DISARM_REQUEST: TopicPolicy(Overflow.BLOCK, maxsize=64),
+    # Hierarchical topics inherit the policy of their nearest declared parent level
+    Events.TELEMETRY: TopicPolicy(Overflow.KEEP_LATEST, maxsize=256),  # One pending message per topic
+    # Published from the receive thread; one pending result per vehicle and command
+    Events.COMMAND_ACK: TopicPolicy(Overflow.KEEP_LATEST, maxsize=256),
+}
+DEFAULT_POLICY = TopicPolicy(Overflow.DROP_OLDEST, maxsize=1024)
+
+_COUNTERS = ("queued", "delivered", "dropped", "coalesced", "sampled_out", "blocked")
+
+
+def _is_pattern(topic):
+    """True for subscriptions with '*' or '#' levels; raises ValueError for malformed ones."""
+    if "*" not in topic and "#" not in topic:
+        return False
+    levels = topic.split(".")
+    for i, level in enumerate(levels):
+        if ("*" in level or "#" in level) and level not in ("*", "#"):
+            raise ValueError(f"Wildcard must be a whole topic level: {topic!r}")
+        if level == "#" and i != len(levels) - 1:
+            raise ValueError(f"'#' must be the last topic level: {topic!r}")
+    return True
+
+
+class _TopicIndex:
+    """
+    Trie of wildcard subscriptions, one node per topic level. Built once
+    per change of the wildcard subscriptions and never modified afterwards.
+    """
+    __slots__ = ("children", "patterns")
 
-class EventBus:
     def __init__(self):
-        # Using defaultdict simplifies subscription handling
-        # Key: event_type (str), Value: list of handler functions
-        self._subscribers = collections.defaultdict(list)
-        # Lock for protecting access to the _subscribers dictionary
+        self.children = {}  # Level (or '*'/'#') -> _TopicIndex
+        self.patterns = ()  # (order, pattern) of the subscriptions ending here
+
+    @classmethod
+    def build(cls, patterns):
+        root = cls()
+        for order, pattern in enumerate(patterns):
+            node = root
+            for level in pattern.split("."):
+                node = node.children.setdefault(level, cls())
+            node.patterns += ((order, pattern),)
+        return root
+
+    def match(self, topic):
+        """Wildcard subscriptions matching a topic, in subscription order."""
+        found = []
+        nodes = (self,)
+        for level in topic.split("."):
+            next_nodes = []
+            for node in nodes:
+                children = node.children
+                if "#" in children:
+                    found.extend(children["#"].patterns)
+                for key in (level, "*"):
+                    child = children.get(key)
+                    if child is not None:
+                        next_nodes.append(child)
+            if not next_nodes:
+                break
+            nodes = next_nodes
+        else:
+            for node in nodes:
+                found.extend(node.patterns)
+                if "#" in node.children:  # 'a.#' also matches 'a'
+                    found.extend(node.children["#"].patterns)
+        return [pattern for _, pattern in sorted(found)]
+
+
+def _handler_name(handler):
+    return getattr(handler, "__name__", getattr(handler, "name", repr(handler)))
+
+
+def _call(handler, handler_name, event_type, args, kwargs, kind="non-UI"):
+    try:
+        handler(*args, **kwargs)
+    except Exception as e:
+        logging.error(f"Error executing {kind} handler {handler_name} for event '{event_type}': {e}", exc_info=True)
+
+
+class _Mailbox:
+    """
+    Bounded queue of one QT/WORKER subscriber's pending calls. put() applies
+    the topic's overflow policy and never blocks, except under BLOCK. A
+    mailbox is handed to its dispatcher when it becomes non-empty and is
+    drained by one thread at a time, so a subscriber sees events in order.
+    """
+
+    def __init__(self, handler, handler_name, event_type, policy, dispatcher):
+        self.handler = handler
+        self.handler_name = handler_name
+        self.event_type = event_type
+        self.policy = policy
+        self.dispatcher = dispatcher
+        self._coalesce = policy.overflow == Overflow.KEEP_LATEST
+        self._items = collections.OrderedDict() if self._coalesce else collections.deque()
+        self._cond = threading.Condition(threading.Lock())
+        self._scheduled = False  # Handed to the dispatcher and not yet drained empty
+        self._seen = 0  # SAMPLE: events offered so far
+        self.counts = dict.fromkeys(_COUNTERS, 0)
+
+    def put(self, event_type, args, kwargs):
+        policy, counts = self.policy, self.counts
+        with self._cond:
+            if policy.overflow == Overflow.SAMPLE:
+                self._seen += 1
+                if (self._seen - 1) % policy.every:
+                    counts["sampled_out"] += 1
+                    return
+            if self._coalesce:
+                # Per published topic, as a wildcard subscription receives several
+                key = (event_type, policy.key(*args, **kwargs) if policy.key else None)
+                if key in self._items:
+                    self._items[key] = (event_type, args, kwargs)  # Keeps its place in the queue
+                    counts["coalesced"] += 1
+                    return
+                if len(self._items) >= policy.maxsize:
+                    self._items.popitem(last=False)
+                    counts["dropped"] += 1
+                self._items[key] = (event_type, args, kwargs)
+            else:
+                if len(self._items) >= policy.maxsize and policy.overflow == Overflow.BLOCK:
+                    counts["blocked"] += 1
+                    deadline = time.monotonic() + policy.block_timeout
+                    while len(self._items) >= policy.maxsize:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0 or not self._cond.wait(remaining):
+                            break
+                if len(self._items) >= policy.maxsize:
+                    if counts["dropped"] == 0:
+                        logging.warning(f"EventBus queue of {self.handler_name} for '{self.event_type}' full "
+                                        f"({policy.overflow}); dropping events")
+                    self._items.popleft()
+                    counts["dropped"] += 1
+                self._items.append((event_type, args, kwargs))
+            counts["queued"] += 1
+            if self._scheduled:
+                return
+            self._scheduled = True
+        self.dispatcher.schedule(self)
+
+    def run(self, limit):
+        """Calls the handler for up to `limit` queued events; returns True if more are left."""
+        with self._cond:
+            batch = []
+            while self._items and len(batch) < limit:
+                batch.append(self._items.popitem(last=False)[1] if self._coalesce else self._items.popleft())
+            self._cond.notify_all()  # Room for BLOCKed publishers
+        for event_type, args, kwargs in batch:
+            _call(self.handler, self.handler_name, event_type, args, kwargs, kind=self.dispatcher.kind)
+        with self._cond:
+            self.counts["delivered"] += len(batch)
+            if self._items:
+                return True
+            self._scheduled = False
+            return False
+
+    def pending(self):
+        return len(self._items)
+
+
+class _Dispatcher:
+    """Runs ready mailboxes of one execution context, a batch per mailbox in turn."""
+    kind = "non-UI"
+    BATCH = 32  # Calls per mailbox before the next ready mailbox gets a turn
+
+    def __init__(self, name):
+        self.name = name
+        self._ready = queue.SimpleQueue()  # Holds each mailbox at most once
+
+    def schedule(self, mailbox):
+        self._ready.put(mailbox)
+        self._wake()
+
+    def _wake(self):
+        pass
+
+    def drain(self, limit=None):
+        """Runs ready mailboxes in the current thread until idle (or `limit` calls); returns calls run."""
+        done = 0
+        while limit is None or done < limit:
+            try:
+                mailbox = self._ready.get_nowait()
+            except queue.Empty:
+                break
+            before = mailbox.counts["delivered"]
+            if mailbox.run(self.BATCH):
+                self._ready.put(mailbox)
+            done += mailbox.counts["delivered"] - before
+        return done
+
+
+class _WorkerDispatcher(_Dispatcher):
+    """Runs mailboxes on a small pool of daemon threads, started on first use."""
+
+    def __init__(self, threads):
+        super().__init__("worker")
+        self._threads = []
+        self._thread_count = threads
+        self._start_lock = threading.Lock()  # Also guards _busy
+        self._busy = 0  # Workers running a mailbox
+
+    def _wake(self):
+        if not self._threads:
+            with self._start_lock:
+                if not self._threads:
+                    for i in range(self._thread_count):
+                        thread = threading.Thread(target=self._run, name=f"EventBusWorker-{i}", daemon=True)
+                        thread.start()
+                        self._threads.append(thread)
+
+    def _run(self):
+        while True:
+            mailbox = self._ready.get()
+            if mailbox is None:
+                break
+            with self._start_lock:
+                self._busy += 1
+            if mailbox.run(self.BATCH):
+                self._ready.put(mailbox)  # Behind the other ready mailboxes
+            with self._start_lock:
+                self._busy -= 1
+
+    def shutdown(self, timeout=None):
+        """Lets the workers finish what is queued, then stops them."""
+        threads, self._threads = self._threads, []
+        if not threads:
+            return
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not self._ready.empty() or self._busy:
+            if deadline is not None and time.monotonic() >= deadline:
+                break
+            time.sleep(0.005)
+        for _ in threads:
+            self._ready.put(None)
+        for thread in threads:
+            thread.join(None if deadline is None else max(0.0, deadline - time.monotonic()))
+
+
+class _QtDispatcher(_Dispatcher):
+    """
+    Runs mailboxes on the Qt main thread: a queued signal wakes the main
+    thread, which runs up to DRAIN_BATCH calls per event-loop turn.
+    """
+    kind = "UI"
+    DRAIN_BATCH = 256
+
+    def __init__(self):
+        super().__init__("qt")
+        self._invoker = None
+        self._scheduled = False
+        self._no_app_warned = False
+
+    def _make_invoker(self):
+        from PySide6.QtCore import QObject, Signal, Qt, QCoreApplication  # Only needed once a QT handler exists
+
+        app = QCoreApplication.instance()
+        if app is None:
+            return None
+
+        class Invoker(QObject):
+            wake = Signal()
+
+            def __init__(self, drain):
+                super().__init__()
+                self._drain = drain
+
+            def drain(self):
+                self._drain()
+
+        invoker = Invoker(self._drain_batch)
+        if invoker.thread() is not app.thread():
+            invoker.moveToThread(app.thread())
+        invoker.wake.connect(invoker.drain, Qt.QueuedConnection)
+        return invoker
+
+    def _wake(self):
+        if self._scheduled:
+            return
+        if self._invoker is None:
+            self._invoker = self._make_invoker()
+            if self._invoker is None:
+                if not self._no_app_warned:
+                    logging.warning("No Qt application; UI handlers are called in the publishing thread.")
+                    self._no_app_warned = True
+                self.drain()
+                return
+        self._scheduled = True
+        self._invoker.wake.emit()
+
+    def _drain_batch(self):
+        self._scheduled = False
+        self.drain(self.DRAIN_BATCH)
+        if not self._ready.empty():
+            self._wake()
+
+
+class EventBus:
+    """
+    Publish/subscribe between subsystems. Each subscriber picks a Context:
+    INLINE handlers run in the publisher's thread, QT handlers on the Qt
+    main thread and WORKER handlers on a shared pool of worker threads.
+
+    Every QT and WORKER subscriber has its own bounded queue that follows
+    its topic's TopicPolicy (TOPIC_POLICIES, or set_policy()), so a slow
+    subscriber never holds up the publisher and a flood on one topic does
+    not delay the others. metrics() reports what the policies dropped,
+    coalesced or sampled out.
+
+    Topics are dotted hierarchies ("telemetry.3.ATTITUDE"). A subscription
+    may use '*' for exactly one level and a trailing '#' for any number of
+    levels ("telemetry.*.ATTITUDE", "telemetry.3.#"). Wildcards are matched
+    through a trie the first time a topic is published; the resulting
+    handlers are cached per topic, so publishing costs one dict lookup
+    however many subscriptions and vehicles there are.
+    """
+    WORKER_THREADS = 2
+    CACHE_SIZE = 4096  # Published topics whose resolved handlers are kept
+
+    def __init__(self, worker_threads=WORKER_THREADS, policies=None, default_policy=DEFAULT_POLICY):
+        # Key: event_type (str), Value: tuple of handler functions.
+        # Tuples are never modified: subscribe/unsubscribe build a new one
+        # under the lock and swap it in, so publishers read without locking.
+        # Keys are topics or wildcard patterns.
+        self._subscribers = {}
+        # Key: event_type, Value: tuple of (handler, name, mailbox or None for inline),
+        # rebuilt with _subscribers so publish does no per-handler lookups
+        self._entries = {}
+        # Trie of the wildcard patterns in _subscribers (None if there are none)
+        self._index = None
+        # Key: published topic, Value: entries of every subscription matching it.
+        # Filled by publish on first use of a topic and replaced by an empty
+        # dict whenever subscriptions change.
+        self._dispatch = {}
+        # Key: event_type, Value: {handler: mailbox or None}
+        self._mailboxes = {}
+        # Key: event_type, Value: counters of mailboxes that were unsubscribed
+        self._retired = {}
+        self._policies = dict(TOPIC_POLICIES if policies is None else policies)
+        self._default_policy = default_policy
+        # Serializes subscribe/unsubscribe; publish never takes it
         self._lock = threading.Lock()
+        self._dispatchers = {
+            Context.INLINE: None,
+            Context.QT: _QtDispatcher(),
+            Context.WORKER: _WorkerDispatcher(worker_threads),
+        }
         logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
         logging.info("EventBus initialized.")
 
-        # --- Placeholder for UI thread safety ---
-        # We'll need a reference to the Tkinter app or a way to schedule calls
-        # on the main thread later. For now, handlers will be called directly.
-        self._ui_queue = None # To be set later, maybe queue.Queue()
-        self._tk_app_ref = None # To be set later
+    def policy(self, event_type):
+        """The policy of a topic or pattern, else of its nearest parent level that has one."""
+        policies = self._policies
+        while event_type not in policies:
+            event_type, dot, _ = event_type.rpartition(".")
+            if not dot:
+                return self._default_policy
+        return policies[event_type]
+
+    def set_policy(self, event_type, policy):
+        """Declares the overflow policy of a topic and the levels below it; applies to later subscriptions."""
+        self._policies[event_type] = policy
+
+    def _set_handlers(self, event_type, handlers, mailboxes):
+        """Swaps in a new handler tuple for an event (caller holds the lock)."""
+        if handlers:
+            self._subscribers[event_type] = handlers
+            self._mailboxes[event_type] = mailboxes
+            self._entries[event_type] = tuple((h, _handler_name(h), mailboxes[h]) for h in handlers)
+        else:
+            self._subscribers.pop(event_type, None)
+            self._mailboxes.pop(event_type, None)
+            self._entries.pop(event_type, None)
+        if _is_pattern(event_type):
+            patterns = [topic for topic in self._subscribers if _is_pattern(topic)]
+            self._index = _TopicIndex.build(patterns) if patterns else None
+        self._dispatch = {}  # Publishers still holding the old cache only fill that one
+
+    def _resolve(self, event_type):
+        """Entries of the subscriptions matching a published topic: exact ones first, then wildcards."""
+        if _is_pattern(event_type):
+            raise ValueError(f"Cannot publish to a wildcard topic: {event_type!r}")
+        entries = self._entries.get(event_type, ())
+        index = self._index
+        if index is None:
+            return entries
+        seen = {entry[0] for entry in entries}
+        entries = list(entries)
+        for pattern in index.match(event_type):
+            for entry in self._entries.get(pattern, ()):
+                if entry[0] not in seen:  # A handler matching several subscriptions is called once
+                    seen.add(entry[0])
+                    entries.append(entry)
+        return tuple(entries)
 
-    def subscribe(self, event_type: str, handler):
-        """Subscribes a handler function to a specific event type."""
+    def subscribe(self, event_type: str, handler, context=Context.INLINE):
+        """
+        Subscribes a handler function to a specific event type, or to every
+        topic matching a wildcard pattern, to be run in `context`.
+        """
         if not callable(handler):
              logging.error(f"Attempted to subscribe non-callable handler to '{event_type}'")
              raise TypeError(f"Handler {handler} is not callable")
-        
-        handler_name = getattr(handler, "__name__", getattr(handler, "name", repr(handler)))
+        if context not in self._dispatchers:
+            raise ValueError(f"Unknown execution context {context!r}")
+        _is_pattern(event_type)  # Rejects malformed wildcards
+
         with self._lock:
-            handlers = self._subscribers[event_type]
+            handlers = self._subscribers.get(event_type, ())
             if handler not in handlers:
-                handlers.append(handler)
-                logging.debug(f"Handler {handler_name} subscribed to '{event_type}'")
+                mailboxes = dict(self._mailboxes.get(event_type, {}))
+                dispatcher = self._dispatchers[context]
+                mailboxes[handler] = (None if dispatcher is None else
+                                      _Mailbox(handler, _handler_name(handler), event_type,
+                                               self.policy(event_type), dispatcher))
+                self._set_handlers(event_type, handlers + (handler,), mailboxes)
+                logging.debug(f"Handler {_handler_name(handler)} subscribed to '{event_type}' ({context})")
             else:
-                 logging.warning(f"Handler {handler_name} already subscribed to '{event_type}'")
+                 logging.warning(f"Handler {_handler_name(handler)} already subscribed to '{event_type}'")
 
     def unsubscribe(self, event_type: str, handler):
-        """Unsubscribes a handler function from a specific event type."""
-        handler_name = getattr(handler, "__name__", getattr(handler, "name", repr(handler)))
-
+        """
+        Unsubscribes a handler function from a specific event type. Calls
+        already queued for it still run.
+        """
         with self._lock:
-            handlers = self._subscribers[event_type]
+            handlers = self._subscribers.get(event_type, ())
             if handler in handlers:
-                handlers.remove(handler)
-                logging.debug(f"Handler {handler_name} unsubscribed from '{event_type}'")
-                # Clean up empty event type keys if desired (optional)
-                if not handlers:
-                    del self._subscribers[event_type]
+                mailboxes = dict(self._mailboxes[event_type])
+                mailbox = mailboxes.pop(handler)
+                if mailbox is not None:
+                    retired = self._retired.setdefault(event_type, dict.fromkeys(_COUNTERS, 0))
+                    for name, value in mailbox.counts.items():
+                        retired[name] += value
+                self._set_handlers(event_type, tuple(h for h in handlers if h != handler), mailboxes)
+                logging.debug(f"Handler {_handler_name(handler)} unsubscribed from '{event_type}'")
             else:
-                 logging.warning(f"Attempted to unsubscribe handler {handler_name} not found for '{event_type}'")
+                 logging.warning(f"Attempted to unsubscribe handler {_handler_name(handler)} not found for '{event_type}'")
 
     def publish(self, event_type: str, *args, **kwargs):
         """
-        Publishes an event, calling all subscribed handlers.
-        NOTE: Currently calls handlers directly in the publisher's thread.
-              UI thread safety needs to be added.
-        """
-        logging.debug(f"Publishing event '{event_type}' with args={args}, kwargs={kwargs}")
-        # Make a copy of the handlers list to iterate over,
-        # in case a handler tries to unsubscribe itself during iteration.
-        
-        with self._lock:
-            # Use .get() to avoid creating an empty list if no subscribers exist
-            handlers = list(self._subscribers.get(event_type, []))
+        Publishes an event: INLINE handlers are called right away, QT and
+        WORKER handlers get it queued according to the topic's policy. QT
+        handlers are called directly when publishing from the main thread
+        (like Qt's AutoConnection).
 
-        if not handlers:
-            logging.debug(f"No subscribers for event '{event_type}'")
+        Reads the current handler tuple without locking; a handler that
+        (un)subscribes while running affects the next publish, not this one.
+        """
+        cache = self._dispatch
+        entries = cache.get(event_type)
+        if entries is None:
+            entries = self._resolve(event_type)
+            if len(cache) >= self.CACHE_SIZE:
+                cache.clear()
+            cache[event_type] = entries
+        debug = logging.root.isEnabledFor(logging.DEBUG)  # Keeps f-strings off the hot path
+        if debug:
+            logging.debug(f"Publishing event '{event_type}' with args={args}, kwargs={kwargs}")
+        if not entries:
+            if debug:
+                logging.debug(f"No subscribers for event '{event_type}'")
             return
-        
-        for handler in handlers:
-            handler_name = getattr(handler, "__name__", getattr(handler, "name", repr(handler)))
+
+        on_main_thread = None
+        for handler, handler_name, mailbox in entries:
+            if mailbox is not None:
+                if mailbox.dispatcher.kind == "UI":
+                    if on_main_thread is None:
+                        on_main_thread = threading.current_thread() is threading.main_thread()
+                    if on_main_thread:
+                        _call(handler, handler_name, event_type, args, kwargs, kind="UI")
+                        continue
+                mailbox.put(event_type, args, kwargs)
+                continue
             try:
-                # --- Direct call (Needs modification for UI thread safety) ---
-                # TODO: Add mechanism to check if handler needs UI thread execution
-                # if is_ui_handler(handler):
-                #    self.schedule_on_ui_thread(handler, args, kwargs)
-                # else:
-                handler(*args, **kwargs) # Direct call for now
-                # --------------------------------------------------------------
-                logging.debug(f"Called handler {handler_name} for '{event_type}'")
+                handler(*args, **kwargs)
             except Exception as e:
-                logging.error(f"Error executing handler {handler_name} for event '{event_type}': {e}", exc_info=True) # Log traceback
-
-
-    # --- Methods for UI Thread Safety (To be implemented later) ---
-
-    def set_tk_app(self, tk_app):
-        """Stores a reference to the main Tkinter application instance."""
-        logging.info("Tkinter app reference set for EventBus UI scheduling.")
-        self._tk_app_ref = tk_app
-
-    def schedule_on_ui_thread(self, handler, args, kwargs):
-        """Schedules a handler to be called on the Tkinter UI thread."""
-        handler_name = getattr(handler, "__name__", getattr(handler, "name", repr(handler)))
-        if self._tk_app_ref:
-            # Use Tkinter's 'after' mechanism to run the handler in the main loop
-            # The lambda captures the current args/kwargs for the scheduled call
-            self._tk_app_ref.after(0, lambda h=handler, a=args, k=kwargs: self._safe_ui_call(h, a, k))
-        else:
-            logging.warning("Tkinter app reference not set. Calling directly.")
-            # Fallback to direct call if Tk reference isn't set (undesirable for UI)
-            self._safe_ui_call(handler, args, kwargs)
+                logging.error(f"Error executing non-UI handler {handler_name} for event '{event_type}': {e}",
+                              exc_info=True)
+                continue
+            if debug:
+                logging.debug(f"Called handler {handler_name} for '{event_type}'")
 
-    def _safe_ui_call(self, handler, args, kwargs):
-         """Wrapper to safely call a handler and log errors."""
-         handler_name = getattr(handler, "__name__", getattr(handler, "name", repr(handler)))
-         try:
-             handler(*args, **kwargs)
-         except Exception as e:
-              logging.error(f"Error executing UI handler {handler_name}: {e}", exc_info=True)
+    # Kept for callers of the Tkinter-era API: publish() now marshals UI handlers itself
+    publish_safe = publish
 
+    def drain(self, context=Context.QT):
+        """Runs the calls queued for a context in the current thread (e.g. in tests or at shutdown)."""
+        return self._dispatchers[context].drain()
 
-    def publish_safe(self, event_type: str, *args, **kwargs):
+    def metrics(self):
         """
-        Publishes an event, calling handlers. Checks if handler needs UI thread.
-        Assumes handlers that need UI thread are methods of the Tkinter app instance.
+        Per subscription (topic or pattern) with queued subscribers: events queued, delivered, dropped,
+        coalesced (KEEP_LATEST), sampled_out (SAMPLE) and blocked (publisher
+        had to wait under BLOCK), plus calls still pending.
         """
-        logging.debug(f"Publishing event '{event_type}' with args={args}, kwargs={kwargs}")
-        with self._lock:
-            handlers = list(self._subscribers.get(event_type, []))
+        result = {topic: dict(counts, pending=0) for topic, counts in self._retired.items()}
+        for topic, mailboxes in list(self._mailboxes.items()):
+            for mailbox in mailboxes.values():
+                if mailbox is None:
+                    continue
+                totals = result.setdefault(topic, dict.fromkeys(_COUNTERS + ("pending",), 0))
+                for name, value in mailbox.counts.items():
+                    totals[name] += value
+                totals["pending"] += mailbox.pending()
+        return result
 
-        if not handlers:
-            logging.debug(f"No subscribers for event '{event_type}'")
-            return
-
-        for handler in handlers:
-            # --- Check if handler seems to be a UI method ---
-            # Simple check: Is the handler a method bound to our stored Tk app instance?
-            is_ui_handler = False
-            # Use the check we confirmed works for real bound methods
-            if self._tk_app_ref and hasattr(handler, '__self__') and getattr(handler, '__self__', None) == self._tk_app_ref:
-                 is_ui_handler = True
-            # REMOVED the elif block for isinstance(handler, Mock)
-
-            if is_ui_handler:
-                 # Schedule UI handlers
-                 self.schedule_on_ui_thread(handler, args, kwargs)
-                 logging.debug(f"Scheduled UI handler {getattr(handler, '__name__', 'unknown')} for '{event_type}'")
-            else:
-                # Call non-UI handlers directly
-                try:
-                    handler(*args, **kwargs)
-                    logging.debug(f"Called non-UI handler {getattr(handler, '__name__', 'unknown')} for '{event_type}'")
-                except Exception as e:
-                    logging.error(f"Error executing non-UI handler {getattr(handler, '__name__', 'unknown')} for event '{event_type}': {e}", exc_info=True)
+    def shutdown(self, timeout=None):
+        """Stops the worker threads once they have run everything already queued."""
+        self._dispatchers[Context.WORKER].shutdown(timeout)
 
 
 # --- Global EventBus Instance ---
@@ -0,0 +1,56 @@
+# utils/footprint.py
+
+import os
+import sys
+import time
+import logging
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def peak_rss_bytes(who=None):
+    """Peak resident set size of this process (or of its waited-for children with who=RUSAGE_CHILDREN)."""
+    if resource is None:
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF if who is None else who).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024  # Bytes on macOS, KiB elsewhere
+
+
+def rss_bytes():
+    """Current resident set size; the peak where /proc is not available."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return peak_rss_bytes()
+
+
+class Footprint:
+    """
+    Samples the memory and CPU use of this process. Each sample() reports
+    the CPU time used since the previous one as a percentage of one core.
+    """
+
+    def __init__(self):
+        self._wall = time.monotonic()
+        self._cpu = time.process_time()
+
+    def sample(self):
+        wall, cpu = time.monotonic(), time.process_time()
+        elapsed = wall - self._wall
+        cpu_percent = 100.0 * (cpu - self._cpu) / elapsed if elapsed > 0 else 0.0
+        self._wall, self._cpu = wall, cpu
+        return {
+            'rss_mb': rss_bytes() / 2**20,
+            'peak_rss_mb': peak_rss_bytes() / 2**20,
+            'cpu_percent': cpu_percent,
+        }
+
+    def log(self):
+        stats = self.sample()
+        logging.info(f"Footprint: RSS {stats['rss_mb']:.1f} MB (peak {stats['peak_rss_mb']:.1f} MB), "
+                     f"CPU {stats['cpu_percent']:.1f}%")
+        return stats
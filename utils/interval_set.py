@@ -0,0 +1,65 @@
+# utils/interval_set.py
+
+from bisect import bisect_left, bisect_right
+
+
+class IntervalSet:
+    """
+    Set of non-overlapping half-open integer ranges [start, end), kept
+    sorted and merged. Used to track which byte ranges of a transfer have
+    arrived so that only the holes are requested again.
+    """
+
+    def __init__(self):
+        self._starts = []
+        self._ends = []
+
+    def __len__(self):
+        """Number of disjoint ranges."""
+        return len(self._starts)
+
+    def __iter__(self):
+        return iter(zip(self._starts, self._ends))
+
+    def __repr__(self):
+        return f"IntervalSet({list(self)})"
+
+    def add(self, start, end):
+        """Adds [start, end), merging with overlapping or adjacent ranges."""
+        if end <= start:
+            return
+        # First range whose end reaches start, last range whose start is within end
+        lo = bisect_left(self._ends, start)
+        hi = bisect_right(self._starts, end)
+        if lo < hi:
+            start = min(start, self._starts[lo])
+            end = max(end, self._ends[hi - 1])
+        self._starts[lo:hi] = [start]
+        self._ends[lo:hi] = [end]
+
+    def contains(self, start, end):
+        """True if all of [start, end) is covered."""
+        i = bisect_right(self._starts, start) - 1
+        return i >= 0 and self._ends[i] >= end
+
+    def covered(self):
+        """Total length covered by all ranges."""
+        return sum(e - s for s, e in zip(self._starts, self._ends))
+
+    def end(self):
+        """End of the highest range, or 0 when empty."""
+        return self._ends[-1] if self._ends else 0
+
+    def gaps(self, start, end):
+        """Returns the uncovered ranges within [start, end) as a list of (start, end)."""
+        holes = []
+        cursor = start
+        i = bisect_right(self._ends, start)  # First range ending after start
+        while i < len(self._starts) and self._starts[i] < end:
+            if self._starts[i] > cursor:
+                holes.append((cursor, self._starts[i]))
+            cursor = max(cursor, self._ends[i])
+            i += 1
+        if cursor < end:
+            holes.append((cursor, end))
+        return holes
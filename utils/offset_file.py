@@ -0,0 +1,41 @@
+# utils/offset_file.py
+
+import os
+
+
+class OffsetFile:
+    """
+    Output file for out-of-order transfers: preallocated to the expected
+    size and written chunk by chunk at absolute offsets, so received data
+    goes straight to disk instead of being buffered in memory.
+    """
+
+    def __init__(self, path, size=None):
+        self.path = path
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT | os.O_TRUNC | getattr(os, "O_BINARY", 0), 0o644)
+        if size:
+            self.resize(size)
+
+    def resize(self, size):
+        """Sets the file length (sparse where the filesystem supports it)."""
+        os.ftruncate(self._fd, size)
+
+    def write_at(self, offset, data):
+        if hasattr(os, "pwrite"):
+            written = os.pwrite(self._fd, data, offset)
+        else:  # Windows
+            os.lseek(self._fd, offset, os.SEEK_SET)
+            written = os.write(self._fd, data)
+        if written != len(data):
+            raise OSError(f"Short write at offset {offset} in {self.path}")
+
+    def close(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,147 @@
+# utils/series_buffer.py
+
+import numpy as np
+
+BLOCK = 64  # Samples per min/max summary block
+BLOCK_THRESHOLD = 4  # Decimate from block summaries once a column covers this many blocks
+
+
+class SeriesBuffer:
+    """
+    History of one telemetry field: the latest `capacity` (time, value)
+    samples plus the min and max of every BLOCK samples, so that views of
+    millions of samples are decimated from the summaries.
+
+    Samples are kept in arrays twice the capacity. When the write position
+    reaches the end, the newest samples are moved back to the front, so the
+    history is always one contiguous, time-ordered slice (no wrap-around
+    for readers, amortized O(1) per sample). Positions stay aligned to
+    blocks across moves.
+    """
+
+    def __init__(self, capacity=1 << 20):
+        self.capacity = -(-capacity // BLOCK) * BLOCK
+        size = 2 * self.capacity
+        self._times = np.empty(size)
+        self._values = np.empty(size)
+        self._min = np.full(size // BLOCK, np.nan)
+        self._max = np.full(size // BLOCK, np.nan)
+        self._start = 0  # Oldest sample kept
+        self._end = 0  # Next write position
+
+    def __len__(self):
+        return self._end - self._start
+
+    @property
+    def times(self):
+        return self._times[self._start:self._end]
+
+    @property
+    def values(self):
+        return self._values[self._start:self._end]
+
+    def last(self):
+        """The newest (time, value), or None."""
+        if self._end == self._start:
+            return None
+        return self._times[self._end - 1], self._values[self._end - 1]
+
+    def append(self, t, value):
+        if value != value:  # NaN: leave a gap rather than poison the summaries
+            return
+        if self._end == len(self._times):
+            self._compact(1)
+        end = self._end
+        if end > self._start and t < self._times[end - 1]:
+            t = self._times[end - 1]  # Keep times sorted if the clock steps back
+        self._times[end] = t
+        self._values[end] = value
+        block = end // BLOCK
+        if end % BLOCK == 0:
+            self._min[block] = self._max[block] = value
+        elif value < self._min[block]:
+            self._min[block] = value
+        elif value > self._max[block]:
+            self._max[block] = value
+        self._end = end + 1
+        if self._end - self._start > self.capacity:
+            self._start += 1
+
+    def extend(self, times, values):
+        """Appends many samples at once (times must be sorted)."""
+        times = np.asarray(times, dtype=float)
+        values = np.asarray(values, dtype=float)
+        keep = ~np.isnan(values)
+        if not keep.all():
+            times, values = times[keep], values[keep]
+        if len(times) > self.capacity:
+            times, values = times[-self.capacity:], values[-self.capacity:]
+        if not len(times):
+            return
+        if self._end + len(times) > len(self._times):
+            self._compact(len(times))
+        end = self._end
+        if end > self._start:
+            times = np.maximum(times, self._times[end - 1])
+        self._times[end:end + len(times)] = times
+        self._values[end:end + len(times)] = values
+        self._end = end + len(times)
+        self._start = max(self._start, self._end - self.capacity)
+        self._summarize(end // BLOCK, -(-self._end // BLOCK))
+
+    def _summarize(self, first, last):
+        """Recomputes the summaries of blocks [first, last)."""
+        lo, hi = first * BLOCK, min(last * BLOCK, self._end)
+        starts = np.arange(lo, hi, BLOCK) - lo
+        self._min[first:last] = np.minimum.reduceat(self._values[lo:hi], starts)
+        self._max[first:last] = np.maximum.reduceat(self._values[lo:hi], starts)
+
+    def _compact(self, incoming):
+        """Moves the samples that stay to the front to make room for `incoming` more."""
+        keep_from = max(self._start, self._end + incoming - self.capacity)
+        shift = keep_from // BLOCK * BLOCK
+        count = self._end - shift
+        self._times[:count] = self._times[shift:self._end]
+        self._values[:count] = self._values[shift:self._end]
+        blocks = -(-self._end // BLOCK) - shift // BLOCK
+        self._min[:blocks] = self._min[shift // BLOCK:shift // BLOCK + blocks]
+        self._max[:blocks] = self._max[shift // BLOCK:shift // BLOCK + blocks]
+        self._start = max(self._start, keep_from) - shift
+        self._end = count
+
+    def window(self, t0, t1, columns):
+        """
+        Points to draw the samples between t0 and t1 across `columns`
+        pixel columns, as (times, values) arrays. Sparse data comes back
+        as is; denser data as the min and max of each column, placed at
+        the column's centre, so the cost depends on `columns` rather than
+        on the number of samples. The samples just outside the window are
+        included so lines run to the edges.
+        """
+        times = self._times
+        start, end = self._start, self._end
+        i0 = max(start, int(np.searchsorted(times[start:end], t0)) + start - 1)
+        i1 = min(end, int(np.searchsorted(times[start:end], t1, side='right')) + start + 1)
+        count = i1 - i0
+        if count <= 2 * columns or t1 <= t0:
+            return times[i0:i1].copy(), self._values[i0:i1].copy()
+
+        edges = t0 + (t1 - t0) * np.arange(columns + 1) / columns
+        bounds = np.empty(columns + 1, dtype=np.int64)
+        bounds[0], bounds[-1] = i0, i1
+        bounds[1:-1] = np.searchsorted(times[i0:i1], edges[1:-1]) + i0
+        if count >= BLOCK_THRESHOLD * BLOCK * columns:
+            # Snap columns to whole blocks; extremes move by less than a quarter column
+            bounds = bounds // BLOCK
+            bounds[-1] = -(-i1 // BLOCK)
+            lows, highs, base = self._min, self._max, bounds[0]
+        else:
+            lows = highs = self._values
+            base = i0
+        used = np.flatnonzero(bounds[1:] > bounds[:-1])
+        offsets = bounds[used] - base
+        span = slice(base, bounds[-1])
+        low = np.minimum.reduceat(lows[span], offsets)
+        high = np.maximum.reduceat(highs[span], offsets)
+        centres = (edges[used] + edges[used + 1]) / 2
+        return np.repeat(centres, 2), np.column_stack((low, high)).ravel()
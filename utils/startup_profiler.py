@@ -0,0 +1,57 @@
+# utils/startup_profiler.py
+
+import time
+import logging
+from contextlib import contextmanager
+
+
+class StartupProfiler:
+    """
+    Records wall-clock timings of named startup phases.
+
+    Phases are measured with time.perf_counter() relative to the moment the
+    profiler was created, so the report shows both when each phase started
+    and how long it took. A disabled profiler still runs the wrapped code
+    but records nothing.
+    """
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self._origin = time.perf_counter()
+        self.phases = []  # List of (name, start_s, duration_s)
+
+    @contextmanager
+    def phase(self, name):
+        """Context manager timing the enclosed block as phase `name`."""
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append((name, start - self._origin, time.perf_counter() - start))
+
+    def mark(self, name):
+        """Records an instantaneous milestone (zero-length phase)."""
+        if self.enabled:
+            self.phases.append((name, time.perf_counter() - self._origin, 0.0))
+
+    def elapsed(self):
+        """Seconds since the profiler was created."""
+        return time.perf_counter() - self._origin
+
+    def report(self):
+        """Returns the recorded phases as a formatted text table."""
+        lines = [f"{'Phase':<40} {'Start (ms)':>11} {'Duration (ms)':>14}"]
+        lines.append("-" * len(lines[0]))
+        for name, start, duration in self.phases:
+            lines.append(f"{name:<40} {start * 1000:>11.1f} {duration * 1000:>14.1f}")
+        lines.append("-" * len(lines[0]))
+        lines.append(f"{'Total':<40} {'':>11} {self.elapsed() * 1000:>14.1f}")
+        return "\n".join(lines)
+
+    def log_report(self):
+        """Logs the report if profiling is enabled."""
+        if self.enabled:
+            logging.info("Startup profile:\n" + self.report())
@@ -0,0 +1,80 @@
+# utils/web_mercator.py
+
+import math
+
+# Standard slippy-map tile size in pixels
+TILE_SIZE = 256
+# Web Mercator is undefined at the poles; tiles stop at this latitude
+MAX_LATITUDE = 85.0511287798
+MIN_ZOOM = 0
+MAX_ZOOM = 19
+
+
+def clamp_latitude(lat):
+    """Clamps a latitude to the range covered by Web Mercator tiles."""
+    return max(-MAX_LATITUDE, min(MAX_LATITUDE, lat))
+
+
+def latlon_to_world(lat, lon, zoom=0):
+    """
+    Projects a WGS84 position to Web Mercator world pixel coordinates.
+
+    At zoom 0 the whole world is one TILE_SIZE x TILE_SIZE tile; every zoom
+    level doubles the size. Returns (x, y) as floats, y growing southwards.
+    """
+    scale = TILE_SIZE * (1 << zoom)
+    lat_rad = math.radians(clamp_latitude(lat))
+    x = (lon + 180.0) / 360.0 * scale
+    y = (1.0 - math.log(math.tan(lat_rad) + 1.0 / math.cos(lat_rad)) / math.pi) / 2.0 * scale
+    return x, y
+
+
+def world_to_latlon(x, y, zoom=0):
+    """Inverse of latlon_to_world. Returns (lat, lon) in degrees."""
+    scale = TILE_SIZE * (1 << zoom)
+    lon = x / scale * 360.0 - 180.0
+    n = math.pi * (1.0 - 2.0 * y / scale)
+    lat = math.degrees(math.atan(math.sinh(n)))
+    return lat, lon
+
+
+def tile_for_latlon(lat, lon, zoom):
+    """Returns the (x, y) index of the tile containing a position at a zoom level."""
+    x, y = latlon_to_world(lat, lon, zoom)
+    max_index = (1 << zoom) - 1
+    return (min(max_index, max(0, int(x // TILE_SIZE))),
+            min(max_index, max(0, int(y // TILE_SIZE))))
+
+
+def visible_tiles(center_x, center_y, width, height, zoom):
+    """
+    Lists the tiles needed to cover a viewport.
+
+    Args:
+        center_x, center_y: Viewport centre in world pixels at `zoom`.
+        width, height: Viewport size in pixels.
+        zoom: Tile zoom level.
+
+    Returns:
+        List of (tile_x, tile_y) indices. tile_x is not wrapped, so callers
+        can place tiles left/right of the antimeridian; use wrap_tile_x()
+        to get the index to fetch. Rows outside the world are skipped.
+    """
+    left = center_x - width / 2.0
+    top = center_y - height / 2.0
+    first_x = int(math.floor(left / TILE_SIZE))
+    first_y = int(math.floor(top / TILE_SIZE))
+    last_x = int(math.floor((left + width) / TILE_SIZE))
+    last_y = int(math.floor((top + height) / TILE_SIZE))
+    rows = 1 << zoom
+
+    tiles = []
+    for ty in range(max(0, first_y), min(rows - 1, last_y) + 1):
+        for tx in range(first_x, last_x + 1):
+            tiles.append((tx, ty))
+    return tiles
+
+
+def wrap_tile_x(tile_x, zoom):
+    """Wraps a tile column index around the antimeridian."""
+    return tile_x % (1 << zoom)